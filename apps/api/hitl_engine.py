@@ -15,6 +15,10 @@ from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
 from pydantic import BaseModel
 
+from services.hitl_rollups import get_hitl_rollups
+from utils.dates import with_native_dates
+from utils.pagination import fetch_page
+
 # ==================== ENUMS & CONSTANTS ====================
 
 class RiskLevel(str, Enum):
@@ -54,6 +58,9 @@ RISK_THRESHOLDS = {
 
 SAMPLING_RATE = 0.10  # 10% of Level 2 go to queue
 
+# Queue listing order; keyset pages need the matching compound index
+MODERATION_QUEUE_SORT = [("created_at", -1), ("queue_id", -1)]
+
 # ==================== SCORING WEIGHTS ====================
 
 SCORING_WEIGHTS = {
@@ -288,6 +295,7 @@ class HITLEngine:
     
     def __init__(self, db):
         self.db = db
+        self.rollups = get_hitl_rollups(db)
         self.keywords_cache = None
         self.keywords_cache_time = None
         self.cache_ttl = 300  # 5 minutes
@@ -530,7 +538,7 @@ class HITLEngine:
         result: RiskAssessmentResult
     ):
         """Store risk assessment in database"""
-        await self.db.risk_assessments.insert_one({
+        assessment = {
             "assessment_id": result.assessment_id,
             "user_id": input_data.user_id,
             "result_id": input_data.result_id,
@@ -546,7 +554,9 @@ class HITLEngine:
             "requires_human_review": result.requires_human_review,
             "blocked_patterns_found": result.blocked_patterns_found,
             "created_at": datetime.now(timezone.utc).isoformat()
-        })
+        }
+        await self.db.risk_assessments.insert_one(with_native_dates(assessment, "created_at"))
+        await self.rollups.record_assessment(assessment)
     
     async def create_moderation_queue_item(
         self,
@@ -580,7 +590,8 @@ class HITLEngine:
             "final_output": None
         }
         
-        await self.db.moderation_queue.insert_one(item)
+        await self.db.moderation_queue.insert_one(with_native_dates(item, "created_at"))
+        await self.rollups.record_queue_item(item)
         
         # Track event
         await self._track_event(
@@ -632,17 +643,19 @@ class HITLEngine:
             final_output = SAFE_RESPONSE.get(item["language"], SAFE_RESPONSE["en"])
         
         # Update queue item
+        moderated_at = datetime.now(timezone.utc).isoformat()
         await self.db.moderation_queue.update_one(
             {"queue_id": queue_id},
-            {"$set": {
+            {"$set": with_native_dates({
                 "status": new_status.value,
                 "moderator_id": moderator_id,
                 "moderator_notes": decision.moderator_notes,
-                "moderated_at": datetime.now(timezone.utc).isoformat(),
+                "moderated_at": moderated_at,
                 "final_output": final_output,
                 "action_taken": decision.action.value
-            }}
+            }, "moderated_at")}
         )
+        await self.rollups.record_decision(item, new_status.value, moderated_at)
         
         # Create audit log
         await self._create_audit_log(
@@ -683,7 +696,7 @@ class HITLEngine:
         new_status: str
     ):
         """Create audit log entry"""
-        await self.db.audit_logs.insert_one({
+        log = {
             "log_id": f"log_{uuid.uuid4().hex[:12]}",
             "queue_id": queue_id,
             "action": action,
@@ -692,16 +705,22 @@ class HITLEngine:
             "original_status": original_status,
             "new_status": new_status,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        }
+        await self.write_audit_log(log)
+    
+    async def write_audit_log(self, log: Dict[str, Any]):
+        """Insert an audit log (with an ISO ``timestamp``) and count it in the HITL rollups"""
+        await self.db.audit_logs.insert_one(with_native_dates(log, "timestamp"))
+        await self.rollups.record_audit_log(log)
     
     async def _track_event(self, event_name: str, data: Dict[str, Any]):
         """Track HITL events"""
-        await self.db.hitl_events.insert_one({
+        await self.db.hitl_events.insert_one(with_native_dates({
             "event_id": f"evt_{uuid.uuid4().hex[:12]}",
             "event_name": event_name,
             "data": data,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        }, "timestamp"))
     
     async def get_moderation_queue(
         self,
@@ -709,9 +728,29 @@ class HITLEngine:
         risk_level: Optional[str] = None,
         series: Optional[str] = None,
         limit: int = 50,
-        skip: int = 0
-    ) -> List[Dict]:
-        """Get moderation queue items with filters"""
+        skip: int = 0,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get moderation queue items with filters, newest first.
+        Returns (items, next_cursor); raises InvalidCursor for a bad cursor.
+        """
+        return await fetch_page(
+            self.db.moderation_queue,
+            self.queue_query(status, risk_level, series),
+            MODERATION_QUEUE_SORT,
+            limit,
+            cursor=cursor,
+            projection={"_id": 0, "original_output": 0},  # Exclude large fields from list
+            skip=skip,
+        )
+    
+    @staticmethod
+    def queue_query(
+        status: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        series: Optional[str] = None
+    ) -> Dict[str, Any]:
         query = {}
         if status:
             query["status"] = status
@@ -719,13 +758,7 @@ class HITLEngine:
             query["risk_level"] = risk_level
         if series:
             query["series"] = series
-        
-        cursor = self.db.moderation_queue.find(
-            query,
-            {"_id": 0, "original_output": 0}  # Exclude large fields from list
-        ).sort("created_at", -1).skip(skip).limit(limit)
-        
-        return await cursor.to_list(length=limit)
+        return query
     
     async def get_queue_item_detail(self, queue_id: str) -> Optional[Dict]:
         """Get full detail of a queue item"""
@@ -743,22 +776,24 @@ class HITLEngine:
         return await cursor.to_list(length=100)
     
     async def get_hitl_stats(self) -> Dict[str, Any]:
-        """Get HITL statistics"""
+        """Get HITL statistics (all-time counts from the daily rollups)"""
+        def by(field):
+            return [
+                {"$group": {"_id": f"${field}", "count": {"$sum": "$count"}}},
+                {"$match": {"count": {"$gt": 0}}},
+            ]
+
         # Count by status
-        pipeline = [
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        status_counts = {}
-        async for doc in self.db.moderation_queue.aggregate(pipeline):
-            status_counts[doc["_id"]] = doc["count"]
+        status_counts = {
+            doc["_id"]: doc["count"]
+            for doc in await self.rollups.aggregate("queue_status", None, by("status"))
+        }
         
         # Count by risk level
-        pipeline = [
-            {"$group": {"_id": "$risk_level", "count": {"$sum": 1}}}
-        ]
-        risk_counts = {}
-        async for doc in self.db.risk_assessments.aggregate(pipeline):
-            risk_counts[doc["_id"]] = doc["count"]
+        risk_counts = {
+            doc["_id"]: doc["count"]
+            for doc in await self.rollups.aggregate("risk_level", None, by("risk_level"))
+        }
         
         # Recent events
         recent_events = await self.db.hitl_events.find(
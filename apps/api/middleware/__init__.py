@@ -1,16 +1,29 @@
 """
 Security Middleware Package
 ===========================
-Rate limiting, request size limits, and security headers.
+Auth context, rate limiting, request size limits, security headers, CORS,
+compression, request metrics and on-demand profiling. SecurityStackMiddleware fuses the security
+middlewares into a single pass; the individual ones remain available.
 """
 
+from .auth_context import AuthContextMiddleware, get_auth_context
 from .rate_limit import RateLimitMiddleware, RateLimitConfig
 from .request_size import RequestSizeLimitMiddleware
 from .security_headers import SecurityHeadersMiddleware
+from .compression import CompressionMiddleware
+from .security_stack import SecurityStackMiddleware
+from .request_metrics import RequestMetricsMiddleware
+from .profiling import ProfilingMiddleware
 
 __all__ = [
+    "AuthContextMiddleware",
+    "get_auth_context",
     "RateLimitMiddleware",
     "RateLimitConfig",
     "RequestSizeLimitMiddleware", 
     "SecurityHeadersMiddleware",
+    "CompressionMiddleware",
+    "SecurityStackMiddleware",
+    "RequestMetricsMiddleware",
+    "ProfilingMiddleware",
 ]
@@ -0,0 +1,99 @@
+"""
+Auth Context Middleware
+=======================
+Verifies the bearer JWT once per request.
+
+The result is stored in ``scope["state"]["auth"]`` (i.e. ``request.state.auth``)
+and shared by everything downstream: rate limiting keys on the real
+user_id, get_current_user skips a second decode, analytics reads the same
+claims.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from jose import ExpiredSignatureError, JWTError, jwt
+
+# Must match the secret/algorithm server.py signs tokens with
+JWT_SECRET = os.environ.get("JWT_SECRET", "default_secret_key")
+JWT_ALGORITHM = "HS256"
+
+
+class AuthContext:
+    """Outcome of verifying the request's bearer token."""
+
+    __slots__ = ("token", "claims", "error")
+
+    def __init__(self, token: Optional[str] = None, claims: Optional[Dict[str, Any]] = None,
+                 error: Optional[str] = None):
+        self.token = token
+        self.claims = claims
+        self.error = error  # None, "expired" or "invalid"
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.claims.get("user_id") if self.claims else None
+
+    @property
+    def authenticated(self) -> bool:
+        return self.claims is not None
+
+
+ANONYMOUS = AuthContext()
+
+
+def bearer_token(authorization: Optional[bytes]) -> Optional[str]:
+    """Token from a raw Authorization header value."""
+    if not authorization:
+        return None
+    # Same tolerance as the old handlers: strip a "Bearer " prefix if present
+    token = authorization.decode("latin-1").replace("Bearer ", "").strip()
+    return token or None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return bearer_token(value)
+    return None
+
+
+def decode_token(token: Optional[str]) -> AuthContext:
+    """Verify a JWT and wrap the result."""
+    if not token:
+        return ANONYMOUS
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except ExpiredSignatureError:
+        return AuthContext(token=token, error="expired")
+    except JWTError:
+        return AuthContext(token=token, error="invalid")
+    return AuthContext(token=token, claims=claims)
+
+
+def get_auth_context(scope) -> AuthContext:
+    """
+    Auth context for a request scope.
+
+    Normally populated by AuthContextMiddleware; computed (and stored) on
+    first use when the middleware is not installed, e.g. in unit tests.
+    """
+    state = scope.setdefault("state", {})
+    auth = state.get("auth")
+    if auth is None:
+        auth = decode_token(_bearer_token(scope))
+        state["auth"] = auth
+    return auth
+
+
+class AuthContextMiddleware:
+    """Pure ASGI middleware that decodes the bearer token once."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            state["auth"] = decode_token(_bearer_token(scope))
+        await self.app(scope, receive, send)
@@ -0,0 +1,206 @@
+"""
+Response Compression Middleware
+===============================
+gzip (and brotli when installed) for large text responses.
+"""
+
+import os
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+from utils.metrics import increment_counter, observe_histogram
+
+
+class _GzipEncoder:
+    """Incremental gzip encoder (zlib with a gzip header)."""
+
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        # Sync-flush streamed chunks so clients can decode them immediately
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    """Incremental brotli encoder."""
+
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = [token.strip().lower() for token in headers.get("vary", "").split(",")]
+    if "accept-encoding" not in vary and "*" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+
+def _weaken_etag(headers: MutableHeaders):
+    # The encoded bytes differ from the identity body, so a strong validator
+    # shared between them would be wrong (RFC 9110 8.8.1)
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses.
+
+    - Only allowlisted content types (JSON, text, NDJSON, CSV, ...)
+    - Bodies below the minimum size are sent as-is
+    - Responses that already carry Content-Encoding (e.g. pre-gzipped
+      static payloads) are never re-compressed
+    - StreamingResponse bodies are compressed chunk by chunk
+    - CPU time spent compressing is recorded per response
+    - Allowlisted responses always get ``Vary: Accept-Encoding``, compressed
+      or not, and compressed ones carry a weak ``ETag`` (``W/"..."``)
+    """
+
+    COMPRESSIBLE_TYPES = (
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/",
+    )
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+        self.minimum_size = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+        self.gzip_level = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+        self.brotli_quality = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 5))
+        self.brotli_enabled = brotli is not None and \
+            os.environ.get("COMPRESSION_BROTLI_ENABLED", "true").lower() == "true"
+
+    def _select_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            token, _, params = part.partition(";")
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    if float(params[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(token.strip())
+        if self.brotli_enabled and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _make_encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+
+        start_message = None
+        encoder = None
+        passthrough = False
+        bytes_in = 0
+        bytes_out = 0
+        cpu_seconds = 0.0
+
+        def finish():
+            cpu_ms = cpu_seconds * 1000
+            labels = {"encoding": encoding}
+            observe_histogram("http_compression_cpu_ms", cpu_ms, labels=labels)
+            increment_counter("http_compression_responses_total", labels=labels)
+            increment_counter("http_compression_bytes_in_total", bytes_in, labels=labels)
+            increment_counter("http_compression_bytes_out_total", bytes_out, labels=labels)
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough, bytes_in, bytes_out, cpu_seconds
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                compressible = headers.get("content-type", "").lower().startswith(self.COMPRESSIBLE_TYPES)
+                if compressible:
+                    # The body sent depends on Accept-Encoding whether or not we compress it
+                    _add_vary(headers)
+                    message["headers"] = headers.raw
+                if (
+                    encoding is None
+                    or "content-encoding" in headers
+                    or message.get("status", 200) in (204, 304)
+                    or not compressible
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold headers until we know whether the body is worth compressing
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = self._make_encoder(encoding)
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+                headers["Content-Encoding"] = encoding
+                _weaken_etag(headers)
+                if more_body:
+                    del headers["Content-Length"]
+                start_message["headers"] = headers.raw
+
+                cpu_start = time.thread_time()
+                compressed = encoder.compress(body, final=not more_body)
+                cpu_seconds += time.thread_time() - cpu_start
+
+                if not more_body:
+                    headers["Content-Length"] = str(len(compressed))
+                    start_message["headers"] = headers.raw
+                await send(start_message)
+            else:
+                cpu_start = time.thread_time()
+                compressed = encoder.compress(body, final=not more_body)
+                cpu_seconds += time.thread_time() - cpu_start
+
+            bytes_in += len(body)
+            bytes_out += len(compressed)
+            message["body"] = compressed
+            await send(message)
+
+            if not more_body:
+                finish()
+
+        await self.app(scope, receive, send_wrapper)
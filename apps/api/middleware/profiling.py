@@ -0,0 +1,30 @@
+"""
+Profiling Middleware
+====================
+Hands requests matching an admin-armed profiling session to
+utils.profiling.RequestProfiler. When nothing is armed the cost is one
+attribute check per request.
+"""
+
+from utils.profiling import get_request_profiler
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; install inside the security stack."""
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler = get_request_profiler()
+
+    async def __call__(self, scope, receive, send):
+        session = self.profiler.session
+        if session is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if session.expired:
+            self.profiler.disarm()
+        elif session.claim(scope):
+            await self.profiler.run(session, scope, lambda: self.app(scope, receive, send))
+            return
+        await self.app(scope, receive, send)
@@ -5,8 +5,8 @@ Per-route rate limits with Redis/in-memory fallback.
 """
 
 import os
+import re
 import time
-import hashlib
 from collections import defaultdict
 from typing import Callable, Optional
 from functools import wraps
@@ -14,6 +14,8 @@ from functools import wraps
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 
+from .auth_context import get_auth_context
+
 
 # In-memory storage (use Redis in production for multi-worker)
 _rate_limit_storage: dict = defaultdict(list)
@@ -43,6 +45,24 @@ class RateLimitConfig:
     DEFAULT_LIMIT = (60, 60)  # 60 per minute
 
 
+# All LIMITS prefixes compiled into one alternation. Alternatives are tried
+# in LIMITS order, so the first matching prefix wins exactly like the
+# startswith loop this replaces.
+_PATTERNS = list(RateLimitConfig.LIMITS.keys())
+_LIMITS_RE = re.compile(
+    "|".join(f"(?P<r{i}>{re.escape(p.replace('/*', ''))})" for i, p in enumerate(_PATTERNS))
+)
+
+
+def classify_path(path: str) -> tuple[str, tuple[int, int]]:
+    """Return (normalized path used in rate-limit keys, (max_requests, window_seconds))."""
+    match = _LIMITS_RE.match(path)
+    if match is None:
+        return path, RateLimitConfig.DEFAULT_LIMIT
+    pattern = _PATTERNS[int(match.lastgroup[1:])]
+    return pattern, RateLimitConfig.LIMITS[pattern]
+
+
 def get_client_ip(request: Request) -> str:
     """Extract client IP from request."""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -62,11 +82,7 @@ def get_rate_limit_key(request: Request, user_id: Optional[str] = None) -> str:
         identifier = f"ip:{get_client_ip(request)}"
     
     # Normalize path (remove dynamic segments)
-    normalized_path = path
-    for pattern in RateLimitConfig.LIMITS.keys():
-        if path.startswith(pattern.replace("/*", "")):
-            normalized_path = pattern
-            break
+    normalized_path, _ = classify_path(path)
     
     return f"ratelimit:{normalized_path}:{identifier}"
 
@@ -101,10 +117,7 @@ def check_rate_limit(key: str, max_requests: int, window_seconds: int) -> tuple[
 
 def get_limit_for_path(path: str) -> tuple[int, int]:
     """Get rate limit config for a path."""
-    for pattern, limit in RateLimitConfig.LIMITS.items():
-        if path.startswith(pattern.replace("/*", "")):
-            return limit
-    return RateLimitConfig.DEFAULT_LIMIT
+    return classify_path(path)[1]
 
 
 class RateLimitMiddleware:
@@ -134,13 +147,8 @@ class RateLimitMiddleware:
             await self.app(scope, receive, send)
             return
         
-        # Get user_id from auth header if present
-        user_id = None
-        auth_header = request.headers.get("authorization", "")
-        if auth_header.startswith("Bearer "):
-            # Extract user_id from JWT (simplified - in production use proper JWT decode)
-            token = auth_header[7:]
-            user_id = hashlib.md5(token.encode()).hexdigest()[:16]
+        # Verified user_id from the auth context; invalid tokens count per IP
+        user_id = get_auth_context(scope).user_id
         
         # Check rate limit
         key = get_rate_limit_key(request, user_id)
@@ -0,0 +1,53 @@
+"""
+Request Metrics Middleware
+==========================
+Times every HTTP request and records it via utils.metrics.record_request.
+
+The ``path`` label is the matched route template (``scope["route"].path``,
+set by FastAPI routing), e.g. ``/api/quiz/result/{result_id}``. Requests
+that never reach a route (404s, 413/429/preflights answered by the
+security stack) share the ``unmatched`` label, so label cardinality is
+bounded by the route table.
+"""
+
+import time
+
+from utils.metrics import record_request
+
+UNMATCHED = "unmatched"
+
+KNOWN_METHODS = frozenset(["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware; install outermost so it times the whole stack."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED
+            method = scope["method"]
+            record_request(
+                method if method in KNOWN_METHODS else "OTHER",
+                path,
+                status,
+                (time.perf_counter() - start_time) * 1000,
+            )
@@ -0,0 +1,301 @@
+"""
+Fused Security Middleware
+=========================
+One pure-ASGI pass that replaces the chain of AuthContext, RateLimit,
+RequestSizeLimit, SecurityHeaders, CORS and RequestContext middlewares.
+
+Per request it:
+- scans the raw header list once (no Starlette Request/Headers objects)
+- classifies the path once (rate-limit bucket, body limit), memoized
+- decodes the bearer JWT once into scope["state"]["auth"]
+- answers 413 / 429 / CORS preflight directly
+- wraps send once, appending precomputed header byte tuples
+
+The individual middlewares are kept for reuse and tests; the app installs
+only this one.
+"""
+
+import os
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logging import log_request, request_id_var, user_id_var
+from utils.serialization import dumps
+
+from .auth_context import bearer_token, decode_token
+from .rate_limit import check_rate_limit, classify_path
+from .security_headers import SECURITY_HEADERS
+
+CORS_ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+# Never rate limited (same list RateLimitMiddleware used)
+RATE_LIMIT_SKIP_PATHS = frozenset(["/api/health", "/health", "/", "/docs", "/openapi.json"])
+
+# Request bodies above REQUEST_MAX_SIZE_KB are rejected, except on these prefixes
+UPLOAD_ROUTES = ("/api/upload", "/api/assets")
+
+# Bound on the memoized path classification table
+MAX_ROUTE_CACHE = 4096
+
+
+class _RouteInfo:
+    """Everything the middleware needs to know about a path."""
+
+    __slots__ = ("rate_limited", "rate_path", "max_requests", "window_seconds",
+                 "limit_header", "max_body")
+
+    def __init__(self, rate_limited: bool, rate_path: str, limit: Tuple[int, int], max_body: int):
+        self.rate_limited = rate_limited
+        self.rate_path = rate_path
+        self.max_requests, self.window_seconds = limit
+        self.limit_header = (b"X-RateLimit-Limit", str(self.max_requests).encode())
+        self.max_body = max_body
+
+
+def _json_response_parts(status: int, content: dict, extra_headers: Iterable[Tuple[bytes, bytes]] = ()):
+    body = dumps(content)
+    headers = [
+        (b"content-length", str(len(body)).encode()),
+        (b"content-type", b"application/json"),
+    ]
+    headers.extend(extra_headers)
+    return {"type": "http.response.start", "status": status, "headers": headers}, body
+
+
+class SecurityStackMiddleware:
+    """
+    Single-pass ASGI security middleware.
+
+    Usage:
+        app.add_middleware(SecurityStackMiddleware, cors_origins=["https://relasi4warna.com"])
+    """
+
+    def __init__(self, app, cors_origins: Iterable[str] = ("*",), cors_allow_credentials: bool = True,
+                 cors_max_age: int = 600):
+        self.app = app
+        self.rate_limit_enabled = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.default_max = int(os.environ.get("REQUEST_MAX_SIZE_KB", 256)) * 1024
+        self.upload_max = int(os.environ.get("UPLOAD_MAX_SIZE_MB", 10)) * 1024 * 1024
+        self.request_logging = os.environ.get("REQUEST_LOG_ENABLED", "false").lower() == "true"
+        self._routes: Dict[str, _RouteInfo] = {}
+
+        # CORS, precomputed with the same semantics as Starlette's CORSMiddleware
+        # (allow_methods=["*"], allow_headers=["*"])
+        origins = [o.strip() for o in cors_origins if o.strip()]
+        self.allow_all_origins = "*" in origins
+        self.allow_origins = frozenset(origins)
+        self.allow_credentials = cors_allow_credentials
+        self.preflight_explicit_origin = not self.allow_all_origins or cors_allow_credentials
+
+        simple: List[Tuple[bytes, bytes]] = []
+        if self.allow_all_origins:
+            simple.append((b"access-control-allow-origin", b"*"))
+        if cors_allow_credentials:
+            simple.append((b"access-control-allow-credentials", b"true"))
+        self.cors_simple_headers = tuple(simple)
+
+        preflight: List[Tuple[bytes, bytes]] = []
+        if self.preflight_explicit_origin:
+            preflight.append((b"vary", b"Origin"))
+        else:
+            preflight.append((b"access-control-allow-origin", b"*"))
+        preflight.append((b"access-control-allow-methods", ", ".join(CORS_ALL_METHODS).encode()))
+        preflight.append((b"access-control-max-age", str(cors_max_age).encode()))
+        if cors_allow_credentials:
+            preflight.append((b"access-control-allow-credentials", b"true"))
+        self.cors_preflight_headers = tuple(preflight)
+
+    # ---------- path classification ----------
+
+    def _classify(self, path: str) -> _RouteInfo:
+        info = self._routes.get(path)
+        if info is None:
+            rate_path, limit = classify_path(path)
+            info = _RouteInfo(
+                rate_limited=path.startswith("/api/") and path not in RATE_LIMIT_SKIP_PATHS,
+                rate_path=rate_path,
+                limit=limit,
+                max_body=self.upload_max if path.startswith(UPLOAD_ROUTES) else self.default_max,
+            )
+            if len(self._routes) >= MAX_ROUTE_CACHE:
+                self._routes.clear()
+            self._routes[path] = info
+        return info
+
+    def _is_allowed_origin(self, origin: str) -> bool:
+        return self.allow_all_origins or origin in self.allow_origins
+
+    # ---------- ASGI ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        path = scope["path"]
+        method = scope["method"]
+        route = self._classify(path)
+
+        # One pass over the raw headers
+        authorization = content_length = origin = forwarded_for = request_method = request_headers = None
+        has_cookie = False
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value
+            elif name == b"content-length":
+                content_length = value
+            elif name == b"origin":
+                origin = value
+            elif name == b"x-forwarded-for":
+                forwarded_for = value
+            elif name == b"cookie":
+                has_cookie = True
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        # Auth context (JWT verified once)
+        auth = decode_token(bearer_token(authorization))
+        scope.setdefault("state", {})["auth"] = auth
+
+        # Request context for structured logs
+        request_id = uuid.uuid4().hex[:8]
+        request_id_var.set(request_id)
+        user_id_var.set(auth.user_id or "")
+
+        # Headers added to every response we send or pass through
+        extra: List[Tuple[bytes, bytes]] = list(SECURITY_HEADERS)
+        extra.append((b"X-Request-ID", request_id.encode()))
+
+        is_preflight = method == "OPTIONS" and origin is not None and request_method is not None
+
+        # Rate limit (preflights are not counted)
+        if self.rate_limit_enabled and route.rate_limited and not is_preflight:
+            user_id = auth.user_id
+            if user_id:
+                identifier = f"user:{user_id}"
+            elif forwarded_for is not None:
+                identifier = "ip:" + forwarded_for.decode("latin-1").split(",")[0].strip()
+            else:
+                client = scope.get("client")
+                identifier = f"ip:{client[0] if client else 'unknown'}"
+            key = f"ratelimit:{route.rate_path}:{identifier}"
+            is_allowed, remaining, retry_after = check_rate_limit(key, route.max_requests, route.window_seconds)
+            if not is_allowed:
+                await self._respond(send, scope, 429, {
+                    "error": "rate_limited",
+                    "message": "Too many requests. Please try again later.",
+                    "retry_after": retry_after,
+                }, extra + [
+                    (b"Retry-After", str(retry_after).encode()),
+                    (b"X-RateLimit-Limit", str(route.max_requests).encode()),
+                    (b"X-RateLimit-Remaining", b"0"),
+                    (b"X-RateLimit-Reset", str(int(time.time()) + retry_after).encode()),
+                ], origin, has_cookie, start_time)
+                return
+            extra.append(route.limit_header)
+            extra.append((b"X-RateLimit-Remaining", str(remaining).encode()))
+
+        # Body size limit
+        if content_length is not None:
+            try:
+                size = int(content_length)
+            except ValueError:
+                size = 0
+            if size > route.max_body:
+                limit_kb = route.max_body // 1024
+                await self._respond(send, scope, 413, {
+                    "error": "request_too_large",
+                    "message": f"Request body exceeds {limit_kb}KB limit",
+                    "max_size_kb": limit_kb,
+                }, extra, origin, has_cookie, start_time)
+                return
+
+        # CORS preflight
+        if is_preflight:
+            await self._preflight(send, scope, origin.decode("latin-1"), request_method.decode("latin-1"),
+                                  request_headers, extra, start_time)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.extend(extra)
+                if origin is not None:
+                    self._add_cors_headers(headers, origin, has_cookie)
+                message["headers"] = headers
+                if self.request_logging:
+                    self._log(scope, message.get("status", 0), start_time, auth.user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    # ---------- helpers ----------
+
+    def _add_cors_headers(self, headers: list, origin: bytes, has_cookie: bool):
+        if self.allow_all_origins and has_cookie:
+            explicit = True
+        elif not self.allow_all_origins and origin.decode("latin-1") in self.allow_origins:
+            explicit = True
+        else:
+            explicit = False
+
+        if explicit:
+            headers.extend(h for h in self.cors_simple_headers if h[0] != b"access-control-allow-origin")
+            headers.append((b"access-control-allow-origin", origin))
+            for i, (name, value) in enumerate(headers):
+                if name.lower() == b"vary":
+                    headers[i] = (name, value + b", Origin")
+                    break
+            else:
+                headers.append((b"vary", b"Origin"))
+        else:
+            headers.extend(self.cors_simple_headers)
+
+    async def _respond(self, send, scope, status: int, content: dict, extra, origin, has_cookie, start_time):
+        start, body = _json_response_parts(status, content, extra)
+        if origin is not None:
+            self._add_cors_headers(start["headers"], origin, has_cookie)
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+        if self.request_logging:
+            self._log(scope, status, start_time, None)
+
+    async def _preflight(self, send, scope, origin: str, method: str, requested_headers: Optional[bytes],
+                         extra, start_time):
+        headers = list(self.cors_preflight_headers)
+        failures = []
+        if self._is_allowed_origin(origin):
+            if self.preflight_explicit_origin:
+                headers.append((b"access-control-allow-origin", origin.encode("latin-1")))
+        else:
+            failures.append("origin")
+        if method not in CORS_ALL_METHODS:
+            failures.append("method")
+        if requested_headers is not None:
+            headers.append((b"access-control-allow-headers", requested_headers))
+
+        if failures:
+            status, body = 400, ("Disallowed CORS " + ", ".join(failures)).encode()
+        else:
+            status, body = 200, b"OK"
+        headers.extend(extra)
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        if self.request_logging:
+            self._log(scope, status, start_time, None)
+
+    @staticmethod
+    def _log(scope, status: int, start_time: float, user_id: Optional[str]):
+        log_request(
+            method=scope.get("method", "UNKNOWN"),
+            path=scope.get("path", "/"),
+            status_code=status,
+            latency_ms=(time.perf_counter() - start_time) * 1000,
+            user_id=user_id,
+        )
@@ -20,6 +20,7 @@ from hitl.safety import SafetyGate, SAFE_RESPONSE, SAFE_RESPONSE_ID
 from hitl.moderation import ModerationQueue, ModerationStatus
 from governance.policy_engine import PolicyEngine, PolicyResult
 from governance.audit import AuditLogger, AuditEventType
+from utils.dates import with_native_dates
 
 
 @dataclass
@@ -123,7 +124,7 @@ class OutputRouter:
         
         # Persist risk assessment
         if self.db:
-            await self.db.risk_assessments.insert_one(risk_assessment.to_dict())
+            await self.db.risk_assessments.insert_one(with_native_dates(risk_assessment.to_dict(), "created_at"))
         
         # STEP 3: Apply Safety Gate based on risk level
         if not blocked:  # Only if not already blocked by policy
@@ -151,7 +152,7 @@ class OutputRouter:
             
             # Persist queue item
             if self.db:
-                await self.db.moderation_queue.insert_one(queue_item.to_dict())
+                await self.db.moderation_queue.insert_one(with_native_dates(queue_item.to_dict(), "created_at"))
         
         # STEP 5: Audit log
         audit_event = self.audit_logger.log_ai_generation(
@@ -11,7 +11,7 @@ from utils.auth import (
     get_current_user, JWT_SECRET
 )
 import jwt
-import httpx
+from utils.http_clients import get_http_client
 
 # Router tetap menggunakan prefix /auth, sehingga total path: /api/auth
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -32,7 +32,7 @@ async def register(user_data: UserRegister):
     user = {
         "user_id": user_id,
         "email": user_data.email.lower(),
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
         "name": user_data.name,
         "is_admin": False,
         "created_at": datetime.now(timezone.utc).isoformat()
@@ -58,7 +58,7 @@ async def login(user_data: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    if not verify_password(user_data.password, user.get("password_hash", "")):
+    if not await verify_password(user_data.password, user.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     token = create_access_token({"user_id": user["user_id"]})
@@ -101,28 +101,28 @@ async def google_auth(request: Request):
 
     # Tahap 2: Jika ada code, tukarkan dengan Token
     try:
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": GOOGLE_CLIENT_ID,
-                    "client_secret": GOOGLE_CLIENT_SECRET,
-                    "code": code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": redirect_uri
-                }
-            )
-            tokens = token_response.json()
+        client = get_http_client("google")
+        token_response = await client.post(
+            "https://oauth2.googleapis.com/token",
+            data={
+                "client_id": GOOGLE_CLIENT_ID,
+                "client_secret": GOOGLE_CLIENT_SECRET,
+                "code": code,
+                "grant_type": "authorization_code",
+                "redirect_uri": redirect_uri
+            }
+        )
+        tokens = token_response.json()
             
-            if "error" in tokens:
-                raise HTTPException(status_code=400, detail=tokens.get("error_description", "Google auth failed"))
+        if "error" in tokens:
+            raise HTTPException(status_code=400, detail=tokens.get("error_description", "Google auth failed"))
             
-            # Ambil info user menggunakan Access Token
-            userinfo_response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {tokens['access_token']}"}
-            )
-            userinfo = userinfo_response.json()
+        # Ambil info user menggunakan Access Token
+        userinfo_response = await client.get(
+            "https://www.googleapis.com/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        userinfo = userinfo_response.json()
         
         email = userinfo.get("email", "").lower()
         if not email:
@@ -210,7 +210,7 @@ async def reset_password(data: PasswordResetConfirm):
         
         await db.users.update_one(
             {"user_id": user_id},
-            {"$set": {"password_hash": hash_password(data.new_password)}}
+            {"$set": {"password_hash": await hash_password(data.new_password)}}
         )
         
         await db.password_resets.update_one(
@@ -15,7 +15,7 @@ Endpoints:
 - GET /api/relasi4/payment/status/{payment_id}: Get payment status
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, Response
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
@@ -41,10 +41,18 @@ from relasi4tm import (
     color_to_archetype,
     get_color_hex,
     get_conflict_description,
+    get_report_leaderboards,
 )
+from utils.serialization import ORJSONRoute
+from utils.pagination import InvalidCursor, fetch_page, get_count_cache
+from middleware.auth_context import get_auth_context
+from services.relasi4_question_sets import get_question_set_cache
+from services.midtrans_client import get_midtrans_client
+from services.analytics_buffer import get_analytics_buffer
+from services.analytics_rollups import get_analytics_rollups, facet
 
 # Router for RELASI4™ endpoints
-relasi4_router = APIRouter(prefix="/relasi4", tags=["relasi4"])
+relasi4_router = APIRouter(prefix="/relasi4", tags=["relasi4"], route_class=ORJSONRoute)
 
 
 # ==================== MODELS ====================
@@ -169,106 +177,42 @@ async def get_user():
 # ==================== ROUTES ====================
 
 @relasi4_router.get("/question-sets", response_model=List[QuestionSetResponse])
-async def list_question_sets():
+async def list_question_sets(request: Request):
     """List all available RELASI4™ question sets."""
     db = await get_db()
-    
-    cursor = db.r4_question_sets.find(
-        {'is_active': True},
-        {'_id': 0, 'code': 1, 'title': 1, 'version': 1, 'is_active': 1}
-    )
-    sets = await cursor.to_list(length=20)
-    
-    # Count questions for each set
-    result = []
-    for s in sets:
-        count = await db.r4_questions.count_documents({
-            'set_code': s['code'],
-            'is_active': True
-        })
-        result.append(QuestionSetResponse(
-            code=s['code'],
-            title=s['title'],
-            version=s['version'],
-            is_active=s['is_active'],
-            question_count=count
-        ))
-    
-    return result
+    payload = await get_question_set_cache(db).get_list_payload()
+    return payload.response(request)
 
 
 @relasi4_router.get("/questions/{set_code}", response_model=List[QuestionResponse])
-async def get_questions(set_code: str):
-    """Get all questions for a question set."""
+async def get_questions(set_code: str, request: Request):
+    """Get all questions for a question set (cached per lock hash)."""
     db = await get_db()
     
-    # Verify set exists
-    question_set = await db.r4_question_sets.find_one(
-        {'code': set_code, 'is_active': True},
-        {'_id': 0, 'code': 1}
-    )
+    question_set = await get_question_set_cache(db).get_set(set_code)
     if not question_set:
         raise HTTPException(status_code=404, detail=f"Question set '{set_code}' not found")
     
-    # Get questions
-    cursor = db.r4_questions.find(
-        {'set_code': set_code, 'is_active': True},
-        {'_id': 0, 'order_no': 1, 'prompt': 1, 'type': 1}
-    ).sort('order_no', 1)
-    questions = await cursor.to_list(length=100)
-    
-    # Get answers for each question
-    result = []
-    for q in questions:
-        ans_cursor = db.r4_answers.find(
-            {'set_code': set_code, 'order_no': q['order_no']},
-            {'_id': 0, 'label': 1, 'text': 1}
-        ).sort('label', 1)
-        answers = await ans_cursor.to_list(length=10)
-        
-        result.append(QuestionResponse(
-            order_no=q['order_no'],
-            prompt=q['prompt'],
-            type=q['type'],
-            answers=[AnswerOption(label=a['label'], text=a['text']) for a in answers]
-        ))
-    
-    return result
+    return question_set.payload.response(request)
 
 
 @relasi4_router.post("/assessments/start", response_model=AssessmentStartResponse)
 async def start_assessment(
     request: AssessmentStartRequest,
+    http_request: Request,
     authorization: str = Header(None)
 ):
     """Start a new RELASI4™ assessment session."""
     db = await get_db()
     
     # Get user (optional - can be anonymous)
-    user_id = "anonymous"
-    if authorization:
-        try:
-            from jose import jwt
-            token = authorization.replace("Bearer ", "")
-            JWT_SECRET = os.environ.get('JWT_SECRET', 'default_secret_key')
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            user_id = payload.get("user_id", "anonymous")
-        except Exception:
-            pass  # Anonymous user
+    user_id = get_auth_context(http_request.scope).user_id or "anonymous"
     
-    # Verify question set exists
-    question_set = await db.r4_question_sets.find_one(
-        {'code': request.question_set_code, 'is_active': True},
-        {'_id': 0, 'code': 1}
-    )
+    # Verify question set exists (question count comes from the cached set)
+    question_set = await get_question_set_cache(db).get_set(request.question_set_code)
     if not question_set:
         raise HTTPException(status_code=404, detail=f"Question set '{request.question_set_code}' not found")
-    
-    # Count questions
-    total_questions = await db.r4_questions.count_documents({
-        'set_code': request.question_set_code,
-        'is_active': True
-    })
+    total_questions = question_set.question_count
     
     # Create assessment session
     assessment_id = f"r4_{uuid.uuid4().hex[:16]}"
@@ -356,24 +300,15 @@ async def submit_assessment(request: AssessmentSubmitRequest):
 # NOTE: These routes must be BEFORE /assessments/{assessment_id} to avoid path conflict
 @relasi4_router.get("/assessments/history")
 async def get_assessment_history(
+    request: Request,
     authorization: str = Header(None),
     limit: int = 10
 ):
     """Get user's assessment history for progress tracking."""
     db = await get_db()
     
-    # Get user ID from token
-    user_id = "anonymous"
-    if authorization:
-        try:
-            from jose import jwt
-            import os
-            token = authorization.replace("Bearer ", "")
-            JWT_SECRET = os.environ.get("JWT_SECRET", "default_secret_key")
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            user_id = payload.get("user_id", "anonymous")
-        except Exception:
-            pass
+    # Get user ID from the verified token
+    user_id = get_auth_context(request.scope).user_id or "anonymous"
     
     if user_id == "anonymous":
         return {"assessments": [], "message": "Login required for history"}
@@ -1293,43 +1228,58 @@ async def generate_family_report(
 
 # ==================== TEASER HELPERS ====================
 
-def _get_teaser_content(primary: str, secondary: str) -> Dict[str, Any]:
-    """Get free teaser content based on archetype combination."""
-    
-    archetypes = {
-        'driver': {
-            'title': 'Kamu adalah Driver yang Tegas',
-            'description': 'Sebagai Driver, kamu memiliki dorongan alami untuk memimpin dan mencapai hasil. Kamu langsung ke inti masalah dan tidak suka bertele-tele.',
-            'strengths': ['Tegas dalam mengambil keputusan', 'Fokus pada hasil', 'Berani menghadapi tantangan', 'Efisien dalam bertindak']
-        },
-        'spark': {
-            'title': 'Kamu adalah Spark yang Bersemangat',
-            'description': 'Sebagai Spark, energimu menular ke orang-orang di sekitarmu. Kamu membawa keceriaan dan kreativitas dalam setiap interaksi.',
-            'strengths': ['Kreatif dan inovatif', 'Pandai memotivasi orang lain', 'Optimis dan antusias', 'Adaptif terhadap perubahan']
-        },
-        'anchor': {
-            'title': 'Kamu adalah Anchor yang Stabil',
-            'description': 'Sebagai Anchor, kamu adalah pilar kekuatan bagi orang-orang di sekitarmu. Kehadiranmu membawa ketenangan dan rasa aman.',
-            'strengths': ['Sabar dan penuh pengertian', 'Bisa diandalkan', 'Pendengar yang baik', 'Menciptakan harmoni']
-        },
-        'analyst': {
-            'title': 'Kamu adalah Analyst yang Cermat',
-            'description': 'Sebagai Analyst, kamu memiliki kemampuan luar biasa untuk melihat detail yang terlewat orang lain. Ketelitianmu memastikan semuanya berjalan dengan benar.',
-            'strengths': ['Teliti dan akurat', 'Pemikir sistematis', 'Berbasis data dan fakta', 'Standar kualitas tinggi']
-        }
+_TEASER_ARCHETYPES = {
+    'driver': {
+        'title': 'Kamu adalah Driver yang Tegas',
+        'description': 'Sebagai Driver, kamu memiliki dorongan alami untuk memimpin dan mencapai hasil. Kamu langsung ke inti masalah dan tidak suka bertele-tele.',
+        'strengths': ['Tegas dalam mengambil keputusan', 'Fokus pada hasil', 'Berani menghadapi tantangan', 'Efisien dalam bertindak']
+    },
+    'spark': {
+        'title': 'Kamu adalah Spark yang Bersemangat',
+        'description': 'Sebagai Spark, energimu menular ke orang-orang di sekitarmu. Kamu membawa keceriaan dan kreativitas dalam setiap interaksi.',
+        'strengths': ['Kreatif dan inovatif', 'Pandai memotivasi orang lain', 'Optimis dan antusias', 'Adaptif terhadap perubahan']
+    },
+    'anchor': {
+        'title': 'Kamu adalah Anchor yang Stabil',
+        'description': 'Sebagai Anchor, kamu adalah pilar kekuatan bagi orang-orang di sekitarmu. Kehadiranmu membawa ketenangan dan rasa aman.',
+        'strengths': ['Sabar dan penuh pengertian', 'Bisa diandalkan', 'Pendengar yang baik', 'Menciptakan harmoni']
+    },
+    'analyst': {
+        'title': 'Kamu adalah Analyst yang Cermat',
+        'description': 'Sebagai Analyst, kamu memiliki kemampuan luar biasa untuk melihat detail yang terlewat orang lain. Ketelitianmu memastikan semuanya berjalan dengan benar.',
+        'strengths': ['Teliti dan akurat', 'Pemikir sistematis', 'Berbasis data dan fakta', 'Standar kualitas tinggi']
     }
-    
-    base = archetypes.get(primary, archetypes['driver'])
+}
+
+
+def _build_teaser_content(primary: str, secondary: str) -> Dict[str, Any]:
+    base = dict(_TEASER_ARCHETYPES.get(primary, _TEASER_ARCHETYPES['driver']))
     
     # Modify based on secondary
     if secondary:
-        secondary_info = archetypes.get(secondary, {})
+        secondary_info = _TEASER_ARCHETYPES.get(secondary, {})
         # Add blended description
         base['description'] += f" Dengan sentuhan {secondary.capitalize()}, kamu juga memiliki sisi {secondary_info.get('strengths', ['unik'])[0].lower()}."
     
     return base
 
 
+# Precomputed once at import: every (primary, secondary) archetype combination
+_TEASER_CONTENT: Dict[tuple, Dict[str, Any]] = {
+    (primary, secondary): _build_teaser_content(primary, secondary)
+    for primary in _TEASER_ARCHETYPES
+    for secondary in [*_TEASER_ARCHETYPES, '']
+}
+
+
+def _get_teaser_content(primary: str, secondary: str) -> Dict[str, Any]:
+    """Get free teaser content based on archetype combination (treat as read-only)."""
+    cached = _TEASER_CONTENT.get((primary, secondary or ''))
+    if cached is not None:
+        return cached
+    return _build_teaser_content(primary, secondary)
+
+
 # ==================== PAYMENT ENDPOINTS ====================
 
 class Relasi4PaymentRequest(BaseModel):
@@ -1359,7 +1309,6 @@ async def create_relasi4_payment(
     """Create a Midtrans payment for RELASI4™ report."""
     import os
     import uuid as uuid_lib
-    import midtransclient
     
     db = await get_db()
     
@@ -1406,21 +1355,13 @@ async def create_relasi4_payment(
     amount = product["price_idr"] if request.currency == "IDR" else product["price_usd"]
     payment_id = f"R4-{uuid_lib.uuid4().hex[:12].upper()}"
     
-    # Initialize Midtrans
-    MIDTRANS_SERVER_KEY = os.environ.get('MIDTRANS_SERVER_KEY', '')
-    MIDTRANS_CLIENT_KEY = os.environ.get('MIDTRANS_CLIENT_KEY', '')
-    MIDTRANS_IS_PRODUCTION = os.environ.get('MIDTRANS_IS_PRODUCTION', 'False') == 'True'
+    # Shared pooled Midtrans client
+    midtrans = get_midtrans_client()
     
-    if not MIDTRANS_SERVER_KEY:
+    if not midtrans.server_key:
         raise HTTPException(status_code=500, detail="Payment system not configured")
     
     try:
-        midtrans_snap = midtransclient.Snap(
-            is_production=MIDTRANS_IS_PRODUCTION,
-            server_key=MIDTRANS_SERVER_KEY,
-            client_key=MIDTRANS_CLIENT_KEY
-        )
-        
         APP_URL = os.environ.get('APP_URL', 'https://relasi4warna.com')
         
         transaction_params = {
@@ -1452,7 +1393,7 @@ async def create_relasi4_payment(
         }
         
         # Create Snap transaction
-        snap_response = midtrans_snap.create_transaction(transaction_params)
+        snap_response = await midtrans.create_transaction(transaction_params)
         
         # Save payment record
         payment_doc = {
@@ -1518,6 +1459,8 @@ async def relasi4_payment_webhook(request_data: Request):
         if signature_key != calculated_signature and MIDTRANS_IS_PRODUCTION:
             raise HTTPException(status_code=401, detail="Invalid signature")
         
+        get_midtrans_client().invalidate_status(order_id)
+        
         if transaction_status in ["capture", "settlement"]:
             if fraud_status == "accept" or fraud_status is None:
                 # Payment successful
@@ -1619,28 +1562,44 @@ async def get_relasi4_payment_status(payment_id: str):
 
 # ==================== ADMIN ENDPOINTS ====================
 
+async def _admin_page(collection, sort, limit: int, cursor: Optional[str], response: Response):
+    """
+    One keyset page for the admin lists. The body stays a bare list (the
+    admin page consumes it as-is); the next cursor and the cached total
+    go in X-Next-Cursor / X-Total-Count.
+    """
+    try:
+        items, next_cursor = await fetch_page(collection, {}, sort, limit, cursor=cursor, projection={'_id': 0})
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    response.headers['X-Total-Count'] = str(await get_count_cache().total(collection))
+    return items
+
+
 @relasi4_router.get("/admin/reports")
-async def admin_get_all_reports(authorization: str = None):
-    """Admin: Get all RELASI4 reports."""
+async def admin_get_all_reports(
+    response: Response,
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    authorization: str = None
+):
+    """Admin: Get all RELASI4 reports, newest first."""
     db = await get_db()
-    
-    # Get all reports
-    cursor = db.r4_reports.find({}, {'_id': 0}).sort('created_at', -1).limit(500)
-    reports = await cursor.to_list(length=500)
-    
-    return reports
+    return await _admin_page(db.r4_reports, [('created_at', -1), ('report_id', -1)], limit, cursor, response)
 
 
 @relasi4_router.get("/admin/assessments")
-async def admin_get_all_assessments(authorization: str = None):
-    """Admin: Get all RELASI4 assessments."""
+async def admin_get_all_assessments(
+    response: Response,
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    authorization: str = None
+):
+    """Admin: Get all RELASI4 assessments with scores, newest first."""
     db = await get_db()
-    
-    # Get all assessments with scores
-    cursor = db.r4_responses.find({}, {'_id': 0}).sort('calculated_at', -1).limit(500)
-    assessments = await cursor.to_list(length=500)
-    
-    return assessments
+    return await _admin_page(db.r4_responses, [('calculated_at', -1), ('assessment_id', -1)], limit, cursor, response)
 
 
 @relasi4_router.delete("/admin/reports/{report_id}")
@@ -1648,11 +1607,13 @@ async def admin_delete_report(report_id: str, authorization: str = None):
     """Admin: Delete a specific report."""
     db = await get_db()
     
-    result = await db.r4_reports.delete_one({'report_id': report_id})
+    report = await db.r4_reports.find_one_and_delete({'report_id': report_id}, {'report_type': 1})
     
-    if result.deleted_count == 0:
+    if report is None:
         raise HTTPException(status_code=404, detail="Report not found")
     
+    await get_report_leaderboards(db).remove(report.get('report_type'), report_id)
+    
     return {"success": True, "deleted_report_id": report_id}
 
 
@@ -1689,54 +1650,25 @@ async def admin_get_stats(authorization: str = None):
 
 @relasi4_router.get("/leaderboard/couples")
 async def get_couple_leaderboard(limit: int = 10):
-    """Get public leaderboard of couple compatibility scores."""
+    """Get public leaderboard of couple compatibility scores (materialized, see relasi4tm.leaderboards)."""
     db = await get_db()
-    
-    cursor = db.r4_reports.find(
-        {'report_type': 'COUPLE'},
-        {
-            '_id': 0, 
-            'report_id': 1, 
-            'compatibility_summary.compatibility_score': 1,
-            'compatibility_summary.compatibility_level': 1,
-            'person_a_profile.primary_color': 1,
-            'person_a_profile.archetype': 1,
-            'person_b_profile.primary_color': 1,
-            'person_b_profile.archetype': 1,
-            'created_at': 1
-        }
-    ).sort('compatibility_summary.compatibility_score', -1).limit(min(limit, 50))
-    
-    couples = await cursor.to_list(length=limit)
+    couples, total = await get_report_leaderboards(db).top('COUPLE', min(limit, 50))
     
     return {
         "leaderboard": couples,
-        "total_couples": await db.r4_reports.count_documents({'report_type': 'COUPLE'})
+        "total_couples": total
     }
 
 
 @relasi4_router.get("/leaderboard/families")
 async def get_family_leaderboard(limit: int = 10):
-    """Get public leaderboard of family harmony scores."""
+    """Get public leaderboard of family harmony scores (materialized, see relasi4tm.leaderboards)."""
     db = await get_db()
-    
-    cursor = db.r4_reports.find(
-        {'report_type': 'FAMILY'},
-        {
-            '_id': 0, 
-            'report_id': 1, 
-            'family_name': 1,
-            'family_summary.harmony_score': 1,
-            'member_profiles': 1,
-            'created_at': 1
-        }
-    ).sort('family_summary.harmony_score', -1).limit(min(limit, 50))
-    
-    families = await cursor.to_list(length=limit)
+    families, total = await get_report_leaderboards(db).top('FAMILY', min(limit, 50))
     
     return {
         "leaderboard": families,
-        "total_families": await db.r4_reports.count_documents({'report_type': 'FAMILY'})
+        "total_families": total
     }
 
 
@@ -1761,83 +1693,59 @@ class AnalyticsEventRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional event data")
 
 
-@relasi4_router.post("/analytics/track")
+@relasi4_router.post("/analytics/track", status_code=202)
 async def track_analytics_event(event_data: AnalyticsEventRequest, request: Request):
     """
     Track an analytics event (fire-and-forget).
-    Stores in MongoDB r4_analytics collection and updates daily aggregates.
+    Buffers the event for r4_analytics and its daily aggregate increment;
+    both are written in batches by the analytics buffer.
     """
     db = await get_db()
     
-    try:
-        # Get user info if available
-        user_id = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
-            try:
-                from jose import jwt
-                SECRET_KEY = os.environ.get("JWT_SECRET", "relasi4-secret-key")
-                payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-                user_id = payload.get("sub")
-            except:
-                pass
-        
-        # Determine CTA variant (prefer cta_variant over variant for backward compat)
-        cta_variant = event_data.cta_variant or event_data.variant or "unknown"
-        
-        # Get today's date for aggregation
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        
-        # Create event document
-        event_doc = {
-            "event_id": f"evt_{uuid.uuid4().hex[:12]}",
-            "event": event_data.event,
-            "cta_variant": cta_variant,
-            "variant": cta_variant,  # backward compat
-            "primary_color": event_data.primary_color,
-            "primary_need": event_data.primary_need,
-            "primary_conflict_style": event_data.primary_conflict_style,
-            "entry_point": event_data.entry_point,
-            "cta_location": event_data.cta_location,
-            "package_type": event_data.package_type,
-            "conversion": event_data.conversion,
-            "metadata": event_data.metadata,
-            "user_id": user_id,
-            "date": today,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "user_agent": request.headers.get("User-Agent", ""),
-            "ip_hash": None  # Don't store raw IP for privacy
-        }
-        
-        await db.r4_analytics.insert_one(event_doc)
-        
-        # Update daily aggregate for heatmap (non-PII)
-        if event_data.primary_need and event_data.primary_conflict_style:
-            await db.r4_analytics_daily.update_one(
-                {
-                    "date": today,
-                    "primary_need": event_data.primary_need,
-                    "primary_conflict_style": event_data.primary_conflict_style,
-                    "cta_variant": cta_variant,
-                    "package_type": event_data.package_type or "unknown"
-                },
-                {
-                    "$inc": {
-                        "count": 1,
-                        "conversions": 1 if event_data.conversion else 0
-                    },
-                    "$setOnInsert": {
-                        "created_at": datetime.now(timezone.utc).isoformat()
-                    }
-                },
-                upsert=True
-            )
-        
-        return {"status": "ok", "event_id": event_doc["event_id"]}
-    except Exception as e:
-        # Fire-and-forget - don't fail the request
-        return {"status": "ok", "error": str(e)}
+    # Get user info if available
+    user_id = get_auth_context(request.scope).user_id
+    
+    # Determine CTA variant (prefer cta_variant over variant for backward compat)
+    cta_variant = event_data.cta_variant or event_data.variant or "unknown"
+    
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    
+    # Create event document
+    event_doc = {
+        "event_id": f"evt_{uuid.uuid4().hex[:12]}",
+        "event": event_data.event,
+        "cta_variant": cta_variant,
+        "variant": cta_variant,  # backward compat
+        "primary_color": event_data.primary_color,
+        "primary_need": event_data.primary_need,
+        "primary_conflict_style": event_data.primary_conflict_style,
+        "entry_point": event_data.entry_point,
+        "cta_location": event_data.cta_location,
+        "package_type": event_data.package_type,
+        "conversion": event_data.conversion,
+        "metadata": event_data.metadata,
+        "user_id": user_id,
+        "date": today,
+        "created_at": now.isoformat(),
+        "created_at_dt": now,
+        "user_agent": request.headers.get("User-Agent", ""),
+        "ip_hash": None  # Don't store raw IP for privacy
+    }
+    
+    # Daily aggregate for heatmap (non-PII)
+    daily_key = None
+    if event_data.primary_need and event_data.primary_conflict_style:
+        daily_key = (
+            today,
+            event_data.primary_need,
+            event_data.primary_conflict_style,
+            cta_variant,
+            event_data.package_type or "unknown",
+        )
+    
+    accepted = get_analytics_buffer(db).add(event_doc, daily_key, bool(event_data.conversion))
+    return {"status": "accepted" if accepted else "dropped", "event_id": event_doc["event_id"]}
 
 
 class AnalyticsSummary(BaseModel):
@@ -1867,78 +1775,19 @@ async def get_analytics_summary(days: int = 30, admin_key: Optional[str] = None)
     from datetime import timedelta
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
     
-    # Aggregation pipeline for summary
-    pipeline = [
-        {"$match": {"created_at": {"$gte": cutoff}}},
-        {"$facet": {
-            "totals": [
-                {"$group": {
-                    "_id": "$event",
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "by_variant": [
-                {"$group": {
-                    "_id": {"variant": "$variant", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "by_color": [
-                {"$match": {"primary_color": {"$ne": None}}},
-                {"$group": {
-                    "_id": {"color": "$primary_color", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "by_need": [
-                {"$match": {"primary_need": {"$ne": None}}},
-                {"$group": {
-                    "_id": {"need": "$primary_need", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "by_conflict_style": [
-                {"$match": {"primary_conflict_style": {"$ne": None}}},
-                {"$group": {
-                    "_id": {"conflict_style": "$primary_conflict_style", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "by_entry_point": [
-                {"$group": {
-                    "_id": {"entry_point": "$entry_point", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "timeline": [
-                {"$group": {
-                    "_id": {
-                        "date": {"$substr": ["$created_at", 0, 10]},
-                        "event": "$event",
-                        "variant": "$variant"
-                    },
-                    "count": {"$sum": 1}
-                }},
-                {"$sort": {"_id.date": 1}}
-            ]
-        }}
-    ]
-    
-    result = await db.r4_analytics.aggregate(pipeline).to_list(1)
-    
-    if not result:
-        return {
-            "total_views": 0,
-            "total_clicks": 0,
-            "conversion_rate": 0,
-            "variants": {"soft": {"views": 0, "clicks": 0, "rate": 0}, "aggressive": {"views": 0, "clicks": 0, "rate": 0}},
-            "by_color": {},
-            "by_entry_point": {},
-            "timeline": [],
-            "period_days": days
-        }
-    
-    data = result[0]
+    # Counts by date and dimension from the hourly rollups
+    cube = await get_analytics_rollups(db).load_cube(cutoff)
+    data = {
+        "totals": facet(cube, "event"),
+        "by_variant": facet(cube, {"variant": "variant", "event": "event"}),
+        "by_color": facet(cube, {"color": "primary_color", "event": "event"}, require="primary_color"),
+        "by_need": facet(cube, {"need": "primary_need", "event": "event"}, require="primary_need"),
+        "by_conflict_style": facet(cube, {"conflict_style": "primary_conflict_style", "event": "event"},
+                                   require="primary_conflict_style"),
+        "by_entry_point": facet(cube, {"entry_point": "entry_point", "event": "event"}),
+        "timeline": sorted(facet(cube, {"date": "date", "event": "event", "variant": "variant"}),
+                           key=lambda item: item["_id"]["date"]),
+    }
     
     # Process totals
     totals = {item["_id"]: item["count"] for item in data.get("totals", [])}
@@ -2187,15 +2036,8 @@ async def get_abc_test_comparison(days: int = 30):
     from datetime import timedelta
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
     
-    pipeline = [
-        {"$match": {"created_at": {"$gte": cutoff}}},
-        {"$group": {
-            "_id": {"variant": "$cta_variant", "event": "$event"},
-            "count": {"$sum": 1}
-        }}
-    ]
-    
-    result = await db.r4_analytics.aggregate(pipeline).to_list(100)
+    cube = await get_analytics_rollups(db).load_cube(cutoff)
+    result = facet(cube, {"variant": "cta_variant", "event": "event"})
     
     # Process results
     variants = {
@@ -2266,39 +2108,12 @@ async def get_weekly_insights():
     week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
     
     # Get aggregated data
-    pipeline = [
-        {"$match": {"created_at": {"$gte": week_ago}}},
-        {"$facet": {
-            "by_need": [
-                {"$match": {"primary_need": {"$ne": None}}},
-                {"$group": {"_id": "$primary_need", "count": {"$sum": 1}}}
-            ],
-            "by_conflict": [
-                {"$match": {"primary_conflict_style": {"$ne": None}}},
-                {"$group": {"_id": "$primary_conflict_style", "count": {"$sum": 1}}}
-            ],
-            "by_variant": [
-                {"$group": {
-                    "_id": {"variant": "$cta_variant", "event": "$event"},
-                    "count": {"$sum": 1}
-                }}
-            ],
-            "totals": [
-                {"$group": {"_id": None, "total": {"$sum": 1}}}
-            ]
-        }}
-    ]
-    
-    result = await db.r4_analytics.aggregate(pipeline).to_list(1)
-    
-    if not result:
-        return {
-            "insights": [],
-            "summary_id": "Belum ada data cukup untuk analisis minggu ini.",
-            "summary_en": "Not enough data for this week's analysis."
-        }
-    
-    data = result[0]
+    cube = await get_analytics_rollups(db).load_cube(week_ago)
+    data = {
+        "by_need": facet(cube, "primary_need", require="primary_need"),
+        "by_conflict": facet(cube, "primary_conflict_style", require="primary_conflict_style"),
+        "by_variant": facet(cube, {"variant": "cta_variant", "event": "event"}),
+    }
     
     # Process needs
     needs_data = {item["_id"]: item["count"] for item in data.get("by_need", [])}
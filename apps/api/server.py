@@ -6,6 +6,7 @@ import os
 import logging
 from pathlib import Path
 from services.ai_service import generate_ai_content
+from utils.serialization import ORJSONResponse, ORJSONRoute
 
 # ===========================================
 # CRITICAL: Create app and health endpoint FIRST
@@ -16,7 +17,9 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # Create the main app IMMEDIATELY
-app = FastAPI(title="Relasi4Warna API")
+# orjson rendering app-wide; ORJSONRoute skips jsonable_encoder where safe
+app = FastAPI(title="Relasi4Warna API", default_response_class=ORJSONResponse)
+app.router.route_class = ORJSONRoute
 
 # ===========================================
 # Security Middleware Stack
@@ -24,24 +27,23 @@ app = FastAPI(title="Relasi4Warna API")
 # Import middleware (lazy load to keep health endpoint fast)
 def setup_security_middleware():
     """Setup security middleware after app is created."""
-    from middleware.rate_limit import RateLimitMiddleware
-    from middleware.request_size import RequestSizeLimitMiddleware
-    from middleware.security_headers import SecurityHeadersMiddleware
+    from middleware.compression import CompressionMiddleware
+    from middleware.profiling import ProfilingMiddleware
+    from middleware.request_metrics import RequestMetricsMiddleware
+    from middleware.security_stack import SecurityStackMiddleware
     
     # Order matters: outermost middleware runs first
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RequestSizeLimitMiddleware)
-    app.add_middleware(RateLimitMiddleware)
-
-# Add CORS middleware with env-driven configuration
+    app.add_middleware(CompressionMiddleware)
+    # Admin-armed request profiling (no-op unless a session is armed)
+    app.add_middleware(ProfilingMiddleware)
+    # Auth context, rate limit, size limit, security headers, CORS and
+    # request ID in a single ASGI pass
+    app.add_middleware(SecurityStackMiddleware, cors_origins=cors_origins, cors_allow_credentials=True)
+    # Per-route latency histograms, timing the whole stack
+    app.add_middleware(RequestMetricsMiddleware)
+
+# CORS configuration (applied by SecurityStackMiddleware)
 cors_origins = os.environ.get("CORS_ORIGINS", "*").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=cors_origins if cors_origins != ["*"] else ["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
 # Health endpoint MUST be registered before any other imports
 @app.get("/health", tags=["health"])
@@ -63,13 +65,10 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
-import bcrypt
-from jose import JWTError, jwt
+from jose import jwt
 import asyncio
-import httpx
 import base64
 import io
-import resend
 # AI Provider (OpenAI) - Use local packages directory
 import sys
 sys.path.insert(0, str(Path(__file__).parent / "packages"))
@@ -93,6 +92,7 @@ from ai_gateway import (
     LLMStatus,
     get_llm_gateway,
     get_budget_guard,
+    get_usage_rollups,
 )
 
 # Helper function to call LLM via gateway
@@ -159,6 +159,16 @@ from hitl_engine import (
     HITLEngine, RiskAssessmentInput, RiskLevel, ModerationDecision, ModerationAction,
     process_ai_output_with_hitl, SAFETY_BUFFER, SAFE_RESPONSE
 )
+from utils.static_payloads import register_static_payload, static_response
+from services.question_catalog import get_question_catalog
+from services.user_cache import get_user_cache
+from middleware.auth_context import get_auth_context
+from utils.passwords import hash_password, verify_password  # async, bcrypt on a bounded pool
+from utils.tracing import span, traced  # stage-level latency for report generation
+from utils.loop_monitor import get_loop_monitor, start_loop_monitor
+from utils.profiling import get_memory_profiler, get_request_profiler
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
 # MongoDB connection with proper settings for Atlas
 # MONGO_URL is required - should be set via .env or environment variable
@@ -227,19 +237,23 @@ MIDTRANS_IS_PRODUCTION = str(os.environ.get('MIDTRANS_IS_PRODUCTION', 'false')).
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID", "")
 GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET", "")
 
-# Initialize Midtrans Snap
-import midtransclient
-midtrans_snap = midtransclient.Snap(
-    is_production=MIDTRANS_IS_PRODUCTION,
-    server_key=MIDTRANS_SERVER_KEY,
-    client_key=MIDTRANS_CLIENT_KEY
-)
+# Midtrans Snap/Core client (async, pooled; shared with relasi4_routes)
+from services.midtrans_client import get_midtrans_client
+from services.resend_client import send_email
+from services.analytics_buffer import get_analytics_buffer
+from services.analytics_rollups import get_analytics_rollups
+from services.date_migration import get_date_migration
+from utils.dates import with_native_dates
+from utils.http_clients import close_http_clients, get_http_client, http_client_stats
+from utils.indexes import ensure_indexes
+from utils.pagination import InvalidCursor, fetch_page, get_count_cache
+from services import hitl_analytics, hitl_export
+from services.hitl_rollups import get_hitl_rollups
+from services.admin_dashboard import get_admin_dashboard
 
 # Resend Config
 RESEND_API_KEY = os.environ.get('RESEND_API_KEY', '')
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'noreply@relasi4warna.com')
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
 
 # OpenAI Config - Used by ai_gateway package
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
@@ -248,18 +262,18 @@ OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 # See call_ai_gateway() helper for the new API
 
 # Create routers (app already created at top of file)
-api_router = APIRouter(prefix="/api")
-auth_router = APIRouter(prefix="/auth", tags=["auth"])
-quiz_router = APIRouter(prefix="/quiz", tags=["quiz"])
-deep_dive_router = APIRouter(prefix="/deep-dive", tags=["deep-dive"])
-payment_router = APIRouter(prefix="/payment", tags=["payment"])
-admin_router = APIRouter(prefix="/admin", tags=["admin"])
-report_router = APIRouter(prefix="/report", tags=["report"])
-share_router = APIRouter(prefix="/share", tags=["share"])
-couples_router = APIRouter(prefix="/couples", tags=["couples"])
-email_router = APIRouter(prefix="/email", tags=["email"])
-analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
-system_router = APIRouter(prefix="/system", tags=["system"])
+api_router = APIRouter(prefix="/api", route_class=ORJSONRoute)
+auth_router = APIRouter(prefix="/auth", tags=["auth"], route_class=ORJSONRoute)
+quiz_router = APIRouter(prefix="/quiz", tags=["quiz"], route_class=ORJSONRoute)
+deep_dive_router = APIRouter(prefix="/deep-dive", tags=["deep-dive"], route_class=ORJSONRoute)
+payment_router = APIRouter(prefix="/payment", tags=["payment"], route_class=ORJSONRoute)
+admin_router = APIRouter(prefix="/admin", tags=["admin"], route_class=ORJSONRoute)
+report_router = APIRouter(prefix="/report", tags=["report"], route_class=ORJSONRoute)
+share_router = APIRouter(prefix="/share", tags=["share"], route_class=ORJSONRoute)
+couples_router = APIRouter(prefix="/couples", tags=["couples"], route_class=ORJSONRoute)
+email_router = APIRouter(prefix="/email", tags=["email"], route_class=ORJSONRoute)
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=ORJSONRoute)
+system_router = APIRouter(prefix="/system", tags=["system"], route_class=ORJSONRoute)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -412,33 +426,26 @@ class ElitePlusReportRequest(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
 def create_token(user_id: str, email: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     payload = {"user_id": user_id, "email": email, "exp": expire}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(authorization: str = Header(None)):
+async def get_current_user(request: Request, authorization: str = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    try:
-        token = authorization.replace("Bearer ", "")
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except JWTError:
+    # Claims were verified once by AuthContextMiddleware
+    auth = get_auth_context(request.scope)
+    if not auth.authenticated:
         raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = auth.user_id
+    user = await get_user_cache(db).get(user_id) if user_id else None
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
 
-async def get_admin_user(authorization: str = Header(None)):
-    user = await get_current_user(authorization)
+async def get_admin_user(request: Request, authorization: str = Header(None)):
+    user = await get_current_user(request, authorization)
     if not user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
@@ -454,7 +461,7 @@ async def login(data: UserLogin):
     password_hash = user.get("password_hash", "") if user else ""
     
     # Cek user ada DAN password cocok
-    if not user or not verify_password(data.password, password_hash):
+    if not user or not await verify_password(data.password, password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Generate token
@@ -492,7 +499,7 @@ async def login(data: UserLogin):
 @auth_router.post("/login", response_model=TokenResponse)
 async def login(data: UserLogin):
     user = await db.users.find_one({"email": data.email}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user or not await verify_password(data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_token(user["user_id"], user["email"])
@@ -524,28 +531,28 @@ async def google_auth(data: GoogleAuthRequest):
     """Authenticate with Google OAuth"""
     try:
         # 1. Exchange code for tokens
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": GOOGLE_CLIENT_ID,
-                    "client_secret": GOOGLE_CLIENT_SECRET,
-                    "code": data.code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": data.redirect_uri
-                }
-            )
-            tokens = token_response.json()
+        client = get_http_client("google")
+        token_response = await client.post(
+            "https://oauth2.googleapis.com/token",
+            data={
+                "client_id": GOOGLE_CLIENT_ID,
+                "client_secret": GOOGLE_CLIENT_SECRET,
+                "code": data.code,
+                "grant_type": "authorization_code",
+                "redirect_uri": data.redirect_uri
+            }
+        )
+        tokens = token_response.json()
             
-            if "error" in tokens:
-                raise HTTPException(status_code=400, detail=tokens.get("error_description", "Google auth failed"))
+        if "error" in tokens:
+            raise HTTPException(status_code=400, detail=tokens.get("error_description", "Google auth failed"))
             
-            # 2. Get user info from Google
-            userinfo_response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {tokens['access_token']}"}
-            )
-            userinfo = userinfo_response.json()
+        # 2. Get user info from Google
+        userinfo_response = await client.get(
+            "https://www.googleapis.com/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        userinfo = userinfo_response.json()
         
         email = userinfo.get("email", "").lower()
         if not email:
@@ -592,6 +599,7 @@ async def google_auth(data: GoogleAuthRequest):
                     "last_login": datetime.now(timezone.utc).isoformat()
                 }}
             )
+            await get_user_cache(db).invalidate(user_id)
             
             # Siapkan data untuk response
             created_at_val = user["created_at"]
@@ -738,9 +746,6 @@ async def forgot_password(data: ForgotPasswordRequest):
     
     if resend_api_key:
         try:
-            import resend
-            resend.api_key = resend_api_key
-            
             html_content = f"""
             <div style="font-family: 'Merriweather', Georgia, serif; max-width: 600px; margin: 0 auto; background-color: #FDFCF8; padding: 40px; border-radius: 12px;">
                 <div style="text-align: center; margin-bottom: 30px;">
@@ -781,12 +786,12 @@ async def forgot_password(data: ForgotPasswordRequest):
             </div>
             """
             
-            resend.Emails.send({
+            await send_email({
                 "from": f"Relasi4Warna <{sender_email}>",
                 "to": [data.email],
                 "subject": "Reset Password - Relasi4Warna",
                 "html": html_content
-            })
+            }, api_key=resend_api_key)
             logger.info(f"Password reset email sent to {email}")
         except Exception as e:
             logger.error(f"Failed to send password reset email: {e}")
@@ -821,14 +826,16 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
     
     # Update user's password
-    hashed_password = hash_password(data.new_password)
-    result = await db.users.update_one(
+    hashed_password = await hash_password(data.new_password)
+    updated_user = await db.users.find_one_and_update(
         {"email": reset_record["email"]},
-        {"$set": {"hashed_password": hashed_password}}
+        {"$set": {"hashed_password": hashed_password}},
+        projection={"_id": 0, "user_id": 1}
     )
     
-    if result.modified_count == 0:
+    if updated_user is None:
         raise HTTPException(status_code=400, detail="Failed to update password")
+    await get_user_cache(db).invalidate(updated_user["user_id"])
     
     # Mark token as used
     await db.password_resets.update_one(
@@ -858,9 +865,7 @@ async def verify_reset_token(token: str):
 
 # ==================== QUIZ ROUTES ====================
 
-@quiz_router.get("/series")
-async def get_series():
-    """Get all quiz series"""
+def _build_series_payload() -> dict:
     series_list = [
         {
             "id": "family",
@@ -901,30 +906,25 @@ async def get_series():
     ]
     return {"series": series_list}
 
+@quiz_router.get("/series")
+async def get_series(request: Request):
+    """Get all quiz series"""
+    return static_response(request, "quiz:series", _build_series_payload)
+
 @quiz_router.get("/questions/{series}")
-async def get_questions(series: str, language: str = "id"):
-    """Get questions for a specific series"""
-    questions = await db.questions.find(
-        {"series": series, "active": True},
-        {"_id": 0}
-    ).sort("order", 1).to_list(100)
+async def get_questions(series: str, request: Request, language: str = "id"):
+    """Get questions for a specific series (served from the question catalog)"""
+    catalog = get_question_catalog(db)
+    payload = await catalog.get_payload(series, language)
     
-    if not questions:
-        # Return seed questions if none exist
-        questions = await seed_questions_for_series(series)
-    
-    # Format questions based on language
-    formatted = []
-    for q in questions:
-        formatted.append({
-            "question_id": q.get("question_id", str(uuid.uuid4())),
-            "text": q.get(f"question_{language}_text", q.get("question_id_text", "")),
-            "type": q.get("question_type", "forced_choice"),
-            "options": q.get("options", []),
-            "order": q.get("order", 0)
-        })
+    if payload is None:
+        # Seed questions if none exist
+        if await seed_questions_for_series(series):
+            payload = await catalog.get_payload(series, language)
+        if payload is None:
+            return {"questions": [], "total": 0}
     
-    return {"questions": formatted, "total": len(formatted)}
+    return payload.response(request)
 
 @quiz_router.post("/start")
 async def start_quiz(data: QuizAttemptCreate, user=Depends(get_current_user)):
@@ -956,14 +956,9 @@ async def submit_quiz(data: QuizSubmit, user=Depends(get_current_user)):
     scores = {"driver": 0, "spark": 0, "anchor": 0, "analyst": 0}
     stress_markers = 0
     
-    # OPTIMIZATION: Batch fetch all questions to avoid N+1 query
+    # Question metadata comes from the in-memory catalog (no per-submit query)
     question_ids = [answer.question_id for answer in data.answers]
-    questions_cursor = db.questions.find(
-        {"question_id": {"$in": question_ids}},
-        {"_id": 0, "question_id": 1, "stress_marker_flag": 1}
-    )
-    questions_list = await questions_cursor.to_list(length=len(question_ids))
-    questions_map = {q["question_id"]: q for q in questions_list}
+    questions_map = await get_question_catalog(db).get_metadata(attempt.get("series"), question_ids)
     
     for answer in data.answers:
         archetype = answer.selected_option.lower()
@@ -1005,7 +1000,7 @@ async def submit_quiz(data: QuizSubmit, user=Depends(get_current_user)):
         "is_paid": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.results.insert_one(result)
+    await db.results.insert_one(with_native_dates(result, "created_at"))
     
     # Update attempt
     await db.quiz_attempts.update_one(
@@ -1112,17 +1107,18 @@ ARCHETYPES = {
 }
 
 @quiz_router.get("/archetypes")
-async def get_archetypes():
+async def get_archetypes(request: Request):
     """Get archetype information"""
-    return {"archetypes": ARCHETYPES}
+    return static_response(request, "quiz:archetypes", lambda: {"archetypes": ARCHETYPES})
 
 @quiz_router.get("/archetype/{archetype}")
-async def get_archetype(archetype: str, language: str = "id"):
+async def get_archetype(archetype: str, request: Request, language: str = "id"):
     """Get specific archetype details"""
-    archetype_data = ARCHETYPES.get(archetype.lower())
+    archetype = archetype.lower()
+    archetype_data = ARCHETYPES.get(archetype)
     if not archetype_data:
         raise HTTPException(status_code=404, detail="Archetype not found")
-    return archetype_data
+    return static_response(request, f"quiz:archetype:{archetype}", lambda: archetype_data)
 
 # ==================== PAYMENT ROUTES ====================
 
@@ -1206,7 +1202,7 @@ async def create_payment(data: PaymentCreate, user=Depends(get_current_user)):
         }
         
         # Create Snap transaction
-        snap_response = midtrans_snap.create_transaction(transaction_params)
+        snap_response = await get_midtrans_client().create_transaction(transaction_params)
         
         # Create payment record
         payment = {
@@ -1221,7 +1217,7 @@ async def create_payment(data: PaymentCreate, user=Depends(get_current_user)):
             "redirect_url": snap_response.get("redirect_url"),
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.payments.insert_one(payment)
+        await db.payments.insert_one(with_native_dates(payment, "created_at"))
         
         return {
             "payment_id": payment_id,
@@ -1264,18 +1260,20 @@ async def payment_webhook(request: Request):
             if MIDTRANS_IS_PRODUCTION:
                 raise HTTPException(status_code=401, detail="Invalid signature")
         
+        get_midtrans_client().invalidate_status(order_id)
+        
         # Handle transaction status
         if transaction_status == "capture" or transaction_status == "settlement":
             if fraud_status == "accept" or fraud_status is None:
                 # Payment successful
                 await db.payments.update_one(
                     {"payment_id": order_id},
-                    {"$set": {
+                    {"$set": with_native_dates({
                         "status": "paid",
                         "payment_type": payment_type,
                         "transaction_status": transaction_status,
                         "paid_at": datetime.now(timezone.utc).isoformat()
-                    }}
+                    }, "paid_at")}
                 )
                 
                 # Get payment details
@@ -1309,6 +1307,7 @@ async def payment_webhook(request: Request):
                                     "subscription_payment_id": order_id
                                 }}
                             )
+                            await get_user_cache(db).invalidate(user_id)
                             logger.info(f"User {user_id} tier upgraded to {new_tier}")
                     
                     logger.info(f"Payment {order_id} marked as paid, result {payment['result_id']} unlocked")
@@ -1352,17 +1351,17 @@ async def get_payment_status(payment_id: str, user=Depends(get_current_user)):
     # If still pending, check with Midtrans
     if payment.get("status") == "pending":
         try:
-            status_response = midtrans_snap.transactions.status(payment_id)
+            status_response = await get_midtrans_client().transaction_status(payment_id)
             transaction_status = status_response.get("transaction_status")
             
             if transaction_status in ["capture", "settlement"]:
                 await db.payments.update_one(
                     {"payment_id": payment_id},
-                    {"$set": {
+                    {"$set": with_native_dates({
                         "status": "paid",
                         "transaction_status": transaction_status,
                         "paid_at": datetime.now(timezone.utc).isoformat()
-                    }}
+                    }, "paid_at")}
                 )
                 
                 await db.results.update_one(
@@ -1387,12 +1386,12 @@ async def simulate_payment(payment_id: str, user=Depends(get_current_user)):
     # Update payment status
     await db.payments.update_one(
         {"payment_id": payment_id},
-        {"$set": {
+        {"$set": with_native_dates({
             "status": "paid",
             "payment_type": "simulation",
             "transaction_status": "settlement",
             "paid_at": datetime.now(timezone.utc).isoformat()
-        }}
+        }, "paid_at")}
     )
     
     # Update result to paid
@@ -1421,6 +1420,7 @@ async def simulate_payment(payment_id: str, user=Depends(get_current_user)):
                 "subscription_payment_id": payment_id
             }}
         )
+        await get_user_cache(db).invalidate(user["user_id"])
         return {"status": "success", "message": f"Payment simulated successfully. Tier upgraded to {new_tier}"}
     
     return {"status": "success", "message": "Payment simulated successfully"}
@@ -1428,12 +1428,14 @@ async def simulate_payment(payment_id: str, user=Depends(get_current_user)):
 # ==================== REPORT ROUTES ====================
 
 @report_router.post("/generate/{result_id}")
+@traced("report.generate")
 async def generate_report(result_id: str, language: str = "id", force: bool = False, user=Depends(get_current_user)):
     """Generate AI-powered premium relationship intelligence report"""
-    result = await db.results.find_one(
-        {"result_id": result_id, "user_id": user["user_id"]},
-        {"_id": 0}
-    )
+    with span("report.results_lookup"):
+        result = await db.results.find_one(
+            {"result_id": result_id, "user_id": user["user_id"]},
+            {"_id": 0}
+        )
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
@@ -1442,10 +1444,11 @@ async def generate_report(result_id: str, language: str = "id", force: bool = Fa
     
     # Check if report already exists (skip if force=True)
     if not force:
-        existing_report = await db.reports.find_one(
-            {"result_id": result_id, "language": language},
-            {"_id": 0}
-        )
+        with span("report.existing_lookup"):
+            existing_report = await db.reports.find_one(
+                {"result_id": result_id, "language": language},
+                {"_id": 0}
+            )
         if existing_report:
             return existing_report
     
@@ -1675,7 +1678,8 @@ DELIVER THE FULL PREMIUM REPORT NOW.
             ai_output=None,
             language=language
         )
-        pre_assessment = await hitl_engine.assess_risk(pre_assessment_input)
+        with span("report.pre_assess"):
+            pre_assessment = await hitl_engine.assess_risk(pre_assessment_input)
         
         # If Level 3 due to stress signals, return safe response immediately
         if pre_assessment.risk_level == RiskLevel.LEVEL_3:
@@ -1683,11 +1687,12 @@ DELIVER THE FULL PREMIUM REPORT NOW.
             safe_response = hitl_engine.get_safe_response(language)
             
             # Create queue item for review
-            await hitl_engine.create_moderation_queue_item(
-                pre_assessment_input,
-                pre_assessment,
-                "Report generation blocked - high risk signals detected before generation"
-            )
+            with span("report.moderation_queue"):
+                await hitl_engine.create_moderation_queue_item(
+                    pre_assessment_input,
+                    pre_assessment,
+                    "Report generation blocked - high risk signals detected before generation"
+                )
             
             report_id = f"report_{uuid.uuid4().hex[:12]}"
             report = {
@@ -1700,7 +1705,8 @@ DELIVER THE FULL PREMIUM REPORT NOW.
                 "hitl_assessment_id": pre_assessment.assessment_id,
                 "created_at": datetime.now(timezone.utc).isoformat()
             }
-            await db.reports.insert_one(report)
+            with span("report.save"):
+                await db.reports.insert_one(report)
             report.pop("_id", None)
             return report
         
@@ -1712,16 +1718,17 @@ DELIVER THE FULL PREMIUM REPORT NOW.
             tier = result.get("tier", "premium")
             product_type = "complete_report" if tier == "premium" else "elite_report"
             
-            llm_response = await guarded_llm.generate(
-                user=user,
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                product_type=product_type,
-                hitl_level=int(pre_assessment.risk_level.value.split("_")[1]) if hasattr(pre_assessment.risk_level, 'value') else 1,
-                is_report_generation=True,
-                temperature=0.3,
-                language=language,
-            )
+            with span("report.llm"):
+                llm_response = await guarded_llm.generate(
+                    user=user,
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    product_type=product_type,
+                    hitl_level=int(pre_assessment.risk_level.value.split("_")[1]) if hasattr(pre_assessment.risk_level, 'value') else 1,
+                    is_report_generation=True,
+                    temperature=0.3,
+                    language=language,
+                )
             
             if not llm_response.success:
                 # Guardrail blocked the request
@@ -1738,7 +1745,8 @@ DELIVER THE FULL PREMIUM REPORT NOW.
                     "block_reason": llm_response.block_reason,
                     "created_at": datetime.now(timezone.utc).isoformat()
                 }
-                await db.reports.insert_one(report)
+                with span("report.save"):
+                    await db.reports.insert_one(report)
                 report.pop("_id", None)
                 return report
             
@@ -1763,7 +1771,8 @@ DELIVER THE FULL PREMIUM REPORT NOW.
             ai_output=report_content,
             language=language
         )
-        post_assessment = await hitl_engine.assess_risk(post_assessment_input)
+        with span("report.post_assess"):
+            post_assessment = await hitl_engine.assess_risk(post_assessment_input)
         
         # Step 4: Process based on HITL level
         hitl_status = "approved"
@@ -1771,11 +1780,12 @@ DELIVER THE FULL PREMIUM REPORT NOW.
         
         if post_assessment.risk_level == RiskLevel.LEVEL_3:
             # Hold for human review
-            queue_id = await hitl_engine.create_moderation_queue_item(
-                post_assessment_input,
-                post_assessment,
-                report_content
-            )
+            with span("report.moderation_queue"):
+                queue_id = await hitl_engine.create_moderation_queue_item(
+                    post_assessment_input,
+                    post_assessment,
+                    report_content
+                )
             
             # Return safe response while pending review
             final_content = hitl_engine.get_safe_response(language)
@@ -1791,11 +1801,12 @@ DELIVER THE FULL PREMIUM REPORT NOW.
             
             # Check if sampled for review
             if post_assessment.requires_human_review:
-                await hitl_engine.create_moderation_queue_item(
-                    post_assessment_input,
-                    post_assessment,
-                    report_content
-                )
+                with span("report.moderation_queue"):
+                    await hitl_engine.create_moderation_queue_item(
+                        post_assessment_input,
+                        post_assessment,
+                        report_content
+                    )
                 logger.info(f"Report {result_id} sampled for review (Level 2)")
         
         # Save report
@@ -1816,13 +1827,15 @@ DELIVER THE FULL PREMIUM REPORT NOW.
         
         # Use upsert when force=true, otherwise insert
         if force:
-            await db.reports.replace_one(
-                {"result_id": result_id, "language": language},
-                report,
-                upsert=True
-            )
+            with span("report.save"):
+                await db.reports.replace_one(
+                    {"result_id": result_id, "language": language},
+                    report,
+                    upsert=True
+                )
         else:
-            await db.reports.insert_one(report)
+            with span("report.save"):
+                await db.reports.insert_one(report)
         
         # Return without MongoDB _id and original_content for security
         report.pop("_id", None)
@@ -1837,26 +1850,8 @@ DELIVER THE FULL PREMIUM REPORT NOW.
 
 @admin_router.get("/stats")
 async def get_admin_stats(user=Depends(get_admin_user)):
-    """Get admin dashboard stats"""
-    total_users = await db.users.count_documents({})
-    total_attempts = await db.quiz_attempts.count_documents({})
-    total_completed = await db.quiz_attempts.count_documents({"status": "completed"})
-    total_paid = await db.results.count_documents({"is_paid": True})
-    
-    # Archetype distribution
-    pipeline = [
-        {"$match": {"primary_archetype": {"$exists": True}}},
-        {"$group": {"_id": "$primary_archetype", "count": {"$sum": 1}}}
-    ]
-    archetype_dist = await db.results.aggregate(pipeline).to_list(10)
-    
-    return {
-        "total_users": total_users,
-        "total_attempts": total_attempts,
-        "completion_rate": round((total_completed / total_attempts * 100) if total_attempts > 0 else 0, 1),
-        "conversion_rate": round((total_paid / total_completed * 100) if total_completed > 0 else 0, 1),
-        "archetype_distribution": {item["_id"]: item["count"] for item in archetype_dist}
-    }
+    """Get admin dashboard stats (cached, see services/admin_dashboard.py)"""
+    return await get_admin_dashboard(db).stats()
 
 @admin_router.get("/questions")
 async def get_admin_questions(series: str = None, user=Depends(get_admin_user)):
@@ -1875,6 +1870,7 @@ async def create_question(data: QuestionCreate, user=Depends(get_admin_user)):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.questions.insert_one(question)
+    await get_question_catalog(db).invalidate()
     return {"question_id": question_id, "message": "Question created"}
 
 @admin_router.put("/questions/{question_id}")
@@ -1886,6 +1882,7 @@ async def update_question(question_id: str, data: QuestionCreate, user=Depends(g
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Question not found")
+    await get_question_catalog(db).invalidate()
     return {"message": "Question updated"}
 
 @admin_router.delete("/questions/{question_id}")
@@ -1894,6 +1891,7 @@ async def delete_question(question_id: str, user=Depends(get_admin_user)):
     result = await db.questions.delete_one({"question_id": question_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Question not found")
+    await get_question_catalog(db).invalidate()
     return {"message": "Question deleted"}
 
 # ==================== SHARE ROUTES ====================
@@ -2084,7 +2082,7 @@ async def send_report_email(data: EmailReportRequest, user=Depends(get_current_u
             "subject": subject,
             "html": html_content
         }
-        email = await asyncio.to_thread(resend.Emails.send, params)
+        email = await send_email(params)
         
         # Log email sent
         await db.email_logs.insert_one({
@@ -2177,7 +2175,7 @@ async def invite_partner(data: CouplesInvite, user=Depends(get_current_user)):
                 "subject": f"{user.get('name', 'Pasangan Anda')} mengundang Anda ke Relasi4Warna",
                 "html": html_content
             }
-            await asyncio.to_thread(resend.Emails.send, params)
+            await send_email(params)
         except Exception as e:
             logger.error(f"Failed to send invite email: {e}")
     
@@ -3303,6 +3301,7 @@ async def download_preview_pdf(result_id: str, language: str = "id", user=Depend
 # ==================== ELITE TIER REPORT ====================
 
 @report_router.post("/elite/{result_id}")
+@traced("elite_report.generate")
 async def generate_elite_report(
     result_id: str,
     request: EliteReportRequest,
@@ -3313,10 +3312,11 @@ async def generate_elite_report(
     Requires: user_is_paid = true AND tier = "elite"
     """
     # Validate result ownership
-    result = await db.results.find_one(
-        {"result_id": result_id, "user_id": user["user_id"]},
-        {"_id": 0}
-    )
+    with span("elite_report.results_lookup"):
+        result = await db.results.find_one(
+            {"result_id": result_id, "user_id": user["user_id"]},
+            {"_id": 0}
+        )
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
@@ -3334,10 +3334,11 @@ async def generate_elite_report(
     
     # Check for existing elite report (unless force)
     if not request.force:
-        existing = await db.elite_reports.find_one(
-            {"result_id": result_id, "language": language},
-            {"_id": 0}
-        )
+        with span("elite_report.existing_lookup"):
+            existing = await db.elite_reports.find_one(
+                {"result_id": result_id, "language": language},
+                {"_id": 0}
+            )
         if existing:
             return existing
     
@@ -3575,16 +3576,17 @@ DELIVER ELITE OUTPUT NOW.
 
     # Generate using LLM Gateway
     try:
-        elite_content = await call_ai_gateway(
-            prompt=elite_user_prompt,
-            system_prompt=elite_system_prompt,
-            user_id=user["user_id"],
-            tier=user.get("tier", "elite"),
-            endpoint_name="/api/report/generate-elite",
-            mode="final",
-            hitl_level=pre_hitl_level,
-            language=language
-        )
+        with span("elite_report.llm"):
+            elite_content = await call_ai_gateway(
+                prompt=elite_user_prompt,
+                system_prompt=elite_system_prompt,
+                user_id=user["user_id"],
+                tier=user.get("tier", "elite"),
+                endpoint_name="/api/report/generate-elite",
+                mode="final",
+                hitl_level=pre_hitl_level,
+                language=language
+            )
     except HTTPException:
         raise
     except Exception as e:
@@ -3640,11 +3642,12 @@ DELIVER ELITE OUTPUT NOW.
     }
     
     # Upsert report
-    await db.elite_reports.replace_one(
-        {"result_id": result_id, "language": language},
-        elite_report,
-        upsert=True
-    )
+    with span("elite_report.save"):
+        await db.elite_reports.replace_one(
+            {"result_id": result_id, "language": language},
+            elite_report,
+            upsert=True
+        )
     
     return {
         "report_id": report_id,
@@ -3670,6 +3673,7 @@ async def get_elite_report(result_id: str, language: str = "id", user=Depends(ge
 # ==================== ELITE+ TIER REPORT ====================
 
 @report_router.post("/elite-plus/{result_id}")
+@traced("elite_plus_report.generate")
 async def generate_elite_plus_report(
     result_id: str,
     request: ElitePlusReportRequest,
@@ -3680,10 +3684,11 @@ async def generate_elite_plus_report(
     Requires: user_is_paid = true AND tier = "elite_plus"
     """
     # Validate result ownership
-    result = await db.results.find_one(
-        {"result_id": result_id, "user_id": user["user_id"]},
-        {"_id": 0}
-    )
+    with span("elite_plus_report.results_lookup"):
+        result = await db.results.find_one(
+            {"result_id": result_id, "user_id": user["user_id"]},
+            {"_id": 0}
+        )
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
@@ -3701,10 +3706,11 @@ async def generate_elite_plus_report(
     
     # Check for existing elite+ report
     if not request.force:
-        existing = await db.elite_plus_reports.find_one(
-            {"result_id": result_id, "language": language},
-            {"_id": 0}
-        )
+        with span("elite_plus_report.existing_lookup"):
+            existing = await db.elite_plus_reports.find_one(
+                {"result_id": result_id, "language": language},
+                {"_id": 0}
+            )
         if existing:
             return existing
     
@@ -3963,16 +3969,17 @@ DELIVER ELITE+ OUTPUT NOW.
 
     # Generate using LLM Gateway
     try:
-        elite_plus_content = await call_ai_gateway(
-            prompt=elite_plus_user_prompt,
-            system_prompt=elite_plus_system_prompt,
-            user_id=user["user_id"],
-            tier=user.get("tier", "elite_plus"),
-            endpoint_name="/api/report/generate-elite-plus",
-            mode="final",
-            hitl_level=pre_hitl_level,
-            language=language
-        )
+        with span("elite_plus_report.llm"):
+            elite_plus_content = await call_ai_gateway(
+                prompt=elite_plus_user_prompt,
+                system_prompt=elite_plus_system_prompt,
+                user_id=user["user_id"],
+                tier=user.get("tier", "elite_plus"),
+                endpoint_name="/api/report/generate-elite-plus",
+                mode="final",
+                hitl_level=pre_hitl_level,
+                language=language
+            )
     except HTTPException:
         raise
     except Exception as e:
@@ -4023,11 +4030,12 @@ DELIVER ELITE+ OUTPUT NOW.
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.elite_plus_reports.replace_one(
-        {"result_id": result_id, "language": language},
-        elite_plus_report,
-        upsert=True
-    )
+    with span("elite_plus_report.save"):
+        await db.elite_plus_reports.replace_one(
+            {"result_id": result_id, "language": language},
+            elite_plus_report,
+            upsert=True
+        )
     
     return {
         "report_id": report_id,
@@ -4235,9 +4243,11 @@ async def delete_pricing(product_id: str, user=Depends(get_admin_user)):
 
 @admin_router.post("/questions/bulk")
 async def create_questions_bulk(data: QuestionBulkCreate, user=Depends(get_admin_user)):
-    """Bulk create questions for a series"""
+    """Bulk create questions for a series (single bulk_write)"""
     created_count = 0
     errors = []
+    operations = []
+    op_indexes = []  # operation position -> submitted question index
     
     for idx, q in enumerate(data.questions):
         try:
@@ -4256,11 +4266,23 @@ async def create_questions_bulk(data: QuestionBulkCreate, user=Depends(get_admin
                 "created_at": datetime.now(timezone.utc).isoformat(),
                 "created_by": user["user_id"]
             }
-            await db.questions.insert_one(question)
-            created_count += 1
+            operations.append(InsertOne(question))
+            op_indexes.append(idx)
         except Exception as e:
             errors.append({"index": idx, "error": str(e)})
     
+    if operations:
+        try:
+            result = await db.questions.bulk_write(operations, ordered=False)
+            created_count = result.inserted_count
+        except BulkWriteError as e:
+            created_count = e.details.get("nInserted", 0)
+            for write_error in e.details.get("writeErrors", []):
+                errors.append({"index": op_indexes[write_error["index"]], "error": write_error.get("errmsg", "")})
+            errors.sort(key=lambda err: err["index"])
+        if created_count:
+            await get_question_catalog(db).invalidate()
+    
     return {
         "message": f"Created {created_count} questions",
         "created_count": created_count,
@@ -4280,16 +4302,18 @@ async def toggle_question(question_id: str, user=Depends(get_admin_user)):
         {"question_id": question_id},
         {"$set": {"active": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await get_question_catalog(db).invalidate()
     return {"message": f"Question {'activated' if new_status else 'deactivated'}", "active": new_status}
 
 @admin_router.post("/questions/reorder")
 async def reorder_questions(series: str, question_ids: List[str], user=Depends(get_admin_user)):
-    """Reorder questions in a series"""
-    for idx, question_id in enumerate(question_ids):
-        await db.questions.update_one(
-            {"question_id": question_id, "series": series},
-            {"$set": {"order": idx + 1}}
-        )
+    """Reorder questions in a series (single bulk_write)"""
+    if question_ids:
+        await db.questions.bulk_write([
+            UpdateOne({"question_id": question_id, "series": series}, {"$set": {"order": idx + 1}})
+            for idx, question_id in enumerate(question_ids)
+        ], ordered=False)
+        await get_question_catalog(db).invalidate()
     return {"message": "Questions reordered", "series": series}
 
 @admin_router.get("/questions/stats")
@@ -4317,78 +4341,36 @@ async def get_questions_stats(user=Depends(get_admin_user)):
 
 @admin_router.get("/dashboard/overview")
 async def get_admin_dashboard_overview(user=Depends(get_admin_user)):
-    """Get comprehensive admin dashboard overview"""
-    now = datetime.now(timezone.utc)
-    today = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-    week_ago = (now - timedelta(days=7)).isoformat()
-    month_ago = (now - timedelta(days=30)).isoformat()
-    
-    # User stats
-    total_users = await db.users.count_documents({})
-    new_users_today = await db.users.count_documents({"created_at": {"$gte": today}})
-    new_users_week = await db.users.count_documents({"created_at": {"$gte": week_ago}})
-    
-    # Quiz stats
-    total_results = await db.results.count_documents({})
-    results_today = await db.results.count_documents({"created_at": {"$gte": today}})
-    results_week = await db.results.count_documents({"created_at": {"$gte": week_ago}})
-    
-    # Payment stats
-    total_paid = await db.payments.count_documents({"status": "paid"})
-    paid_today = await db.payments.count_documents({"status": "paid", "paid_at": {"$gte": today}})
-    paid_week = await db.payments.count_documents({"status": "paid", "paid_at": {"$gte": week_ago}})
-    
-    # Revenue calculation
-    revenue_pipeline = [
-        {"$match": {"status": "paid", "paid_at": {"$gte": month_ago}}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    revenue_month = await db.payments.aggregate(revenue_pipeline).to_list(1)
-    
-    # Archetype distribution
-    archetype_pipeline = [
-        {"$group": {"_id": "$primary_archetype", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    archetype_dist = await db.results.aggregate(archetype_pipeline).to_list(10)
-    
-    # Series distribution
-    series_pipeline = [
-        {"$group": {"_id": "$series", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    series_dist = await db.results.aggregate(series_pipeline).to_list(10)
-    
-    return {
-        "users": {
-            "total": total_users,
-            "today": new_users_today,
-            "week": new_users_week
-        },
-        "quizzes": {
-            "total": total_results,
-            "today": results_today,
-            "week": results_week
-        },
-        "payments": {
-            "total_paid": total_paid,
-            "today": paid_today,
-            "week": paid_week,
-            "revenue_month": revenue_month[0]["total"] if revenue_month else 0
-        },
-        "distributions": {
-            "archetypes": {item["_id"]: item["count"] for item in archetype_dist if item["_id"]},
-            "series": {item["_id"]: item["count"] for item in series_dist if item["_id"]}
-        },
-        "generated_at": now.isoformat()
-    }
+    """Get comprehensive admin dashboard overview (cached, see services/admin_dashboard.py)"""
+    return await get_admin_dashboard(db).overview()
+
+async def paginated(collection, query: dict, sort, limit: int, cursor: Optional[str],
+                    skip: int = 0, projection: Optional[dict] = None, include_total: bool = True):
+    """Keyset page + cached total for admin/list endpoints (utils.pagination)."""
+    try:
+        items, next_cursor = await fetch_page(
+            collection, query, sort, limit, cursor=cursor,
+            projection=projection or {"_id": 0}, skip=skip,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = await get_count_cache().total(collection, query) if include_total else None
+    return items, next_cursor, total
 
 @admin_router.get("/users")
-async def get_users(skip: int = 0, limit: int = 50, user=Depends(get_admin_user)):
-    """Get all users (admin only)"""
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).skip(skip).limit(limit).to_list(limit)
-    total = await db.users.count_documents({})
-    return {"users": users, "total": total}
+async def get_users(
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    user=Depends(get_admin_user)
+):
+    """Get all users (admin only), newest first. Pass ``next_cursor`` back as ``cursor``."""
+    users, next_cursor, total = await paginated(
+        db.users, {}, [("created_at", -1), ("user_id", -1)], limit, cursor, skip=skip,
+        projection={"_id": 0, "password_hash": 0}, include_total=include_total,
+    )
+    return {"users": users, "total": total, "next_cursor": next_cursor}
 
 @admin_router.delete("/reports/clear-cache")
 async def clear_reports_cache(user=Depends(get_admin_user)):
@@ -4425,6 +4407,7 @@ async def update_user_tier(user_id: str, tier: str, user=Depends(get_admin_user)
             "tier_updated_by": user["user_id"]
         }}
     )
+    await get_user_cache(db).invalidate(user_id)
     
     return {
         "message": f"User tier updated to {tier}",
@@ -4433,18 +4416,34 @@ async def update_user_tier(user_id: str, tier: str, user=Depends(get_admin_user)
     }
 
 @admin_router.get("/elite/reports")
-async def get_all_elite_reports(skip: int = 0, limit: int = 50, user=Depends(get_admin_user)):
+async def get_all_elite_reports(
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    user=Depends(get_admin_user)
+):
     """Get all elite reports for admin review"""
-    reports = await db.elite_reports.find({}, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.elite_reports.count_documents({})
-    return {"reports": reports, "total": total}
+    reports, next_cursor, total = await paginated(
+        db.elite_reports, {}, [("created_at", -1), ("report_id", -1)], limit, cursor, skip=skip,
+        include_total=include_total,
+    )
+    return {"reports": reports, "total": total, "next_cursor": next_cursor}
 
 @admin_router.get("/results")
-async def get_all_results(skip: int = 0, limit: int = 50, user=Depends(get_admin_user)):
+async def get_all_results(
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    user=Depends(get_admin_user)
+):
     """Get all quiz results (admin only)"""
-    results = await db.results.find({}, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.results.count_documents({})
-    return {"results": results, "total": total}
+    results, next_cursor, total = await paginated(
+        db.results, {}, [("created_at", -1), ("result_id", -1)], limit, cursor, skip=skip,
+        include_total=include_total,
+    )
+    return {"results": results, "total": total, "next_cursor": next_cursor}
 
 # ==================== HITL MODERATION ADMIN ROUTES ====================
 
@@ -4471,28 +4470,31 @@ async def get_moderation_queue(
     series: Optional[str] = None,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     user=Depends(get_admin_user)
 ):
     """Get moderation queue items"""
-    items = await hitl_engine.get_moderation_queue(
-        status=status,
-        risk_level=risk_level,
-        series=series,
-        limit=limit,
-        skip=skip
-    )
-    
-    # Get total count
-    query = {}
-    if status:
-        query["status"] = status
-    if risk_level:
-        query["risk_level"] = risk_level
-    if series:
-        query["series"] = series
-    total = await db.moderation_queue.count_documents(query)
+    try:
+        items, next_cursor = await hitl_engine.get_moderation_queue(
+            status=status,
+            risk_level=risk_level,
+            series=series,
+            limit=limit,
+            skip=skip,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Cached total (a full count per page would dominate deep pages)
+    total = None
+    if include_total:
+        total = await get_count_cache().total(
+            db.moderation_queue, HITLEngine.queue_query(status, risk_level, series)
+        )
     
-    return {"items": items, "total": total}
+    return {"items": items, "total": total, "next_cursor": next_cursor}
 
 @admin_router.get("/hitl/queue/{queue_id}")
 async def get_queue_item(queue_id: str, user=Depends(get_admin_user)):
@@ -4575,8 +4577,8 @@ async def update_keywords(
         keywords_en=data.keywords_en
     )
     
-    # Audit log
-    await db.audit_logs.insert_one({
+    # Audit log (also counted in the moderator performance rollups)
+    await hitl_engine.write_audit_log({
         "log_id": f"log_{uuid.uuid4().hex[:12]}",
         "action": "keyword_update",
         "category": category,
@@ -4626,7 +4628,7 @@ async def get_all_audit_logs(
 # ==================== SEED DATA ====================
 
 # Communication Challenge Router
-challenge_router = APIRouter(prefix="/challenge", tags=["challenge"])
+challenge_router = APIRouter(prefix="/challenge", tags=["challenge"], route_class=ORJSONRoute)
 
 class StartChallengeRequest(BaseModel):
     archetype: str
@@ -4999,7 +5001,7 @@ async def get_premium_content_detail(content_id: str, language: str = "id", user
         raise HTTPException(status_code=500, detail="Failed to generate content")
 
 # Team/Family Pack Router
-team_router = APIRouter(prefix="/team", tags=["team"])
+team_router = APIRouter(prefix="/team", tags=["team"], route_class=ORJSONRoute)
 
 class CreateTeamPackRequest(BaseModel):
     pack_name: str
@@ -5091,7 +5093,7 @@ async def invite_team_member(data: InviteTeamMemberRequest, user=Depends(get_cur
         """
         try:
             params = {"from": SENDER_EMAIL, "to": [data.member_email], "subject": subject, "html": html_content}
-            await asyncio.to_thread(resend.Emails.send, params)
+            await send_email(params)
         except Exception as e:
             logger.error(f"Failed to send invite email: {e}")
     
@@ -5361,7 +5363,9 @@ async def leave_team_pack(pack_id: str, user=Depends(get_current_user)):
     return {"status": "left", "pack_id": pack_id}
 
 # Blog Router
-blog_router = APIRouter(prefix="/blog", tags=["blog"])
+blog_router = APIRouter(prefix="/blog", tags=["blog"], route_class=ORJSONRoute)
+
+BLOG_ARTICLE_SORT = [("created_at", -1), ("article_id", -1)]
 
 class CreateArticleRequest(BaseModel):
     title_id: str
@@ -5407,9 +5411,10 @@ async def get_articles(
     limit: int = 10, 
     category: Optional[str] = None,
     tag: Optional[str] = None,
-    status: str = "published"
+    status: str = "published",
+    cursor: Optional[str] = None
 ):
-    """Get paginated blog articles"""
+    """Get paginated blog articles (``page`` or, for deep paging, ``cursor``)"""
     skip = (page - 1) * limit
     
     query = {}
@@ -5420,15 +5425,17 @@ async def get_articles(
     if tag:
         query["tags"] = tag
     
-    articles = await db.blog_articles.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.blog_articles.count_documents(query)
+    articles, next_cursor, total = await paginated(
+        db.blog_articles, query, BLOG_ARTICLE_SORT, limit, cursor, skip=skip
+    )
     
     return {
         "articles": articles,
         "total": total,
         "page": page,
         "limit": limit,
-        "total_pages": (total + limit - 1) // limit
+        "total_pages": (total + limit - 1) // limit,
+        "next_cursor": next_cursor
     }
 
 @blog_router.get("/articles/{slug}")
@@ -5448,9 +5455,9 @@ async def get_article_by_slug(slug: str):
     return article
 
 @blog_router.get("/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """Get blog categories"""
-    return {"categories": BLOG_CATEGORIES}
+    return static_response(request, "blog:categories", lambda: {"categories": BLOG_CATEGORIES})
 
 @blog_router.get("/featured")
 async def get_featured_articles(limit: int = 3):
@@ -5462,7 +5469,7 @@ async def get_featured_articles(limit: int = 3):
     return {"articles": articles}
 
 # Compatibility Router
-compatibility_router = APIRouter(prefix="/compatibility", tags=["compatibility"])
+compatibility_router = APIRouter(prefix="/compatibility", tags=["compatibility"], route_class=ORJSONRoute)
 
 # Comprehensive compatibility data for all 16 combinations
 COMPATIBILITY_MATRIX = {
@@ -6212,11 +6219,11 @@ COMPATIBILITY_MATRIX = {
     }
 }
 
-@compatibility_router.get("/matrix")
-async def get_compatibility_matrix():
-    """Get the full compatibility matrix"""
+COMPATIBILITY_ARCHETYPES = ["driver", "spark", "anchor", "analyst"]
+
+def _build_compatibility_matrix() -> dict:
     # Create a summary view
-    archetypes = ["driver", "spark", "anchor", "analyst"]
+    archetypes = COMPATIBILITY_ARCHETYPES
     matrix_summary = []
     
     for arch1 in archetypes:
@@ -6232,12 +6239,7 @@ async def get_compatibility_matrix():
     
     return {"matrix": matrix_summary, "archetypes": archetypes}
 
-@compatibility_router.get("/pair/{arch1}/{arch2}")
-async def get_compatibility_pair(arch1: str, arch2: str, language: str = "id"):
-    """Get detailed compatibility for a specific pair"""
-    arch1 = arch1.lower()
-    arch2 = arch2.lower()
-    
+def _build_compatibility_pair(arch1: str, arch2: str, language: str) -> dict:
     key = f"{arch1}_{arch2}"
     if key not in COMPATIBILITY_MATRIX:
         # Try reversed
@@ -6263,11 +6265,8 @@ async def get_compatibility_pair(arch1: str, arch2: str, language: str = "id"):
     
     return result
 
-@compatibility_router.get("/for/{archetype}")
-async def get_compatibility_for_archetype(archetype: str, language: str = "id"):
-    """Get all compatibilities for a specific archetype"""
-    archetype = archetype.lower()
-    archetypes = ["driver", "spark", "anchor", "analyst"]
+def _build_compatibility_for_archetype(archetype: str, language: str) -> dict:
+    archetypes = COMPATIBILITY_ARCHETYPES
     
     if archetype not in archetypes:
         raise HTTPException(status_code=400, detail="Invalid archetype")
@@ -6297,6 +6296,32 @@ async def get_compatibility_for_archetype(archetype: str, language: str = "id"):
         "compatibilities": compatibilities
     }
 
+@compatibility_router.get("/matrix")
+async def get_compatibility_matrix(request: Request):
+    """Get the full compatibility matrix"""
+    return static_response(request, "compat:matrix", _build_compatibility_matrix)
+
+@compatibility_router.get("/pair/{arch1}/{arch2}")
+async def get_compatibility_pair(arch1: str, arch2: str, request: Request, language: str = "id"):
+    """Get detailed compatibility for a specific pair"""
+    arch1 = arch1.lower()
+    arch2 = arch2.lower()
+    return static_response(
+        request,
+        f"compat:pair:{arch1}:{arch2}:{language}",
+        lambda: _build_compatibility_pair(arch1, arch2, language),
+    )
+
+@compatibility_router.get("/for/{archetype}")
+async def get_compatibility_for_archetype(archetype: str, request: Request, language: str = "id"):
+    """Get all compatibilities for a specific archetype"""
+    archetype = archetype.lower()
+    return static_response(
+        request,
+        f"compat:for:{archetype}:{language}",
+        lambda: _build_compatibility_for_archetype(archetype, language),
+    )
+
 @compatibility_router.get("/share/card/{arch1}/{arch2}")
 async def generate_compatibility_share_card(arch1: str, arch2: str, language: str = "id"):
     """Generate shareable SVG card for compatibility pair"""
@@ -6468,7 +6493,14 @@ async def delete_article(article_id: str, user=Depends(get_admin_user)):
     return {"status": "deleted", "article_id": article_id}
 
 @admin_router.get("/blog/articles")
-async def admin_get_articles(page: int = 1, limit: int = 20, status: str = "all", user=Depends(get_admin_user)):
+async def admin_get_articles(
+    page: int = 1,
+    limit: int = 20,
+    status: str = "all",
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    user=Depends(get_admin_user)
+):
     """Get all articles for admin"""
     skip = (page - 1) * limit
     
@@ -6476,17 +6508,20 @@ async def admin_get_articles(page: int = 1, limit: int = 20, status: str = "all"
     if status != "all":
         query["status"] = status
     
-    articles = await db.blog_articles.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.blog_articles.count_documents(query)
+    articles, next_cursor, total = await paginated(
+        db.blog_articles, query, BLOG_ARTICLE_SORT, limit, cursor, skip=skip,
+        include_total=include_total,
+    )
     
     return {
         "articles": articles,
         "total": total,
-        "page": page
+        "page": page,
+        "next_cursor": next_cursor
     }
 
 # Weekly Tips Router
-tips_router = APIRouter(prefix="/tips", tags=["tips"])
+tips_router = APIRouter(prefix="/tips", tags=["tips"], route_class=ORJSONRoute)
 
 class TipsSubscription(BaseModel):
     subscribed: bool = True
@@ -6724,7 +6759,7 @@ async def send_weekly_tips_batch(user=Depends(get_admin_user)):
                     "subject": subject,
                     "html": html_content
                 }
-                await asyncio.to_thread(resend.Emails.send, params)
+                await send_email(params)
             
             sent_count += 1
             
@@ -6770,9 +6805,12 @@ async def seed_questions_for_series(series: str) -> List[dict]:
             "order": idx + 1,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.questions.insert_one(question)
         questions.append(question)
     
+    if questions:
+        await db.questions.insert_many(questions)
+        await get_question_catalog(db).invalidate()
+    
     return questions
 
     # ... (kode sebelumnya: return questions)
@@ -6817,7 +6855,7 @@ async def seed_admin_user():
         admin = {
             "user_id": user_id,
             "email": admin_email,
-            "password_hash": hash_password(admin_password),
+            "password_hash": await hash_password(admin_password),
             "name": "Admin",
             "language": "id",
             "is_admin": True,
@@ -6832,9 +6870,7 @@ class DeepDiveSubmission(BaseModel):
     result_id: str
     answers: List[Dict[str, Any]]
 
-@deep_dive_router.get("/questions")
-async def get_deep_dive_questions(language: str = "id"):
-    """Get Deep Dive assessment questions"""
+def _build_deep_dive_questions(language: str) -> dict:
     questions = DEEP_DIVE_QUESTIONS.get("universal", [])
     
     formatted = []
@@ -6859,6 +6895,17 @@ async def get_deep_dive_questions(language: str = "id"):
         "sections": ["inner_motivation", "stress_response", "relationship_dynamics", "communication_patterns"]
     }
 
+@deep_dive_router.get("/questions")
+async def get_deep_dive_questions(request: Request, language: str = "id"):
+    """Get Deep Dive assessment questions"""
+    # Anything other than "id" renders English, so both share one payload
+    lang_key = "id" if language == "id" else "en"
+    return static_response(
+        request,
+        f"deep_dive:questions:{lang_key}",
+        lambda: _build_deep_dive_questions(language),
+    )
+
 @deep_dive_router.post("/submit")
 async def submit_deep_dive(data: DeepDiveSubmission, user=Depends(get_current_user)):
     """Submit Deep Dive assessment and generate enhanced analysis"""
@@ -6960,9 +7007,7 @@ async def get_deep_dive_result(result_id: str, user=Depends(get_current_user)):
     
     return deep_dive
 
-@deep_dive_router.get("/type-interactions/{archetype}")
-async def get_type_interactions(archetype: str, language: str = "id"):
-    """Get interaction patterns for a specific archetype with all other types"""
+def _build_type_interactions(archetype: str, language: str) -> dict:
     if archetype not in TYPE_INTERACTIONS:
         raise HTTPException(status_code=400, detail="Invalid archetype")
     
@@ -6977,21 +7022,60 @@ async def get_type_interactions(archetype: str, language: str = "id"):
         "interactions": interactions
     }
 
+@deep_dive_router.get("/type-interactions/{archetype}")
+async def get_type_interactions(archetype: str, request: Request, language: str = "id"):
+    """Get interaction patterns for a specific archetype with all other types"""
+    return static_response(
+        request,
+        f"deep_dive:interactions:{archetype}:{language}",
+        lambda: _build_type_interactions(archetype, language),
+    )
+
+def warm_static_payloads():
+    """Precompute serialized reference payloads for every supported language."""
+    languages = ["id", "en"]
+    register_static_payload("quiz:series", _build_series_payload())
+    register_static_payload("quiz:archetypes", {"archetypes": ARCHETYPES})
+    for archetype, archetype_data in ARCHETYPES.items():
+        register_static_payload(f"quiz:archetype:{archetype}", archetype_data)
+    register_static_payload("blog:categories", {"categories": BLOG_CATEGORIES})
+    register_static_payload("compat:matrix", _build_compatibility_matrix())
+    for language in languages:
+        for arch1 in COMPATIBILITY_ARCHETYPES:
+            register_static_payload(
+                f"compat:for:{arch1}:{language}",
+                _build_compatibility_for_archetype(arch1, language),
+            )
+            for arch2 in COMPATIBILITY_ARCHETYPES:
+                register_static_payload(
+                    f"compat:pair:{arch1}:{arch2}:{language}",
+                    _build_compatibility_pair(arch1, arch2, language),
+                )
+        register_static_payload(f"deep_dive:questions:{language}", _build_deep_dive_questions(language))
+        for archetype in TYPE_INTERACTIONS:
+            register_static_payload(
+                f"deep_dive:interactions:{archetype}:{language}",
+                _build_type_interactions(archetype, language),
+            )
+
 @deep_dive_router.post("/generate-report/{result_id}")
+@traced("deep_dive_report.generate")
 async def generate_deep_dive_report(result_id: str, language: str = "id", user=Depends(get_current_user)):
     """Generate comprehensive Deep Dive AI report - Professional Premium Analysis"""
     
     # Get deep dive result
-    deep_dive = await db.deep_dive_results.find_one(
-        {"result_id": result_id, "user_id": user["user_id"]},
-        {"_id": 0}
-    )
+    with span("deep_dive_report.deep_dive_lookup"):
+        deep_dive = await db.deep_dive_results.find_one(
+            {"result_id": result_id, "user_id": user["user_id"]},
+            {"_id": 0}
+        )
     
     if not deep_dive:
         raise HTTPException(status_code=404, detail="Deep Dive result not found. Complete Deep Dive assessment first.")
     
     # Get base result
-    result = await db.results.find_one({"result_id": result_id}, {"_id": 0})
+    with span("deep_dive_report.results_lookup"):
+        result = await db.results.find_one({"result_id": result_id}, {"_id": 0})
     if not result:
         raise HTTPException(status_code=404, detail="Base result not found")
     
@@ -7277,16 +7361,17 @@ DELIVER THE FULL PREMIUM DEEP DIVE REPORT NOW.
     
     try:
         # Use LLM Gateway for deep dive report
-        report_content = await call_ai_gateway(
-            prompt=user_prompt,
-            system_prompt=system_prompt,
-            user_id=user["user_id"],
-            tier=user.get("tier", "premium"),
-            endpoint_name="/api/deep-dive/generate-report",
-            mode="final",
-            hitl_level=1,
-            language=language
-        )
+        with span("deep_dive_report.llm"):
+            report_content = await call_ai_gateway(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                user_id=user["user_id"],
+                tier=user.get("tier", "premium"),
+                endpoint_name="/api/deep-dive/generate-report",
+                mode="final",
+                hitl_level=1,
+                language=language
+            )
         
         # Save report
         report_id = f"ddr_{uuid.uuid4().hex[:12]}"
@@ -7301,7 +7386,8 @@ DELIVER THE FULL PREMIUM DEEP DIVE REPORT NOW.
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        await db.deep_dive_reports.insert_one(report)
+        with span("deep_dive_report.save"):
+            await db.deep_dive_reports.insert_one(report)
         
         report.pop("_id", None)
         return report
@@ -7317,67 +7403,8 @@ async def get_hitl_analytics_overview(
     days: int = 30,
     user=Depends(get_admin_user)
 ):
-    """Get HITL analytics overview"""
-    from_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    
-    # Get risk assessment distribution
-    pipeline_risk = [
-        {"$match": {"created_at": {"$gte": from_date}}},
-        {"$group": {"_id": "$risk_level", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    risk_distribution = await db.risk_assessments.aggregate(pipeline_risk).to_list(100)
-    
-    # Get moderation queue stats
-    pipeline_queue = [
-        {"$match": {"created_at": {"$gte": from_date}}},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    queue_stats = await db.moderation_queue.aggregate(pipeline_queue).to_list(100)
-    
-    # Get keyword detection trends
-    pipeline_keywords = [
-        {"$match": {"created_at": {"$gte": from_date}}},
-        {"$unwind": {"path": "$detected_keywords", "preserveNullAndEmptyArrays": False}},
-        {"$group": {"_id": "$detected_keywords", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 20}
-    ]
-    keyword_trends = await db.risk_assessments.aggregate(pipeline_keywords).to_list(20)
-    
-    # Calculate average response time for moderated items
-    pipeline_response = [
-        {"$match": {"moderated_at": {"$exists": True}, "created_at": {"$gte": from_date}}},
-        {"$project": {
-            "response_time_seconds": {
-                "$divide": [
-                    {"$subtract": [{"$toDate": "$moderated_at"}, {"$toDate": "$created_at"}]},
-                    1000
-                ]
-            }
-        }},
-        {"$group": {
-            "_id": None,
-            "avg_response_time": {"$avg": "$response_time_seconds"},
-            "min_response_time": {"$min": "$response_time_seconds"},
-            "max_response_time": {"$max": "$response_time_seconds"},
-            "count": {"$sum": 1}
-        }}
-    ]
-    response_stats = await db.moderation_queue.aggregate(pipeline_response).to_list(1)
-    
-    return {
-        "period_days": days,
-        "risk_distribution": {item["_id"]: item["count"] for item in risk_distribution},
-        "queue_stats": {item["_id"]: item["count"] for item in queue_stats},
-        "keyword_trends": [{"keyword": k["_id"], "count": k["count"]} for k in keyword_trends],
-        "response_time": response_stats[0] if response_stats else {
-            "avg_response_time": 0,
-            "min_response_time": 0,
-            "max_response_time": 0,
-            "count": 0
-        }
-    }
+    """Get HITL analytics overview (daily rollups, services/hitl_analytics.py)"""
+    return await hitl_analytics.overview(db, days)
 
 @analytics_router.get("/hitl/timeline")
 async def get_hitl_timeline(
@@ -7385,48 +7412,8 @@ async def get_hitl_timeline(
     interval: str = "day",
     user=Depends(get_admin_user)
 ):
-    """Get HITL events timeline for charts"""
-    from_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    
-    # Date format based on interval
-    date_format = "%Y-%m-%d" if interval == "day" else "%Y-%m-%d %H:00"
-    
-    # Risk level over time
-    pipeline = [
-        {"$match": {"created_at": {"$gte": from_date}}},
-        {"$addFields": {
-            "date": {"$dateToString": {"format": date_format, "date": {"$toDate": "$created_at"}}}
-        }},
-        {"$group": {
-            "_id": {"date": "$date", "level": "$risk_level"},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id.date": 1}}
-    ]
-    
-    timeline_data = await db.risk_assessments.aggregate(pipeline).to_list(1000)
-    
-    # Restructure for frontend charting
-    dates = sorted(set(item["_id"]["date"] for item in timeline_data))
-    series = {
-        "level_1": [],
-        "level_2": [],
-        "level_3": []
-    }
-    
-    for date in dates:
-        for level in ["level_1", "level_2", "level_3"]:
-            count = next(
-                (item["count"] for item in timeline_data 
-                 if item["_id"]["date"] == date and item["_id"]["level"] == level),
-                0
-            )
-            series[level].append({"date": date, "count": count})
-    
-    return {
-        "dates": dates,
-        "series": series
-    }
+    """Get HITL events timeline for charts, one row per date and risk level"""
+    return await hitl_analytics.timeline(db, days, interval)
 
 @analytics_router.get("/hitl/moderator-performance")
 async def get_moderator_performance(
@@ -7434,93 +7421,55 @@ async def get_moderator_performance(
     user=Depends(get_admin_user)
 ):
     """Get moderator performance metrics"""
-    from_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    
-    pipeline = [
-        {"$match": {"timestamp": {"$gte": from_date}, "moderator_id": {"$exists": True}}},
-        {"$group": {
-            "_id": "$moderator_id",
-            "total_actions": {"$sum": 1},
-            "actions_by_type": {"$push": "$action"}
-        }}
-    ]
-    
-    moderator_stats = await db.audit_logs.aggregate(pipeline).to_list(100)
-    
-    # Enrich with user data
-    enriched = []
-    for stat in moderator_stats:
-        user_data = await db.users.find_one({"user_id": stat["_id"]}, {"_id": 0, "name": 1, "email": 1})
-        action_counts = {}
-        for action in stat.get("actions_by_type", []):
-            action_counts[action] = action_counts.get(action, 0) + 1
-        
-        enriched.append({
-            "moderator_id": stat["_id"],
-            "name": user_data.get("name", "Unknown") if user_data else "Unknown",
-            "email": user_data.get("email", "") if user_data else "",
-            "total_actions": stat["total_actions"],
-            "action_breakdown": action_counts
-        })
-    
-    return {"moderators": enriched, "period_days": days}
+    return await hitl_analytics.moderator_performance(db, days)
 
 @analytics_router.get("/hitl/export")
 async def export_hitl_data(
     days: int = 30,
     format: str = "json",
+    collections: Optional[str] = None,
+    collection: str = "risk_assessments",
+    gzip: bool = False,
     user=Depends(get_admin_user)
 ):
-    """Export HITL data for analysis"""
+    """
+    Export HITL data for analysis, streamed (services/hitl_export.py).
+    json/ndjson cover ``collections`` (comma-separated, default all three);
+    csv covers one ``collection``. ``gzip=true`` downloads a .gz file.
+    """
     from_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
     
-    # Get all data
-    assessments = await db.risk_assessments.find(
-        {"created_at": {"$gte": from_date}},
-        {"_id": 0}
-    ).to_list(10000)
-    
-    queue_items = await db.moderation_queue.find(
-        {"created_at": {"$gte": from_date}},
-        {"_id": 0}
-    ).to_list(10000)
-    
-    audit_logs = await db.audit_logs.find(
-        {"timestamp": {"$gte": from_date}},
-        {"_id": 0}
-    ).to_list(10000)
-    
-    export_data = {
-        "export_date": datetime.now(timezone.utc).isoformat(),
-        "period_days": days,
-        "risk_assessments": assessments,
-        "moderation_queue": queue_items,
-        "audit_logs": audit_logs,
-        "summary": {
-            "total_assessments": len(assessments),
-            "total_queue_items": len(queue_items),
-            "total_audit_logs": len(audit_logs)
-        }
-    }
+    if format not in hitl_export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(hitl_export.MEDIA_TYPES)}")
+    names = [c.strip() for c in collections.split(",") if c.strip()] if collections else list(hitl_export.EXPORT_COLLECTIONS)
+    if format == "csv":
+        names = [collection]
+    unknown = [c for c in names if c not in hitl_export.EXPORT_COLLECTIONS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"collections must be among {list(hitl_export.EXPORT_COLLECTIONS)}")
     
     if format == "csv":
-        # Convert to CSV format for assessments
-        import csv
-        import io
-        
-        output = io.StringIO()
-        if assessments:
-            writer = csv.DictWriter(output, fieldnames=assessments[0].keys())
-            writer.writeheader()
-            writer.writerows(assessments)
-        
-        return Response(
-            content=output.getvalue(),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=hitl_export_{days}d.csv"}
-        )
+        chunks = hitl_export.iter_csv(db, collection, from_date)
+        filename = f"hitl_export_{days}d.csv" if collection == "risk_assessments" \
+            else f"hitl_export_{collection}_{days}d.csv"
+    elif format == "ndjson":
+        chunks = hitl_export.iter_ndjson(db, names, from_date)
+        filename = f"hitl_export_{days}d.ndjson"
+    else:
+        chunks = hitl_export.iter_json(db, names, from_date, days)
+        filename = f"hitl_export_{days}d.json"
+    
+    media_type = hitl_export.MEDIA_TYPES[format]
+    if gzip:
+        chunks = hitl_export.gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
     
-    return export_data
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 # ==================== SYSTEM ROUTES (Budget Status) ====================
 
@@ -7549,7 +7498,8 @@ async def get_budget_status():
 async def get_llm_usage_summary(days: int = 7, user=Depends(get_admin_user)):
     """
     Admin endpoint to get LLM usage summary.
-    Returns aggregated stats for the specified number of days.
+    Returns aggregated stats for the specified number of days (daily rollups,
+    with latency/token/cost percentiles).
     """
     try:
         budget_guard = get_budget_guard(db)
@@ -7569,6 +7519,8 @@ async def get_llm_usage_events(
 ):
     """
     Admin endpoint to get individual LLM usage events.
+    Raw events are kept for LLM_USAGE_RETENTION_DAYS; older periods are in
+    /llm-usage-summary.
     """
     from_date = datetime.now(timezone.utc) - timedelta(days=days)
     
@@ -7599,6 +7551,126 @@ async def get_llm_usage_events(
         }
     }
 
+@admin_router.get("/cache-stats")
+async def get_cache_stats(user=Depends(get_admin_user)):
+    """In-process cache statistics for this worker (hit rate, DB reads saved)."""
+    return {"user_cache": get_user_cache(db).stats(), "analytics_buffer": get_analytics_buffer().stats()}
+
+@admin_router.get("/analytics/rollups")
+async def get_analytics_rollup_status(user=Depends(get_admin_user)):
+    """Hourly analytics rollup state (rebuilt range, readiness, row count)."""
+    return await get_analytics_rollups(db).status()
+
+@admin_router.post("/analytics/rollups/rebuild")
+async def rebuild_analytics_rollups(since_hour: Optional[str] = None, user=Depends(get_admin_user)):
+    """Recompute hourly analytics rollups from raw events (since_hour: YYYY-MM-DDTHH)."""
+    if since_hour:
+        try:
+            datetime.strptime(since_hour, "%Y-%m-%dT%H")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since_hour must be YYYY-MM-DDTHH")
+    return await get_analytics_rollups(db).rebuild(since_hour=since_hour)
+
+@admin_router.get("/llm-usage/rollups")
+async def get_llm_usage_rollup_status(user=Depends(get_admin_user)):
+    """Daily LLM usage rollup state (rebuilt range, readiness, retention, row count)."""
+    return await get_usage_rollups(db).status()
+
+@admin_router.post("/llm-usage/rollups/rebuild")
+async def rebuild_llm_usage_rollups(since_day: Optional[str] = None, user=Depends(get_admin_user)):
+    """Recompute daily LLM usage rollups from raw events (since_day: YYYY-MM-DD)."""
+    if since_day:
+        try:
+            datetime.strptime(since_day, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since_day must be YYYY-MM-DD")
+    return await get_usage_rollups(db).rebuild(since_day=since_day)
+
+@admin_router.get("/hitl/rollups")
+async def get_hitl_rollup_status(user=Depends(get_admin_user)):
+    """Daily HITL rollup state (rebuilt range, readiness, row count)."""
+    return await get_hitl_rollups(db).status()
+
+@admin_router.post("/hitl/rollups/rebuild")
+async def rebuild_hitl_rollups(since_day: Optional[str] = None, user=Depends(get_admin_user)):
+    """Recompute daily HITL rollups from the raw collections (since_day: YYYY-MM-DD)."""
+    if since_day:
+        try:
+            datetime.strptime(since_day, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since_day must be YYYY-MM-DD")
+    return await get_hitl_rollups(db).rebuild(since_day=since_day)
+
+@admin_router.get("/migrations/native-dates")
+async def get_native_date_migration_status(user=Depends(get_admin_user)):
+    """Progress of the ISO string -> native date backfill per collection field."""
+    return await get_date_migration(db).status()
+
+@admin_router.post("/migrations/native-dates")
+async def run_native_date_migration(collection: Optional[str] = None, user=Depends(get_admin_user)):
+    """Run (or resume) the native date backfill; safe to repeat."""
+    return await get_date_migration(db).run([collection] if collection else None)
+
+@admin_router.get("/loop-monitor")
+async def get_loop_monitor_stats(user=Depends(get_admin_user)):
+    """Event-loop lag and the most recent blocking calls on this worker."""
+    return get_loop_monitor().stats()
+
+@admin_router.get("/http-clients")
+async def get_http_client_stats(user=Depends(get_admin_user)):
+    """Outbound connection reuse and in-flight requests per upstream on this worker."""
+    return http_client_stats()
+
+class ProfileRequestsRequest(BaseModel):
+    route: str  # route template, e.g. /api/report/generate/{result_id}
+    count: int = 1
+    mode: str = "sampling"  # sampling, cprofile
+    method: Optional[str] = None
+    interval_ms: float = 5.0
+
+@admin_router.post("/profiling/requests")
+async def arm_request_profiling(data: ProfileRequestsRequest, user=Depends(get_admin_user)):
+    """Profile the next N requests matching a route on this worker."""
+    try:
+        session = get_request_profiler().arm(data.route, data.count, data.mode, data.method, data.interval_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return session.summary()
+
+@admin_router.get("/profiling/requests")
+async def get_request_profiles(format: str = "json", user=Depends(get_admin_user)):
+    """Results of the armed (or last) session; format=collapsed for flamegraph input."""
+    status = get_request_profiler().status()
+    if format == "collapsed":
+        stacks = "\n".join(p["collapsed"] for p in status["profiles"] if p.get("collapsed"))
+        return Response(content=stacks, media_type="text/plain")
+    return status
+
+@admin_router.delete("/profiling/requests")
+async def disarm_request_profiling(user=Depends(get_admin_user)):
+    profiler = get_request_profiler()
+    profiler.disarm()
+    return profiler.status()
+
+@admin_router.post("/profiling/memory/start")
+async def start_memory_profiling(frames: int = 10, user=Depends(get_admin_user)):
+    """Start tracemalloc on this worker and take the baseline snapshot."""
+    return get_memory_profiler().start(frames)
+
+@admin_router.post("/profiling/memory/snapshot")
+async def take_memory_snapshot(limit: int = 25, group_by: str = "lineno", user=Depends(get_admin_user)):
+    """Allocation growth since the previous snapshot, plus module cache sizes."""
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno, filename or traceback")
+    try:
+        return get_memory_profiler().snapshot(limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@admin_router.post("/profiling/memory/stop")
+async def stop_memory_profiling(user=Depends(get_admin_user)):
+    return get_memory_profiler().stop()
+
 # ==================== APP SETUP ====================
 
 # Setup security middleware (after all imports are done)
@@ -7607,15 +7679,26 @@ try:
     logger.info("Security middleware initialized")
 except Exception as e:
     logger.warning(f"Could not initialize security middleware: {e}")
+    # Keep the frontend working even without the security stack
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Add metrics router
 try:
-    from utils.metrics import router as metrics_router
+    from utils.metrics import router as metrics_router, run_snapshot_writer
     app.include_router(metrics_router, prefix="/api", tags=["metrics"])
     logger.info("Metrics endpoint available at /api/metrics")
 except Exception as e:
+    run_snapshot_writer = None
     logger.warning(f"Could not initialize metrics: {e}")
 
+_metrics_snapshot_task = None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize application - with error handling for production"""
@@ -7623,6 +7706,27 @@ async def startup_event():
     start_time = time.time()
     logger.info("Starting application initialization...")
     
+    # Event-loop lag monitor + blocking-call detector
+    try:
+        start_loop_monitor()
+    except Exception as e:
+        logger.warning(f"Could not start event loop monitor: {e}")
+    
+    # Share this worker's metrics with the others (METRICS_MULTIPROC_DIR)
+    global _metrics_snapshot_task
+    if run_snapshot_writer is not None:
+        _metrics_snapshot_task = asyncio.create_task(run_snapshot_writer())
+    
+    # Batched writer for /relasi4/analytics/track
+    get_analytics_buffer(db).start()
+    
+    # Precompute reference payloads (no DB needed)
+    try:
+        warm_static_payloads()
+        logger.info("Static reference payloads precomputed")
+    except Exception as e:
+        logger.warning(f"Could not precompute static payloads: {e}")
+    
     # Initialize Sentry if configured
     try:
         from utils.sentry import init_sentry
@@ -7651,20 +7755,20 @@ async def startup_event():
         except Exception as e:
             logger.warning(f"Could not initialize Guarded LLM: {e}")
         
-        # Create AI usage collection indexes
+        # Indexes from the shared registry (utils.indexes)
         try:
-            await db.ai_usage.create_index("user_id", unique=True)
-            await db.ai_usage.create_index("last_request_date")
-            logger.info("AI usage indexes created")
-            
-            # Create LLM usage events indexes (for new gateway)
-            await db.llm_usage_events.create_index("ts_utc")
-            await db.llm_usage_events.create_index("user_id")
-            await db.llm_usage_events.create_index("status")
-            await db.llm_usage_events.create_index([("ts_utc", -1), ("status", 1)])
-            logger.info("LLM usage events indexes created")
+            index_report = await ensure_indexes(db)
+            logger.info(f"Indexes ensured: {len(index_report['created'])} ok, "
+                        f"{len(index_report['failed'])} failed")
         except Exception as e:
-            logger.debug(f"AI usage indexes already exist or failed: {e}")
+            logger.warning(f"Index creation failed: {e}")
+        
+        # TTL on raw LLM usage events (only once the daily rollups are backfilled)
+        try:
+            retention = await get_usage_rollups(db).apply_retention()
+            logger.info(f"LLM usage retention: {retention}")
+        except Exception as e:
+            logger.warning(f"LLM usage retention failed: {e}")
         
         # Seed admin user (with timeout protection)
         logger.info("Seeding admin user...")
@@ -7692,11 +7796,6 @@ async def startup_event():
         
         logger.info(f"Application startup complete (total: {time.time() - start_time:.2f}s)")
         
-    except Exception as e:
-        logger.warning(f"Startup initialization warning (non-fatal): {e}")
-        
-        logger.info(f"Application startup complete (total: {time.time() - start_time:.2f}s)")
-        
     except Exception as e:
         logger.warning(f"Startup initialization warning (non-fatal): {e}")
         # Don't crash the app if seeding fails - it can be done later
@@ -7727,7 +7826,7 @@ api_router.include_router(deep_dive_router)
 api_router.include_router(analytics_router)
 api_router.include_router(system_router)
 
-RELASI4™ Core Engine routes
+# RELASI4™ Core Engine routes
 try:
     # [FIX] Import set_dependencies juga
     from routes.relasi4_routes import relasi4_router, set_dependencies
@@ -7759,6 +7858,12 @@ async def startup_db_client():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await get_loop_monitor().stop()
+    if _metrics_snapshot_task is not None:
+        _metrics_snapshot_task.cancel()
+        await asyncio.gather(_metrics_snapshot_task, return_exceptions=True)
+    await get_analytics_buffer().stop()
+    await close_http_clients()
     client.close()
     logger.info("MongoDB connection closed")
 
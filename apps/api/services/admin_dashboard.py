@@ -0,0 +1,220 @@
+"""
+Admin Dashboard
+===============
+Payloads for ``GET /api/admin/dashboard/overview`` and ``GET /api/admin/stats``.
+
+Each payload runs a few independent queries concurrently
+(``asyncio.gather``), so latency is roughly the slowest query rather than
+the sum. Per-collection counters are folded into one ``$facet`` pipeline
+per collection: one round trip and, for ``results``, one scan instead of
+five. Unfiltered totals come from ``estimated_document_count()`` (collection
+metadata) where the collection is not scanned anyway.
+
+Results are kept in a stale-while-revalidate cache shared by every admin
+on the worker:
+- younger than ``ADMIN_DASHBOARD_CACHE_SECONDS``: served as-is
+- up to ``ADMIN_DASHBOARD_STALE_SECONDS`` older than that: served
+  immediately while one background task recomputes
+- older, or missing: computed once, with concurrent requests waiting on
+  the same computation
+
+Metrics:
+- admin_dashboard_cache_total{payload, result="hit|stale|miss"}
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+ADMIN_DASHBOARD_CACHE_SECONDS = float(os.environ.get("ADMIN_DASHBOARD_CACHE_SECONDS", 30))
+ADMIN_DASHBOARD_STALE_SECONDS = float(os.environ.get("ADMIN_DASHBOARD_STALE_SECONDS", 300))
+
+
+def _count(facet: Dict[str, List[Dict[str, Any]]], name: str) -> int:
+    rows = facet.get(name) or []
+    return rows[0]["n"] if rows else 0
+
+
+def _distribution(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {row["_id"]: row["count"] for row in rows if row["_id"]}
+
+
+class AdminDashboard:
+    """Concurrent dashboard queries behind a stale-while-revalidate cache."""
+
+    def __init__(self, db=None, ttl: float = ADMIN_DASHBOARD_CACHE_SECONDS,
+                 stale: float = ADMIN_DASHBOARD_STALE_SECONDS):
+        self.db = db
+        self.ttl = ttl
+        self.stale = stale
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self.invalidate()
+
+    def invalidate(self):
+        self._entries.clear()
+
+    async def overview(self) -> Dict[str, Any]:
+        return await self._cached("overview", self.compute_overview)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self._cached("stats", self.compute_stats)
+
+    # ---------- cache ----------
+
+    async def _cached(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry[0] if entry else None
+        if age is not None and age < self.ttl:
+            increment_counter("admin_dashboard_cache_total", labels={"payload": key, "result": "hit"})
+            return entry[1]
+        if age is not None and age < self.ttl + self.stale:
+            increment_counter("admin_dashboard_cache_total", labels={"payload": key, "result": "stale"})
+            self._refresh(key, compute)
+            return entry[1]
+        increment_counter("admin_dashboard_cache_total", labels={"payload": key, "result": "miss"})
+        # shield: one admin disconnecting must not cancel the shared refresh
+        return await asyncio.shield(self._refresh(key, compute))
+
+    def _refresh(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._compute(key, compute))
+            # Background refreshes have no awaiter; _compute already logged
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            payload = await compute()
+            self._entries[key] = (time.monotonic(), payload)
+            return payload
+        except Exception as e:
+            logger.warning(f"Admin dashboard {key} refresh failed: {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    # ---------- queries ----------
+
+    async def compute_overview(self) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        week_ago = (now - timedelta(days=7)).isoformat()
+        month_ago = (now - timedelta(days=30)).isoformat()
+
+        async def first(cursor) -> Dict[str, Any]:
+            rows = await cursor.to_list(1)
+            return rows[0] if rows else {}
+
+        total_users, users, results, payments = await asyncio.gather(
+            self.db.users.estimated_document_count(),
+            # Index range on created_at, then split in memory
+            first(self.db.users.aggregate([
+                {"$match": {"created_at": {"$gte": week_ago}}},
+                {"$facet": {
+                    "today": [{"$match": {"created_at": {"$gte": today}}}, {"$count": "n"}],
+                    "week": [{"$count": "n"}],
+                }},
+            ])),
+            # The distributions scan results anyway; count in the same pass
+            first(self.db.results.aggregate([
+                {"$facet": {
+                    "total": [{"$count": "n"}],
+                    "today": [{"$match": {"created_at": {"$gte": today}}}, {"$count": "n"}],
+                    "week": [{"$match": {"created_at": {"$gte": week_ago}}}, {"$count": "n"}],
+                    "archetypes": [
+                        {"$group": {"_id": "$primary_archetype", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 10},
+                    ],
+                    "series": [
+                        {"$group": {"_id": "$series", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 10},
+                    ],
+                }},
+            ])),
+            first(self.db.payments.aggregate([
+                {"$match": {"status": "paid"}},
+                {"$facet": {
+                    "total": [{"$count": "n"}],
+                    "today": [{"$match": {"paid_at": {"$gte": today}}}, {"$count": "n"}],
+                    "week": [{"$match": {"paid_at": {"$gte": week_ago}}}, {"$count": "n"}],
+                    "revenue_month": [
+                        {"$match": {"paid_at": {"$gte": month_ago}}},
+                        {"$group": {"_id": None, "total": {"$sum": "$amount"}}},
+                    ],
+                }},
+            ])),
+        )
+
+        revenue = payments.get("revenue_month") or []
+        return {
+            "users": {
+                "total": total_users,
+                "today": _count(users, "today"),
+                "week": _count(users, "week")
+            },
+            "quizzes": {
+                "total": _count(results, "total"),
+                "today": _count(results, "today"),
+                "week": _count(results, "week")
+            },
+            "payments": {
+                "total_paid": _count(payments, "total"),
+                "today": _count(payments, "today"),
+                "week": _count(payments, "week"),
+                "revenue_month": revenue[0]["total"] if revenue else 0
+            },
+            "distributions": {
+                "archetypes": _distribution(results.get("archetypes", [])),
+                "series": _distribution(results.get("series", []))
+            },
+            "generated_at": now.isoformat()
+        }
+
+    async def compute_stats(self) -> Dict[str, Any]:
+        total_users, total_attempts, total_completed, total_paid, archetype_dist = await asyncio.gather(
+            self.db.users.estimated_document_count(),
+            self.db.quiz_attempts.estimated_document_count(),
+            self.db.quiz_attempts.count_documents({"status": "completed"}),
+            self.db.results.count_documents({"is_paid": True}),
+            self.db.results.aggregate([
+                {"$match": {"primary_archetype": {"$exists": True}}},
+                {"$group": {"_id": "$primary_archetype", "count": {"$sum": 1}}}
+            ]).to_list(10),
+        )
+
+        return {
+            "total_users": total_users,
+            "total_attempts": total_attempts,
+            "completion_rate": round((total_completed / total_attempts * 100) if total_attempts > 0 else 0, 1),
+            "conversion_rate": round((total_paid / total_completed * 100) if total_completed > 0 else 0, 1),
+            "archetype_distribution": {item["_id"]: item["count"] for item in archetype_dist}
+        }
+
+
+_admin_dashboard: Optional[AdminDashboard] = None
+
+
+def get_admin_dashboard(db=None) -> AdminDashboard:
+    """Get or create singleton admin dashboard."""
+    global _admin_dashboard
+    if _admin_dashboard is None:
+        _admin_dashboard = AdminDashboard(db)
+    elif db is not None and db is not _admin_dashboard.db:
+        _admin_dashboard.set_db(db)
+    return _admin_dashboard
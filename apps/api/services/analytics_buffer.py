@@ -0,0 +1,207 @@
+"""
+Analytics Ingestion Buffer
+==========================
+In-process buffer for ``/relasi4/analytics/track``, which is the
+highest-volume endpoint (every CTA render and click).
+
+The endpoint only appends to memory and returns 202. A background task
+writes the data on every flush:
+- all buffered raw events with one ``insert_many`` into ``r4_analytics``
+- one ``$inc`` upsert per (date, need, conflict style, variant, package)
+  into ``r4_analytics_daily``, coalesced in memory and sent as a single
+  unordered ``bulk_write``
+- one ``$inc`` upsert per hour and dimension set into
+  ``r4_analytics_hourly`` (see services.analytics_rollups)
+
+A flush happens when ``ANALYTICS_FLUSH_SIZE`` events are waiting, every
+``ANALYTICS_FLUSH_INTERVAL_SECONDS``, and at shutdown.
+
+Memory is bounded: beyond ``ANALYTICS_BUFFER_MAX_EVENTS`` pending events,
+new events are dropped and counted. Analytics is best-effort. Events are
+lost if the process dies before a flush (at most one interval's worth) or
+if a flush fails.
+
+Metrics:
+- analytics_events_total{result="buffered|dropped"}
+- analytics_flush_total{trigger="size|interval|shutdown"}
+- analytics_flush_errors_total
+- analytics_flush_ms
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from services.analytics_rollups import AnalyticsRollups, HourlyKey, hourly_key, hourly_updates
+from utils.metrics import increment_counter, observe_histogram
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FLUSH_SIZE = int(os.environ.get("ANALYTICS_FLUSH_SIZE", 500))
+ANALYTICS_FLUSH_INTERVAL_SECONDS = float(os.environ.get("ANALYTICS_FLUSH_INTERVAL_SECONDS", 1.0))
+ANALYTICS_BUFFER_MAX_EVENTS = int(os.environ.get("ANALYTICS_BUFFER_MAX_EVENTS", 20000))
+
+# (date, primary_need, primary_conflict_style, cta_variant, package_type)
+DailyKey = Tuple[str, str, str, str, str]
+
+
+class AnalyticsBuffer:
+    """Bounded event buffer with size/interval/shutdown flushes."""
+
+    def __init__(self, db=None, flush_size: int = ANALYTICS_FLUSH_SIZE,
+                 flush_interval: float = ANALYTICS_FLUSH_INTERVAL_SECONDS,
+                 max_events: int = ANALYTICS_BUFFER_MAX_EVENTS):
+        self.db = db
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self._events: List[Dict[str, Any]] = []
+        self._daily: Dict[DailyKey, List[int]] = {}
+        self._hourly: Dict[HourlyKey, int] = {}
+        self._incremental_marked = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self.dropped = 0
+        self.flushed_events = 0
+        self.flushes = 0
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Start the flush task on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write whatever is buffered."""
+        if self._task is not None:
+            # A flag rather than cancel(): wait_for can swallow a cancellation
+            # that races with the wake event
+            self._stopping = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush("shutdown")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+                trigger = "size"
+            except asyncio.TimeoutError:
+                trigger = "interval"
+            self._wake.clear()
+            if self._stopping:
+                break
+            if self._events or self._daily:
+                await self.flush(trigger)
+
+    # ---------- ingestion ----------
+
+    def add(self, event: Dict[str, Any], daily_key: Optional[DailyKey] = None, conversion: bool = False) -> bool:
+        """Buffer one event (and its daily increment). False if dropped."""
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            increment_counter("analytics_events_total", labels={"result": "dropped"})
+            return False
+        self._events.append(event)
+        if daily_key is not None:
+            counts = self._daily.get(daily_key)
+            if counts is None:
+                counts = self._daily[daily_key] = [0, 0]
+            counts[0] += 1
+            counts[1] += 1 if conversion else 0
+        if event.get("created_at"):
+            key = hourly_key(event)
+            self._hourly[key] = self._hourly.get(key, 0) + 1
+        increment_counter("analytics_events_total", labels={"result": "buffered"})
+
+        if self._task is None or self._task.done():
+            self.start()
+        if len(self._events) >= self.flush_size:
+            self._wake.set()
+        return True
+
+    # ---------- flushing ----------
+
+    async def flush(self, trigger: str = "manual"):
+        """Write buffered events and coalesced daily/hourly increments."""
+        async with self._flush_lock:
+            events, self._events = self._events, []
+            daily, self._daily = self._daily, {}
+            hourly, self._hourly = self._hourly, {}
+            if not events and not daily:
+                return
+            start = time.perf_counter()
+            increment_counter("analytics_flush_total", labels={"trigger": trigger})
+            try:
+                if events:
+                    await self.db.r4_analytics.insert_many(events, ordered=False)
+                if daily:
+                    now = datetime.now(timezone.utc).isoformat()
+                    await self.db.r4_analytics_daily.bulk_write([
+                        UpdateOne(
+                            {
+                                "date": date,
+                                "primary_need": need,
+                                "primary_conflict_style": conflict,
+                                "cta_variant": variant,
+                                "package_type": package,
+                            },
+                            {
+                                "$inc": {"count": count, "conversions": conversions},
+                                "$setOnInsert": {"created_at": now},
+                            },
+                            upsert=True,
+                        )
+                        for (date, need, conflict, variant, package), (count, conversions) in daily.items()
+                    ], ordered=False)
+                if hourly:
+                    if not self._incremental_marked:
+                        await AnalyticsRollups(self.db).mark_incremental(min(key[0] for key in hourly))
+                        self._incremental_marked = True
+                    await self.db.r4_analytics_hourly.bulk_write(hourly_updates(hourly), ordered=False)
+                self.flushed_events += len(events)
+                self.flushes += 1
+            except Exception as e:
+                increment_counter("analytics_flush_errors_total")
+                logger.error(f"Analytics flush failed ({len(events)} events, {len(daily)} daily keys): {e}")
+            finally:
+                observe_histogram("analytics_flush_ms", (time.perf_counter() - start) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_events": len(self._events),
+            "pending_daily_keys": len(self._daily),
+            "pending_hourly_keys": len(self._hourly),
+            "flushed_events": self.flushed_events,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+        }
+
+
+_analytics_buffer: Optional[AnalyticsBuffer] = None
+
+
+def get_analytics_buffer(db=None) -> AnalyticsBuffer:
+    """Get or create singleton analytics buffer."""
+    global _analytics_buffer
+    if _analytics_buffer is None:
+        _analytics_buffer = AnalyticsBuffer(db)
+    elif db is not None:
+        _analytics_buffer.set_db(db)
+    return _analytics_buffer
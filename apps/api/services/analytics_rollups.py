@@ -0,0 +1,234 @@
+"""
+Analytics Hourly Rollups
+========================
+Pre-aggregated counts of ``r4_analytics`` events for the A/B dashboards
+(``/relasi4/analytics/summary``, ``/abc-comparison``, ``/weekly-insights``).
+
+``r4_analytics_hourly`` holds one document per (hour, event, variant,
+cta_variant, primary_need, primary_conflict_style, primary_color,
+entry_point) with a ``count``. ``hour`` is the ``YYYY-MM-DDTHH`` prefix of
+the events' ``created_at``. Both variant fields are kept because
+``get_analytics_summary`` groups by ``variant`` while the A/B/C views group by
+``cta_variant``, and legacy events may disagree.
+
+Maintenance:
+- incremental: the analytics buffer coalesces ``$inc`` upserts per key and
+  writes them in the same flush as the raw events
+- rebuild: ``rebuild()`` recomputes settled hours (ended more than
+  ``ANALYTICS_ROLLUP_SETTLE_SECONDS`` ago) from the raw events. It is
+  idempotent; run it once after deploying to backfill history
+  (``scripts/rebuild_analytics_rollups.py`` or
+  ``POST /api/admin/analytics/rollups/rebuild``), and again to repair hours
+  after a failed flush. State, readiness and the rebuild loop are
+  ``RollupState`` (``utils/rollups.py``).
+
+Reads (``load_cube``) return counts grouped by date and all dimensions:
+- full hours come from the rollups
+- the partial hour at the start of the window comes from the raw events
+Results therefore match a raw scan from the same cutoff. Until the
+rollups have been rebuilt past the first incrementally written hour, reads
+fall back to grouping the raw events.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pymongo import UpdateOne
+
+from utils.rollups import HOUR, RollupState, replace_rows
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ROLLUP_SETTLE_SECONDS = int(os.environ.get("ANALYTICS_ROLLUP_SETTLE_SECONDS", 300))
+
+DIMENSIONS = (
+    "event",
+    "variant",
+    "cta_variant",
+    "primary_need",
+    "primary_conflict_style",
+    "primary_color",
+    "entry_point",
+)
+
+# (hour, *DIMENSIONS)
+HourlyKey = Tuple[Optional[str], ...]
+
+REBUILD_CHUNK_HOURS = 24
+
+
+def hour_of(timestamp: str) -> str:
+    """``2026-01-01T13:25:11+00:00`` -> ``2026-01-01T13``."""
+    return timestamp[:13]
+
+
+def next_hour(hour: str) -> str:
+    return (datetime.strptime(hour, "%Y-%m-%dT%H") + timedelta(hours=1)).strftime("%Y-%m-%dT%H")
+
+
+def hourly_key(event: Dict[str, Any]) -> HourlyKey:
+    return (hour_of(event["created_at"]), *(event.get(field) for field in DIMENSIONS))
+
+
+def hourly_updates(counts: Dict[HourlyKey, int]) -> List[UpdateOne]:
+    """Coalesced ``$inc`` upserts for the analytics buffer."""
+    return [
+        UpdateOne(
+            {"hour": key[0], **dict(zip(DIMENSIONS, key[1:]))},
+            {"$inc": {"count": count}},
+            upsert=True,
+        )
+        for key, count in counts.items()
+    ]
+
+
+def facet(rows: List[Dict[str, Any]], key: Union[str, Dict[str, str], None],
+          require: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    ``$group`` over cube rows, shaped like the aggregation output.
+
+    ``key`` is a row field (scalar ``_id``), a mapping of ``_id`` field to row
+    field, or None. ``require`` drops rows where that field is null, like
+    ``{"$match": {field: {"$ne": None}}}``.
+    """
+    groups: Dict[Any, int] = {}
+    for row in rows:
+        if require is not None and row.get(require) is None:
+            continue
+        if key is None:
+            group = None
+        elif isinstance(key, str):
+            group = row.get(key)
+        else:
+            group = tuple(row.get(field) for field in key.values())
+        groups[group] = groups.get(group, 0) + row["count"]
+    if isinstance(key, dict):
+        return [{"_id": dict(zip(key, group)), "count": count} for group, count in groups.items()]
+    return [{"_id": group, "count": count} for group, count in groups.items()]
+
+
+class AnalyticsRollups:
+    """Reads and rebuilds ``r4_analytics_hourly``."""
+
+    def __init__(self, db=None):
+        self.db = db
+        self.state = RollupState("Analytics", "r4_analytics_rollup_state", "r4_analytics_hourly", HOUR,
+                                 ANALYTICS_ROLLUP_SETTLE_SECONDS, state_id="hourly",
+                                 chunk=REBUILD_CHUNK_HOURS, db=db)
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self.state.set_db(db)
+
+    # ---------- reads ----------
+
+    async def is_ready(self) -> bool:
+        """True once rollups cover every hour (cached; it never reverts)."""
+        return await self.state.is_ready()
+
+    async def load_cube(self, since: str) -> List[Dict[str, Any]]:
+        """
+        Event counts since an ISO timestamp, one row per (date, dimensions).
+        Rows have ``date``, every field of DIMENSIONS and ``count``.
+        """
+        if not await self.is_ready():
+            return await self._raw_cube({"created_at": {"$gte": since}})
+
+        boundary = next_hour(hour_of(since))
+        edge = await self._raw_cube({"created_at": {"$gte": since, "$lt": boundary}})
+        pipeline = [
+            {"$match": {"hour": {"$gte": boundary}}},
+            {"$group": {
+                "_id": {"date": {"$substr": ["$hour", 0, 10]}, **{f: f"${f}" for f in DIMENSIONS}},
+                "count": {"$sum": "$count"},
+            }},
+        ]
+        rows = await self.db.r4_analytics_hourly.aggregate(pipeline).to_list(None)
+        return self._merge(edge, [self._row(item) for item in rows])
+
+    async def _raw_cube(self, match: Dict[str, Any]) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"date": {"$substr": ["$created_at", 0, 10]}, **{f: f"${f}" for f in DIMENSIONS}},
+                "count": {"$sum": 1},
+            }},
+        ]
+        rows = await self.db.r4_analytics.aggregate(pipeline).to_list(None)
+        return [self._row(item) for item in rows]
+
+    @staticmethod
+    def _row(item: Dict[str, Any]) -> Dict[str, Any]:
+        # $group leaves missing fields out of _id; the raw pipelines match them as null
+        return {
+            "date": item["_id"].get("date"),
+            **{field: item["_id"].get(field) for field in DIMENSIONS},
+            "count": item["count"],
+        }
+
+    @staticmethod
+    def _merge(*parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for rows in parts:
+            for row in rows:
+                key = (row["date"], *(row[field] for field in DIMENSIONS))
+                if key in merged:
+                    merged[key]["count"] += row["count"]
+                else:
+                    merged[key] = dict(row)
+        return list(merged.values())
+
+    # ---------- maintenance ----------
+
+    async def mark_incremental(self, hour: str):
+        """Record the first hour written by the ingestion path (analytics buffer)."""
+        await self.state.mark_incremental(hour)
+
+    async def rebuild(self, since_hour: Optional[str] = None, until_hour: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recompute hours in [since_hour, until_hour) from the raw events.
+
+        ``until_hour`` defaults to the latest settled hour; ``since_hour`` to the
+        hour of the oldest raw event.
+        """
+        if since_hour is None:
+            oldest = await self.db.r4_analytics.find_one(
+                {"created_at": {"$type": "string"}}, {"created_at": 1}, sort=[("created_at", 1)]
+            )
+            since_hour = hour_of(oldest["created_at"]) if oldest else None
+        return await self.state.rebuild(self._rebuild_range, since_hour, until_hour)
+
+    async def _rebuild_range(self, start: str, end: str, rebuild_id: str) -> int:
+        pipeline = [
+            {"$match": {"created_at": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {"hour": {"$substr": ["$created_at", 0, 13]}, **{f: f"${f}" for f in DIMENSIONS}},
+                "count": {"$sum": 1},
+            }},
+        ]
+        groups = await self.db.r4_analytics.aggregate(pipeline).to_list(None)
+        return await replace_rows(
+            self.db.r4_analytics_hourly,
+            (({"hour": item["_id"]["hour"], **{f: item["_id"].get(f) for f in DIMENSIONS}}, {"count": item["count"]})
+             for item in groups),
+            {"hour": {"$gte": start, "$lt": end}}, rebuild_id,
+        )
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.state.status()
+
+
+_analytics_rollups: Optional[AnalyticsRollups] = None
+
+
+def get_analytics_rollups(db=None) -> AnalyticsRollups:
+    """Get or create singleton analytics rollups."""
+    global _analytics_rollups
+    if _analytics_rollups is None:
+        _analytics_rollups = AnalyticsRollups(db)
+    elif db is not None and db is not _analytics_rollups.db:
+        _analytics_rollups.set_db(db)
+    return _analytics_rollups
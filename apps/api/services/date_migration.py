@@ -0,0 +1,159 @@
+"""
+Native Date Migration
+=====================
+Online, resumable backfill of the ``<field>_dt`` BSON dates listed in
+utils.dates.NATIVE_DATE_FIELDS.
+
+Each (collection, field) is walked in ``_id`` order, ``DATE_MIGRATION_BATCH_SIZE``
+documents at a time. The conversion runs on the server
+(``update_many`` with a ``$convert`` pipeline), so documents are never
+shipped to the app. After every batch the last ``_id`` is checkpointed in
+``migrations``. An interrupted run continues where it stopped, and a short
+pause between batches keeps the primary responsive.
+
+Writers dual-write both representations, so a field is complete once a
+walk reaches the end of the collection. Queries call ``is_complete()``
+before switching to the native field; until then they keep the string
+pipelines.
+
+Run with ``scripts/migrate_native_dates.py`` or
+``POST /api/admin/migrations/native-dates`` after the dual-writing release
+has fully rolled out.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.dates import NATIVE_DATE_FIELDS, native_field
+
+logger = logging.getLogger(__name__)
+
+DATE_MIGRATION_BATCH_SIZE = int(os.environ.get("DATE_MIGRATION_BATCH_SIZE", 1000))
+DATE_MIGRATION_PAUSE_SECONDS = float(os.environ.get("DATE_MIGRATION_PAUSE_SECONDS", 0.05))
+
+
+def _state_id(collection: str, field: str) -> str:
+    return f"native_dates:{collection}.{field}"
+
+
+class NativeDateMigration:
+    """Batch backfill of native date fields with checkpoints."""
+
+    def __init__(self, db=None, batch_size: int = DATE_MIGRATION_BATCH_SIZE,
+                 pause: float = DATE_MIGRATION_PAUSE_SECONDS):
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self._complete: set = set()
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self._complete = set()
+
+    async def is_complete(self, collection: str, field: str) -> bool:
+        """True once every document has ``<field>_dt`` (cached once true)."""
+        key = (collection, field)
+        if key not in self._complete:
+            state = await self.db.migrations.find_one({"_id": _state_id(collection, field)})
+            if state and state.get("done"):
+                self._complete.add(key)
+        return key in self._complete
+
+    async def run(self, collections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Migrate every registered field (or only ``collections``)."""
+        results = {}
+        for collection, fields in NATIVE_DATE_FIELDS.items():
+            if collections and collection not in collections:
+                continue
+            for field in fields:
+                results[f"{collection}.{field}"] = await self.migrate_field(collection, field)
+        return results
+
+    async def migrate_field(self, collection: str, field: str) -> Dict[str, Any]:
+        state_id = _state_id(collection, field)
+        state = await self.db.migrations.find_one({"_id": state_id}) or {}
+        if state.get("done"):
+            return {"done": True, "converted": state.get("converted", 0), "resumed": False}
+
+        target = native_field(field)
+        coll = self.db[collection]
+        last_id = state.get("last_id")
+        converted = state.get("converted", 0)
+        started = datetime.now(timezone.utc)
+        logger.info(f"Native date migration {collection}.{field}: starting after _id={last_id}")
+
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = await coll.find(query, {"_id": 1}).sort("_id", 1).limit(self.batch_size).to_list(None)
+            if not batch:
+                break
+            ids = [doc["_id"] for doc in batch]
+            result = await coll.update_many(
+                {"_id": {"$in": ids}, field: {"$type": "string"}, target: {"$exists": False}},
+                [{"$set": {target: {"$convert": {
+                    "input": f"${field}", "to": "date", "onError": None, "onNull": None,
+                }}}}],
+            )
+            converted += result.modified_count
+            last_id = ids[-1]
+            await self.db.migrations.update_one(
+                {"_id": state_id},
+                {"$set": {"last_id": last_id, "converted": converted,
+                          "updated_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True,
+            )
+            if len(batch) < self.batch_size:
+                break
+            if self.pause:
+                await asyncio.sleep(self.pause)
+
+        await self.db.migrations.update_one(
+            {"_id": state_id},
+            {"$set": {"done": True, "converted": converted,
+                      "completed_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+        self._complete.add((collection, field))
+        elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        logger.info(f"Native date migration {collection}.{field}: done, {converted} converted in {elapsed:.1f}s")
+        return {"done": True, "converted": converted, "resumed": bool(state)}
+
+    async def status(self) -> Dict[str, Any]:
+        out = {}
+        for collection, fields in NATIVE_DATE_FIELDS.items():
+            for field in fields:
+                state = await self.db.migrations.find_one({"_id": _state_id(collection, field)}) or {}
+                out[f"{collection}.{field}"] = {
+                    "done": bool(state.get("done")),
+                    "converted": state.get("converted", 0),
+                    "last_id": str(state["last_id"]) if state.get("last_id") is not None else None,
+                    "completed_at": state.get("completed_at"),
+                }
+        return out
+
+
+async def date_field(db, collection: str, field: str) -> Tuple[str, bool]:
+    """
+    ``(field_name, native)`` to query ``field`` on ``collection``: the
+    ``_dt`` twin once migrated, otherwise the ISO string itself.
+    """
+    if await get_date_migration(db).is_complete(collection, field):
+        return native_field(field), True
+    return field, False
+
+
+_date_migration: Optional[NativeDateMigration] = None
+
+
+def get_date_migration(db=None) -> NativeDateMigration:
+    """Get or create singleton native date migration."""
+    global _date_migration
+    if _date_migration is None:
+        _date_migration = NativeDateMigration(db)
+    elif db is not None and db is not _date_migration.db:
+        _date_migration.set_db(db)
+    return _date_migration
@@ -25,6 +25,7 @@ from security.cost_guardrail import (
     GuardrailDecision,
     ProductTier,
 )
+from utils.tracing import current_span, span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +76,7 @@ class GuardedLLMService:
         """Set LLM provider."""
         self.llm_provider = provider
     
+    @traced("llm.generate")
     async def generate(
         self,
         user: Dict[str, Any],
@@ -111,7 +113,8 @@ class GuardedLLMService:
         # ========================================
         # STEP 1: Abuse Guard Pre-Check
         # ========================================
-        abuse_result = self.abuse_guard.analyze(user_prompt)
+        with span("llm.abuse_check"):
+            abuse_result = self.abuse_guard.analyze(user_prompt)
         
         if abuse_result.should_block:
             logger.warning(
@@ -134,13 +137,14 @@ class GuardedLLMService:
         # ========================================
         # STEP 2: Cost Guardrail Check
         # ========================================
-        decision = await self.guardrail.check_request(
-            user=user,
-            product_type=product_type,
-            input_text=full_input,
-            hitl_level=hitl_level,
-            is_report_generation=is_report_generation,
-        )
+        with span("llm.guardrail_check"):
+            decision = await self.guardrail.check_request(
+                user=user,
+                product_type=product_type,
+                input_text=full_input,
+                hitl_level=hitl_level,
+                is_report_generation=is_report_generation,
+            )
         
         if not decision.allowed:
             logger.warning(
@@ -185,6 +189,8 @@ class GuardedLLMService:
         # ========================================
         # STEP 3: LLM Call with Enforced Limits
         # ========================================
+        current_span().set_attribute("model", decision.model)
+        
         if self.llm_provider is None:
             raise RuntimeError("LLM provider not configured")
         
@@ -201,13 +207,14 @@ class GuardedLLMService:
         try:
             llm_start = time.time()
             
-            content = await self.llm_provider.generate(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                model=decision.model,
-                temperature=temperature,
-                max_tokens=decision.max_output_tokens,
-            )
+            with span("llm.provider_call"):
+                content = await self.llm_provider.generate(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=decision.model,
+                    temperature=temperature,
+                    max_tokens=decision.max_output_tokens,
+                )
             
             llm_latency = (time.time() - llm_start) * 1000
             
@@ -233,13 +240,14 @@ class GuardedLLMService:
         # ========================================
         cost_usd = self.guardrail.estimate_cost(tokens_in, tokens_out, decision.model)
         
-        await self.guardrail.update_usage(
-            user_id=user_id,
-            tokens_in=tokens_in,
-            tokens_out=tokens_out,
-            model=decision.model,
-            is_report=is_report_generation,
-        )
+        with span("llm.usage_update"):
+            await self.guardrail.update_usage(
+                user_id=user_id,
+                tokens_in=tokens_in,
+                tokens_out=tokens_out,
+                model=decision.model,
+                is_report=is_report_generation,
+            )
         
         total_latency = (time.time() - start_time) * 1000
         
@@ -0,0 +1,148 @@
+"""
+HITL Analytics
+==============
+Payloads for ``GET /api/analytics/hitl/overview``, ``/hitl/timeline`` and
+``/hitl/moderator-performance``.
+
+Each payload is a pivot over the daily rollup rows of services.hitl_rollups,
+done in the pipeline:
+- timeline: one ``$group`` per day with a conditional ``$sum`` per risk
+  level, so the response is assembled in a single pass over the days
+- moderator performance: ``$group`` counts per (moderator, action), folded
+  into ``action_breakdown`` with ``$arrayToObject``, and names/emails joined
+  with ``$lookup`` instead of one ``users`` query per moderator
+- overview: four small ``$group`` pipelines run concurrently
+
+Cost follows the number of days (and dimensions) in the window, not the
+number of events. Hourly timelines have no rollups and group the raw risk
+assessments with the same pivot.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from services.date_migration import date_field
+from services.hitl_rollups import get_hitl_rollups
+
+RISK_LEVELS = ("level_1", "level_2", "level_3")
+MODERATOR_LIMIT = 100
+
+
+def _since(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+def _level_sums(count: Any) -> Dict[str, Any]:
+    return {
+        level: {"$sum": {"$cond": [{"$eq": ["$risk_level", level]}, count, 0]}}
+        for level in RISK_LEVELS
+    }
+
+
+def _counts(rows: List[Dict[str, Any]]) -> Dict[Any, int]:
+    return {row["_id"]: row["count"] for row in rows}
+
+
+async def overview(db, days: int) -> Dict[str, Any]:
+    rollups = get_hitl_rollups(db)
+    since = _since(days)
+    by = lambda field: {"$group": {"_id": f"${field}", "count": {"$sum": "$count"}}}  # noqa: E731
+    positive = {"$match": {"count": {"$gt": 0}}}
+
+    risk, queue, keywords, response = await asyncio.gather(
+        rollups.aggregate("risk_level", since, [by("risk_level"), positive, {"$sort": {"_id": 1}}]),
+        rollups.aggregate("queue_status", since, [by("status"), positive]),
+        rollups.aggregate("keyword", since, [
+            by("keyword"), {"$sort": {"count": -1, "_id": 1}}, {"$limit": 20},
+        ], length=20),
+        rollups.aggregate("response", since, [{"$group": {
+            "_id": None,
+            "count": {"$sum": "$count"},
+            "seconds_sum": {"$sum": "$seconds_sum"},
+            "min_response_time": {"$min": "$seconds_min"},
+            "max_response_time": {"$max": "$seconds_max"},
+        }}], length=1),
+    )
+
+    stats = response[0] if response and response[0]["count"] else None
+    return {
+        "period_days": days,
+        "risk_distribution": _counts(risk),
+        "queue_stats": _counts(queue),
+        "keyword_trends": [{"keyword": k["_id"], "count": k["count"]} for k in keywords],
+        "response_time": {
+            "avg_response_time": stats["seconds_sum"] / stats["count"],
+            "min_response_time": stats["min_response_time"],
+            "max_response_time": stats["max_response_time"],
+            "count": stats["count"],
+        } if stats else {
+            "avg_response_time": 0,
+            "min_response_time": 0,
+            "max_response_time": 0,
+            "count": 0
+        }
+    }
+
+
+async def timeline(db, days: int, interval: str = "day") -> Dict[str, Any]:
+    since = _since(days)
+    if interval == "day":
+        rows = await get_hitl_rollups(db).aggregate("risk_level", since, [
+            {"$group": {"_id": "$day", **_level_sums("$count")}},
+            {"$sort": {"_id": 1}},
+        ])
+    else:
+        created, native = await date_field(db, "risk_assessments", "created_at")
+        rows = await db.risk_assessments.aggregate([
+            {"$match": {created: {"$gte": datetime.fromisoformat(since) if native else since}}},
+            {"$group": {
+                "_id": {"$dateToString": {
+                    "format": "%Y-%m-%d %H:00",
+                    "date": f"${created}" if native else {"$toDate": "$created_at"},
+                }},
+                **_level_sums(1),
+            }},
+            {"$sort": {"_id": 1}},
+        ]).to_list(None)
+
+    return {
+        "dates": [row["_id"] for row in rows],
+        "series": {
+            level: [{"date": row["_id"], "count": row[level]} for row in rows]
+            for level in RISK_LEVELS
+        }
+    }
+
+
+async def moderator_performance(db, days: int) -> Dict[str, Any]:
+    rows = await get_hitl_rollups(db).aggregate("moderator_action", _since(days), [
+        {"$group": {
+            "_id": {"moderator_id": "$moderator_id", "action": "$action"},
+            "count": {"$sum": "$count"},
+        }},
+        {"$match": {"count": {"$gt": 0}}},
+        {"$group": {
+            "_id": "$_id.moderator_id",
+            "total_actions": {"$sum": "$count"},
+            "actions": {"$push": {"k": "$_id.action", "v": "$count"}},
+        }},
+        {"$sort": {"total_actions": -1, "_id": 1}},
+        {"$limit": MODERATOR_LIMIT},
+        {"$lookup": {
+            "from": "users",
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [{"$project": {"_id": 0, "name": 1, "email": 1}}],
+            "as": "user",
+        }},
+        {"$project": {
+            "_id": 0,
+            "moderator_id": "$_id",
+            "name": {"$ifNull": [{"$first": "$user.name"}, "Unknown"]},
+            "email": {"$ifNull": [{"$first": "$user.email"}, ""]},
+            "total_actions": 1,
+            "action_breakdown": {"$arrayToObject": "$actions"},
+        }},
+    ], length=MODERATOR_LIMIT)
+    return {"moderators": rows, "period_days": days}
@@ -0,0 +1,315 @@
+"""
+HITL Daily Rollups
+==================
+Pre-aggregated daily counts behind the HITL analytics endpoints
+(``/analytics/hitl/overview``, ``/timeline``, ``/moderator-performance``)
+and ``HITLEngine.get_hitl_stats``.
+
+``hitl_daily`` holds one document per (metric, day, dimensions) with a
+``count``. ``day`` is the ``YYYY-MM-DD`` prefix of the source timestamp:
+
+- ``risk_level``: risk assessments by ``risk_level``
+- ``keyword``: keywords detected in risk assessments (any category), by
+  ``keyword``
+- ``queue_status``: moderation queue items by current ``status``, on the
+  item's creation day (a decision moves one count between statuses)
+- ``response``: moderated queue items on their creation day, with
+  ``seconds_sum`` / ``seconds_min`` / ``seconds_max`` of the time to decision
+- ``moderator_action``: audit logs by ``moderator_id`` and ``action``
+
+Maintenance:
+- incremental: HITLEngine applies ``$inc`` upserts right after each raw write.
+  A failed rollup write is logged and counted; the raw write stands.
+- rebuild: ``rebuild()`` recomputes settled days (ended more than
+  ``HITL_ROLLUP_SETTLE_SECONDS`` ago) from the raw collections. It is
+  idempotent; run it once after deploying to backfill history
+  (``scripts/rebuild_hitl_rollups.py`` or
+  ``POST /api/admin/hitl/rollups/rebuild``), and again to repair days after
+  failed rollup writes. State, readiness and the rebuild loop are
+  ``RollupState`` (``utils/rollups.py``).
+
+Reads (``aggregate``) run one pipeline per metric that yields rows of
+``{day, <dimensions>, count}`` followed by the caller's pivot stages:
+- full days come from ``hitl_daily``
+- the partial day at the start of the window is grouped from the raw
+  collection inside the same pipeline (``$unionWith``)
+Results therefore match a raw scan from the same cutoff. Until the
+rollups have been rebuilt past the first incrementally written day, the
+rows are grouped from the raw collection instead.
+
+Metrics:
+- hitl_rollup_write_errors_total{metric}
+"""
+
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from utils.metrics import increment_counter
+from utils.rollups import DAY, RollupState, replace_rows
+
+logger = logging.getLogger(__name__)
+
+HITL_ROLLUP_SETTLE_SECONDS = int(os.environ.get("HITL_ROLLUP_SETTLE_SECONDS", 300))
+
+# metric -> source collection, ISO timestamp field, dimensions
+METRICS: Dict[str, Dict[str, Any]] = {
+    "risk_level": {"collection": "risk_assessments", "date_field": "created_at",
+                   "dimensions": ("risk_level",)},
+    "keyword": {"collection": "risk_assessments", "date_field": "created_at",
+                "dimensions": ("keyword",)},
+    "queue_status": {"collection": "moderation_queue", "date_field": "created_at",
+                     "dimensions": ("status",)},
+    "response": {"collection": "moderation_queue", "date_field": "created_at",
+                 "dimensions": ()},
+    "moderator_action": {"collection": "audit_logs", "date_field": "timestamp",
+                         "dimensions": ("moderator_id", "action")},
+}
+
+RESPONSE_FIELDS = ("seconds_sum", "seconds_min", "seconds_max")
+
+REBUILD_CHUNK_DAYS = 7
+
+
+def day_of(timestamp: str) -> str:
+    """``2026-01-01T13:25:11+00:00`` -> ``2026-01-01``."""
+    return timestamp[:10]
+
+
+def next_day(day: str) -> str:
+    return (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def response_seconds(created_at: str, moderated_at: str) -> float:
+    return (datetime.fromisoformat(moderated_at) - datetime.fromisoformat(created_at)).total_seconds()
+
+
+def raw_rows(metric: str, window: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Pipeline over the metric's raw collection producing rollup-shaped rows.
+    ``window`` is a condition on the ISO timestamp field (``{"$gte": ...}``).
+    """
+    spec = METRICS[metric]
+    field = spec["date_field"]
+    match: Dict[str, Any] = {field: window} if window else {}
+    day = {"$substr": [f"${field}", 0, 10]}
+    stages: List[Dict[str, Any]] = []
+
+    if metric == "risk_level":
+        group = {"day": day, "risk_level": "$risk_level"}
+    elif metric == "keyword":
+        # detected_keywords is {category: [keyword, ...]}
+        stages = [
+            {"$project": {field: 1, "kw": {"$cond": [
+                {"$eq": [{"$type": "$detected_keywords"}, "object"]},
+                {"$objectToArray": "$detected_keywords"},
+                [],
+            ]}}},
+            {"$unwind": "$kw"},
+            {"$unwind": "$kw.v"},
+        ]
+        group = {"day": day, "keyword": "$kw.v"}
+    elif metric == "queue_status":
+        group = {"day": day, "status": "$status"}
+    elif metric == "moderator_action":
+        match["moderator_id"] = {"$exists": True}
+        group = {"day": day, "moderator_id": "$moderator_id", "action": "$action"}
+    else:  # response
+        match["moderated_at"] = {"$type": "string"}
+        seconds = {"$divide": [
+            {"$subtract": [{"$toDate": "$moderated_at"}, {"$toDate": "$created_at"}]}, 1000
+        ]}
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": {"day": day},
+                "count": {"$sum": 1},
+                "seconds_sum": {"$sum": seconds},
+                "seconds_min": {"$min": seconds},
+                "seconds_max": {"$max": seconds},
+            }},
+            {"$project": {"_id": 0, "day": "$_id.day", "count": 1,
+                          **{f: 1 for f in RESPONSE_FIELDS}}},
+        ]
+
+    return [
+        {"$match": match},
+        *stages,
+        {"$group": {"_id": group, "count": {"$sum": 1}}},
+        {"$project": {"_id": 0, **{k: f"$_id.{k}" for k in group}, "count": 1}},
+    ]
+
+
+def _inc(metric: str, day: str, count: int = 1, **dimensions) -> UpdateOne:
+    return UpdateOne(
+        {"metric": metric, "day": day, **dimensions},
+        {"$inc": {"count": count}},
+        upsert=True,
+    )
+
+
+class HITLRollups:
+    """Maintains and reads ``hitl_daily``."""
+
+    def __init__(self, db=None):
+        self.db = db
+        self.state = RollupState("HITL", "hitl_rollup_state", "hitl_daily", DAY, HITL_ROLLUP_SETTLE_SECONDS,
+                                 state_id="daily", chunk=REBUILD_CHUNK_DAYS, db=db)
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self.state.set_db(db)
+
+    # ---------- incremental writes ----------
+
+    async def record_assessment(self, assessment: Dict[str, Any]):
+        day = day_of(assessment["created_at"])
+        ops = [_inc("risk_level", day, risk_level=assessment.get("risk_level"))]
+        ops += [
+            _inc("keyword", day, keyword=keyword)
+            for keywords in (assessment.get("detected_keywords") or {}).values()
+            for keyword in keywords
+        ]
+        await self._write("risk_level", ops, day)
+
+    async def record_queue_item(self, item: Dict[str, Any]):
+        day = day_of(item["created_at"])
+        await self._write("queue_status", [_inc("queue_status", day, status=item.get("status"))], day)
+
+    async def record_decision(self, item: Dict[str, Any], new_status: str, moderated_at: str):
+        """A moderation decision on ``item`` (the queue document before the update)."""
+        day = day_of(item["created_at"])
+        ops = [
+            _inc("queue_status", day, -1, status=item.get("status")),
+            _inc("queue_status", day, status=new_status),
+        ]
+        if item.get("moderated_at"):
+            # Re-moderation replaces a response time; min/max cannot be undone
+            await self._write("queue_status", ops)
+            await self.rebuild_metric_day("response", day)
+            return
+        seconds = response_seconds(item["created_at"], moderated_at)
+        ops.append(UpdateOne(
+            {"metric": "response", "day": day},
+            {"$inc": {"count": 1, "seconds_sum": seconds},
+             "$min": {"seconds_min": seconds},
+             "$max": {"seconds_max": seconds}},
+            upsert=True,
+        ))
+        await self._write("queue_status", ops)
+
+    async def record_audit_log(self, log: Dict[str, Any]):
+        day = day_of(log["timestamp"])
+        op = _inc("moderator_action", day, moderator_id=log.get("moderator_id"), action=log.get("action"))
+        await self._write("moderator_action", [op], day)
+
+    async def _write(self, metric: str, ops: List[UpdateOne], new_day: Optional[str] = None):
+        """``new_day`` is set for writes of newly created raw documents."""
+        try:
+            if new_day:
+                await self.state.mark_incremental_once(new_day)
+            await self.db.hitl_daily.bulk_write(ops, ordered=False)
+        except Exception as e:
+            increment_counter("hitl_rollup_write_errors_total", labels={"metric": metric})
+            logger.warning(f"HITL rollup write failed ({metric}): {e}")
+
+    # ---------- reads ----------
+
+    async def is_ready(self) -> bool:
+        """True once rollups cover every day (cached; it never reverts)."""
+        return await self.state.is_ready()
+
+    async def aggregate(self, metric: str, since: Optional[str], stages: List[Dict[str, Any]],
+                        length: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Run ``stages`` over the metric's rows since an ISO timestamp (all time
+        when None). Rows have ``day``, the metric's dimensions and ``count``.
+        """
+        spec = METRICS[metric]
+        if not await self.is_ready():
+            window = {"$gte": since} if since else None
+            pipeline = raw_rows(metric, window) + stages
+            return await self.db[spec["collection"]].aggregate(pipeline).to_list(length)
+
+        if since is None:
+            rows = [{"$match": {"metric": metric}}]
+        else:
+            boundary = next_day(day_of(since))
+            rows = [
+                {"$match": {"metric": metric, "day": {"$gte": boundary}}},
+                {"$unionWith": {
+                    "coll": spec["collection"],
+                    "pipeline": raw_rows(metric, {"$gte": since, "$lt": boundary}),
+                }},
+            ]
+        return await self.db.hitl_daily.aggregate(rows + stages).to_list(length)
+
+    # ---------- maintenance ----------
+
+    async def rebuild(self, since_day: Optional[str] = None, until_day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recompute days in [since_day, until_day) from the raw collections.
+
+        ``until_day`` defaults to the latest settled day; ``since_day`` to the
+        day of the oldest risk assessment, queue item or audit log.
+        """
+        if since_day is None:
+            oldest_days = []
+            for collection, field in (("risk_assessments", "created_at"),
+                                      ("moderation_queue", "created_at"),
+                                      ("audit_logs", "timestamp")):
+                oldest = await self.db[collection].find_one(
+                    {field: {"$type": "string"}}, {field: 1}, sort=[(field, 1)]
+                )
+                if oldest:
+                    oldest_days.append(day_of(oldest[field]))
+            since_day = min(oldest_days, default=None)
+        return await self.state.rebuild(self._rebuild_all, since_day, until_day)
+
+    async def rebuild_metric_day(self, metric: str, day: str):
+        """Recompute one metric for one day (after a change $inc cannot express)."""
+        try:
+            await self._rebuild_range(metric, day, next_day(day), uuid.uuid4().hex)
+        except Exception as e:
+            increment_counter("hitl_rollup_write_errors_total", labels={"metric": metric})
+            logger.warning(f"HITL rollup day rebuild failed ({metric} {day}): {e}")
+
+    async def _rebuild_all(self, start: str, end: str, rebuild_id: str) -> int:
+        rows = 0
+        for metric in METRICS:
+            rows += await self._rebuild_range(metric, start, end, rebuild_id)
+        return rows
+
+    async def _rebuild_range(self, metric: str, start: str, end: str, rebuild_id: str) -> int:
+        spec = METRICS[metric]
+        groups = await self.db[spec["collection"]].aggregate(
+            raw_rows(metric, {"$gte": start, "$lt": end})
+        ).to_list(None)
+        values = ("count", *RESPONSE_FIELDS) if metric == "response" else ("count",)
+        return await replace_rows(
+            self.db.hitl_daily,
+            (({"metric": metric, "day": row["day"], **{d: row.get(d) for d in spec["dimensions"]}},
+              {v: row[v] for v in values}) for row in groups),
+            {"metric": metric, "day": {"$gte": start, "$lt": end}}, rebuild_id,
+        )
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.state.status()
+
+
+_hitl_rollups: Optional[HITLRollups] = None
+
+
+def get_hitl_rollups(db=None) -> HITLRollups:
+    """Get or create singleton HITL rollups."""
+    global _hitl_rollups
+    if _hitl_rollups is None:
+        _hitl_rollups = HITLRollups(db)
+    elif db is not None and db is not _hitl_rollups.db:
+        _hitl_rollups.set_db(db)
+    return _hitl_rollups
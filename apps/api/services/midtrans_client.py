@@ -0,0 +1,211 @@
+"""
+Async Midtrans Client
+=====================
+httpx-based Snap/Core API client. It replaces the blocking
+``midtransclient`` calls that ran on the event loop.
+
+- Connections come from the shared ``midtrans`` pool in
+  utils.http_clients (keep-alive, timeouts, concurrency limit).
+- Retries with backoff:
+  - Status reads retry on transport errors, 429 and 5xx.
+  - Transaction creation only retries when the request never reached
+    Midtrans (connect errors), so an order is never submitted twice.
+- Transaction status is cached for ``MIDTRANS_STATUS_CACHE_SECONDS``.
+  Concurrent lookups for the same order share one upstream call, so a
+  client polling the status page costs at most one Midtrans call per TTL.
+  Webhooks call ``invalidate_status`` so a settled order is seen at once.
+
+``MIDTRANS_SNAP_BASE_URL`` / ``MIDTRANS_CORE_BASE_URL`` override the hosts,
+e.g. to point a dev stack at a local fake Midtrans server.
+
+Metrics:
+- midtrans_requests_total{operation, outcome}
+- midtrans_request_ms{operation}
+- midtrans_status_cache_total{result="hit|miss"}
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from utils.http_clients import get_http_client
+from utils.metrics import increment_counter, observe_histogram
+
+logger = logging.getLogger(__name__)
+
+SNAP_SANDBOX_BASE_URL = "https://app.sandbox.midtrans.com/snap/v1"
+SNAP_PRODUCTION_BASE_URL = "https://app.midtrans.com/snap/v1"
+CORE_SANDBOX_BASE_URL = "https://api.sandbox.midtrans.com"
+CORE_PRODUCTION_BASE_URL = "https://api.midtrans.com"
+
+MIDTRANS_MAX_RETRIES = int(os.environ.get("MIDTRANS_MAX_RETRIES", 2))
+MIDTRANS_STATUS_CACHE_SECONDS = float(os.environ.get("MIDTRANS_STATUS_CACHE_SECONDS", 5))
+MIDTRANS_STATUS_CACHE_MAX_SIZE = 10000
+
+RETRY_BACKOFF_SECONDS = 0.2
+RETRYABLE_STATUS = frozenset([429, 500, 502, 503, 504])
+
+
+class MidtransError(Exception):
+    """Midtrans returned an error, or could not be reached."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 response: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response or {}
+
+
+class MidtransClient:
+    """Async client for Snap transactions and Core status."""
+
+    def __init__(self, server_key: str, client_key: str = "", is_production: bool = False,
+                 snap_base_url: Optional[str] = None, core_base_url: Optional[str] = None,
+                 max_retries: int = MIDTRANS_MAX_RETRIES,
+                 status_cache_ttl: float = MIDTRANS_STATUS_CACHE_SECONDS,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        self.server_key = server_key
+        self.client_key = client_key
+        self.is_production = is_production
+        self.snap_base_url = (snap_base_url or
+                              (SNAP_PRODUCTION_BASE_URL if is_production else SNAP_SANDBOX_BASE_URL)).rstrip("/")
+        self.core_base_url = (core_base_url or
+                              (CORE_PRODUCTION_BASE_URL if is_production else CORE_SANDBOX_BASE_URL)).rstrip("/")
+        self.max_retries = max_retries
+        self.status_cache_ttl = status_cache_ttl
+        self._http_client = http_client
+        self._status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._status_inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client("midtrans")
+
+    # ---------- API ----------
+
+    async def create_transaction(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a Snap transaction; returns ``token`` and ``redirect_url``."""
+        return await self._request("create_transaction", "POST", f"{self.snap_base_url}/transactions",
+                                   json=params, idempotent=False)
+
+    async def transaction_status(self, order_id: str) -> Dict[str, Any]:
+        """Core API transaction status, cached briefly and coalesced per order."""
+        cached = self._status_cache.get(order_id)
+        if cached is not None and cached[0] > time.monotonic():
+            increment_counter("midtrans_status_cache_total", labels={"result": "hit"})
+            return dict(cached[1])
+
+        inflight = self._status_inflight.get(order_id)
+        if inflight is not None:
+            increment_counter("midtrans_status_cache_total", labels={"result": "hit"})
+            return dict(await asyncio.shield(inflight))
+
+        increment_counter("midtrans_status_cache_total", labels={"result": "miss"})
+        future = asyncio.get_running_loop().create_future()
+        self._status_inflight[order_id] = future
+        try:
+            status = await self._request("transaction_status", "GET",
+                                         f"{self.core_base_url}/v2/{order_id}/status")
+            self._cache_status(order_id, status)
+            future.set_result(status)
+            return dict(status)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise; don't warn when there are none
+            raise
+        finally:
+            self._status_inflight.pop(order_id, None)
+
+    def invalidate_status(self, order_id: str):
+        """Drop a cached status (call when a webhook changes the order)."""
+        self._status_cache.pop(order_id, None)
+
+    def _cache_status(self, order_id: str, status: Dict[str, Any]):
+        if self.status_cache_ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._status_cache) >= MIDTRANS_STATUS_CACHE_MAX_SIZE:
+            self._status_cache = {k: v for k, v in self._status_cache.items() if v[0] > now}
+            if len(self._status_cache) >= MIDTRANS_STATUS_CACHE_MAX_SIZE:
+                self._status_cache.clear()
+        self._status_cache[order_id] = (now + self.status_cache_ttl, status)
+
+    # ---------- transport ----------
+
+    async def _request(self, operation: str, method: str, url: str, json: Optional[Dict[str, Any]] = None,
+                       idempotent: bool = True) -> Dict[str, Any]:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.client.request(method, url, json=json, auth=(self.server_key, ""),
+                                                         headers={"Accept": "application/json"})
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    # Never reached Midtrans: safe to retry any request
+                    if attempt >= self.max_retries:
+                        outcome = "unreachable"
+                        raise MidtransError(f"Midtrans unreachable: {e!r}") from e
+                except httpx.TransportError as e:
+                    if not idempotent or attempt >= self.max_retries:
+                        outcome = "transport_error"
+                        raise MidtransError(f"Midtrans request failed: {e!r}") from e
+                else:
+                    if not (idempotent and response.status_code in RETRYABLE_STATUS
+                            and attempt < self.max_retries):
+                        body = self._parse(response)
+                        outcome = "ok"
+                        return body
+                attempt += 1
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+        except MidtransError as e:
+            if e.status_code:
+                outcome = str(e.status_code)
+            raise
+        finally:
+            increment_counter("midtrans_requests_total", labels={"operation": operation, "outcome": outcome})
+            observe_histogram("midtrans_request_ms", (time.perf_counter() - start) * 1000,
+                              labels={"operation": operation})
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            body = response.json()
+        except ValueError:
+            raise MidtransError(f"Midtrans returned non-JSON (HTTP {response.status_code}): {response.text[:200]}",
+                                status_code=response.status_code)
+        if response.status_code >= 400:
+            raise MidtransError(f"Midtrans API error (HTTP {response.status_code}): {body}",
+                                status_code=response.status_code, response=body)
+        # Core API reports errors in the body; 407 (expired) is a valid status
+        api_status = body.get("status_code") if isinstance(body, dict) else None
+        if api_status and str(api_status).isdigit() and int(api_status) >= 400 and int(api_status) != 407:
+            raise MidtransError(f"Midtrans API error ({api_status}): {body.get('status_message')}",
+                                status_code=int(api_status), response=body)
+        return body
+
+
+_midtrans_client: Optional[MidtransClient] = None
+
+
+def get_midtrans_client() -> MidtransClient:
+    """Get or create the singleton client from MIDTRANS_* env."""
+    global _midtrans_client
+    if _midtrans_client is None:
+        _midtrans_client = MidtransClient(
+            server_key=os.environ.get("MIDTRANS_SERVER_KEY", ""),
+            client_key=os.environ.get("MIDTRANS_CLIENT_KEY", ""),
+            is_production=str(os.environ.get("MIDTRANS_IS_PRODUCTION", "false")).lower() == "true",
+            snap_base_url=os.environ.get("MIDTRANS_SNAP_BASE_URL") or None,
+            core_base_url=os.environ.get("MIDTRANS_CORE_BASE_URL") or None,
+        )
+    return _midtrans_client
+
@@ -0,0 +1,206 @@
+"""
+Question Catalog
+================
+In-memory catalog of quiz questions, per series.
+
+For each series the catalog holds:
+- the active questions sorted by ``order`` (what GET /quiz/questions returns)
+- pre-serialized payloads per language, served with an ETag
+- a question_id -> metadata map (series, stress_marker_flag, active)
+  used by quiz submission
+
+Reads make no database calls for catalog data. Every admin mutation calls
+``invalidate()``, which bumps the shared ``questions`` version stamp; other
+workers notice the bump on their next version check.
+
+Only series that exist in ``questions`` (a ``distinct`` cached per version)
+are loaded and cached, so requests for arbitrary series names cannot grow
+the cache.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.cache_version import VersionStamp
+from utils.static_payloads import StaticPayload
+
+logger = logging.getLogger(__name__)
+
+# GET /quiz/questions historically returned at most this many questions
+MAX_QUESTIONS_PER_SERIES = 100
+
+# Languages with a dedicated question_<lang>_text field
+CATALOG_LANGUAGES = ("id", "en")
+
+
+def format_question(question: Dict[str, Any], language: str) -> Dict[str, Any]:
+    """Client-facing question shape for a language."""
+    return {
+        "question_id": question.get("question_id"),
+        "text": question.get(f"question_{language}_text", question.get("question_id_text", "")),
+        "type": question.get("question_type", "forced_choice"),
+        "options": question.get("options", []),
+        "order": question.get("order", 0),
+    }
+
+
+def _order_key(question: Dict[str, Any]):
+    # Mirrors .sort("order", 1): documents without an order come first
+    order = question.get("order")
+    return (order is not None, order if order is not None else 0)
+
+
+class SeriesEntry:
+    """Cached questions of one series."""
+
+    __slots__ = ("series", "questions", "metadata", "_payloads")
+
+    def __init__(self, series: str, documents: Iterable[Dict[str, Any]]):
+        self.series = series
+        documents = list(documents)
+        active = [q for q in documents if q.get("active") is True]
+        self.questions: List[Dict[str, Any]] = sorted(active, key=_order_key)[:MAX_QUESTIONS_PER_SERIES]
+        self.metadata: Dict[str, Dict[str, Any]] = {
+            q["question_id"]: {
+                "series": series,
+                "stress_marker_flag": bool(q.get("stress_marker_flag", False)),
+                "active": bool(q.get("active", False)),
+            }
+            for q in documents
+            if q.get("question_id")
+        }
+        self._payloads: Dict[str, StaticPayload] = {}
+
+    def content(self, language: str) -> Dict[str, Any]:
+        formatted = [format_question(q, language) for q in self.questions]
+        return {"questions": formatted, "total": len(formatted)}
+
+    def payload(self, language: str) -> StaticPayload:
+        """Serialized response for a language, built on first use."""
+        payload = self._payloads.get(language)
+        if payload is None:
+            # max-age=0: clients must revalidate, which is a cheap 304
+            payload = StaticPayload(self.content(language), max_age=0)
+            if language in CATALOG_LANGUAGES:
+                self._payloads[language] = payload
+        return payload
+
+
+class QuestionCatalog:
+    """
+    Versioned in-process cache of quiz questions.
+
+    Usage:
+        catalog = get_question_catalog(db)
+        entry = await catalog.get_series("couples")
+        await catalog.invalidate()  # after any write to db.questions
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.version = VersionStamp("questions")
+        self._entries: Dict[str, SeriesEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._known: Optional[Set[str]] = None
+        self.loads = 0
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+
+    async def _check_version(self):
+        if await self.version.refresh(self.db):
+            self._entries.clear()
+            self._known = None
+
+    async def _known_series(self) -> Set[str]:
+        """Series that have questions in the database (cached per version)."""
+        if self._known is None:
+            version = self.version.version
+            known = set(await self.db.questions.distinct("series"))
+            if version != self.version.version:
+                return known
+            self._known = known
+        return self._known
+
+    async def get_series(self, series: str) -> SeriesEntry:
+        """Return the cached entry for a series, loading it once if needed."""
+        await self._check_version()
+        entry = self._entries.get(series)
+        if entry is not None:
+            return entry
+        if series not in await self._known_series():
+            return SeriesEntry(series, [])
+
+        lock = self._locks.setdefault(series, asyncio.Lock())
+        try:
+            async with lock:
+                entry = self._entries.get(series)
+                if entry is None:
+                    version = self.version.version
+                    documents = await self.db.questions.find({"series": series}, {"_id": 0}).to_list(None)
+                    entry = SeriesEntry(series, documents)
+                    self.loads += 1
+                    # Don't keep an entry that an invalidation raced past
+                    if version == self.version.version:
+                        self._entries[series] = entry
+        finally:
+            if self._locks.get(series) is lock:
+                del self._locks[series]
+        return entry
+
+    async def get_payload(self, series: str, language: str) -> Optional[StaticPayload]:
+        """Serialized questions for a series, or None when it has no active questions."""
+        entry = await self.get_series(series)
+        if not entry.questions:
+            return None
+        return entry.payload(language)
+
+    async def get_metadata(self, series: Optional[str], question_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Metadata for question_ids.
+
+        IDs from the given series come from the cache; anything else
+        (e.g. a question moved to another series) falls back to one query.
+        """
+        question_ids = list(question_ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        if series:
+            entry = await self.get_series(series)
+            found = {qid: entry.metadata[qid] for qid in question_ids if qid in entry.metadata}
+
+        missing = [qid for qid in set(question_ids) if qid not in found]
+        if missing:
+            documents = await self.db.questions.find(
+                {"question_id": {"$in": missing}},
+                {"_id": 0, "question_id": 1, "series": 1, "stress_marker_flag": 1, "active": 1}
+            ).to_list(length=len(missing))
+            for q in documents:
+                found[q["question_id"]] = {
+                    "series": q.get("series"),
+                    "stress_marker_flag": bool(q.get("stress_marker_flag", False)),
+                    "active": bool(q.get("active", False)),
+                }
+        return found
+
+    async def invalidate(self) -> int:
+        """Drop cached series here and bump the version for other workers."""
+        self._entries.clear()
+        self._known = None
+        version = await self.version.bump(self.db)
+        logger.info(f"Question catalog invalidated (version {version})")
+        return version
+
+
+_question_catalog: Optional[QuestionCatalog] = None
+
+
+def get_question_catalog(db=None) -> QuestionCatalog:
+    """Get or create singleton question catalog."""
+    global _question_catalog
+    if _question_catalog is None:
+        _question_catalog = QuestionCatalog(db)
+    elif db is not None:
+        _question_catalog.set_db(db)
+    return _question_catalog
@@ -0,0 +1,205 @@
+"""
+RELASI4™ Question Set Cache
+===========================
+Locked RELASI4™ question sets (see packages/relasi4tm/seed_relasi4_v1.py)
+never change under the same lock_hash: the seed script refuses to
+overwrite locked content and new content ships as a new set code.
+
+This cache therefore:
+- loads a set (questions + answers) with a single aggregation
+- keeps it, pre-serialized, for as long as its lock_hash stays the same
+- serves it with ETag = lock_hash
+
+The only recurring query is a small poll of r4_question_sets (code,
+lock_hash) every R4_QUESTION_SET_CHECK_SECONDS to notice new or re-locked
+sets. Sets without a lock_hash are reloaded on every poll.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.static_payloads import StaticPayload
+
+logger = logging.getLogger(__name__)
+
+R4_QUESTION_SET_CHECK_SECONDS = float(os.environ.get("R4_QUESTION_SET_CHECK_SECONDS", 60))
+
+# Limits kept from the original per-request queries
+MAX_SETS = 20
+MAX_QUESTIONS_PER_SET = 100
+MAX_ANSWERS_PER_QUESTION = 10
+
+SET_FIELDS = {"_id": 0, "code": 1, "title": 1, "version": 1, "is_active": 1, "lock_hash": 1}
+
+
+def build_question_set_pipeline(codes: List[str]) -> List[Dict[str, Any]]:
+    """Sets with their active questions and answers, in one round trip."""
+    return [
+        {"$match": {"code": {"$in": codes}, "is_active": True}},
+        {"$project": SET_FIELDS},
+        {"$lookup": {
+            "from": "r4_questions",
+            "let": {"code": "$code"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$set_code", "$$code"]}, "is_active": True}},
+                {"$sort": {"order_no": 1}},
+                {"$limit": MAX_QUESTIONS_PER_SET},
+                {"$lookup": {
+                    "from": "r4_answers",
+                    "let": {"set_code": "$set_code", "order_no": "$order_no"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$and": [
+                            {"$eq": ["$set_code", "$$set_code"]},
+                            {"$eq": ["$order_no", "$$order_no"]},
+                        ]}}},
+                        {"$sort": {"label": 1}},
+                        {"$limit": MAX_ANSWERS_PER_QUESTION},
+                        {"$project": {"_id": 0, "label": 1, "text": 1}},
+                    ],
+                    "as": "answers",
+                }},
+                {"$project": {"_id": 0, "order_no": 1, "prompt": 1, "type": 1, "answers": 1}},
+            ],
+            "as": "questions",
+        }},
+    ]
+
+
+def format_questions(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Same shape as List[QuestionResponse]."""
+    return [
+        {
+            "order_no": q["order_no"],
+            "prompt": q["prompt"],
+            "type": q["type"],
+            "answers": [{"label": a["label"], "text": a["text"]} for a in q.get("answers", [])],
+        }
+        for q in questions
+    ]
+
+
+class CachedQuestionSet:
+    """One loaded question set and its serialized questions."""
+
+    __slots__ = ("code", "title", "version", "is_active", "lock_hash", "question_count", "payload")
+
+    def __init__(self, doc: Dict[str, Any]):
+        self.code = doc["code"]
+        self.title = doc["title"]
+        self.version = doc["version"]
+        self.is_active = doc["is_active"]
+        self.lock_hash: Optional[str] = doc.get("lock_hash")
+        questions = format_questions(doc.get("questions", []))
+        self.question_count = len(questions)
+        self.payload = StaticPayload(questions, etag=self.lock_hash)
+
+    def summary(self) -> Dict[str, Any]:
+        """Same shape as QuestionSetResponse."""
+        return {
+            "code": self.code,
+            "title": self.title,
+            "version": self.version,
+            "is_active": self.is_active,
+            "question_count": self.question_count,
+        }
+
+
+class RELASI4QuestionSetCache:
+    """
+    Lock-hash keyed cache of active RELASI4™ question sets.
+
+    Usage:
+        cache = get_question_set_cache(db)
+        question_set = await cache.get_set("R4W_CORE_V1")
+        return question_set.payload.response(request)
+    """
+
+    def __init__(self, db=None, check_interval: float = R4_QUESTION_SET_CHECK_SECONDS):
+        self.db = db
+        self.check_interval = check_interval
+        self._sets: Dict[str, CachedQuestionSet] = {}
+        self._list_payload: Optional[StaticPayload] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    async def refresh(self, force: bool = False):
+        """Poll lock hashes and (re)load only sets whose hash is new."""
+        if not force and self._is_fresh():
+            return
+        async with self._lock:
+            if not force and self._is_fresh():
+                return
+
+            active = await self.db.r4_question_sets.find(
+                {"is_active": True}, {"_id": 0, "code": 1, "lock_hash": 1}
+            ).to_list(length=MAX_SETS)
+            active_codes = [s["code"] for s in active]
+
+            stale = [
+                s["code"] for s in active
+                if not s.get("lock_hash")
+                or s["code"] not in self._sets
+                or self._sets[s["code"]].lock_hash != s["lock_hash"]
+            ]
+            removed = [code for code in self._sets if code not in active_codes]
+
+            if stale:
+                docs = await self.db.r4_question_sets.aggregate(
+                    build_question_set_pipeline(stale)
+                ).to_list(length=None)
+                for doc in docs:
+                    self._sets[doc["code"]] = CachedQuestionSet(doc)
+                self.loads += 1
+                logger.info(f"RELASI4 question sets loaded: {', '.join(stale)}")
+            for code in removed:
+                del self._sets[code]
+
+            if stale or removed or self._list_payload is None:
+                ordered = [self._sets[code] for code in active_codes if code in self._sets]
+                hashes = "|".join(f"{s.code}:{s.lock_hash or s.payload.etag}" for s in ordered)
+                self._list_payload = StaticPayload(
+                    [s.summary() for s in ordered],
+                    etag=hashlib.sha256(hashes.encode("utf-8")).hexdigest(),
+                )
+            self._checked_at = time.monotonic()
+
+    async def get_set(self, code: str) -> Optional[CachedQuestionSet]:
+        """Cached active set by code, or None."""
+        await self.refresh()
+        return self._sets.get(code)
+
+    async def get_list_payload(self) -> StaticPayload:
+        """Serialized list of active sets with question counts."""
+        await self.refresh()
+        return self._list_payload
+
+    def clear(self):
+        """Drop everything; the next read reloads all sets."""
+        self._sets.clear()
+        self._list_payload = None
+        self._checked_at = None
+
+
+_question_set_cache: Optional[RELASI4QuestionSetCache] = None
+
+
+def get_question_set_cache(db=None) -> RELASI4QuestionSetCache:
+    """Get or create singleton question set cache."""
+    global _question_set_cache
+    if _question_set_cache is None:
+        _question_set_cache = RELASI4QuestionSetCache(db)
+    elif db is not None:
+        _question_set_cache.set_db(db)
+    return _question_set_cache
@@ -0,0 +1,44 @@
+"""
+Async Resend Client
+===================
+Sends email through the Resend REST API on the shared ``resend`` pool from
+utils.http_clients. It replaces the sync SDK, which ran on a thread (or on
+the loop) and opened a new connection for every email.
+
+``params`` follow the Resend API / SDK shape (``from``, ``to``, ``subject``,
+``html``, ...). Returns the response, e.g. ``{"id": "..."}``.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from utils.http_clients import get_http_client
+
+RESEND_API_URL = os.environ.get("RESEND_API_URL", "https://api.resend.com")
+
+
+class ResendError(Exception):
+    """Resend rejected the email or could not be reached."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+async def send_email(params: Dict[str, Any], api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Send one email; raises ResendError on failure."""
+    api_key = api_key or os.environ.get("RESEND_API_KEY", "")
+    if not api_key:
+        raise ResendError("RESEND_API_KEY not configured")
+    try:
+        response = await get_http_client("resend").post(
+            f"{RESEND_API_URL}/emails",
+            json=params,
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+    except Exception as e:
+        raise ResendError(f"Resend request failed: {e!r}") from e
+    if response.status_code >= 400:
+        raise ResendError(f"Resend API error (HTTP {response.status_code}): {response.text[:300]}",
+                          status_code=response.status_code)
+    return response.json()
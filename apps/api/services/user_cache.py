@@ -0,0 +1,123 @@
+"""
+Authenticated User Cache
+========================
+Short-TTL, size-bounded cache of user documents keyed by user_id.
+
+get_current_user resolves the user_id from a verified JWT and reads the
+user from here instead of MongoDB. Entries expire after USER_CACHE_TTL_SECONDS
+and the least recently used entries are evicted beyond USER_CACHE_MAX_SIZE.
+
+Every write that changes a user document must call ``invalidate(user_id)``.
+That evicts the entry locally and bumps the shared ``users`` version stamp
+with the user_id, so other workers evict the same entry on their next
+version check.
+
+Metrics:
+- user_cache_requests_total{result="hit|miss"}  hits are DB reads saved
+- user_cache_invalidations_total
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.cache_version import ALL_KEYS, VersionStamp
+from utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_MAX_SIZE = int(os.environ.get("USER_CACHE_MAX_SIZE", 10000))
+
+
+class UserCache:
+    """LRU + TTL cache of user documents with cross-worker invalidation."""
+
+    def __init__(self, db=None, ttl: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.db = db
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version = VersionStamp("users")
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+
+    async def _apply_remote_invalidations(self):
+        changed = await self.version.changes(self.db)
+        if not changed:
+            return
+        if ALL_KEYS in changed:
+            self._entries.clear()
+        else:
+            for user_id in changed:
+                self._entries.pop(user_id, None)
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """User document for user_id (a copy), or None if it doesn't exist."""
+        await self._apply_remote_invalidations()
+
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            increment_counter("user_cache_requests_total", labels={"result": "hit"})
+            return dict(entry[1])
+
+        self.misses += 1
+        increment_counter("user_cache_requests_total", labels={"result": "miss"})
+        version = self.version.version
+        user = await self.db.users.find_one({"user_id": user_id}, {"_id": 0})
+        if user is None:
+            self._entries.pop(user_id, None)
+            return None
+
+        # Skip caching if an invalidation landed while we were reading
+        if version == self.version.version:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return dict(user)
+
+    async def invalidate(self, user_id: Optional[str] = None):
+        """Evict user_id (or everyone) here and on every other worker."""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+        increment_counter("user_cache_invalidations_total")
+        try:
+            await self.version.bump(self.db, user_id)
+        except Exception as e:
+            # The local entry is gone; other workers still expire it via TTL
+            logger.warning(f"User cache version bump failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and DB reads saved since startup."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "db_reads_saved": self.hits,
+        }
+
+
+_user_cache: Optional[UserCache] = None
+
+
+def get_user_cache(db=None) -> UserCache:
+    """Get or create singleton user cache."""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(db)
+    elif db is not None:
+        _user_cache.set_db(db)
+    return _user_cache
@@ -23,6 +23,14 @@ os.environ.setdefault("MIDTRANS_SERVER_KEY", "test-server-key")
 os.environ.setdefault("MIDTRANS_CLIENT_KEY", "test-client-key")
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "fake_mongo: compares pipelines run by tests/fake_mongo.py, so results reflect the fake's "
+        "semantics rather than mongod's",
+    )
+
+
 @pytest.fixture
 def test_user():
     """Test user data fixture."""
@@ -32,3 +40,32 @@ def test_user():
         "name": "Test User",
         "tier": "free"
     }
+
+
+@pytest.fixture(scope="module")
+def local_server():
+    """Start ASGI apps on free localhost ports (uvicorn threads); returns their base URLs."""
+    import socket
+    import threading
+    import time
+
+    import uvicorn
+
+    servers = []
+
+    def start(app) -> str:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
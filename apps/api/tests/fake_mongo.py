@@ -0,0 +1,988 @@
+"""
+In-memory MongoDB for tests
+===========================
+The subset of Motor's database and collection API, the query language,
+update operators and aggregation stages that the services under test use.
+Collections are created on first access (``db.users`` or ``db["users"]``),
+keep their documents in ``docs`` and count operations per method in
+``calls``.
+
+Aggregation results here reflect what this module implements, not what
+mongod does. Tests that check a pipeline against another code path (rollups
+vs raw scans) are marked ``fake_mongo``; ``scripts/audit_query_plans.py``
+runs the audited queries against a real mongod.
+"""
+
+import copy
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+# A path that does not exist (distinct from a stored null)
+MISSING = _Missing()
+
+
+# ---------- values ----------
+
+def _type_rank(value) -> int:
+    """BSON comparison order: null < numbers < strings < objects < arrays < bool < dates."""
+    if value is None or value is MISSING:
+        return 0
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def sort_key(value):
+    rank = _type_rank(value)
+    if rank == 0:
+        return (0,)
+    if rank == 3:
+        return (3, tuple((k, sort_key(v)) for k, v in value.items()))
+    if rank == 4:
+        return (4, tuple(sort_key(v) for v in value))
+    if rank == 9 and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (rank, value)
+
+
+def _compare(a, b) -> Optional[int]:
+    """-1/0/1 for values of the same type bracket, None otherwise."""
+    if type(a) is type(b) and type(a) in (str, int, float):
+        return (a > b) - (a < b)
+    if a is MISSING or b is MISSING or _type_rank(a) != _type_rank(b):
+        return None
+    ka, kb = sort_key(a), sort_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return ("__list__", tuple(_freeze(v) for v in value))
+    return value
+
+
+def _to_date(value):
+    """``$toDate`` of an ISO string; mongod keeps millisecond precision."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        raise ValueError(f"cannot convert {value!r} to date")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    return parsed.replace(microsecond=parsed.microsecond // 1000 * 1000)
+
+
+# ---------- paths ----------
+
+def get_path(doc, path: str):
+    """Value at a dotted path; arrays of documents yield the list of their values."""
+    for part in path.split("."):
+        if isinstance(doc, list):
+            values = [get_path(item, part) for item in doc if isinstance(item, dict)]
+            doc = [v for v in values if v is not MISSING]
+        elif isinstance(doc, dict):
+            doc = doc.get(part, MISSING)
+        else:
+            return MISSING
+        if doc is MISSING:
+            return MISSING
+    return doc
+
+
+def set_path(doc: Dict[str, Any], path: str, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def with_path(doc: Dict[str, Any], path: str, value) -> Dict[str, Any]:
+    """Copy of ``doc`` with ``path`` set, sharing everything off the path."""
+    head, _, rest = path.partition(".")
+    inner = doc.get(head)
+    return {**doc, head: with_path(inner if isinstance(inner, dict) else {}, rest, value) if rest else value}
+
+
+def unset_path(doc: Dict[str, Any], path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+# ---------- expressions ----------
+
+def evaluate(doc, expr, variables: Optional[Dict[str, Any]] = None):
+    """Aggregation expression; may return MISSING for absent field paths."""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, rest = expr[2:].partition(".")
+        value = doc if name == "ROOT" else (variables or {}).get(name, MISSING)
+        return get_path(value, rest) if rest else value
+    if isinstance(expr, str) and expr.startswith("$"):
+        return get_path(doc, expr[1:])
+    if isinstance(expr, list):
+        return [_value(evaluate(doc, e, variables)) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if not any(k.startswith("$") for k in expr):
+        # Expression object: fields that evaluate to missing are left out
+        out = {}
+        for key, sub in expr.items():
+            value = evaluate(doc, sub, variables)
+            if value is not MISSING:
+                out[key] = value
+        return out
+    (op, arg), = expr.items()
+    if op == "$literal":
+        return arg
+    if op not in OPERATORS:
+        raise NotImplementedError(op)
+    return OPERATORS[op](doc, arg, variables)
+
+
+def _value(value):
+    return None if value is MISSING else value
+
+
+def _args(doc, arg, variables):
+    if not isinstance(arg, list):
+        arg = [arg]
+    return [_value(evaluate(doc, a, variables)) for a in arg]
+
+
+def _truthy(value) -> bool:
+    return value not in (None, False, 0, MISSING)
+
+
+def _substr(doc, arg, variables):
+    value, start, length = _args(doc, arg, variables)
+    if value is None:
+        return ""
+    value = str(value)
+    return value[start:] if length < 0 else value[start:start + length]
+
+
+def _cond(doc, arg, variables):
+    if isinstance(arg, dict):
+        arg = [arg["if"], arg["then"], arg["else"]]
+    test, then, other = arg
+    return evaluate(doc, then if _truthy(evaluate(doc, test, variables)) else other, variables)
+
+
+def _comparison(check: Callable[[int], bool]):
+    def op(doc, arg, variables):
+        a, b = _args(doc, arg, variables)
+        order = _compare(a, b)
+        if order is None:
+            order = (_type_rank(a) > _type_rank(b)) - (_type_rank(a) < _type_rank(b))
+        return check(order)
+    return op
+
+
+def _subtract(doc, arg, variables):
+    a, b = _args(doc, arg, variables)
+    if a is None or b is None:
+        return None
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return int((a - b).total_seconds() * 1000)
+    return a - b
+
+
+def _divide(doc, arg, variables):
+    a, b = _args(doc, arg, variables)
+    return None if a is None or b is None else a / b
+
+
+def _multiply(doc, arg, variables):
+    values = _args(doc, arg, variables)
+    if any(v is None for v in values):
+        return None
+    product = 1
+    for v in values:
+        product *= v
+    return product
+
+
+def _add(doc, arg, variables):
+    values = _args(doc, arg, variables)
+    return None if any(v is None for v in values) else sum(values)
+
+
+def _if_null(doc, arg, variables):
+    *values, default = _args(doc, arg, variables)
+    return next((v for v in values if v is not None), default)
+
+
+def _type(doc, arg, variables):
+    value = evaluate(doc, arg, variables)
+    if value is MISSING:
+        return "missing"
+    names = {0: "null", 2: "string", 3: "object", 4: "array", 7: "objectId", 8: "bool", 9: "date"}
+    rank = _type_rank(value)
+    if rank == 1:
+        return "double" if isinstance(value, float) else "int"
+    return names.get(rank, "unknown")
+
+
+def _convert(doc, arg, variables):
+    value = evaluate(doc, arg["input"], variables)
+    if value is MISSING or value is None:
+        return arg.get("onNull")
+    try:
+        if arg["to"] == "date":
+            return _to_date(value)
+        if arg["to"] == "string":
+            return str(value)
+    except ValueError:
+        if "onError" in arg:
+            return arg["onError"]
+        raise
+    raise NotImplementedError(f"$convert to {arg['to']}")
+
+
+def _to_date_op(doc, arg, variables):
+    value, = _args(doc, arg, variables)
+    return None if value is None else _to_date(value)
+
+
+def _date_to_string(doc, arg, variables):
+    value = _value(evaluate(doc, arg["date"], variables))
+    if value is None:
+        return arg.get("onNull")
+    return value.strftime(arg.get("format", "%Y-%m-%dT%H:%M:%S.%LZ").replace("%L", "000"))
+
+
+def _first(doc, arg, variables):
+    value, = _args(doc, arg, variables)
+    return value[0] if value else MISSING
+
+
+def _object_to_array(doc, arg, variables):
+    value, = _args(doc, arg, variables)
+    return None if value is None else [{"k": k, "v": v} for k, v in value.items()]
+
+
+def _array_to_object(doc, arg, variables):
+    value, = _args(doc, arg, variables)
+    items = value[0] if value and isinstance(value[0], list) and len(value) == 1 else value
+    out = {}
+    for item in items or []:
+        key, val = (item["k"], item["v"]) if isinstance(item, dict) else item
+        out[key] = val
+    return out
+
+
+def _in(doc, arg, variables):
+    value, array = _args(doc, arg, variables)
+    return value in (array or [])
+
+
+def _size(doc, arg, variables):
+    value, = _args(doc, arg, variables)
+    return len(value)
+
+
+def _concat(doc, arg, variables):
+    values = _args(doc, arg, variables)
+    return None if any(v is None for v in values) else "".join(values)
+
+
+OPERATORS: Dict[str, Callable] = {
+    "$substr": _substr,
+    "$substrBytes": _substr,
+    "$cond": _cond,
+    "$eq": _comparison(lambda o: o == 0),
+    "$ne": _comparison(lambda o: o != 0),
+    "$gt": _comparison(lambda o: o > 0),
+    "$gte": _comparison(lambda o: o >= 0),
+    "$lt": _comparison(lambda o: o < 0),
+    "$lte": _comparison(lambda o: o <= 0),
+    "$and": lambda doc, arg, v: all(_truthy(evaluate(doc, a, v)) for a in arg),
+    "$or": lambda doc, arg, v: any(_truthy(evaluate(doc, a, v)) for a in arg),
+    "$not": lambda doc, arg, v: not _truthy(evaluate(doc, arg[0] if isinstance(arg, list) else arg, v)),
+    "$subtract": _subtract,
+    "$divide": _divide,
+    "$multiply": _multiply,
+    "$add": _add,
+    "$ifNull": _if_null,
+    "$type": _type,
+    "$convert": _convert,
+    "$toDate": _to_date_op,
+    "$dateToString": _date_to_string,
+    "$first": _first,
+    "$objectToArray": _object_to_array,
+    "$arrayToObject": _array_to_object,
+    "$in": _in,
+    "$size": _size,
+    "$concat": _concat,
+}
+
+
+# ---------- queries ----------
+
+TYPE_NAMES = {"null": 0, "number": 1, "double": 1, "int": 1, "long": 1, "string": 2, "object": 3,
+              "array": 4, "objectId": 7, "bool": 8, "date": 9}
+
+
+def _candidates(value) -> List[Any]:
+    """Values a query condition is tested against (array fields match per element)."""
+    if isinstance(value, list):
+        return [value, *value]
+    return [value]
+
+
+def _condition(value, op: str, arg, variables=None) -> bool:
+    candidates = _candidates(value)
+    if op == "$eq":
+        return any(_equals(c, arg) for c in candidates)
+    if op == "$ne":
+        return not _condition(value, "$eq", arg)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        checks = {"$gt": lambda o: o > 0, "$gte": lambda o: o >= 0, "$lt": lambda o: o < 0, "$lte": lambda o: o <= 0}
+        return any((o := _compare(c, arg)) is not None and checks[op](o) for c in candidates)
+    if op == "$in":
+        return any(_condition(value, "$eq", a) for a in arg)
+    if op == "$nin":
+        return not _condition(value, "$in", arg)
+    if op == "$exists":
+        return (value is not MISSING) == bool(arg)
+    if op == "$type":
+        names = arg if isinstance(arg, list) else [arg]
+        ranks = {TYPE_NAMES[n] for n in names}
+        return value is not MISSING and any(_type_rank(c) in ranks for c in candidates)
+    if op == "$not":
+        return not _field_matches(value, arg)
+    if op == "$size":
+        return isinstance(value, list) and len(value) == arg
+    if op == "$elemMatch":
+        return isinstance(value, list) and any(
+            matches(item, arg) if isinstance(item, dict) else _field_matches(item, arg) for item in value
+        )
+    raise NotImplementedError(op)
+
+
+def _equals(value, arg) -> bool:
+    if arg is None:
+        return value is None or value is MISSING
+    if value is MISSING:
+        return False
+    return _compare(value, arg) == 0
+
+
+def _field_matches(value, cond) -> bool:
+    if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+        return all(_condition(value, op, arg) for op, arg in cond.items())
+    return _condition(value, "$eq", cond)
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _scalar_equals(value, cond) -> Optional[bool]:
+    """Fast path for ``{field: scalar}``; None when the general rules apply (arrays)."""
+    if type(value) is type(cond):
+        return value == cond
+    if isinstance(value, list):
+        return None
+    if cond is None:
+        return value is MISSING
+    numbers = (int, float)
+    return type(value) in numbers and type(cond) in numbers and value == cond
+
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]], variables=None) -> bool:
+    for key, cond in (query or {}).items():
+        if type(cond) in _SCALARS and "." not in key and key[0] != "$":
+            equal = _scalar_equals(doc.get(key, MISSING), cond)
+            if equal is not None:
+                if not equal:
+                    return False
+                continue
+        if key == "$and":
+            if not all(matches(doc, c, variables) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, c, variables) for c in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, c, variables) for c in cond):
+                return False
+        elif key == "$expr":
+            if not _truthy(evaluate(doc, cond, variables)):
+                return False
+        elif not _field_matches(get_path(doc, key), cond):
+            return False
+    return True
+
+
+# ---------- projections and sorting ----------
+
+def _include(doc, paths: List[List[str]]):
+    if isinstance(doc, list):
+        return [_include(item, paths) for item in doc if isinstance(item, dict)]
+    out = {}
+    for key, value in doc.items():
+        subpaths = [p[1:] for p in paths if p[0] == key]
+        if not subpaths:
+            continue
+        if any(not p for p in subpaths):
+            out[key] = value
+        elif isinstance(value, (dict, list)):
+            out[key] = _include(value, subpaths)
+    return out
+
+
+def project(doc: Dict[str, Any], projection, variables=None) -> Dict[str, Any]:
+    """``find`` projection or ``$project`` stage."""
+    if not projection:
+        return copy.deepcopy(doc)
+    spec = dict(projection)
+    id_spec = spec.pop("_id", 1)
+    flags = {k: v for k, v in spec.items() if isinstance(v, (bool, int))}
+    computed = {k: v for k, v in spec.items() if k not in flags}
+    if not any(flags.values()) and not computed:
+        out = copy.deepcopy(doc)
+        for path in flags:
+            unset_path(out, path)
+    else:
+        out = copy.deepcopy(_include(doc, [p.split(".") for p, include in flags.items() if include]))
+        for key, expr in computed.items():
+            value = evaluate(doc, expr, variables)
+            if value is not MISSING:
+                set_path(out, key, value)
+    out.pop("_id", None)
+    if isinstance(id_spec, (bool, int)):
+        id_value = doc.get("_id", MISSING) if id_spec else MISSING
+    else:
+        id_value = evaluate(doc, id_spec, variables)
+    return out if id_value is MISSING else {"_id": id_value, **out}
+
+
+def _sort_spec(key_or_list, direction=None) -> List[tuple]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def sort_docs(docs: List[Dict[str, Any]], spec: Iterable[tuple]) -> List[Dict[str, Any]]:
+    docs = list(docs)
+    for field, direction in reversed(list(spec)):
+        docs.sort(key=lambda d: sort_key(_sortable(get_path(d, field), direction)), reverse=direction < 0)
+    return docs
+
+
+def _sortable(value, direction):
+    # Arrays sort by their smallest (ascending) or largest (descending) element
+    if isinstance(value, list) and value:
+        return (min if direction > 0 else max)(value, key=sort_key)
+    return None if value is MISSING else value
+
+
+# ---------- updates ----------
+
+def _upsert_doc(query: Dict[str, Any]) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {}
+    for key, cond in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+            if "$eq" in cond:
+                set_path(doc, key, cond["$eq"])
+            continue
+        set_path(doc, key, copy.deepcopy(cond))
+    return doc
+
+
+def apply_update(doc: Dict[str, Any], update, inserted: bool = False):
+    if isinstance(update, list):
+        for stage in update:
+            (op, arg), = stage.items()
+            if op not in ("$set", "$addFields"):
+                raise NotImplementedError(op)
+            values = {k: evaluate(doc, v) for k, v in arg.items()}
+            for key, value in values.items():
+                if value is not MISSING:
+                    set_path(doc, key, value)
+        return
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserted:
+            continue
+        for path, value in fields.items():
+            current = get_path(doc, path)
+            if op in ("$set", "$setOnInsert"):
+                set_path(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$inc":
+                set_path(doc, path, (0 if current in (MISSING, None) else current) + value)
+            elif op == "$min":
+                if current in (MISSING, None) or _compare(value, current) == -1:
+                    set_path(doc, path, value)
+            elif op == "$max":
+                if current in (MISSING, None) or _compare(value, current) == 1:
+                    set_path(doc, path, value)
+            elif op in ("$push", "$addToSet"):
+                items = [] if current is MISSING else list(current)
+                each = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for item in copy.deepcopy(each):
+                    if op == "$push" or item not in items:
+                        items.append(item)
+                if isinstance(value, dict) and "$sort" in value:
+                    order = value["$sort"]
+                    if isinstance(order, dict):
+                        items = sort_docs(items, order.items())
+                    else:
+                        items.sort(key=sort_key, reverse=order < 0)
+                if isinstance(value, dict) and "$slice" in value:
+                    n = value["$slice"]
+                    items = items[n:] if n < 0 else items[:n]
+                set_path(doc, path, items)
+            elif op == "$pull":
+                if current is not MISSING:
+                    set_path(doc, path, [i for i in current if not _field_matches(i, value)])
+            else:
+                raise NotImplementedError(op)
+
+
+# ---------- aggregation ----------
+
+def _unwind(docs, arg):
+    if isinstance(arg, str):
+        arg = {"path": arg}
+    path = arg["path"][1:]
+    keep = arg.get("preserveNullAndEmptyArrays", False)
+    for doc in docs:
+        value = get_path(doc, path)
+        if isinstance(value, list) and value:
+            for item in value:
+                yield with_path(doc, path, item)
+        elif value not in (MISSING, None) and not isinstance(value, list):
+            yield doc
+        elif keep:
+            yield doc
+
+
+def _group(docs, spec, variables):
+    groups: Dict[Any, Dict[str, Any]] = {}
+    values: Dict[Any, Dict[str, List[Any]]] = {}
+    for doc in docs:
+        key = _value(evaluate(doc, spec["_id"], variables))
+        frozen = _freeze(key)
+        if frozen not in groups:
+            groups[frozen] = {"_id": key}
+            values[frozen] = {name: [] for name in spec if name != "_id"}
+        for name, accumulator in spec.items():
+            if name != "_id":
+                (op, expr), = accumulator.items()
+                values[frozen][name].append(evaluate(doc, expr, variables))
+    for frozen, group in groups.items():
+        for name, accumulator in spec.items():
+            if name != "_id":
+                (op, _), = accumulator.items()
+                group[name] = _accumulate(op, values[frozen][name])
+    return list(groups.values())
+
+
+def _accumulate(op: str, items: List[Any]):
+    numbers = [v for v in items if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    present = [v for v in items if v not in (MISSING, None)]
+    if op == "$sum":
+        return sum(numbers)
+    if op == "$avg":
+        return sum(numbers) / len(numbers) if numbers else None
+    if op == "$min":
+        return min(present, key=sort_key) if present else None
+    if op == "$max":
+        return max(present, key=sort_key) if present else None
+    if op == "$push":
+        return [v for v in items if v is not MISSING]
+    if op == "$addToSet":
+        out = []
+        for v in items:
+            if v is not MISSING and v not in out:
+                out.append(v)
+        return out
+    if op == "$first":
+        return _value(items[0]) if items else None
+    if op == "$last":
+        return _value(items[-1]) if items else None
+    raise NotImplementedError(op)
+
+
+def run_pipeline(db, docs: List[Dict[str, Any]], pipeline: List[Dict[str, Any]],
+                 variables: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Run a pipeline over ``docs``; stages never modify their input documents."""
+    docs = list(docs)
+    for stage in pipeline:
+        (op, arg), = stage.items()
+        if op == "$match":
+            docs = [d for d in docs if matches(d, arg, variables)]
+        elif op == "$project":
+            docs = [project(d, arg, variables) for d in docs]
+        elif op in ("$addFields", "$set"):
+            docs = [{**d, **{k: v for k, v in ((k, evaluate(d, e, variables)) for k, e in arg.items())
+                             if v is not MISSING}} for d in docs]
+        elif op == "$unwind":
+            docs = list(_unwind(docs, arg))
+        elif op == "$group":
+            docs = _group(docs, arg, variables)
+        elif op == "$sort":
+            docs = sort_docs(docs, arg.items())
+        elif op == "$skip":
+            docs = docs[arg:]
+        elif op == "$limit":
+            docs = docs[:arg]
+        elif op == "$count":
+            docs = [{arg: len(docs)}] if docs else []
+        elif op == "$replaceRoot":
+            docs = [evaluate(d, arg["newRoot"], variables) for d in docs]
+        elif op == "$facet":
+            docs = [{name: run_pipeline(db, docs, sub, variables) for name, sub in arg.items()}]
+        elif op == "$unionWith":
+            coll, sub = (arg, []) if isinstance(arg, str) else (arg["coll"], arg.get("pipeline", []))
+            docs += run_pipeline(db, db[coll].docs, sub)
+        elif op == "$lookup":
+            docs = [_lookup(db, d, arg, variables) for d in docs]
+        else:
+            raise NotImplementedError(op)
+    return docs
+
+
+def _lookup(db, doc, arg, variables):
+    foreign = db[arg["from"]].docs
+    if "localField" in arg:
+        local = _value(get_path(doc, arg["localField"]))
+        local_values = local if isinstance(local, list) else [local]
+        foreign = [f for f in foreign
+                   if any(_condition(get_path(f, arg["foreignField"]), "$eq", v) for v in local_values)]
+    let = {name: _value(evaluate(doc, expr, variables)) for name, expr in arg.get("let", {}).items()}
+    joined = run_pipeline(db, foreign, arg.get("pipeline", []), {**(variables or {}), **let})
+    return {**doc, arg["as"]: joined}
+
+
+# ---------- cursors, collections, database ----------
+
+class Cursor:
+    """``find()`` / ``aggregate()`` cursor; sort, skip and limit apply in MongoDB order."""
+
+    def __init__(self, docs: List[Dict[str, Any]], collection=None):
+        self._docs = docs
+        self._collection = collection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    def _results(self) -> List[Dict[str, Any]]:
+        docs = sort_docs(self._docs, self._sort) if self._sort else list(self._docs)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        if self._collection is not None:
+            self._collection.returned += len(docs)
+        return docs
+
+    async def to_list(self, length=None):
+        docs = self._results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    """One in-memory collection."""
+
+    def __init__(self, db, name: str):
+        self.db = db
+        self.name = name
+        self.docs: List[Dict[str, Any]] = []
+        self.indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+        self.calls: Counter = Counter()
+        self.pipelines: List[List[Dict[str, Any]]] = []
+        # documents handed out by find() cursors
+        self.returned = 0
+        self._faults: Dict[tuple, Exception] = {}
+
+    def fail_on(self, method: str, call: int, error: Exception):
+        """Raise ``error`` on the ``call``-th call of ``method``."""
+        self._faults[(method, call)] = error
+
+    def _call(self, method: str):
+        self.calls[method] += 1
+        error = self._faults.get((method, self.calls[method]))
+        if error is not None:
+            raise error
+
+    def _find(self, query, limit: int = 0) -> List[Dict[str, Any]]:
+        found = []
+        for doc in self.docs:
+            if matches(doc, query):
+                found.append(doc)
+                if len(found) == limit:
+                    break
+        return found
+
+    def _insert(self, doc: Dict[str, Any]):
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+        elif any(d.get("_id") == doc["_id"] for d in self.docs):
+            raise ValueError(f"E11000 duplicate key error: {doc['_id']}")
+        self.docs.append(copy.deepcopy(doc))
+
+    # ---------- reads ----------
+
+    def find(self, query=None, projection=None, sort=None, limit=0):
+        self._call("find")
+        cursor = Cursor([project(d, projection) for d in self._find(query)], self)
+        if sort:
+            cursor.sort(sort)
+        return cursor.limit(limit)
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        self._call("find_one")
+        docs = self._find(query)
+        if sort:
+            docs = sort_docs(docs, _sort_spec(sort))
+        return project(docs[0], projection) if docs else None
+
+    async def count_documents(self, query, **kwargs):
+        self._call("count_documents")
+        return len(self._find(query))
+
+    async def estimated_document_count(self):
+        self._call("estimated_document_count")
+        return len(self.docs)
+
+    async def distinct(self, field: str, query=None):
+        self._call("distinct")
+        values: List[Any] = []
+        for doc in self._find(query):
+            value = get_path(doc, field)
+            for v in value if isinstance(value, list) else [value]:
+                if v is not MISSING and v not in values:
+                    values.append(v)
+        return values
+
+    def aggregate(self, pipeline, **kwargs):
+        self._call("aggregate")
+        self.pipelines.append(pipeline)
+        return Cursor([copy.deepcopy(d) for d in run_pipeline(self.db, self.docs, pipeline)])
+
+    # ---------- writes ----------
+
+    async def insert_one(self, doc):
+        self._call("insert_one")
+        self._insert(doc)
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, docs, ordered=True):
+        self._call("insert_many")
+        for doc in docs:
+            self._insert(doc)
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in docs], acknowledged=True)
+
+    def _update(self, query, update, upsert: bool, many: bool):
+        targets = self._find(query, limit=0 if many else 1)
+        modified = 0
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            modified += doc != before
+        if targets or not upsert:
+            return SimpleNamespace(matched_count=len(targets), modified_count=modified,
+                                   upserted_id=None, acknowledged=True)
+        doc = _upsert_doc(query)
+        apply_update(doc, update, inserted=True)
+        self._insert(doc)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"], acknowledged=True)
+
+    async def update_one(self, query, update, upsert=False):
+        self._call("update_one")
+        return self._update(query, update, upsert, many=False)
+
+    async def update_many(self, query, update, upsert=False):
+        self._call("update_many")
+        return self._update(query, update, upsert, many=True)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        self._call("replace_one")
+        return self._replace(query, replacement, upsert)
+
+    def _replace(self, query, replacement, upsert):
+        targets = self._find(query, limit=1)
+        if targets:
+            doc = targets[0]
+            keep = doc.get("_id")
+            doc.clear()
+            doc.update(copy.deepcopy(replacement))
+            if keep is not None:
+                doc["_id"] = keep
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = {**_upsert_doc(query), **copy.deepcopy(replacement)}
+            self._insert(doc)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False,
+                                  return_document=False, sort=None):
+        self._call("find_one_and_update")
+        docs = self._find(query)
+        if sort:
+            docs = sort_docs(docs, _sort_spec(sort))
+        if docs:
+            doc = docs[0]
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            return project(doc if return_document else before, projection)
+        if not upsert:
+            return None
+        doc = _upsert_doc(query)
+        apply_update(doc, update, inserted=True)
+        self._insert(doc)
+        return project(doc, projection) if return_document else None
+
+    async def find_one_and_delete(self, query, projection=None, sort=None):
+        self._call("find_one_and_delete")
+        docs = self._find(query)
+        if sort:
+            docs = sort_docs(docs, _sort_spec(sort))
+        if not docs:
+            return None
+        self.docs.remove(docs[0])
+        return project(docs[0], projection)
+
+    async def delete_one(self, query):
+        self._call("delete_one")
+        return self._delete(query, many=False)
+
+    async def delete_many(self, query):
+        self._call("delete_many")
+        return self._delete(query, many=True)
+
+    def _delete(self, query, many: bool):
+        targets = self._find(query, limit=0 if many else 1)
+        ids = {id(d) for d in targets}
+        self.docs = [d for d in self.docs if id(d) not in ids]
+        return SimpleNamespace(deleted_count=len(targets), acknowledged=True)
+
+    async def bulk_write(self, ops, ordered=True):
+        self._call("bulk_write")
+        for op in ops:
+            if isinstance(op, InsertOne):
+                self._insert(op._doc)
+            elif isinstance(op, (UpdateOne, UpdateMany)):
+                self._update(op._filter, op._doc, op._upsert, many=isinstance(op, UpdateMany))
+            elif isinstance(op, ReplaceOne):
+                self._replace(op._filter, op._doc, op._upsert)
+            elif isinstance(op, (DeleteOne, DeleteMany)):
+                self._delete(op._filter, many=isinstance(op, DeleteMany))
+            else:
+                raise NotImplementedError(type(op).__name__)
+        return SimpleNamespace(acknowledged=True)
+
+    # ---------- indexes ----------
+
+    async def index_information(self):
+        self._call("index_information")
+        return copy.deepcopy(self.indexes)
+
+    def _add_index(self, keys, name=None, **options):
+        keys = _sort_spec(keys, 1)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes[name] = {"key": keys, **options}
+        return name
+
+    async def create_index(self, keys, name=None, **options):
+        self._call("create_index")
+        return self._add_index(keys, name, **options)
+
+    async def create_indexes(self, models):
+        self._call("create_indexes")
+        return [self._add_index(m.document["key"].items(), **{k: v for k, v in m.document.items() if k != "key"})
+                for m in models]
+
+    async def drop_index(self, name: str):
+        self._call("drop_index")
+        del self.indexes[name]
+
+
+class FakeDB:
+    """In-memory database; collections appear on first access."""
+
+    def __init__(self, **collections: List[Dict[str, Any]]):
+        self._collections: Dict[str, FakeCollection] = {}
+        self.commands: List[Dict[str, Any]] = []
+        for name, docs in collections.items():
+            self[name].docs = [dict(d) for d in docs]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self):
+        return list(self._collections)
+
+    async def command(self, command: Dict[str, Any]):
+        self.commands.append(command)
+        if "collMod" in command:
+            index = command["index"]
+            self[command["collMod"]].indexes[index["name"]]["expireAfterSeconds"] = index["expireAfterSeconds"]
+        return {"ok": 1}
@@ -0,0 +1,126 @@
+"""
+Tests for the admin dashboard
+=============================
+Payload shape from $facet results, concurrent queries, and the
+stale-while-revalidate cache.
+"""
+
+import asyncio
+import time
+
+from services.admin_dashboard import AdminDashboard
+
+DELAY = 0.05
+
+
+class Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(DELAY)
+        return self.rows
+
+
+class FakeCollection:
+    def __init__(self, db, name, facet=None, count=0):
+        self.db = db
+        self.name = name
+        self.facet = facet or {}
+        self.count = count
+
+    async def estimated_document_count(self):
+        self.db.calls += 1
+        await asyncio.sleep(DELAY)
+        return self.count
+
+    async def count_documents(self, query):
+        self.db.calls += 1
+        await asyncio.sleep(DELAY)
+        return self.count // 2
+
+    def aggregate(self, pipeline):
+        self.db.calls += 1
+        if "$facet" in pipeline[-1]:
+            return Cursor([self.facet])
+        return Cursor([{"_id": "driver", "count": 3}])
+
+
+class FakeDB:
+    def __init__(self):
+        self.calls = 0
+        self.users = FakeCollection(self, "users", {"today": [{"n": 2}], "week": [{"n": 5}]}, count=40)
+        self.results = FakeCollection(self, "results", {
+            "total": [{"n": 30}], "today": [], "week": [{"n": 7}],
+            "archetypes": [{"_id": "driver", "count": 20}, {"_id": None, "count": 1}],
+            "series": [{"_id": "couples", "count": 30}],
+        })
+        self.payments = FakeCollection(self, "payments", {
+            "total": [{"n": 4}], "today": [{"n": 1}], "week": [{"n": 2}],
+            "revenue_month": [{"_id": None, "total": 99000}],
+        })
+        self.quiz_attempts = FakeCollection(self, "quiz_attempts", count=50)
+
+
+class TestAdminDashboard:
+    """Test payloads and caching."""
+
+    def test_overview_payload(self):
+        payload = asyncio.run(AdminDashboard(FakeDB()).compute_overview())
+        assert payload["users"] == {"total": 40, "today": 2, "week": 5}
+        assert payload["quizzes"] == {"total": 30, "today": 0, "week": 7}
+        assert payload["payments"] == {"total_paid": 4, "today": 1, "week": 2, "revenue_month": 99000}
+        assert payload["distributions"] == {"archetypes": {"driver": 20}, "series": {"couples": 30}}
+
+    def test_stats_payload(self):
+        payload = asyncio.run(AdminDashboard(FakeDB()).compute_stats())
+        assert payload["total_users"] == 40
+        assert payload["completion_rate"] == 50.0
+        assert payload["archetype_distribution"] == {"driver": 3}
+
+    def test_queries_run_concurrently(self):
+        dashboard = AdminDashboard(FakeDB())
+        start = time.perf_counter()
+        asyncio.run(dashboard.compute_overview())
+        # 4 queries of DELAY each: about one DELAY, not four
+        assert time.perf_counter() - start < DELAY * 3
+
+    def test_concurrent_misses_share_one_computation(self):
+        db = FakeDB()
+        dashboard = AdminDashboard(db)
+
+        async def run():
+            return await asyncio.gather(*(dashboard.overview() for _ in range(10)))
+
+        payloads = asyncio.run(run())
+        assert db.calls == 4
+        assert all(p is payloads[0] for p in payloads)
+
+    def test_stale_served_while_revalidating(self):
+        db = FakeDB()
+        dashboard = AdminDashboard(db, ttl=60, stale=300)
+
+        async def run():
+            first = await dashboard.overview()
+            assert await dashboard.overview() is first  # fresh hit
+            assert db.calls == 4
+
+            # Age the entry past the TTL but inside the stale window
+            stamp, payload = dashboard._entries["overview"]
+            dashboard._entries["overview"] = (stamp - 120, payload)
+            start = time.perf_counter()
+            stale = await dashboard.overview()
+            assert stale is first
+            assert time.perf_counter() - start < DELAY
+            await asyncio.sleep(DELAY * 3)
+            assert db.calls == 8
+            assert await dashboard.overview() is not first
+
+        asyncio.run(run())
+
+    def test_expired_entry_is_recomputed(self):
+        db = FakeDB()
+        dashboard = AdminDashboard(db, ttl=0, stale=0)
+        asyncio.run(dashboard.stats())
+        asyncio.run(dashboard.stats())
+        assert db.calls == 10
@@ -0,0 +1,151 @@
+"""
+Tests for the analytics ingestion buffer
+========================================
+Batching, daily-aggregate coalescing, flush triggers, the memory bound and
+the 202 track endpoint.
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.analytics_buffer import AnalyticsBuffer
+
+
+class FakeCollection:
+    def __init__(self):
+        self.inserted = []
+        self.insert_calls = 0
+        self.bulk_ops = []
+        self.bulk_calls = 0
+
+    async def insert_many(self, docs, ordered=True):
+        self.insert_calls += 1
+        self.inserted.extend(docs)
+
+    async def bulk_write(self, ops, ordered=True):
+        self.bulk_calls += 1
+        self.bulk_ops.extend(ops)
+
+    async def update_one(self, query, update, upsert=False):
+        pass
+
+
+class FakeDB:
+    def __init__(self):
+        self.r4_analytics = FakeCollection()
+        self.r4_analytics_daily = FakeCollection()
+        self.r4_analytics_hourly = FakeCollection()
+        self.r4_analytics_rollup_state = FakeCollection()
+
+
+def event(i: int) -> dict:
+    return {"event_id": f"evt_{i}", "event": "cta_click", "created_at": "2026-01-01T10:00:00+00:00"}
+
+
+def daily_updates(db: FakeDB) -> dict:
+    return {
+        (op._filter["primary_need"], op._filter["cta_variant"]): op._doc["$inc"]
+        for op in db.r4_analytics_daily.bulk_ops
+    }
+
+
+class TestAnalyticsBuffer:
+    """Test batched writes and flush triggers."""
+
+    def test_shutdown_flush_coalesces_daily_increments(self):
+        db = FakeDB()
+        buffer = AnalyticsBuffer(db, flush_size=1000, flush_interval=60)
+
+        async def scenario():
+            for i in range(100):
+                key = ("2026-01-01", "security" if i % 2 else "approval", "avoid", "A", "single")
+                buffer.add(event(i), key, conversion=i % 10 == 0)
+            buffer.add(event(100))  # no daily key
+            await buffer.stop()
+
+        asyncio.run(scenario())
+        assert db.r4_analytics.insert_calls == 1
+        assert len(db.r4_analytics.inserted) == 101
+        assert db.r4_analytics_daily.bulk_calls == 1
+        assert daily_updates(db) == {
+            ("security", "A"): {"count": 50, "conversions": 0},
+            ("approval", "A"): {"count": 50, "conversions": 10},
+        }
+
+    def test_size_triggered_flush(self):
+        db = FakeDB()
+        buffer = AnalyticsBuffer(db, flush_size=10, flush_interval=60)
+
+        async def scenario():
+            for i in range(25):
+                buffer.add(event(i))
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            flushed = len(db.r4_analytics.inserted)
+            await buffer.stop()
+            return flushed
+
+        flushed_before_stop = asyncio.run(scenario())
+        assert flushed_before_stop >= 20
+        assert len(db.r4_analytics.inserted) == 25
+
+    def test_interval_flush(self):
+        db = FakeDB()
+        buffer = AnalyticsBuffer(db, flush_size=1000, flush_interval=0.02)
+
+        async def scenario():
+            buffer.add(event(1))
+            await asyncio.sleep(0.1)
+            flushed = len(db.r4_analytics.inserted)
+            await buffer.stop()
+            return flushed
+
+        assert asyncio.run(scenario()) == 1
+        assert db.r4_analytics.insert_calls == 1
+
+    def test_bounded_memory_drops(self):
+        db = FakeDB()
+        buffer = AnalyticsBuffer(db, flush_size=1000, flush_interval=60, max_events=5)
+
+        async def scenario():
+            results = [buffer.add(event(i)) for i in range(8)]
+            await buffer.stop()
+            return results
+
+        assert asyncio.run(scenario()) == [True] * 5 + [False] * 3
+        assert buffer.dropped == 3
+        assert len(db.r4_analytics.inserted) == 5
+
+
+class TestTrackEndpoint:
+    """Test /relasi4/analytics/track returns 202 and buffers."""
+
+    def test_track_returns_202(self, monkeypatch):
+        from routes import relasi4_routes
+        from services import analytics_buffer
+
+        db = FakeDB()
+        buffer = AnalyticsBuffer(db, flush_size=1000, flush_interval=60)
+        monkeypatch.setattr(analytics_buffer, "_analytics_buffer", buffer)
+        monkeypatch.setattr(relasi4_routes, "_db", db)
+
+        app = FastAPI()
+        app.include_router(relasi4_routes.relasi4_router, prefix="/api")
+
+        @app.on_event("shutdown")
+        async def flush():
+            await buffer.stop()
+
+        with TestClient(app) as client:
+            response = client.post("/api/relasi4/analytics/track", json={
+                "event": "cta_view", "cta_variant": "B", "primary_need": "security",
+                "primary_conflict_style": "avoid", "package_type": "couple",
+            })
+            assert response.status_code == 202
+            assert response.json()["status"] == "accepted"
+            assert not db.r4_analytics.inserted
+
+        assert db.r4_analytics.inserted[0]["cta_variant"] == "B"
+        assert daily_updates(db) == {("security", "B"): {"count": 1, "conversions": 0}}
@@ -0,0 +1,100 @@
+"""
+Tests for AuthContextMiddleware
+===============================
+Single JWT decode per request, shared with rate limiting and handlers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from middleware import auth_context
+from middleware.auth_context import AuthContextMiddleware, decode_token, get_auth_context
+from middleware.rate_limit import RateLimitMiddleware, _rate_limit_storage
+
+
+def make_token(user_id="user_abc", hours=1, secret=None):
+    payload = {"user_id": user_id, "email": "a@example.com",
+               "exp": datetime.now(timezone.utc) + timedelta(hours=hours)}
+    return jwt.encode(payload, secret or auth_context.JWT_SECRET, algorithm="HS256")
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(AuthContextMiddleware)
+
+    @app.get("/api/whoami")
+    async def whoami(request: Request):
+        auth = get_auth_context(request.scope)
+        return {"user_id": auth.user_id, "error": auth.error}
+
+    return app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "true")
+    _rate_limit_storage.clear()
+    return TestClient(make_app())
+
+
+class TestDecode:
+    """Test token verification outcomes."""
+
+    def test_valid_token(self):
+        auth = decode_token(make_token())
+        assert auth.authenticated
+        assert auth.user_id == "user_abc"
+
+    def test_expired_token(self):
+        auth = decode_token(make_token(hours=-1))
+        assert not auth.authenticated
+        assert auth.error == "expired"
+
+    def test_wrong_secret(self):
+        auth = decode_token(make_token(secret="another-secret"))
+        assert auth.error == "invalid"
+        assert auth.user_id is None
+
+    def test_no_token_is_anonymous(self):
+        assert get_auth_context({"type": "http", "headers": []}).user_id is None
+
+    def test_lazy_context_decodes_once(self, monkeypatch):
+        calls = []
+        original = auth_context.decode_token
+        monkeypatch.setattr(auth_context, "decode_token", lambda t: calls.append(t) or original(t))
+        scope = {"type": "http", "headers": [(b"authorization", f"Bearer {make_token()}".encode())]}
+        get_auth_context(scope)
+        get_auth_context(scope)
+        assert len(calls) == 1
+
+
+class TestMiddleware:
+    """Test claims sharing through scope state."""
+
+    def test_claims_available_to_handlers(self, client):
+        response = client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token()}"})
+        assert response.json() == {"user_id": "user_abc", "error": None}
+
+    def test_single_decode_per_request(self, client, monkeypatch):
+        calls = []
+        original = auth_context.jwt.decode
+        monkeypatch.setattr(auth_context.jwt, "decode", lambda *a, **k: calls.append(1) or original(*a, **k))
+        client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token()}"})
+        assert len(calls) == 1
+
+    def test_rate_limit_keyed_by_user_id(self, client):
+        # Two different tokens for the same user share one bucket
+        client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token(hours=1)}"})
+        client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token(hours=2)}"})
+        user_keys = [key for key in _rate_limit_storage if "user:user_abc" in key]
+        assert len(user_keys) == 1
+        assert len(_rate_limit_storage[user_keys[0]]) == 2
+
+    def test_invalid_token_rate_limited_by_ip(self, client):
+        client.get("/api/whoami", headers={"Authorization": "Bearer not-a-jwt"})
+        assert all(":ip:" in key for key in _rate_limit_storage)
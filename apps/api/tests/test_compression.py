@@ -0,0 +1,145 @@
+"""
+Tests for CompressionMiddleware
+===============================
+Threshold, content-type allowlist, streaming and pre-compressed bodies.
+"""
+
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from middleware.compression import CompressionMiddleware, brotli
+from utils import metrics
+
+BIG_TEXT = "Laporan premium RELASI4™ — pola komunikasi. " * 200
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/report")
+    async def report():
+        return JSONResponse({"content": BIG_TEXT})
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/pdf")
+    async def pdf():
+        return Response(b"%PDF-" + b"0" * 5000, media_type="application/pdf")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        body = gzip.compress(BIG_TEXT.encode())
+        return Response(body, media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(50):
+                yield f'{{"row": {i}, "text": "{BIG_TEXT[:100]}"}}\n'
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.get("/tagged")
+    async def tagged():
+        return JSONResponse({"content": BIG_TEXT}, headers={"ETag": '"abc123"'})
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse(BIG_TEXT)
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(make_app())
+
+
+def raw_get(client, path, accept_encoding):
+    """GET without httpx auto-decoding the body."""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestCompression:
+    """Test response compression rules."""
+
+    def test_large_json_is_gzipped(self, client):
+        response, body = raw_get(client, "/report", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert int(response.headers["content-length"]) == len(body)
+        assert BIG_TEXT in gzip.decompress(body).decode()
+
+    def test_identity_when_not_accepted(self, client):
+        response, _ = raw_get(client, "/report", "identity")
+        assert "content-encoding" not in response.headers
+
+    def test_gzip_q_zero_is_refused(self, client):
+        response, _ = raw_get(client, "/report", "gzip;q=0")
+        assert "content-encoding" not in response.headers
+
+    def test_small_response_untouched(self, client):
+        response, body = raw_get(client, "/small", "gzip")
+        assert "content-encoding" not in response.headers
+        assert body == b'{"ok":true}'
+
+    def test_non_allowlisted_type_untouched(self, client):
+        response, body = raw_get(client, "/pdf", "gzip")
+        assert "content-encoding" not in response.headers
+        assert body.startswith(b"%PDF-")
+
+    def test_precompressed_not_recompressed(self, client):
+        response, body = raw_get(client, "/precompressed", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(body).decode() == BIG_TEXT
+
+    def test_streaming_response_compressed(self, client):
+        response, body = raw_get(client, "/stream", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        lines = gzip.decompress(body).decode().splitlines()
+        assert len(lines) == 50
+
+    def test_streamed_chunks_decode_incrementally(self, client):
+        """Each streamed chunk is sync-flushed so clients see rows early."""
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            decoder = zlib.decompressobj(31)
+            first = next(response.iter_raw())
+            assert b'"row": 0' in decoder.decompress(first)
+
+    def test_text_plain_compressed(self, client):
+        response, _ = raw_get(client, "/text", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+
+    @pytest.mark.skipif(brotli is None, reason="brotli not installed")
+    def test_brotli_preferred_when_available(self, client):
+        response, body = raw_get(client, "/report", "gzip, br")
+        assert response.headers["content-encoding"] == "br"
+        assert BIG_TEXT in brotli.decompress(body).decode()
+
+    def test_compressed_etag_is_weak(self, client):
+        response, _ = raw_get(client, "/tagged", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == 'W/"abc123"'
+        response, _ = raw_get(client, "/tagged", "identity")
+        assert response.headers["etag"] == '"abc123"'
+
+    def test_vary_on_allowlisted_responses_only(self, client):
+        for path, accept_encoding in (("/report", "identity"), ("/small", "gzip"), ("/precompressed", "gzip")):
+            response, _ = raw_get(client, path, accept_encoding)
+            assert response.headers["vary"].lower().count("accept-encoding") == 1, path
+        response, _ = raw_get(client, "/pdf", "gzip")
+        assert "vary" not in response.headers
+
+    def test_cpu_time_recorded(self, client):
+        raw_get(client, "/report", "gzip")
+        assert any(key.startswith("http_compression_cpu_ms") for key in metrics._histograms)
+        assert any(key.startswith("http_compression_bytes_out_total") for key in metrics._counters)
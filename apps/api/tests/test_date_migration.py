@@ -0,0 +1,80 @@
+"""
+Tests for native date fields
+============================
+Dual-write helper, and the resumable batch backfill of ``<field>_dt``.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from fake_mongo import FakeDB
+from services.date_migration import NativeDateMigration
+from utils.dates import parse_iso, with_native_dates
+
+
+def audit_logs(n):
+    return [{"_id": i, "timestamp": f"2026-01-{1 + i % 28:02d}T10:00:00+00:00"} for i in range(n)]
+
+
+class TestNativeDates:
+    """Test parsing and dual-write documents."""
+
+    def test_parse_iso(self):
+        aware = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+        assert parse_iso("2026-01-01T10:00:00+00:00") == aware
+        assert parse_iso("2026-01-01T17:00:00+07:00") == aware
+        assert parse_iso("2026-01-01T10:00:00Z") == aware
+        assert parse_iso("2026-01-01T10:00:00") == aware  # naive -> UTC
+        assert parse_iso("not a date") is None
+        assert parse_iso(None) is None
+
+    def test_with_native_dates_copies(self):
+        doc = {"status": "paid", "paid_at": "2026-01-01T10:00:00+00:00", "moderated_at": None}
+        out = with_native_dates(doc, "paid_at", "moderated_at")
+        assert out["paid_at_dt"] == datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+        assert "moderated_at_dt" not in out
+        assert "paid_at_dt" not in doc
+
+
+class TestNativeDateMigration:
+    """Test batched, checkpointed backfill."""
+
+    def test_migrates_in_batches(self):
+        db = FakeDB(audit_logs=audit_logs(10) + [{"_id": 10, "timestamp": None}])
+        logs = db.audit_logs
+        migration = NativeDateMigration(db, batch_size=4, pause=0)
+
+        result = asyncio.run(migration.migrate_field("audit_logs", "timestamp"))
+        assert result == {"done": True, "converted": 10, "resumed": False}
+        assert logs.calls["update_many"] == 3
+        assert all(isinstance(d["timestamp_dt"], datetime) for d in logs.docs[:10])
+        assert "timestamp_dt" not in logs.docs[10]
+        assert asyncio.run(migration.is_complete("audit_logs", "timestamp"))
+
+    def test_resumes_after_interruption(self):
+        db = FakeDB(audit_logs=audit_logs(10))
+        logs = db.audit_logs
+        logs.fail_on("update_many", 3, ConnectionError("primary stepped down"))
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(NativeDateMigration(db, batch_size=3, pause=0).migrate_field("audit_logs", "timestamp"))
+        checkpoint = db.migrations.docs[0]
+        assert checkpoint["last_id"] == 5 and checkpoint["converted"] == 6
+        assert not asyncio.run(NativeDateMigration(db).is_complete("audit_logs", "timestamp"))
+
+        result = asyncio.run(NativeDateMigration(db, batch_size=3, pause=0).migrate_field("audit_logs", "timestamp"))
+        assert result == {"done": True, "converted": 10, "resumed": True}
+        # Restarted after the checkpoint, not from the beginning
+        assert logs.calls["update_many"] == 3 + 2
+        assert all("timestamp_dt" in d for d in logs.docs)
+
+    def test_dual_written_documents_not_rewritten(self):
+        written = datetime(2026, 1, 1, 10, 0, 0, 123456, tzinfo=timezone.utc)
+        db = FakeDB(audit_logs=[with_native_dates({"_id": 0, "timestamp": written.isoformat()}, "timestamp")])
+        logs = db.audit_logs
+
+        result = asyncio.run(NativeDateMigration(db, pause=0).migrate_field("audit_logs", "timestamp"))
+        assert result["converted"] == 0
+        assert logs.docs[0]["timestamp_dt"] == written
@@ -0,0 +1,76 @@
+"""
+Tests for the streaming HITL export
+===================================
+JSON (legacy shape), NDJSON, CSV column union and gzip, against the
+in-memory Mongo fake.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from fake_mongo import FakeDB
+from services.hitl_export import gzip_chunks, iter_csv, iter_json, iter_ndjson
+
+FROM = "2026-01-01T00:00:00+00:00"
+
+
+def hitl_db(n=5):
+    db = FakeDB(
+        risk_assessments=[
+            {"_id": i, "assessment_id": f"ra_{i}", "risk_level": "level_2", "flags": ["a", "b"],
+             "created_at": f"2026-01-02T00:00:{i:02d}+00:00", "created_at_dt": datetime(2026, 1, 2, 0, 0, i)}
+            for i in range(n)
+        ] + [{"_id": 99, "assessment_id": "ra_old", "created_at": "2025-12-01T00:00:00+00:00"}],
+        moderation_queue=[
+            {"_id": 1, "queue_id": "q1", "status": "pending", "created_at": "2026-01-03T00:00:00+00:00"},
+        ],
+        audit_logs=[],
+    )
+    db.risk_assessments.docs[-2]["extra_note"] = "late field"
+    return db
+
+
+async def collect(chunks):
+    return [c async for c in chunks]
+
+
+class TestHITLExport:
+    """Test the streaming export formats."""
+
+    def test_json_keeps_legacy_shape(self):
+        names = ["risk_assessments", "moderation_queue", "audit_logs"]
+        chunks = asyncio.run(collect(iter_json(hitl_db(), names, FROM, 30, batch_size=2)))
+        data = json.loads(b"".join(chunks))
+        assert data["period_days"] == 30
+        assert [d["assessment_id"] for d in data["risk_assessments"]] == [f"ra_{i}" for i in range(5)]
+        assert "created_at_dt" not in data["risk_assessments"][0]
+        assert data["audit_logs"] == []
+        assert data["summary"] == {"total_assessments": 5, "total_queue_items": 1, "total_audit_logs": 0}
+        # Streamed in batches, not one blob
+        assert len(chunks) > 5
+
+    def test_ndjson_lines(self):
+        chunks = asyncio.run(collect(iter_ndjson(hitl_db(), ["risk_assessments", "moderation_queue"], FROM,
+                                                 batch_size=2)))
+        lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        assert [line["collection"] for line in lines] == ["risk_assessments"] * 5 + ["moderation_queue", "summary"]
+        assert lines[0]["data"]["assessment_id"] == "ra_0"
+        assert lines[-1]["data"] == {"total_assessments": 5, "total_queue_items": 1}
+
+    def test_csv_columns_union(self):
+        chunks = asyncio.run(collect(iter_csv(hitl_db(), "risk_assessments", FROM, batch_size=2)))
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        assert len(rows) == 5
+        assert list(rows[0])[:5] == ["assessment_id", "risk_level", "flags", "created_at", "extra_note"]
+        assert "created_at_dt" not in rows[0]
+        assert json.loads(rows[0]["flags"]) == ["a", "b"]
+        assert rows[4]["extra_note"] == "late field" and rows[0]["extra_note"] == ""
+
+    def test_gzip(self):
+        chunks = asyncio.run(collect(gzip_chunks(iter_ndjson(hitl_db(), ["moderation_queue"], FROM))))
+        lines = gzip.decompress(b"".join(chunks)).splitlines()
+        assert json.loads(lines[0])["data"]["queue_id"] == "q1"
@@ -0,0 +1,210 @@
+"""
+Tests for the daily HITL rollups
+================================
+Incremental writes from HITLEngine, rebuilds, readiness, and parity of the
+HITL analytics payloads between the rollups and a raw scan.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fake_mongo import FakeDB
+from hitl_engine import HITLEngine, ModerationAction, ModerationDecision, RiskAssessmentInput
+from services import hitl_analytics
+from services.hitl_rollups import HITLRollups, day_of, get_hitl_rollups
+
+
+# ---------- data ----------
+
+NOW = datetime.now(timezone.utc)
+LEVELS = ["level_1", "level_2", "level_3", None]
+KEYWORDS = {"red": ["bunuh diri", "putus.asa"], "yellow": ["lelah", "sendiri", "marah"]}
+STATUSES = ["approved", "edited", "escalated"]
+ACTIONS = ["approve_as_is", "edit_output", "escalate"]
+
+
+def ts(days_ago, rng):
+    return (NOW - timedelta(days=days_ago, seconds=rng.randrange(86400))).isoformat()
+
+
+def assessment(i, created_at, rng):
+    doc = {"assessment_id": f"ra_{i}", "risk_level": rng.choice(LEVELS), "created_at": created_at,
+           "detected_keywords": {c: rng.sample(words, rng.randrange(3)) for c, words in KEYWORDS.items()}}
+    if doc["risk_level"] is None:
+        del doc["risk_level"]
+    return doc
+
+
+def queue_item(i, created_at):
+    return {"queue_id": f"queue_{i}", "status": "pending", "created_at": created_at,
+            "moderator_id": None, "moderated_at": None}
+
+
+async def decide(db, rollups, item, rng, incremental):
+    """Moderate ``item``, writing the queue update and audit log like HITLEngine."""
+    moderated_at = (datetime.fromisoformat(item["created_at"])
+                    + timedelta(seconds=rng.randrange(60, 7200))).isoformat()
+    status, action = rng.choice(list(zip(STATUSES, ACTIONS)))
+    moderator = rng.choice(["user_a", "user_b", "user_ghost"])
+    before = dict(item)
+    item.update({"status": status, "moderated_at": moderated_at, "moderator_id": moderator})
+    log = {"log_id": f"log_{rng.random()}", "queue_id": item["queue_id"], "action": action,
+           "moderator_id": moderator, "timestamp": moderated_at}
+    db.audit_logs.docs.append(log)
+    if incremental:
+        await rollups.record_decision(before, status, moderated_at)
+        await rollups.record_audit_log(log)
+
+
+def populate(db, seed=7):
+    """Pre-deploy history (raw only), then incremental writes for the last days."""
+    rng = random.Random(seed)
+    rollups = HITLRollups(db)
+    db.users.docs += [{"user_id": "user_a", "name": "Ana", "email": "ana@example.com"},
+                      {"user_id": "user_b", "name": "Budi", "email": "budi@example.com"}]
+
+    async def run():
+        for i in range(400):
+            days_ago = rng.randrange(3, 20)
+            db.risk_assessments.docs.append(assessment(i, ts(days_ago, rng), rng))
+            item = queue_item(i, ts(days_ago, rng))
+            db.moderation_queue.docs.append(item)
+            if rng.random() < 0.6:
+                await decide(db, rollups, item, rng, incremental=False)
+        # Deploy: from here on every write also updates the rollups
+        for i in range(400, 600):
+            days_ago = 3 if i == 400 else rng.randrange(0, 3)
+            doc = assessment(i, ts(days_ago, rng), rng)
+            db.risk_assessments.docs.append(doc)
+            await rollups.record_assessment(doc)
+            item = queue_item(i, ts(days_ago, rng))
+            db.moderation_queue.docs.append(item)
+            await rollups.record_queue_item(item)
+        # Decisions on old and new items, including re-moderation
+        for item in rng.sample(db.moderation_queue.docs, 150):
+            await decide(db, rollups, item, rng, incremental=True)
+        return rollups
+
+    return asyncio.run(run())
+
+
+async def payloads(db):
+    return {
+        "overview": await hitl_analytics.overview(db, 10),
+        "timeline": await hitl_analytics.timeline(db, 10),
+        "moderators": await hitl_analytics.moderator_performance(db, 10),
+        "stats": {k: v for k, v in (await HITLEngine(db).get_hitl_stats()).items() if k != "recent_events"},
+    }
+
+
+def normalized(payload):
+    response = payload["overview"]["response_time"]
+    response["avg_response_time"] = round(response["avg_response_time"], 6)
+    return payload
+
+
+class TestHITLRollups:
+    """Test rollup maintenance and payload parity."""
+
+    def test_rebuild_marks_ready_after_first_incremental_day(self):
+        db = FakeDB()
+        rollups = populate(db)
+        assert not asyncio.run(rollups.is_ready())
+        first_incremental = db.hitl_rollup_state.docs[0]["incremental_since"]
+        result = asyncio.run(rollups.rebuild(until_day=first_incremental))
+        assert result["ready"] is False
+        result = asyncio.run(rollups.rebuild())
+        assert result["ready"] is True
+        assert asyncio.run(rollups.is_ready())
+
+    def test_rebuild_is_idempotent(self):
+        db = FakeDB()
+        rollups = populate(db)
+        asyncio.run(rollups.rebuild())
+        first = sorted(map(repr, ({k: v for k, v in d.items() if k != "rebuild_id"}
+                                  for d in db.hitl_daily.docs)))
+        asyncio.run(rollups.rebuild())
+        again = sorted(map(repr, ({k: v for k, v in d.items() if k != "rebuild_id"}
+                                  for d in db.hitl_daily.docs)))
+        assert first == again
+
+    @pytest.mark.fake_mongo
+    def test_payloads_match_raw_scan(self):
+        db = FakeDB()
+        populate(db)
+        rollups = get_hitl_rollups(db)
+        asyncio.run(rollups.rebuild())
+        assert asyncio.run(rollups.is_ready())
+        # Writes after the rebuild only reach the rollups incrementally
+        rng = random.Random(11)
+        for item in rng.sample(db.moderation_queue.docs, 40):
+            asyncio.run(decide(db, rollups, item, rng, incremental=True))
+
+        before = db.risk_assessments.calls["aggregate"], db.hitl_daily.calls["aggregate"]
+        rolled = normalized(asyncio.run(payloads(db)))
+        # Full days come from hitl_daily; the edge day is unioned in server-side
+        assert db.risk_assessments.calls["aggregate"] == before[0]
+        assert db.hitl_daily.calls["aggregate"] - before[1] == 8
+
+        db.hitl_rollup_state.docs[0]["ready"] = False
+        rollups.state._ready = False
+        raw = normalized(asyncio.run(payloads(db)))
+        assert db.risk_assessments.calls["aggregate"] - before[0] == 4
+
+        assert rolled == raw
+        assert raw["overview"]["risk_distribution"]
+        assert raw["overview"]["keyword_trends"]
+        assert raw["moderators"]["moderators"]
+
+    def test_timeline_pivots_levels_per_day(self):
+        db = FakeDB()
+        day = NOW - timedelta(days=1)
+        for i, level in enumerate(["level_1", "level_3", "level_3", "level_9"]):
+            db.risk_assessments.docs.append({"risk_level": level, "created_at": day.isoformat()})
+        result = asyncio.run(hitl_analytics.timeline(db, 5))
+        assert result["dates"] == [day_of(day.isoformat())]
+        assert [result["series"][lvl][0]["count"] for lvl in ("level_1", "level_2", "level_3")] == [1, 0, 2]
+
+    def test_moderator_performance_joins_users(self):
+        db = FakeDB()
+        db.users.docs.append({"user_id": "user_a", "name": "Ana", "email": "ana@example.com"})
+        stamp = NOW.isoformat()
+        for action in ["approve_as_is", "approve_as_is", "escalate"]:
+            db.audit_logs.docs.append({"moderator_id": "user_a", "action": action, "timestamp": stamp})
+        db.audit_logs.docs.append({"moderator_id": "user_x", "action": "edit_output", "timestamp": stamp})
+        result = asyncio.run(hitl_analytics.moderator_performance(db, 1))
+        assert result["moderators"] == [
+            {"moderator_id": "user_a", "name": "Ana", "email": "ana@example.com", "total_actions": 3,
+             "action_breakdown": {"approve_as_is": 2, "escalate": 1}},
+            {"moderator_id": "user_x", "name": "Unknown", "email": "", "total_actions": 1,
+             "action_breakdown": {"edit_output": 1}},
+        ]
+
+    def test_engine_writes_update_rollups(self):
+        db = FakeDB()
+        engine = HITLEngine(db)
+        engine.keywords_cache = {}
+        engine.keywords_cache_time = NOW
+        data = RiskAssessmentInput(user_id="user_1", result_id="res_1", series="couples",
+                                   language="id", ai_output="ok")
+        result = asyncio.run(engine.assess_risk(data))
+        queue_id = asyncio.run(engine.create_moderation_queue_item(data, result, "output"))
+        decision = ModerationDecision(action=ModerationAction.ESCALATE, moderator_notes="")
+        asyncio.run(engine.process_moderation_decision(queue_id, decision, "user_mod"))
+        # Logged by PUT /admin/hitl/keywords/{category}
+        asyncio.run(engine.write_audit_log({"log_id": "log_kw", "action": "keyword_update", "category": "red",
+                                            "moderator_id": "user_mod", "timestamp": NOW.isoformat()}))
+
+        rows = {(d["metric"], d.get("risk_level") or d.get("status") or d.get("action")): d["count"]
+                for d in db.hitl_daily.docs}
+        assert rows[("risk_level", result.risk_level.value)] == 1
+        assert rows[("queue_status", "pending")] == 0
+        assert rows[("queue_status", "escalated")] == 1
+        assert rows[("moderator_action", "escalate")] == 1
+        assert rows[("moderator_action", "keyword_update")] == 1
+        assert len(db.audit_logs.docs) == 2
+        response = next(d for d in db.hitl_daily.docs if d["metric"] == "response")
+        assert response["count"] == 1 and response["seconds_min"] >= 0
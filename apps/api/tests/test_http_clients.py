@@ -0,0 +1,113 @@
+"""
+Tests for the outbound HTTP client registry
+===========================================
+Connection reuse, reuse metrics, concurrency limits and lifespan close,
+against a local server.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from utils import metrics
+from utils.http_clients import HTTPClientRegistry, UpstreamConfig
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    for store in (metrics._counters, metrics._histograms):
+        store.clear()
+    yield
+
+
+class SlowApp:
+    def __init__(self):
+        self.app = FastAPI()
+        self.active = 0
+        self.max_active = 0
+
+        @self.app.get("/slow")
+        async def slow():
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.05)
+            self.active -= 1
+            return {"ok": True}
+
+
+@pytest.fixture(scope="module")
+def upstream(local_server):
+    slow = SlowApp()
+    slow.url = local_server(slow.app)
+    return slow
+
+
+def make_registry(max_concurrency=10) -> HTTPClientRegistry:
+    return HTTPClientRegistry({
+        "test": UpstreamConfig("test", connect_timeout=1, read_timeout=5,
+                               max_connections=10, max_concurrency=max_concurrency),
+    })
+
+
+class TestHTTPClientRegistry:
+    """Test pooled upstream clients."""
+
+    def test_connections_reused(self, upstream):
+        registry = make_registry()
+
+        async def scenario():
+            for _ in range(5):
+                response = await registry.get("test").get(f"{upstream.url}/slow")
+                assert response.json() == {"ok": True}
+            await registry.aclose()
+
+        asyncio.run(scenario())
+        stats = registry.stats()["test"]
+        assert stats["requests"] == 5
+        assert stats["new_connections"] == 1
+        assert stats["reuse_ratio"] == 0.8
+        assert metrics._counters['http_client_requests_total{connection="new",upstream="test"}'] == 1
+        assert metrics._counters['http_client_requests_total{connection="reused",upstream="test"}'] == 4
+        assert metrics._histograms['http_client_connect_ms{upstream="test"}'].count == 1
+
+    def test_concurrency_limit(self, upstream):
+        upstream.max_active = 0
+        registry = make_registry(max_concurrency=2)
+
+        async def scenario():
+            client = registry.get("test")
+            await asyncio.gather(*(client.get(f"{upstream.url}/slow") for _ in range(8)))
+            await registry.aclose()
+
+        asyncio.run(scenario())
+        assert upstream.max_active == 2
+        assert registry.stats()["test"]["new_connections"] == 2
+
+    def test_closed_registry_reopens(self, upstream):
+        registry = make_registry()
+
+        async def scenario():
+            first = registry.get("test")
+            await registry.aclose()
+            assert first.is_closed
+            second = registry.get("test")
+            assert second is not first
+            await second.get(f"{upstream.url}/slow")
+            await registry.aclose()
+
+        asyncio.run(scenario())
+        assert registry.stats()["test"]["open"] is False
+
+    def test_errors_counted(self):
+        registry = make_registry()
+
+        async def scenario():
+            try:
+                await registry.get("test").get("http://127.0.0.1:1/slow")
+            finally:
+                await registry.aclose()
+
+        with pytest.raises(Exception):
+            asyncio.run(scenario())
+        assert metrics._counters['http_client_errors_total{upstream="test"}'] == 1
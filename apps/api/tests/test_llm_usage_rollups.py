@@ -0,0 +1,169 @@
+"""
+Tests for the LLM usage rollups
+===============================
+Fixed-bucket percentiles, incremental writes vs rebuilds, usage summary
+parity with the raw events, and the raw-event retention lifecycle.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from ai_gateway.budget_guard import BudgetGuard
+from ai_gateway.usage_rollups import (
+    TTL_INDEX_NAME,
+    UsageRollups,
+    bucket,
+    day_of,
+    get_usage_rollups,
+    percentile,
+)
+from fake_mongo import FakeDB
+
+
+# ---------- data ----------
+
+NOW = datetime.now(timezone.utc)
+ENDPOINTS = ["/api/report/generate", "/api/deep-dive/generate", "/api/tips/generate"]
+
+
+def make_event(rng, ts):
+    status = rng.choice(["ok", "ok", "ok", "degraded", "blocked"])
+    blocked = status == "blocked"
+    tokens_in = 0 if blocked else rng.randrange(200, 3000)
+    tokens_out = 0 if blocked else rng.randrange(100, 2500)
+    return {
+        "ts_utc": ts,
+        "endpoint_name": rng.choice(ENDPOINTS),
+        "model_used": None if blocked else rng.choice(["gpt-4o", "gpt-4o-mini"]),
+        "tier": rng.choice(["free", "premium", "elite"]),
+        "status": status,
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "cost_estimate_usd": round((tokens_in * 0.0025 + tokens_out * 0.01) / 1000, 6),
+        "latency_ms": 0.0 if blocked else rng.uniform(300, 20000),
+    }
+
+
+def events_over(days, per_day, seed=3):
+    rng = random.Random(seed)
+    return [make_event(rng, NOW - timedelta(days=d, seconds=rng.randrange(86400)))
+            for d in range(days) for _ in range(per_day)]
+
+
+def reference_summary(events, since):
+    """The raw-event summary, computed directly."""
+    daily, endpoints = {}, {}
+    for e in events:
+        if e["ts_utc"] < since:
+            continue
+        entry = daily.setdefault((day_of(e["ts_utc"]), e["status"]), [0, 0.0, 0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += e["cost_estimate_usd"]
+        entry[2] += e["tokens_in"]
+        entry[3] += e["tokens_out"]
+        entry[4] += e["latency_ms"]
+        if e["status"] in ("ok", "degraded"):
+            endpoint = endpoints.setdefault(e["endpoint_name"], [0, 0.0])
+            endpoint[0] += 1
+            endpoint[1] += e["cost_estimate_usd"]
+    return daily, endpoints
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestUsageRollups:
+    """Test rollup maintenance, summaries and retention."""
+
+    def test_percentiles_within_one_bucket(self):
+        hist = {}
+        for value in range(1, 1001):
+            key = bucket(value)
+            hist[key] = hist.get(key, 0) + 1
+        assert 500 <= percentile(hist, 50) <= 500 * 10 ** 0.1
+        assert 990 <= percentile(hist, 99) <= 990 * 10 ** 0.1
+        assert bucket(0) == "z" and bucket(None) == "z"
+        assert percentile({"z": 3, bucket(10): 1}, 50) == 0.0
+
+    def test_incremental_matches_rebuild(self):
+        db = FakeDB()
+        rollups = UsageRollups(db)
+        for event in events_over(4, 50):
+            db.llm_usage_events.docs.append(event)
+            run(rollups.record(event))
+        incremental = {(d["day"], d["endpoint_name"], d["model"], d["tier"], d["status"]): d
+                       for d in db.llm_usage_daily.docs}
+        run(rollups.rebuild(until_day=day_of(NOW + timedelta(days=1))))
+        rebuilt = {(d["day"], d["endpoint_name"], d["model"], d["tier"], d["status"]): d
+                   for d in db.llm_usage_daily.docs}
+        assert incremental.keys() == rebuilt.keys()
+        for key, row in rebuilt.items():
+            assert row["count"] == incremental[key]["count"]
+            assert row["hist"] == incremental[key]["hist"]
+            assert round(row["cost_usd"], 9) == round(incremental[key]["cost_usd"], 9)
+
+    def test_summary_matches_raw_events(self):
+        db = FakeDB()
+        events = sorted(events_over(12, 40), key=lambda e: e["ts_utc"])
+        rollups = get_usage_rollups(db)
+        deploy = NOW - timedelta(days=3)
+        for event in events:
+            db.llm_usage_events.docs.append(event)
+            if event["ts_utc"] >= deploy:
+                run(rollups.record(event))
+        assert not run(rollups.is_ready())
+        assert run(rollups.rebuild())["ready"]
+
+        since = NOW - timedelta(days=7)
+        before = db.llm_usage_events.returned
+        summary = run(BudgetGuard(db).get_usage_summary(7))
+        # Raw events are only read for the partial first day
+        assert 0 < db.llm_usage_events.returned - before <= 40
+
+        daily, endpoints = reference_summary(events, since)
+        got = {(r["_id"]["date"], r["_id"]["status"]): r for r in summary["daily_breakdown"]}
+        assert got.keys() == daily.keys()
+        for key, (count, cost, tin, tout, latency) in daily.items():
+            row = got[key]
+            assert (row["count"], row["total_tokens_in"], row["total_tokens_out"]) == (count, tin, tout)
+            assert abs(row["total_cost"] - cost) < 1e-9
+            assert abs(row["avg_latency"] - latency / count) < 1e-6
+        top = {e["_id"]: (e["count"], round(e["total_cost"], 9)) for e in summary["top_endpoints"]}
+        assert top == {k: (v[0], round(v[1], 9)) for k, v in endpoints.items()}
+        assert summary["total_calls"] == sum(v[0] for v in daily.values())
+        assert summary["percentiles"]["latency_ms"]["p50"] <= summary["percentiles"]["latency_ms"]["p99"]
+
+    def test_retention_waits_for_backfill(self):
+        db = FakeDB()
+        db.llm_usage_events.indexes["ts_utc_1"] = {"key": [("ts_utc", 1)]}
+        rollups = UsageRollups(db, retention_days=30)
+        assert run(rollups.apply_retention())["applied"] is False
+        assert "ts_utc_1" in db.llm_usage_events.indexes
+
+        run(db.llm_usage_rollup_state.update_one({"_id": "daily"}, {"$set": {"ready": True}}, upsert=True))
+        assert run(rollups.apply_retention())["action"] == "created"
+        assert "ts_utc_1" not in db.llm_usage_events.indexes
+        assert db.llm_usage_events.indexes[TTL_INDEX_NAME]["expireAfterSeconds"] == 30 * 86400
+        assert run(rollups.apply_retention())["action"] == "unchanged"
+
+        rollups.retention_days = 7
+        assert run(rollups.apply_retention())["action"] == "updated"
+        assert db.commands[0]["index"] == {"name": TTL_INDEX_NAME, "expireAfterSeconds": 7 * 86400}
+
+        rollups.retention_days = 0
+        assert run(rollups.apply_retention())["action"] == "removed"
+        assert TTL_INDEX_NAME not in db.llm_usage_events.indexes
+
+    def test_rebuild_keeps_rollups_of_expired_days(self):
+        db = FakeDB()
+        rollups = UsageRollups(db, retention_days=5)
+        old_day = day_of(NOW - timedelta(days=20))
+        db.llm_usage_daily.docs.append({"day": old_day, "endpoint_name": "/x", "model": None,
+                                        "tier": "free", "status": "ok", "count": 9})
+        run(db.llm_usage_rollup_state.update_one(
+            {"_id": "daily"}, {"$set": {"ready": True, "retention_days": 5}}, upsert=True))
+        result = run(rollups.rebuild(since_day=old_day))
+        assert result["since_day"] > old_day
+        assert [d["count"] for d in db.llm_usage_daily.docs if d["day"] == old_day] == [9]
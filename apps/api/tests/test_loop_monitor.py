@@ -0,0 +1,99 @@
+"""
+Tests for the event-loop lag monitor
+====================================
+Lag histogram, and blocking-call capture with route and culprit function.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import metrics
+from utils.loop_monitor import LoopLagMonitor
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    for store in (metrics._counters, metrics._metrics, metrics._histograms):
+        store.clear()
+    yield
+
+
+def blocking_sleep(seconds: float):
+    time.sleep(seconds)  # stands in for bcrypt / ReportLab / a sync SDK call
+
+
+def make_app(monitor: LoopLagMonitor) -> FastAPI:
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def start():
+        monitor.start()
+
+    @app.on_event("shutdown")
+    async def stop():
+        await monitor.stop()
+
+    @app.get("/api/payment/status/{payment_id}")
+    async def payment_status(payment_id: str):
+        blocking_sleep(0.3)
+        return {"payment_id": payment_id}
+
+    @app.get("/api/ok")
+    async def ok():
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    return app
+
+
+def settle(monitor: LoopLagMonitor):
+    # Let the ticker observe the end of the stall
+    time.sleep(monitor.interval * 3)
+
+
+class TestLoopLagMonitor:
+    """Test lag measurement and blocking-call reports."""
+
+    def test_blocking_endpoint_reported(self):
+        monitor = LoopLagMonitor(interval_ms=20, block_threshold_ms=100)
+        with TestClient(make_app(monitor)) as client:
+            time.sleep(0.1)
+            client.get("/api/payment/status/pay_123")
+            settle(monitor)
+
+        assert monitor.recent_blocks
+        block = monitor.recent_blocks[-1]
+        assert block["lag_ms"] >= 200
+        assert block["route"] == "/api/payment/status/{payment_id}"
+        assert block["path"] == "/api/payment/status/pay_123"
+        assert block["function"].startswith("blocking_sleep (test_loop_monitor.py")
+        assert metrics._counters[
+            'event_loop_blocked_total{route="/api/payment/status/{payment_id}"}'
+        ] >= 1
+
+    def test_awaiting_endpoint_not_reported(self):
+        monitor = LoopLagMonitor(interval_ms=20, block_threshold_ms=100)
+        with TestClient(make_app(monitor)) as client:
+            client.get("/api/ok")
+            settle(monitor)
+
+        assert not monitor.recent_blocks
+        assert metrics._histograms["event_loop_lag_ms"].count > 5
+
+    def test_lag_outside_requests_labelled_background(self):
+        monitor = LoopLagMonitor(interval_ms=20, block_threshold_ms=100)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            blocking_sleep(0.3)
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        assert monitor.recent_blocks[-1]["route"] == "background"
+        assert monitor.recent_blocks[-1]["function"].startswith("blocking_sleep")
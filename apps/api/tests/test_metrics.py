@@ -0,0 +1,126 @@
+"""
+Tests for Prometheus metrics
+============================
+Fixed-bucket histograms, route-template labels and multi-worker merging.
+"""
+
+import time
+
+import orjson
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from middleware.request_metrics import RequestMetricsMiddleware
+from utils import metrics
+from utils.metrics import Histogram
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    for store in (metrics._counters, metrics._metrics, metrics._histograms, metrics._gauge_modes):
+        store.clear()
+    yield
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/api/quiz/result/{result_id}")
+    async def get_result(result_id: str):
+        if result_id == "missing":
+            raise HTTPException(status_code=404, detail="not found")
+        return {"result_id": result_id}
+
+    return app
+
+
+class TestHistogram:
+    """Test fixed-bucket observation and exposition."""
+
+    def test_observe_is_bounded(self):
+        histogram = Histogram(buckets=(10, 100))
+        for value in range(1000):
+            histogram.observe(value)
+        assert len(histogram.counts) == 3
+        assert histogram.count == 1000
+        assert histogram.cumulative() == [("10", 11), ("100", 101), ("+Inf", 1000)]
+
+    def test_prometheus_exposition(self):
+        metrics.observe_histogram("job_ms", 3, labels={"kind": "a"}, buckets=(1, 5))
+        metrics.observe_histogram("job_ms", 7, labels={"kind": "a"})
+        text = metrics._format_prometheus()
+        assert text.count("# TYPE job_ms histogram") == 1
+        assert 'job_ms_bucket{kind="a",le="1"} 0' in text
+        assert 'job_ms_bucket{kind="a",le="5"} 1' in text
+        assert 'job_ms_bucket{kind="a",le="+Inf"} 2' in text
+        assert 'job_ms_sum{kind="a"} 10.0' in text
+        assert 'job_ms_count{kind="a"} 2' in text
+
+
+class TestRequestMetricsMiddleware:
+    """Test per-route request recording."""
+
+    def test_route_template_label(self):
+        client = TestClient(make_app())
+        for result_id in ("result_abc", "result_def", "result_ghi"):
+            client.get(f"/api/quiz/result/{result_id}")
+
+        key = 'http_request_duration_ms{method="GET",path="/api/quiz/result/{result_id}"}'
+        assert metrics._histograms[key].count == 3
+        assert not any("result_abc" in key for key in metrics._counters)
+
+    def test_status_recorded(self):
+        client = TestClient(make_app())
+        client.get("/api/quiz/result/missing")
+        assert metrics._counters[
+            'http_requests_total{method="GET",path="/api/quiz/result/{result_id}",status="404"}'
+        ] == 1
+
+    def test_unmatched_paths_share_one_label(self):
+        client = TestClient(make_app())
+        client.get("/api/nope/1")
+        client.get("/api/nope/2")
+        assert metrics._counters['http_requests_total{method="GET",path="unmatched",status="404"}'] == 2
+
+
+class TestMultiWorker:
+    """Test merging snapshots written by other workers."""
+
+    def write_other_worker(self, directory, age=0.0):
+        snapshot = {
+            "time": time.time() - age,
+            "counters": {"jobs_total": 5},
+            "gauges": {"queue_depth": 2, "loop_lag_ms": 40},
+            "gauge_modes": {"queue_depth": "sum", "loop_lag_ms": "max"},
+            "histograms": {"job_ms": [list(metrics.DEFAULT_BUCKETS_MS), [1] + [0] * 15, 0.5, 1]},
+        }
+        (directory / "metrics_999999.json").write_bytes(orjson.dumps(snapshot))
+
+    def test_counters_histograms_and_gauges_merged(self, tmp_path):
+        metrics.increment_counter("jobs_total", 3)
+        metrics.observe_histogram("job_ms", 20)
+        metrics.set_gauge("queue_depth", 1)
+        metrics.set_gauge("loop_lag_ms", 10, mode="max")
+        self.write_other_worker(tmp_path)
+
+        counters, gauges, histograms = metrics._collect(str(tmp_path))
+        assert counters["jobs_total"] == 8
+        assert histograms["job_ms"].count == 2
+        assert gauges["queue_depth"] == 3
+        assert gauges["loop_lag_ms"] == 40
+
+    def test_stale_gauges_ignored_counters_kept(self, tmp_path):
+        metrics.set_gauge("queue_depth", 1)
+        self.write_other_worker(tmp_path, age=metrics.GAUGE_STALE_SECONDS + 1)
+
+        counters, gauges, _ = metrics._collect(str(tmp_path))
+        assert counters["jobs_total"] == 5
+        assert gauges["queue_depth"] == 1
+
+    def test_own_snapshot_not_double_counted(self, tmp_path):
+        metrics.increment_counter("jobs_total", 3)
+        metrics.write_snapshot(str(tmp_path))
+        counters, _, _ = metrics._collect(str(tmp_path))
+        assert counters["jobs_total"] == 3
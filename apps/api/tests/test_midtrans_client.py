@@ -0,0 +1,144 @@
+"""
+Tests for the async Midtrans client
+===================================
+Runs against a local fake Midtrans server (see the local_server fixture):
+Snap creation, status caching and coalescing, retries and error mapping.
+"""
+
+import asyncio
+import socket
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from services.midtrans_client import MidtransClient, MidtransError
+from utils.http_clients import close_http_clients
+
+
+class FakeMidtrans:
+    """Minimal Snap + Core API with call counters and injectable failures."""
+
+    def __init__(self):
+        self.app = FastAPI()
+        self.calls = {"create": 0, "status": 0}
+        self.fail_next = []  # HTTP status codes to return before succeeding
+        self.status_delay = 0.0
+        self.auth_headers = set()
+
+        @self.app.post("/snap/v1/transactions")
+        async def create(request: Request):
+            self.calls["create"] += 1
+            self.auth_headers.add(request.headers.get("authorization"))
+            if self.fail_next:
+                return JSONResponse({"error_messages": ["down"]}, status_code=self.fail_next.pop(0))
+            body = await request.json()
+            order_id = body["transaction_details"]["order_id"]
+            return JSONResponse({"token": f"tok-{order_id}",
+                                 "redirect_url": f"https://fake/snap/{order_id}"}, status_code=201)
+
+        @self.app.get("/v2/{order_id}/status")
+        async def status(order_id: str):
+            self.calls["status"] += 1
+            await asyncio.sleep(self.status_delay)
+            if self.fail_next:
+                return JSONResponse({"status_message": "down"}, status_code=self.fail_next.pop(0))
+            if order_id == "missing":
+                return {"status_code": "404", "status_message": "Transaction doesn't exist."}
+            return {"status_code": "200", "order_id": order_id, "transaction_status": "settlement"}
+
+
+@pytest.fixture(scope="module")
+def fake_midtrans(local_server):
+    fake = FakeMidtrans()
+    fake.url = local_server(fake.app)
+    return fake
+
+
+@pytest.fixture
+def fake(fake_midtrans):
+    fake_midtrans.calls = {"create": 0, "status": 0}
+    fake_midtrans.fail_next = []
+    fake_midtrans.status_delay = 0.0
+    return fake_midtrans
+
+
+def make_client(fake, **kwargs) -> MidtransClient:
+    return MidtransClient("SB-server-key", snap_base_url=f"{fake.url}/snap/v1", core_base_url=fake.url, **kwargs)
+
+
+def run(client: MidtransClient, coro_fn):
+    async def scenario():
+        try:
+            return await coro_fn()
+        finally:
+            await close_http_clients()
+    return asyncio.run(scenario())
+
+
+class TestMidtransClient:
+    """Test the client against the fake server."""
+
+    def test_create_transaction(self, fake):
+        client = make_client(fake)
+        params = {"transaction_details": {"order_id": "PAY-1", "gross_amount": 49000}}
+        response = run(client, lambda: client.create_transaction(params))
+        assert response == {"token": "tok-PAY-1", "redirect_url": "https://fake/snap/PAY-1"}
+        # Basic auth with the server key and an empty password
+        assert "Basic U0Itc2VydmVyLWtleTo=" in fake.auth_headers
+
+    def test_status_cached_and_coalesced(self, fake):
+        fake.status_delay = 0.05
+        client = make_client(fake)
+
+        async def scenario():
+            burst = await asyncio.gather(*(client.transaction_status("PAY-1") for _ in range(10)))
+            again = await client.transaction_status("PAY-1")
+            return burst, again
+
+        burst, again = run(client, scenario)
+        assert fake.calls["status"] == 1
+        assert {s["transaction_status"] for s in burst} == {"settlement"}
+        assert again["order_id"] == "PAY-1"
+
+    def test_invalidate_and_ttl(self, fake):
+        client = make_client(fake, status_cache_ttl=60)
+
+        async def scenario():
+            await client.transaction_status("PAY-2")
+            client.invalidate_status("PAY-2")
+            await client.transaction_status("PAY-2")
+            await client.transaction_status("PAY-2")
+
+        run(client, scenario)
+        assert fake.calls["status"] == 2
+
+    def test_status_retries_5xx(self, fake):
+        fake.fail_next = [503, 502]
+        client = make_client(fake)
+        status = run(client, lambda: client.transaction_status("PAY-3"))
+        assert status["transaction_status"] == "settlement"
+        assert fake.calls["status"] == 3
+
+    def test_create_not_retried_after_reaching_midtrans(self, fake):
+        fake.fail_next = [503]
+        client = make_client(fake)
+        with pytest.raises(MidtransError) as exc:
+            run(client, lambda: client.create_transaction({"transaction_details": {"order_id": "PAY-4"}}))
+        assert exc.value.status_code == 503
+        assert fake.calls["create"] == 1
+
+    def test_core_error_in_body(self, fake):
+        client = make_client(fake)
+        with pytest.raises(MidtransError) as exc:
+            run(client, lambda: client.transaction_status("missing"))
+        assert exc.value.status_code == 404
+
+    def test_unreachable_retried_then_raised(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+        sock.close()
+        client = MidtransClient("key", core_base_url=f"http://127.0.0.1:{closed_port}", max_retries=1)
+        with pytest.raises(MidtransError, match="unreachable"):
+            run(client, lambda: client.transaction_status("PAY-5"))
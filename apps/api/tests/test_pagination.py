@@ -0,0 +1,127 @@
+"""
+Tests for keyset pagination
+===========================
+Cursor round trips, walking a listing page by page (ties and nulls
+included), and the cached totals.
+"""
+
+import asyncio
+from functools import cmp_to_key
+
+import pytest
+
+from fake_mongo import FakeDB
+from utils.pagination import (
+    CountCache,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+    keyset_filter,
+)
+
+SORT = [("created_at", -1), ("user_id", -1)]
+
+
+def compare(sort):
+    def cmp(a, b):
+        for field, direction in sort:
+            x, y = a.get(field), b.get(field)
+            if x == y:
+                continue
+            # MongoDB sorts null below strings
+            less = x is None or (y is not None and x < y)
+            return (-1 if less else 1) * direction
+        return 0
+    return cmp_to_key(cmp)
+
+
+def user_collection(docs):
+    return FakeDB(users=docs).users
+
+
+def counts(collection):
+    return collection.calls["count_documents"] + collection.calls["estimated_document_count"]
+
+
+def users(n):
+    # Three users per timestamp so pages split inside a tie
+    return [{"user_id": f"user_{i:03d}", "created_at": f"2026-01-{1 + i // 3:02d}T00:00:00+00:00"}
+            for i in range(n)]
+
+
+def walk(collection, query, limit):
+    pages, cursor = [], None
+    while True:
+        items, cursor = asyncio.run(fetch_page(collection, query, SORT, limit, cursor=cursor))
+        pages.append(items)
+        if cursor is None:
+            return pages
+
+
+class TestCursor:
+    """Test cursor tokens."""
+
+    def test_round_trip(self):
+        token = encode_cursor({"created_at": "2026-01-01T00:00:00+00:00", "user_id": "u1"}, SORT)
+        assert "=" not in token
+        assert decode_cursor(token, SORT) == ["2026-01-01T00:00:00+00:00", "u1"]
+
+    def test_rejects_foreign_or_garbage(self):
+        token = encode_cursor({"created_at": "x", "report_id": "r1"}, [("created_at", -1), ("report_id", -1)])
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, SORT)
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor", SORT)
+
+    def test_keyset_filter(self):
+        assert keyset_filter(SORT, ["t", "u"]) == {"$or": [
+            {"created_at": {"$lt": "t"}},
+            {"created_at": None},
+            {"created_at": "t", "user_id": {"$lt": "u"}},
+        ]}
+
+
+class TestFetchPage:
+    """Test walking listings with cursors."""
+
+    def test_walk_matches_full_sort(self):
+        docs = users(20) + [{"user_id": "user_legacy"}]  # no created_at
+        collection = user_collection(docs)
+        pages = walk(collection, {}, limit=4)
+        walked = [d["user_id"] for page in pages for d in page]
+        expected = [d["user_id"] for d in sorted(docs, key=compare(SORT))]
+        assert walked == expected
+        assert [len(p) for p in pages] == [4, 4, 4, 4, 4, 1]
+
+    def test_filter_is_kept_across_pages(self):
+        docs = [dict(d, status="pending" if i % 2 else "approved") for i, d in enumerate(users(12))]
+        pages = walk(user_collection(docs), {"status": "pending"}, limit=4)
+        walked = [d for page in pages for d in page]
+        assert len(walked) == 6
+        assert all(d["status"] == "pending" for d in walked)
+
+    def test_skip_without_cursor(self):
+        items, cursor = asyncio.run(fetch_page(user_collection(users(10)), {}, SORT, 3, skip=3))
+        assert [d["user_id"] for d in items] == ["user_006", "user_005", "user_004"]
+        assert cursor is not None
+
+
+class TestCountCache:
+    """Test cached totals."""
+
+    def test_cached_and_estimated(self):
+        collection = user_collection(users(10))
+        cache = CountCache(ttl=60)
+        assert asyncio.run(cache.total(collection)) == 10
+        assert asyncio.run(cache.total(collection)) == 10
+        assert counts(collection) == 1
+        assert asyncio.run(cache.total(collection, {"user_id": "user_001"})) == 1
+        assert counts(collection) == 2
+
+    def test_expires(self):
+        collection = user_collection(users(10))
+        cache = CountCache(ttl=0)
+        asyncio.run(cache.total(collection))
+        asyncio.run(cache.total(collection))
+        assert counts(collection) == 2
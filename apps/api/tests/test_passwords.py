@@ -0,0 +1,86 @@
+"""
+Tests for the bcrypt password pool
+==================================
+Round trips, fail-fast admission and event-loop responsiveness.
+"""
+
+import asyncio
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from utils import metrics
+from utils.passwords import PasswordHasher, PasswordHasherBusy, hash_password, verify_password
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestPasswordHasher:
+    """Test the bounded bcrypt executor."""
+
+    def test_hash_and_verify_round_trip(self):
+        async def scenario():
+            hashed = await hash_password("Rahasia123!")
+            return hashed, await verify_password("Rahasia123!", hashed), await verify_password("salah", hashed)
+
+        hashed, ok, wrong = run(scenario())
+        assert hashed.startswith("$2")
+        assert ok is True
+        assert wrong is False
+
+    def test_compatible_with_existing_hashes(self):
+        legacy = bcrypt.hashpw(b"Admin123!", bcrypt.gensalt(rounds=4)).decode()
+        assert run(verify_password("Admin123!", legacy)) is True
+
+    def test_saturated_pool_fails_fast_with_503(self):
+        hasher = PasswordHasher(workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = [asyncio.ensure_future(hasher.run("verify", release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            start = time.perf_counter()
+            with pytest.raises(PasswordHasherBusy) as exc:
+                await hasher.run("verify", release.wait)
+            elapsed = time.perf_counter() - start
+            release.set()
+            await asyncio.gather(*blocked)
+            return exc.value, elapsed
+
+        error, elapsed = run(scenario())
+        assert error.status_code == 503
+        assert error.headers["Retry-After"] == "1"
+        assert elapsed < 0.05
+        assert hasher.pending == 0
+        assert any(key.startswith("password_hash_rejected_total") for key in metrics._counters)
+
+    def test_event_loop_keeps_ticking(self):
+        hasher = PasswordHasher(workers=2, max_queue=8)
+        hashed = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=10)).decode()
+
+        async def scenario():
+            ticks = 0
+            stop = False
+
+            async def ticker():
+                nonlocal ticks
+                while not stop:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.ensure_future(ticker())
+            await asyncio.gather(*[hasher.verify("pw", hashed) for _ in range(4)])
+            stop = True
+            await task
+            return ticks
+
+        assert run(scenario()) > 5
+
+    def test_latency_and_queue_depth_recorded(self):
+        run(hash_password("x"))
+        assert any(key.startswith("password_hash_duration_ms") for key in metrics._histograms)
+        assert metrics._metrics["password_hash_queue_depth"] == 0
@@ -0,0 +1,125 @@
+"""
+Tests for on-demand profiling
+=============================
+Armed request sessions (sampling and cProfile) and tracemalloc diffs.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.profiling import ProfilingMiddleware
+from utils import profiling
+from utils.profiling import MemoryProfiler, compile_route, get_request_profiler
+
+_leak = []
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    profiler = get_request_profiler()
+    profiler.session = profiler.last = None
+    yield
+    profiler.session = profiler.last = None
+
+
+def busy_work(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/api/report/{result_id}")
+    async def report(result_id: str):
+        busy_work(0.05)
+        await asyncio.sleep(0.05)
+        return {"result_id": result_id}
+
+    @app.get("/api/other")
+    async def other():
+        return {"ok": True}
+
+    return app
+
+
+class TestRequestProfiler:
+    """Test armed request profiling."""
+
+    def test_route_template_matching(self):
+        pattern = compile_route("/api/report/{result_id}")
+        assert pattern.match("/api/report/abc")
+        assert not pattern.match("/api/report/abc/pdf")
+        assert not pattern.match("/api/other")
+
+    def test_sampling_profiles_next_n_requests(self):
+        client = TestClient(make_app())
+        get_request_profiler().arm("/api/report/{result_id}", count=2, interval_ms=2)
+
+        client.get("/api/other")
+        for i in range(3):
+            client.get(f"/api/report/r{i}")
+
+        profiler = get_request_profiler()
+        assert profiler.session is None  # disarmed after two requests
+        status = profiler.status()
+        assert status["profiled"] == 2
+        assert [p["path"] for p in status["profiles"]] == ["/api/report/r0", "/api/report/r1"]
+        profile = status["profiles"][0]
+        assert profile["route"] == "/api/report/{result_id}"
+        assert profile["samples"] > 10
+        stacks = dict(line.rsplit(" ", 1) for line in profile["collapsed"].splitlines())
+        assert any("busy_work (test_profiling.py)" in stack for stack in stacks)
+        assert any(stack.endswith("[awaiting]") and "report (test_profiling.py)" in stack for stack in stacks)
+
+    def test_cprofile_mode(self):
+        client = TestClient(make_app())
+        get_request_profiler().arm("/api/report/{result_id}", mode="cprofile", method="get")
+        client.get("/api/report/r1")
+
+        profile = get_request_profiler().status()["profiles"][0]
+        functions = {f["function"].split(" ")[0]: f for f in profile["functions"]}
+        assert functions["busy_work"]["cumtime_ms"] >= 40
+
+    def test_invalid_mode_rejected(self):
+        with pytest.raises(ValueError):
+            get_request_profiler().arm("/api/other", mode="perf")
+
+    def test_expired_session_disarmed(self, monkeypatch):
+        client = TestClient(make_app())
+        get_request_profiler().arm("/api/report/{result_id}")
+        monkeypatch.setattr(profiling, "PROFILE_SESSION_TTL_SECONDS", -1)
+        client.get("/api/report/r1")
+        status = get_request_profiler().status()
+        assert not status["armed"]
+        assert status["profiles"] == []
+
+
+class TestMemoryProfiler:
+    """Test tracemalloc snapshot diffs."""
+
+    def test_growth_reported_between_snapshots(self):
+        memory = MemoryProfiler()
+        memory.start(frames=5)
+        try:
+            _leak.extend("x" * 1000 + str(i) for i in range(500))
+            report = memory.snapshot(limit=10)
+        finally:
+            memory.stop()
+            _leak.clear()
+
+        assert report["tracing"]
+        top = report["top_growth"][0]
+        assert "test_profiling.py" in top["location"]
+        assert top["size_diff_kb"] > 400
+        assert "rate_limit_storage_keys" in report["caches"]
+
+    def test_snapshot_requires_start(self):
+        with pytest.raises(RuntimeError):
+            MemoryProfiler().snapshot()
@@ -0,0 +1,129 @@
+"""
+Tests for the index registry and query plan auditor
+===================================================
+Explain parsing, the static index coverage check for every audited query,
+and ``ensure_indexes`` fallback. The live explain() audit runs only when
+QUERY_AUDIT_MONGO_URL points at a mongod.
+"""
+
+import asyncio
+import os
+
+import pytest
+from pymongo import ASCENDING, IndexModel
+
+from utils import indexes as indexes_module
+from utils.indexes import ensure_indexes
+from utils.query_audit import AUDIT_QUERIES, explain_command, plan_problems, unsupported
+
+
+def classic(plan):
+    return {"queryPlanner": {"winningPlan": plan}}
+
+
+class FakeCollection:
+    def __init__(self, name, fail=()):
+        self.name = name
+        self.fail = fail
+        self.created = []
+
+    async def create_indexes(self, models):
+        names = [m.document["name"] for m in models]
+        if any(n in self.fail for n in names):
+            raise RuntimeError("IndexOptionsConflict")
+        self.created.extend(names)
+
+
+class FakeDB:
+    def __init__(self, fail=()):
+        self.collections = {}
+        self.fail = fail
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(name, self.fail))
+
+
+class TestPlanProblems:
+    """Test COLLSCAN / SORT detection in explain() output."""
+
+    def test_index_scan_is_clean(self):
+        plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+        assert plan_problems(classic(plan)) == []
+
+    def test_collscan_and_sort(self):
+        plan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+        assert plan_problems(classic(plan)) == ["in-memory SORT", "COLLSCAN"]
+
+    def test_or_branches(self):
+        plan = {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [
+            {"stage": "IXSCAN"}, {"stage": "COLLSCAN"},
+        ]}}
+        assert plan_problems(classic(plan)) == ["COLLSCAN"]
+
+    def test_sbe_and_aggregate_shapes(self):
+        sbe = {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "IXSCAN"}},
+                                                "slotBasedPlan": {}}}}
+        assert plan_problems(sbe) == ["in-memory SORT"]
+        agg = {"stages": [{"$cursor": classic({"stage": "COLLSCAN"})}, {"$group": {}}]}
+        assert plan_problems(agg) == ["COLLSCAN"]
+
+    def test_explain_command(self):
+        command = explain_command({"collection": "r4_reports", "filter": {"report_type": "COUPLE"},
+                                   "sort": [("created_at", -1)]})
+        assert command["explain"]["sort"] == {"created_at": -1}
+        assert command["verbosity"] == "queryPlanner"
+        dated = explain_command({"collection": "audit_logs", "pipeline": [
+            {"$match": {"timestamp_dt": {"$gte": {"$date": "2026-01-01T00:00:00Z"}}}}]})
+        assert dated["explain"]["pipeline"][0]["$match"]["timestamp_dt"]["$gte"].year == 2026
+
+
+class TestIndexRegistry:
+    """Test the registry covers every audited query."""
+
+    @pytest.mark.parametrize("query", AUDIT_QUERIES, ids=lambda q: f"{q['collection']}:{q['source']}")
+    def test_audited_query_has_index(self, query):
+        assert unsupported(query) is None
+
+    def test_detects_missing_index(self):
+        assert unsupported({"collection": "reports", "filter": {"language": "id"}})
+        assert unsupported({"collection": "blog_articles", "filter": {"status": "published"},
+                            "sort": [("title", 1)]})
+        assert unsupported({"collection": "couples_packs", "filter": {"$or": [
+            {"creator_id": "user_1"}, {"status": "active"}]}})
+
+    def test_sort_direction_may_be_reversed(self):
+        query = {"collection": "blog_articles", "filter": {"status": "published"}, "sort": [("created_at", 1)]}
+        assert unsupported(query) is None
+
+    def test_ensure_indexes_falls_back_per_index(self, monkeypatch):
+        monkeypatch.setattr(indexes_module, "INDEXES", {
+            "items": [IndexModel([("a", ASCENDING)]), IndexModel([("b", ASCENDING)])],
+            "other": [IndexModel([("c", ASCENDING)])],
+        })
+        db = FakeDB(fail={"b_1"})
+        report = asyncio.run(ensure_indexes(db, collections=["items"]))
+        assert report == {"created": ["items.a_1"], "failed": ["items.b_1"]}
+        assert "other" not in db.collections
+
+
+@pytest.mark.skipif(not os.environ.get("QUERY_AUDIT_MONGO_URL"), reason="QUERY_AUDIT_MONGO_URL not set")
+class TestLiveQueryPlans:
+    """explain() every audited query against a real mongod."""
+
+    def test_no_collscan_or_sort(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.query_audit import audit
+
+        async def run():
+            client = AsyncIOMotorClient(os.environ["QUERY_AUDIT_MONGO_URL"])
+            db = client["relasi4warna_query_audit_test"]
+            try:
+                report = await ensure_indexes(db)
+                assert report["failed"] == []
+                return await audit(db)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+
+        failures = [r for r in asyncio.run(run()) if r["problems"]]
+        assert failures == []
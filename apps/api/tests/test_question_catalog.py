@@ -0,0 +1,147 @@
+"""
+Tests for the in-memory question catalog
+========================================
+Caching, per-language payloads, metadata lookups and versioned invalidation.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from fake_mongo import FakeDB
+from services.question_catalog import QuestionCatalog, format_question
+
+
+def question(qid, order, series="couples", active=True, stress=False):
+    return {
+        "question_id": qid,
+        "series": series,
+        "question_id_text": f"Pertanyaan {qid}",
+        "question_en_text": f"Question {qid}",
+        "question_type": "forced_choice",
+        "options": [{"text": "A", "archetype": "driver"}],
+        "stress_marker_flag": stress,
+        "active": active,
+        "order": order,
+    }
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def docs():
+    return [
+        question("q2", 2, stress=True),
+        question("q1", 1),
+        question("q3", 3, active=False),
+        question("f1", 1, series="family"),
+    ]
+
+
+class TestQuestionCatalog:
+    """Test catalog reads and invalidation."""
+
+    def test_payload_matches_legacy_format(self, docs):
+        catalog = QuestionCatalog(FakeDB(questions=docs))
+        payload = run(catalog.get_payload("couples", "en"))
+        body = json.loads(payload.body)
+        assert body["total"] == 2
+        assert [q["question_id"] for q in body["questions"]] == ["q1", "q2"]
+        assert body["questions"][0] == format_question(docs[1], "en")
+        assert body["questions"][0]["text"] == "Question q1"
+
+    def test_unknown_language_falls_back_to_indonesian(self, docs):
+        catalog = QuestionCatalog(FakeDB(questions=docs))
+        body = json.loads(run(catalog.get_payload("couples", "fr")).body)
+        assert body["questions"][0]["text"] == "Pertanyaan q1"
+
+    def test_reads_hit_database_once(self, docs):
+        db = FakeDB(questions=docs)
+        catalog = QuestionCatalog(db)
+
+        async def scenario():
+            for _ in range(20):
+                await catalog.get_payload("couples", "id")
+                await catalog.get_metadata("couples", ["q1", "q2", "q3"])
+
+        run(scenario())
+        assert db.questions.calls["find"] == 1
+        assert db.cache_versions.calls["find_one"] == 1
+
+    def test_concurrent_cold_reads_load_once(self, docs):
+        db = FakeDB(questions=docs)
+        catalog = QuestionCatalog(db)
+
+        async def scenario():
+            await asyncio.gather(*[catalog.get_series("couples") for _ in range(10)])
+
+        run(scenario())
+        assert catalog.loads == 1
+
+    def test_unknown_series_is_not_loaded_or_cached(self, docs):
+        db = FakeDB(questions=docs)
+        catalog = QuestionCatalog(db)
+
+        async def scenario():
+            for i in range(50):
+                assert await catalog.get_payload(f"random-{i}", "id") is None
+
+        run(scenario())
+        assert db.questions.calls["find"] == 0
+        assert db.questions.calls["distinct"] == 1
+        assert catalog._entries == {} and catalog._locks == {}
+
+    def test_admin_created_series_is_served(self, docs):
+        db = FakeDB(questions=docs)
+        catalog = QuestionCatalog(db)
+        assert run(catalog.get_payload("workplace", "id")) is None
+        db.questions.docs.append(question("w1", 1, series="workplace"))
+        run(catalog.invalidate())
+        body = json.loads(run(catalog.get_payload("workplace", "id")).body)
+        assert [q["question_id"] for q in body["questions"]] == ["w1"]
+
+    def test_metadata_includes_inactive_and_other_series(self, docs):
+        catalog = QuestionCatalog(FakeDB(questions=docs))
+        meta = run(catalog.get_metadata("couples", ["q2", "q3", "f1", "missing"]))
+        assert meta["q2"]["stress_marker_flag"] is True
+        assert meta["q3"]["active"] is False
+        assert meta["f1"]["series"] == "family"
+        assert "missing" not in meta
+
+    def test_invalidate_reloads(self, docs):
+        db = FakeDB(questions=docs)
+        catalog = QuestionCatalog(db)
+
+        async def scenario():
+            await catalog.get_payload("couples", "id")
+            db.questions.docs.append(question("q4", 4))
+            await catalog.invalidate()
+            return await catalog.get_payload("couples", "id")
+
+        body = json.loads(run(scenario()).body)
+        assert body["total"] == 3
+        assert db.questions.calls["find"] == 2
+
+    def test_other_worker_sees_version_bump(self, docs):
+        db = FakeDB(questions=docs)
+        worker_a = QuestionCatalog(db)
+        worker_b = QuestionCatalog(db)
+        worker_a.version.check_interval = 0
+
+        async def scenario():
+            await worker_a.get_series("couples")
+            await worker_b.invalidate()
+            await worker_a.get_series("couples")
+
+        run(scenario())
+        assert worker_a.loads == 2
+
+    def test_etag_stable_until_invalidated(self, docs):
+        catalog = QuestionCatalog(FakeDB(questions=docs))
+        first = run(catalog.get_payload("couples", "id"))
+        assert run(catalog.get_payload("couples", "id")) is first
+        run(catalog.invalidate())
+        assert run(catalog.get_payload("couples", "id")).etag == first.etag
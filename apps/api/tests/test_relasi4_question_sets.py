@@ -0,0 +1,143 @@
+"""
+Tests for the RELASI4™ question set cache
+=========================================
+Single-aggregation loads, lock-hash ETags and hash-based invalidation.
+"""
+
+import asyncio
+import json
+
+from fake_mongo import FakeDB
+from services.relasi4_question_sets import RELASI4QuestionSetCache
+
+
+def add_set(db, code, lock_hash="a" * 64, count=3):
+    db.r4_question_sets.docs.append(
+        {"code": code, "title": f"Set {code}", "version": 1, "is_active": True, "lock_hash": lock_hash}
+    )
+    set_questions(db, code, count)
+
+
+def set_questions(db, code, count):
+    """Replace a set's questions: ``count`` active ones with two answers each, and one retired."""
+    db.r4_questions.docs = [q for q in db.r4_questions.docs if q["set_code"] != code]
+    db.r4_answers.docs = [a for a in db.r4_answers.docs if a["set_code"] != code]
+    # Stored out of order; the pipeline sorts questions and answers
+    for n in reversed(range(1, count + 2)):
+        db.r4_questions.docs.append({"set_code": code, "order_no": n, "prompt": f"Prompt {n}",
+                                     "type": "forced_choice", "is_active": n <= count})
+        for label, text in (("B", "Tidak"), ("A", "Ya")):
+            db.r4_answers.docs.append({"set_code": code, "order_no": n, "label": label, "text": text})
+
+
+def loaded_codes(db):
+    """Codes requested by each question set aggregation."""
+    return [pipeline[0]["$match"]["code"]["$in"] for pipeline in db.r4_question_sets.pipelines]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestQuestionSetCache:
+    """Test loading and invalidation by lock hash."""
+
+    def test_questions_payload_and_lock_hash_etag(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1", lock_hash="f" * 64)
+        cache = RELASI4QuestionSetCache(db)
+        cached = run(cache.get_set("R4W_CORE_V1"))
+        body = json.loads(cached.payload.body)
+        assert len(body) == 3
+        assert body[0] == {
+            "order_no": 1, "prompt": "Prompt 1", "type": "forced_choice",
+            "answers": [{"label": "A", "text": "Ya"}, {"label": "B", "text": "Tidak"}],
+        }
+        assert cached.payload.etag == '"' + "f" * 64 + '"'
+
+    def test_list_payload_counts_questions(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1", count=40)
+        add_set(db, "R4T_DEEP_V1", count=20)
+        cache = RELASI4QuestionSetCache(db)
+        body = json.loads(run(cache.get_list_payload()).body)
+        assert [(s["code"], s["question_count"]) for s in body] == [("R4W_CORE_V1", 40), ("R4T_DEEP_V1", 20)]
+
+    def test_unknown_set_is_none(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1")
+        cache = RELASI4QuestionSetCache(db)
+        assert run(cache.get_set("NOPE")) is None
+
+    def test_all_sets_loaded_with_one_aggregation(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1")
+        add_set(db, "R4T_DEEP_V1")
+        cache = RELASI4QuestionSetCache(db)
+
+        async def scenario():
+            for _ in range(10):
+                await cache.get_list_payload()
+                await cache.get_set("R4W_CORE_V1")
+                await cache.get_set("R4T_DEEP_V1")
+
+        run(scenario())
+        assert loaded_codes(db) == [["R4W_CORE_V1", "R4T_DEEP_V1"]]
+        assert db.r4_question_sets.calls["find"] == 1
+
+    def test_unchanged_lock_hash_not_reloaded(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1")
+        cache = RELASI4QuestionSetCache(db, check_interval=0)
+
+        async def scenario():
+            for _ in range(5):
+                await cache.get_set("R4W_CORE_V1")
+
+        run(scenario())
+        assert db.r4_question_sets.calls["find"] == 5
+        assert db.r4_question_sets.calls["aggregate"] == 1
+
+    def test_new_lock_hash_reloads_only_that_set(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1")
+        add_set(db, "R4T_DEEP_V1")
+        cache = RELASI4QuestionSetCache(db, check_interval=0)
+
+        async def scenario():
+            await cache.get_set("R4W_CORE_V1")
+            set_questions(db, "R4T_DEEP_V1", count=5)
+            await db.r4_question_sets.update_one({"code": "R4T_DEEP_V1"}, {"$set": {"lock_hash": "b" * 64}})
+            return await cache.get_set("R4T_DEEP_V1")
+
+        cached = run(scenario())
+        assert cached.question_count == 5
+        assert loaded_codes(db)[-1] == ["R4T_DEEP_V1"]
+
+    def test_deactivated_set_dropped(self):
+        db = FakeDB()
+        add_set(db, "R4W_CORE_V1")
+        add_set(db, "R4T_DEEP_V1")
+        cache = RELASI4QuestionSetCache(db, check_interval=0)
+
+        async def scenario():
+            await cache.get_set("R4T_DEEP_V1")
+            await db.r4_question_sets.update_one({"code": "R4T_DEEP_V1"}, {"$set": {"is_active": False}})
+            return await cache.get_set("R4T_DEEP_V1"), await cache.get_list_payload()
+
+        cached, listing = run(scenario())
+        assert cached is None
+        assert [s["code"] for s in json.loads(listing.body)] == ["R4W_CORE_V1"]
+
+    def test_unlocked_set_reloaded_every_poll(self):
+        db = FakeDB()
+        add_set(db, "DRAFT", lock_hash=None)
+        cache = RELASI4QuestionSetCache(db, check_interval=0)
+
+        async def scenario():
+            await cache.get_set("DRAFT")
+            return await cache.get_set("DRAFT")
+
+        cached = run(scenario())
+        assert db.r4_question_sets.calls["aggregate"] == 2
+        assert cached.payload.etag.startswith('"')
@@ -0,0 +1,116 @@
+"""
+Tests for the materialized report leaderboards
+==============================================
+Incremental pushes on save vs a rebuild from r4_reports, the per-worker
+read cache, and admin deletion.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timezone
+
+from fake_mongo import FakeDB
+from relasi4tm.leaderboards import ReportLeaderboards, get_report_leaderboards
+from relasi4tm.report_service import RELASI4ReportService
+
+
+# ---------- data ----------
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_report(rng, i):
+    if rng.random() < 0.6:
+        return {
+            "report_id": f"r4c_{i}",
+            "report_type": "COUPLE",
+            "compatibility_summary": {"compatibility_score": rng.randrange(0, 101),
+                                      "compatibility_level": "high", "summary": "private"},
+            "person_a_profile": {"primary_color": "color_red", "archetype": "Driver", "strengths": ["x"]},
+            "person_b_profile": {"primary_color": "color_blue", "archetype": "Analyst"},
+            "user_id": "private",
+        }
+    return {
+        "report_id": f"r4f_{i}",
+        "report_type": "FAMILY",
+        "family_summary": {"harmony_score": rng.randrange(0, 101), "overview": "private"},
+        "member_profiles": [{"primary_color": "color_green", "archetype": "Anchor"}],
+        "user_id": "private",
+    }
+
+
+async def save_all(db, reports):
+    service = RELASI4ReportService(db)
+    for report in reports:
+        await service._save_report(dict(report))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestReportLeaderboards:
+    """Test leaderboard maintenance, caching and deletion."""
+
+    def test_saved_reports_match_rebuild(self, monkeypatch):
+        db = FakeDB()
+        rng = random.Random(5)
+        leaderboards = get_report_leaderboards(db)
+        monkeypatch.setattr(leaderboards, "size", 10)
+        run(leaderboards.rebuild("COUPLE"))
+        run(leaderboards.rebuild("FAMILY"))
+        run(save_all(db, [make_report(rng, i) for i in range(80)]))
+
+        incremental = {d["_id"]: dict(d) for d in db.r4_leaderboards.docs}
+        for report_type in ("COUPLE", "FAMILY"):
+            rebuilt = run(ReportLeaderboards(db, size=10).rebuild(report_type))
+            got = incremental[report_type]
+            assert got["total"] == rebuilt["total"]
+            assert got["entries"] == rebuilt["entries"]
+            assert len(got["entries"]) == 10
+        couple = incremental["COUPLE"]["entries"][0]
+        assert set(couple) == {"report_id", "compatibility_summary", "person_a_profile",
+                               "person_b_profile", "created_at"}
+        assert "summary" not in couple["compatibility_summary"]
+        assert "strengths" not in couple["person_a_profile"]
+
+        # Re-saving an existing report is not counted twice
+        run(RELASI4ReportService(db)._save_report(dict(db.r4_reports.docs[0])))
+        assert [d["total"] for d in db.r4_leaderboards.docs] == [incremental[d["_id"]]["total"]
+                                                                 for d in db.r4_leaderboards.docs]
+
+    def test_reads_are_one_cached_fetch(self):
+        db = FakeDB()
+        rng = random.Random(6)
+        db.r4_reports.docs = [dict(make_report(rng, i), created_at=NOW) for i in range(30)]
+        leaderboards = ReportLeaderboards(db, ttl=60)
+
+        entries, total = run(leaderboards.top("COUPLE", 5))  # builds the missing board
+        assert total == sum(1 for d in db.r4_reports.docs if d["report_type"] == "COUPLE")
+        scores = [e["compatibility_summary"]["compatibility_score"] for e in entries]
+        assert len(entries) == 5 and scores == sorted(scores, reverse=True)
+
+        reads = db.r4_leaderboards.calls["find_one"]
+        run(leaderboards.top("COUPLE", 50))
+        assert db.r4_leaderboards.calls["find_one"] == reads
+
+        run(leaderboards.record(dict(make_report(rng, 99), report_type="COUPLE", created_at=NOW)))
+        _, new_total = run(leaderboards.top("COUPLE", 5))
+        assert new_total == total + 1 and db.r4_leaderboards.calls["find_one"] == reads + 1
+
+    def test_admin_delete(self):
+        db = FakeDB()
+        leaderboards = ReportLeaderboards(db, size=3, ttl=0)
+        db.r4_reports.docs = [{"report_id": f"r4f_{i}", "report_type": "FAMILY", "created_at": NOW,
+                               "family_summary": {"harmony_score": i}} for i in range(6)]
+        run(leaderboards.rebuild("FAMILY"))
+
+        db.r4_reports.docs = [d for d in db.r4_reports.docs if d["report_id"] != "r4f_0"]
+        run(leaderboards.remove("FAMILY", "r4f_0"))
+        entries, total = run(leaderboards.top("FAMILY", 10))
+        assert total == 5 and [e["report_id"] for e in entries] == ["r4f_5", "r4f_4", "r4f_3"]
+
+        db.r4_reports.docs = [d for d in db.r4_reports.docs if d["report_id"] != "r4f_5"]
+        run(leaderboards.remove("FAMILY", "r4f_5"))
+        entries, total = run(leaderboards.top("FAMILY", 10))
+        assert total == 4 and [e["report_id"] for e in entries] == ["r4f_4", "r4f_3", "r4f_2"]
@@ -0,0 +1,172 @@
+"""
+Tests for SecurityStackMiddleware
+=================================
+The fused middleware must answer exactly like the chain it replaces
+(CORS + SecurityHeaders + RequestSizeLimit + RateLimit + AuthContext).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from middleware import auth_context
+from middleware.auth_context import AuthContextMiddleware, get_auth_context
+from middleware.rate_limit import RateLimitMiddleware, _rate_limit_storage
+from middleware.request_size import RequestSizeLimitMiddleware
+from middleware.security_headers import SECURITY_HEADERS, SecurityHeadersMiddleware
+from middleware.security_stack import SecurityStackMiddleware
+
+CORS_HEADERS = (
+    "access-control-allow-origin",
+    "access-control-allow-credentials",
+    "access-control-allow-methods",
+    "access-control-allow-headers",
+    "access-control-max-age",
+    "vary",
+)
+
+
+def make_token(user_id="user_abc"):
+    payload = {"user_id": user_id, "exp": datetime.now(timezone.utc) + timedelta(hours=1)}
+    return jwt.encode(payload, auth_context.JWT_SECRET, algorithm="HS256")
+
+
+def add_routes(app: FastAPI):
+    @app.get("/api/whoami")
+    async def whoami(request: Request):
+        return {"user_id": get_auth_context(request.scope).user_id}
+
+    @app.post("/api/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+
+def legacy_app(origins) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_credentials=True, allow_origins=origins,
+                       allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RequestSizeLimitMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(AuthContextMiddleware)
+    add_routes(app)
+    return app
+
+
+def fused_app(origins) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SecurityStackMiddleware, cors_origins=origins)
+    add_routes(app)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_on(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "true")
+    _rate_limit_storage.clear()
+    yield
+    _rate_limit_storage.clear()
+
+
+def assert_same(origins, method, path, **kwargs):
+    """Run one request through both stacks and compare the observable result."""
+    legacy = getattr(TestClient(legacy_app(origins)), method)(path, **kwargs)
+    _rate_limit_storage.clear()
+    fused = getattr(TestClient(fused_app(origins)), method)(path, **kwargs)
+    _rate_limit_storage.clear()
+
+    assert fused.status_code == legacy.status_code
+    assert fused.content == legacy.content
+    for name in CORS_HEADERS:
+        assert fused.headers.get(name) == legacy.headers.get(name), name
+    return fused
+
+
+class TestParity:
+    """Test the fused stack against the old middleware chain."""
+
+    def test_simple_request_any_origin(self):
+        assert_same(["*"], "get", "/api/whoami", headers={"Origin": "https://a.example"})
+
+    def test_simple_request_with_cookie(self):
+        assert_same(["*"], "get", "/api/whoami",
+                    headers={"Origin": "https://a.example", "Cookie": "session=1"})
+
+    @pytest.mark.parametrize("origin", ["https://app.example", "https://evil.example"])
+    def test_explicit_origins(self, origin):
+        assert_same(["https://app.example"], "get", "/api/whoami", headers={"Origin": origin})
+
+    @pytest.mark.parametrize("origins", [["*"], ["https://app.example"]])
+    def test_preflight(self, origins):
+        assert_same(origins, "options", "/api/echo", headers={
+            "Origin": "https://app.example",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "authorization, content-type",
+        })
+
+    def test_preflight_disallowed_origin(self):
+        response = assert_same(["https://app.example"], "options", "/api/echo", headers={
+            "Origin": "https://evil.example",
+            "Access-Control-Request-Method": "POST",
+        })
+        assert response.status_code == 400
+
+    def test_body_too_large(self):
+        response = assert_same(["*"], "post", "/api/echo", content=b"x" * (300 * 1024))
+        assert response.status_code == 413
+
+    def test_authenticated_request(self):
+        response = assert_same(["*"], "get", "/api/whoami",
+                               headers={"Authorization": f"Bearer {make_token()}"})
+        assert response.json() == {"user_id": "user_abc"}
+
+
+class TestFusedStack:
+    """Test headers and limits applied by the fused stack."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(fused_app(["*"]))
+
+    def test_security_headers_and_request_id(self, client):
+        response = client.get("/api/whoami")
+        for name, value in SECURITY_HEADERS:
+            assert response.headers[name.decode()] == value.decode()
+        assert len(response.headers["x-request-id"]) == 8
+
+    def test_rate_limit_headers(self, client):
+        response = client.get("/api/whoami")
+        assert response.headers["x-ratelimit-limit"] == "60"
+        assert response.headers["x-ratelimit-remaining"] == "59"
+
+    def test_rate_limited_response_keeps_security_headers(self, client):
+        token = make_token()
+        for _ in range(60):
+            client.get("/api/whoami", headers={"Authorization": f"Bearer {token}"})
+        response = client.get("/api/whoami", headers={"Authorization": f"Bearer {token}",
+                                                      "Origin": "https://a.example"})
+        assert response.status_code == 429
+        assert response.json()["error"] == "rate_limited"
+        assert response.headers["retry-after"]
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert response.headers["access-control-allow-origin"] == "*"
+
+    def test_rate_limit_keyed_by_user_id(self, client):
+        client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token()}"})
+        assert any(key.endswith(":user:user_abc") for key in _rate_limit_storage)
+
+    def test_preflight_not_rate_limited(self, client):
+        client.options("/api/echo", headers={"Origin": "https://a.example",
+                                             "Access-Control-Request-Method": "POST"})
+        assert not _rate_limit_storage
+
+    def test_single_decode_per_request(self, client, monkeypatch):
+        calls = []
+        original = auth_context.jwt.decode
+        monkeypatch.setattr(auth_context.jwt, "decode", lambda *a, **k: calls.append(1) or original(*a, **k))
+        client.get("/api/whoami", headers={"Authorization": f"Bearer {make_token()}"})
+        assert len(calls) == 1
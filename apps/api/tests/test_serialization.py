@@ -0,0 +1,255 @@
+"""
+Parity tests for orjson serialization
+=====================================
+ORJSONResponse / ORJSONRoute must produce what clients got from FastAPI's
+default jsonable_encoder + json.dumps path.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+from bson import ObjectId
+from fastapi import BackgroundTasks, FastAPI, APIRouter, Depends, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from utils.serialization import ORJSONResponse, ORJSONRoute, dumps
+
+
+def legacy_render(content) -> bytes:
+    """What FastAPI produced before: jsonable_encoder + JSONResponse.render."""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def report_payload() -> dict:
+    markdown = "\n".join(
+        f"## Bab {i}: Pola Komunikasi — “Driver” & Spark 🔥\n"
+        f"Anda cenderung *tegas* dan **berorientasi hasil**. <tips> \"quote\" \\ /   é ñ 日本\n"
+        for i in range(40)
+    )
+    return {
+        "report_id": "report_abc123",
+        "result_id": "result_abc123",
+        "language": "id",
+        "content": markdown,
+        "scores": {"driver": 12, "spark": 8, "anchor": 4, "analyst": 2},
+        "balance_index": 0.38,
+        "stress_flag": False,
+        "hitl_status": None,
+        "created_at": "2025-01-22T23:57:28.123456+00:00",
+    }
+
+
+def history_payload() -> dict:
+    return {"results": [
+        {
+            "result_id": f"result_{i:012x}",
+            "user_id": "user_123",
+            "series": "couples",
+            "primary_archetype": "driver",
+            "secondary_archetype": "spark",
+            "scores": {"driver": 10, "spark": 9, "anchor": 4, "analyst": 3},
+            "balance_index": round(i / 50, 2),
+            "is_paid": i % 2 == 0,
+            "created_at": f"2025-01-{(i % 28) + 1:02d}T10:00:00+00:00",
+        }
+        for i in range(50)
+    ]}
+
+
+def export_payload() -> dict:
+    now = datetime.datetime(2025, 1, 22, 23, 57, 28, 123456, tzinfo=datetime.timezone.utc)
+    return {
+        "export_date": now.isoformat(),
+        "assessments": [
+            {"assessment_id": f"ra_{i}", "risk_level": i % 3 + 1, "risk_score": i * 7 % 100,
+             "keywords_detected": {"violence": ["x"], "self_harm": []}, "created_at": now.isoformat()}
+            for i in range(200)
+        ],
+        "moderation_queue": [{"queue_id": f"q_{i}", "status": "pending"} for i in range(50)],
+        "audit_logs": [{"log_id": f"log_{i}", "action": "approve", "timestamp": now.isoformat()} for i in range(50)],
+    }
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+class Item(BaseModel):
+    name: str
+    created_at: datetime.datetime
+    tags: List[str] = []
+    note: Optional[str] = None
+
+
+class TestRenderParity:
+    """Byte-for-byte parity on representative payloads."""
+
+    @pytest.mark.parametrize("payload", [report_payload(), history_payload(), export_payload()],
+                             ids=["report", "history", "export"])
+    def test_representative_payloads_byte_identical(self, payload):
+        assert ORJSONResponse(payload).body == legacy_render(payload)
+
+    def test_datetime_matches_isoformat(self):
+        values = {
+            "aware": datetime.datetime(2025, 1, 1, 8, 30, 0, 5, tzinfo=datetime.timezone.utc),
+            "offset": datetime.datetime(2025, 1, 1, 8, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=7))),
+            "naive": datetime.datetime(2025, 1, 1, 8, 30),
+            "date": datetime.date(2025, 1, 1),
+            "time": datetime.time(8, 30, 15),
+        }
+        assert dumps(values) == legacy_render(values)
+
+    def test_pydantic_models(self):
+        item = Item(name="a", created_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        payload = {"item": item, "items": [item, item]}
+        assert dumps(payload) == legacy_render(payload)
+
+    def test_misc_types(self):
+        payload = {
+            "enum": Color.RED,
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "tuple": (1, 2),
+            "set": {"only"},
+            "decimal_int": decimal.Decimal("10"),
+            "decimal_float": decimal.Decimal("1.5"),
+            "delta": datetime.timedelta(minutes=1, seconds=30),
+            "bytes": b"abc",
+            "nested": {"deep": [{"x": None, "y": True}]},
+        }
+        assert json.loads(dumps(payload)) == json.loads(legacy_render(payload))
+
+    def test_non_string_keys(self):
+        # True == 1, so the bool key needs its own payload
+        for payload in ({1: "a", 2.5: "b"}, {True: "c", None: "d"}):
+            assert json.loads(dumps(payload)) == json.loads(legacy_render(payload))
+
+    def test_non_finite_floats_render_as_null(self):
+        # Deliberate change: the legacy path raised and answered with a 500
+        payload = {"nan": float("nan"), "inf": float("inf"), "ninf": float("-inf")}
+        assert dumps(payload) == b'{"nan":null,"inf":null,"ninf":null}'
+        assert ORJSONResponse(payload).body == dumps(payload)
+        with pytest.raises(ValueError):
+            legacy_render(payload)
+
+    def test_float_semantics(self):
+        payload = {"values": [0.1, 1.0, 1e16, 1e-7, -2.5, 123456.789]}
+        assert json.loads(dumps(payload)) == json.loads(legacy_render(payload))
+
+    def test_object_id_serialized_as_string(self):
+        oid = ObjectId("65a1b2c3d4e5f6a7b8c9d0e1")
+        assert json.loads(dumps({"_id": oid})) == {"_id": "65a1b2c3d4e5f6a7b8c9d0e1"}
+
+    def test_huge_int_falls_back(self):
+        payload = {"n": 2 ** 70}
+        assert dumps(payload) == legacy_render(payload)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+    router = APIRouter(prefix="/api", route_class=ORJSONRoute)
+
+    @router.get("/report")
+    async def report():
+        return report_payload()
+
+    @router.get("/sync")
+    def sync_route():
+        return {"sync": True}
+
+    @router.get("/model", response_model=Item)
+    async def model_route():
+        return {"name": "m", "created_at": "2025-01-01T00:00:00+00:00", "extra": "dropped"}
+
+    @router.post("/created", status_code=201)
+    async def created():
+        return {"ok": True}
+
+    @router.get("/with-response")
+    async def with_response(response: Response):
+        response.headers["X-Custom"] = "1"
+        response.status_code = 202
+        return {"ok": True}
+
+    def dep_sets_header(response: Response):
+        response.headers["X-Dep"] = "1"
+
+    @router.get("/dep-response", dependencies=[Depends(dep_sets_header)])
+    async def dep_response():
+        return {"ok": True}
+
+    @router.get("/raw")
+    async def raw():
+        return PlainTextResponse("plain")
+
+    ran = []
+
+    @router.get("/background")
+    async def background(tasks: BackgroundTasks):
+        tasks.add_task(ran.append, "done")
+        return {"queued": True}
+
+    @router.get("/text", response_class=PlainTextResponse)
+    async def text():
+        return "hello"
+
+    app.include_router(router)
+    app.state.ran = ran
+    return app
+
+
+class TestRouteParity:
+    """End-to-end behaviour through ORJSONRoute."""
+
+    @pytest.fixture(scope="class")
+    def client(self):
+        return TestClient(make_app())
+
+    def test_dict_payload(self, client):
+        response = client.get("/api/report")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == legacy_render(report_payload())
+
+    def test_sync_endpoint(self, client):
+        assert client.get("/api/sync").json() == {"sync": True}
+
+    def test_response_model_still_filters(self, client):
+        assert client.get("/api/model").json() == {
+            "name": "m", "created_at": "2025-01-01T00:00:00Z", "tags": [], "note": None,
+        }
+
+    def test_route_status_code(self, client):
+        assert client.post("/api/created").status_code == 201
+
+    def test_injected_response_headers_and_status(self, client):
+        response = client.get("/api/with-response")
+        assert response.status_code == 202
+        assert response.headers["x-custom"] == "1"
+
+    def test_dependency_response_headers(self, client):
+        assert client.get("/api/dep-response").headers["x-dep"] == "1"
+
+    def test_returned_response_passthrough(self, client):
+        response = client.get("/api/raw")
+        assert response.text == "plain"
+        assert response.headers["content-type"].startswith("text/plain")
+
+    def test_background_tasks_run(self, client):
+        assert client.get("/api/background").json() == {"queued": True}
+        assert client.app.state.ran == ["done"]
+
+    def test_explicit_response_class(self, client):
+        assert client.get("/api/text").text == "hello"
+
+    def test_http_exception_body(self, client):
+        response = client.get("/api/missing")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Not Found"}
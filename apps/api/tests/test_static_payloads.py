@@ -0,0 +1,100 @@
+"""
+Tests for precomputed static payloads
+=====================================
+ETag / Cache-Control / gzip negotiation for reference endpoints.
+"""
+
+import gzip
+import json
+
+import pytest
+from starlette.requests import Request
+
+from utils.static_payloads import (
+    StaticPayload,
+    clear_static_payloads,
+    register_static_payload,
+    render_json,
+    static_response,
+)
+
+
+def make_request(headers=None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    clear_static_payloads()
+    yield
+    clear_static_payloads()
+
+
+class TestStaticPayload:
+    """Test serialized payload blobs."""
+
+    def test_body_matches_json_response_rendering(self):
+        """Body is byte-identical to the app's JSON response output."""
+        from fastapi.responses import JSONResponse
+        from utils.serialization import ORJSONResponse
+        content = {"name": "Penggerak", "items": [1, 2, 3], "nested": {"a": None}}
+        assert StaticPayload(content).body == ORJSONResponse(content).body
+        assert StaticPayload(content).body == JSONResponse(content).body
+
+    def test_etag_is_stable(self):
+        """Same content yields the same ETag across instances/workers."""
+        content = {"series": ["family", "couples"]}
+        assert StaticPayload(content).etag == StaticPayload(content).etag
+
+    def test_small_body_has_no_gzip_variant(self):
+        """Tiny payloads are not worth compressing."""
+        assert StaticPayload({"a": 1}).gzip_body is None
+
+    def test_large_body_gzip_roundtrip(self):
+        """Gzip variant decompresses to the identity body."""
+        payload = StaticPayload({"text": "relasi " * 500})
+        assert payload.gzip_body is not None
+        assert gzip.decompress(payload.gzip_body) == payload.body
+
+
+class TestStaticResponse:
+    """Test request negotiation."""
+
+    def test_identity_response_headers(self):
+        payload = register_static_payload("k", {"text": "x" * 1000})
+        response = static_response(make_request(), "k", lambda: {})
+        assert response.status_code == 200
+        assert response.body == payload.body
+        assert response.headers["etag"] == payload.etag
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        assert "content-encoding" not in response.headers
+
+    def test_gzip_negotiation(self):
+        payload = register_static_payload("k", {"text": "x" * 1000})
+        response = static_response(make_request({"Accept-Encoding": "gzip, br"}), "k", lambda: {})
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == payload.body
+        assert response.headers["etag"] == f"W/{payload.etag}"
+        revalidate = make_request({"If-None-Match": response.headers["etag"], "Accept-Encoding": "gzip"})
+        assert static_response(revalidate, "k", lambda: {}).status_code == 304
+
+    def test_if_none_match_returns_304(self):
+        payload = register_static_payload("k", {"a": 1})
+        response = static_response(make_request({"If-None-Match": payload.etag}), "k", lambda: {})
+        assert response.status_code == 304
+        assert response.body == b""
+
+    def test_weak_etag_matches(self):
+        payload = register_static_payload("k", {"a": 1})
+        request = make_request({"If-None-Match": f'"other", W/{payload.etag}'})
+        assert static_response(request, "k", lambda: {}).status_code == 304
+
+    def test_unregistered_key_uses_builder(self):
+        """Unknown keys fall back to the live builder result."""
+        result = static_response(make_request(), "missing", lambda: {"live": True})
+        assert result == {"live": True}
+
+    def test_render_json_keeps_unicode(self):
+        assert json.loads(render_json({"t": "RELASI4™"})) == {"t": "RELASI4™"}
+        assert "™".encode() in render_json({"t": "RELASI4™"})
@@ -0,0 +1,152 @@
+"""
+Tests for span tracing
+======================
+Parent/child linking, OTel JSON export and per-stage histograms.
+"""
+
+import asyncio
+import logging
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from ai_gateway import GuardedLLMContext, GuardedLLMGateway
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import metrics, tracing
+from utils.tracing import current_span, span, traced
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics._histograms.clear()
+    yield
+
+
+def exported(caplog):
+    records = [r for r in caplog.records if r.name == "tracing"]
+    return [r.extra_data for r in records]
+
+
+def otel_spans(trace):
+    return trace["otel"]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+class TestSpans:
+    """Test trace structure and export."""
+
+    def test_nested_spans_share_trace(self, caplog):
+        caplog.set_level(logging.INFO, logger="tracing")
+
+        async def scenario():
+            with span("report.generate", result_id="result_1"):
+                with span("report.results_lookup"):
+                    await asyncio.sleep(0)
+                with span("report.llm"):
+                    with span("llm.provider_call"):
+                        await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+        traces = exported(caplog)
+        assert len(traces) == 1
+        spans = {s["name"]: s for s in otel_spans(traces[0])}
+        root = spans["report.generate"]
+        assert root["parentSpanId"] == ""
+        assert {s["traceId"] for s in spans.values()} == {root["traceId"]}
+        assert spans["report.results_lookup"]["parentSpanId"] == root["spanId"]
+        assert spans["llm.provider_call"]["parentSpanId"] == spans["report.llm"]["spanId"]
+        assert {"key": "result_id", "value": {"stringValue": "result_1"}} in root["attributes"]
+        assert set(traces[0]["stages_ms"]) == {"report.results_lookup", "report.llm", "llm.provider_call"}
+
+    def test_error_status(self, caplog):
+        caplog.set_level(logging.INFO, logger="tracing")
+        with pytest.raises(ValueError):
+            with span("report.generate"):
+                raise ValueError("boom")
+        root = otel_spans(exported(caplog)[0])[0]
+        assert root["status"]["code"] == 2
+        assert "boom" in root["status"]["message"]
+
+    def test_stage_histograms(self):
+        with span("report.generate"):
+            with span("report.save"):
+                pass
+        assert metrics._histograms['span_duration_ms{span="report.save"}'].count == 1
+        assert metrics._histograms['span_duration_ms{span="report.generate"}'].count == 1
+
+    def test_concurrent_traces_isolated(self, caplog):
+        caplog.set_level(logging.INFO, logger="tracing")
+
+        async def one(name):
+            with span("report.generate", name=name):
+                await asyncio.sleep(0)
+                with span("report.llm"):
+                    await asyncio.sleep(0)
+
+        async def scenario():
+            await asyncio.gather(one("a"), one("b"))
+
+        asyncio.run(scenario())
+        traces = exported(caplog)
+        assert len(traces) == 2
+        for trace in traces:
+            assert len(otel_spans(trace)) == 2
+
+    def test_disabled_is_noop(self, monkeypatch, caplog):
+        caplog.set_level(logging.INFO, logger="tracing")
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+        with span("report.generate") as s:
+            s.set_attribute("model", "x")
+        assert not exported(caplog)
+        assert not metrics._histograms
+        current_span().set_attribute("ignored", True)
+
+
+class TestTracedEndpoint:
+    """Test @traced on FastAPI endpoints."""
+
+    def test_signature_preserved(self, caplog):
+        caplog.set_level(logging.INFO, logger="tracing")
+        app = FastAPI()
+
+        @app.post("/generate/{result_id}")
+        @traced("report.generate")
+        async def generate(result_id: str, language: str = "id"):
+            current_span().set_attribute("language", language)
+            return {"result_id": result_id, "language": language}
+
+        response = TestClient(app).post("/generate/result_1?language=en")
+        assert response.json() == {"result_id": "result_1", "language": "en"}
+        root = otel_spans(exported(caplog)[0])[0]
+        assert root["name"] == "report.generate"
+        assert {"key": "language", "value": {"stringValue": "en"}} in root["attributes"]
+
+
+class TestGatewayStages:
+    """Test stage spans inside the LLM gateway."""
+
+    def test_gateway_stages_recorded(self):
+        abuse_guard = MagicMock()
+        abuse_guard.analyze.return_value = MagicMock(detected=False, should_block=False, matched_patterns=[])
+        budget_guard = MagicMock()
+        budget_guard.check_daily_budget = AsyncMock(return_value={"blocked": False, "retry_after_seconds": 0})
+        budget_guard.check_user_soft_cap = AsyncMock(return_value={"exceeded": False})
+        budget_guard.record_usage = AsyncMock()
+        routing = MagicMock()
+        routing.get_route.return_value = {"model_preferred": "gpt-4o", "model_degraded": "gpt-4o-mini",
+                                          "max_tokens": 1800}
+        provider = MagicMock()
+        provider.generate = AsyncMock(return_value="Test response")
+
+        gateway = GuardedLLMGateway(db=None)
+        gateway.set_dependencies(abuse_guard=abuse_guard, budget_guard=budget_guard,
+                                 routing_policy=routing, llm_provider=provider)
+
+        async def scenario():
+            with span("llm.gateway"):
+                await gateway.call_llm_guarded(GuardedLLMContext(user_id="user_1", prompt="hi"))
+
+        asyncio.run(scenario())
+        for stage in ("gateway.abuse_check", "gateway.budget_check", "gateway.user_cap_check",
+                      "gateway.provider_call", "gateway.persist", "gateway.record_usage"):
+            assert metrics._histograms[f'span_duration_ms{{span="{stage}"}}'].count == 1
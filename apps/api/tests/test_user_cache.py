@@ -0,0 +1,120 @@
+"""
+Tests for the authenticated user cache
+======================================
+TTL, LRU bound, targeted and cross-worker invalidation.
+"""
+
+import asyncio
+
+from fake_mongo import FakeDB
+from services.user_cache import UserCache
+
+
+def users():
+    return [
+        {"user_id": "user_a", "email": "a@example.com", "tier": "free"},
+        {"user_id": "user_b", "email": "b@example.com", "tier": "free"},
+        {"user_id": "user_c", "email": "c@example.com", "tier": "free"},
+    ]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestUserCache:
+    """Test cached user resolution."""
+
+    def test_repeated_reads_hit_cache(self):
+        db = FakeDB(users=users())
+        cache = UserCache(db)
+
+        async def scenario():
+            for _ in range(10):
+                await cache.get("user_a")
+
+        run(scenario())
+        assert db.users.calls["find_one"] == 1
+        stats = cache.stats()
+        assert stats["hits"] == 9
+        assert stats["db_reads_saved"] == 9
+        assert stats["hit_rate"] == 0.9
+
+    def test_missing_user_not_cached(self):
+        db = FakeDB(users=users())
+        cache = UserCache(db)
+        assert run(cache.get("nobody")) is None
+        assert run(cache.get("nobody")) is None
+        assert db.users.calls["find_one"] == 2
+
+    def test_returns_copies(self):
+        cache = UserCache(FakeDB(users=users()))
+        first = run(cache.get("user_a"))
+        first["tier"] = "mutated"
+        assert run(cache.get("user_a"))["tier"] == "free"
+
+    def test_ttl_expiry(self):
+        db = FakeDB(users=users())
+        cache = UserCache(db, ttl=0)
+        run(cache.get("user_a"))
+        run(cache.get("user_a"))
+        assert db.users.calls["find_one"] == 2
+
+    def test_size_bound_evicts_least_recent(self):
+        db = FakeDB(users=users())
+        cache = UserCache(db, max_size=2)
+
+        async def scenario():
+            await cache.get("user_a")
+            await cache.get("user_b")
+            await cache.get("user_a")
+            await cache.get("user_c")  # evicts user_b
+            await cache.get("user_a")
+            await cache.get("user_b")
+
+        run(scenario())
+        assert db.users.calls["find_one"] == 4
+
+    def test_invalidate_sees_tier_change(self):
+        db = FakeDB(users=users())
+        cache = UserCache(db)
+
+        async def scenario():
+            await cache.get("user_a")
+            await db.users.update_one({"user_id": "user_a"}, {"$set": {"tier": "elite"}})
+            await cache.invalidate("user_a")
+            return await cache.get("user_a")
+
+        assert run(scenario())["tier"] == "elite"
+
+    def test_other_worker_evicts_only_invalidated_user(self):
+        db = FakeDB(users=users())
+        worker_a = UserCache(db)
+        worker_b = UserCache(db)
+        worker_a.version.check_interval = 0
+
+        async def scenario():
+            await worker_a.get("user_a")
+            await worker_a.get("user_b")
+            await worker_b.invalidate("user_a")
+            await worker_a.get("user_a")
+            await worker_a.get("user_b")
+
+        run(scenario())
+        assert db.users.calls["find_one"] == 3
+
+    def test_global_invalidation_clears_all_workers(self):
+        db = FakeDB(users=users())
+        worker_a = UserCache(db)
+        worker_b = UserCache(db)
+        worker_a.version.check_interval = 0
+
+        async def scenario():
+            await worker_a.get("user_a")
+            await worker_a.get("user_b")
+            await worker_b.invalidate()
+            await worker_a.get("user_a")
+            await worker_a.get("user_b")
+
+        run(scenario())
+        assert db.users.calls["find_one"] == 4
@@ -6,6 +6,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from utils.database import db
+from utils.passwords import get_password_hasher
 
 # JWT Configuration
 JWT_SECRET = os.environ.get("JWT_SECRET", "relasi4warna_secret_key_2024")
@@ -16,13 +17,13 @@ ACCESS_TOKEN_EXPIRE_HOURS = 24
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    """Hash a password (on the bcrypt pool, 503 when saturated)"""
+    return await get_password_hasher().run("hash", pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (on the bcrypt pool, 503 when saturated)"""
+    return await get_password_hasher().run("verify", pwd_context.verify, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Create a JWT access token"""
@@ -0,0 +1,90 @@
+"""
+Cross-Worker Cache Versions
+===========================
+Version stamps for in-process caches.
+
+Each stamp is one document in the ``cache_versions`` collection. Writers
+bump it after a mutation; every worker polls it at most once per check
+interval and drops its local cache when the number moves, so all uvicorn
+workers converge within ``check_interval`` seconds without a broker.
+
+A bump can name the key it touched (e.g. a user_id). The document keeps
+the last RECENT_KEYS keys, so a worker that is only a few versions behind
+evicts just those keys instead of its whole cache.
+"""
+
+import os
+import time
+from typing import Optional, Set
+
+from pymongo import ReturnDocument
+
+CACHE_VERSION_CHECK_SECONDS = float(os.environ.get("CACHE_VERSION_CHECK_SECONDS", 5))
+
+# Marker for "everything changed"
+ALL_KEYS = "*"
+
+
+class VersionStamp:
+    """A named, monotonically increasing version shared through MongoDB."""
+
+    COLLECTION = "cache_versions"
+    RECENT_KEYS = 200
+
+    def __init__(self, name: str, check_interval: float = CACHE_VERSION_CHECK_SECONDS):
+        self.name = name
+        self.check_interval = check_interval
+        self.version = 0
+        self._checked_at: Optional[float] = None
+
+    async def changes(self, db) -> Optional[Set[str]]:
+        """
+        Re-read the shared version if the check interval elapsed.
+
+        Returns None when nothing changed since the last read, otherwise
+        the set of keys bumped in between ({ALL_KEYS} if unknown).
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return None
+        self._checked_at = now
+        if db is None:
+            return None
+
+        doc = await db[self.COLLECTION].find_one({"_id": self.name})
+        version = doc.get("version", 0) if doc else 0
+        if version == self.version:
+            return None
+
+        behind = version - self.version
+        recent = doc.get("recent", []) if doc else []
+        self.version = version
+        if 0 < behind <= len(recent):
+            return set(recent[-behind:])
+        return {ALL_KEYS}
+
+    async def refresh(self, db) -> bool:
+        """True when the version changed, i.e. local caches must be discarded."""
+        return await self.changes(db) is not None
+
+    async def bump(self, db, key: Optional[str] = None) -> int:
+        """Increment the shared version (recording key) and adopt it locally."""
+        if db is None:
+            self.version += 1
+        else:
+            doc = await db[self.COLLECTION].find_one_and_update(
+                {"_id": self.name},
+                {
+                    "$inc": {"version": 1},
+                    "$push": {"recent": {"$each": [key or ALL_KEYS], "$slice": -self.RECENT_KEYS}},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            # Only skip ahead if no other worker bumped in between
+            if doc["version"] == self.version + 1:
+                self.version = doc["version"]
+                self._checked_at = time.monotonic()
+            else:
+                self._checked_at = None
+        return self.version
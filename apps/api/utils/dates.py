@@ -0,0 +1,64 @@
+"""
+Native Date Fields
+==================
+Timestamps are stored as ``isoformat()`` strings, which API responses and
+clients rely on. Next to each string listed in ``NATIVE_DATE_FIELDS`` the
+writers also store a BSON date under ``<field>_dt``. Aggregations can then
+filter and bucket with indexed native dates instead of ``$toDate`` on
+every document.
+
+Existing documents are backfilled by services.date_migration. Queries must
+only rely on a ``_dt`` field after ``is_complete()`` reports the migration
+for that collection/field as done.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+NATIVE_SUFFIX = "_dt"
+
+# collection -> string timestamp fields that get a native twin
+NATIVE_DATE_FIELDS: Dict[str, tuple] = {
+    "results": ("created_at",),
+    "payments": ("created_at", "paid_at"),
+    "risk_assessments": ("created_at",),
+    "moderation_queue": ("created_at", "moderated_at"),
+    "audit_logs": ("timestamp",),
+    "hitl_events": ("timestamp",),
+    "r4_analytics": ("created_at",),
+}
+
+
+def native_field(field: str) -> str:
+    """``created_at`` -> ``created_at_dt``."""
+    return field + NATIVE_SUFFIX
+
+
+def parse_iso(value: Any) -> Optional[datetime]:
+    """ISO string -> aware UTC datetime (naive strings are taken as UTC)."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def with_native_dates(doc: Dict[str, Any], *fields: str) -> Dict[str, Any]:
+    """
+    Copy of ``doc`` with ``<field>_dt`` set for each ISO string field.
+    Use for inserts and ``$set`` bodies; the original dict (often returned to
+    the client) is left untouched.
+    """
+    out = dict(doc)
+    for field in fields:
+        parsed = parse_iso(doc.get(field))
+        if parsed is not None:
+            out[native_field(field)] = parsed
+    return out
@@ -0,0 +1,218 @@
+"""
+Outbound HTTP Client Registry
+=============================
+One pooled ``httpx.AsyncClient`` per upstream (Google OAuth, Resend,
+Midtrans, OpenAI), shared by every request on the worker. Connections stay
+alive between calls, so outbound latency does not include a TCP + TLS
+handshake every time.
+
+Each upstream has its own settings:
+- connect/read timeouts
+- pool size (``max_connections``)
+- concurrency limit (``max_concurrency``): in-flight requests above it
+  wait instead of opening more connections or streams
+- HTTP/2, when the optional ``h2`` package is installed
+
+All of them can be overridden with ``HTTP_<UPSTREAM>_CONNECT_TIMEOUT``,
+``_READ_TIMEOUT``, ``_MAX_CONNECTIONS``, ``_MAX_CONCURRENCY`` and ``_HTTP2``.
+
+Clients are created lazily on the running loop and closed by
+``close_http_clients()`` at shutdown. A later ``get_http_client`` call
+opens a fresh pool.
+
+Metrics (connection reuse is detected through httpcore's ``trace``
+extension):
+- http_client_requests_total{upstream, connection="new|reused"}
+- http_client_errors_total{upstream}
+- http_client_request_ms{upstream}
+- http_client_connect_ms{upstream}  (TCP + TLS time of new connections)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from utils.metrics import increment_counter, observe_histogram
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UpstreamConfig:
+    """Pool, timeout and concurrency settings for one upstream."""
+
+    def __init__(self, name: str, connect_timeout: float, read_timeout: float,
+                 max_connections: int, max_concurrency: int, http2: bool = True):
+        prefix = f"HTTP_{name.upper()}_"
+        self.name = name
+        self.connect_timeout = float(os.environ.get(prefix + "CONNECT_TIMEOUT", connect_timeout))
+        self.read_timeout = float(os.environ.get(prefix + "READ_TIMEOUT", read_timeout))
+        self.max_connections = int(os.environ.get(prefix + "MAX_CONNECTIONS", max_connections))
+        self.max_concurrency = int(os.environ.get(prefix + "MAX_CONCURRENCY", max_concurrency))
+        self.http2 = str(os.environ.get(prefix + "HTTP2", http2)).lower() == "true" and HTTP2_AVAILABLE
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+UPSTREAMS: Dict[str, UpstreamConfig] = {
+    "google": UpstreamConfig("google", connect_timeout=3, read_timeout=10, max_connections=10, max_concurrency=50),
+    "resend": UpstreamConfig("resend", connect_timeout=3, read_timeout=15, max_connections=10, max_concurrency=20),
+    "midtrans": UpstreamConfig("midtrans", connect_timeout=3, read_timeout=10, max_connections=20, max_concurrency=50),
+    # Report generation streams long completions
+    "openai": UpstreamConfig("openai", connect_timeout=5, read_timeout=120, max_connections=20, max_concurrency=40),
+}
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees a concurrency slot once when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if self.release is not None:
+                self.release, release = None, self.release
+                release()
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Concurrency limit plus reuse/latency metrics around the pooled transport."""
+
+    def __init__(self, upstream: UpstreamConfig):
+        self.upstream = upstream
+        self.labels = {"upstream": upstream.name}
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=upstream.http2,
+            limits=httpx.Limits(max_connections=upstream.max_connections,
+                                max_keepalive_connections=upstream.max_connections),
+        )
+        self.semaphore = asyncio.Semaphore(upstream.max_concurrency)
+        self.in_flight = 0
+        self.requests = 0
+        self.new_connections = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        connect = {"started": None, "ms": 0.0}
+
+        async def trace(event: str, info: Dict[str, Any]):
+            if event in ("connection.connect_tcp.started", "connection.start_tls.started"):
+                connect["started"] = time.perf_counter()
+            elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                connect["ms"] += (time.perf_counter() - connect["started"]) * 1000
+
+        request.extensions = {**request.extensions, "trace": trace}
+        # Held until the response body is closed, i.e. until the connection
+        # (or HTTP/2 stream) is free again
+        await self.semaphore.acquire()
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            self._release()
+            if isinstance(e, Exception):
+                increment_counter("http_client_errors_total", labels=self.labels)
+            raise
+        response.stream = _ReleasingStream(response.stream, self._release)
+
+        # Time to response headers; the body is streamed by the caller
+        observe_histogram("http_client_request_ms", (time.perf_counter() - start) * 1000, labels=self.labels)
+        self.requests += 1
+        if connect["started"] is not None:
+            self.new_connections += 1
+            observe_histogram("http_client_connect_ms", connect["ms"], labels=self.labels)
+        increment_counter("http_client_requests_total", labels={
+            **self.labels, "connection": "new" if connect["started"] is not None else "reused",
+        })
+        return response
+
+    def _release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reuse_ratio": round(1 - self.new_connections / self.requests, 4) if self.requests else 0.0,
+            "in_flight": self.in_flight,
+            "http2": self.upstream.http2,
+        }
+
+
+class HTTPClientRegistry:
+    """Lazily created pooled clients, one per upstream."""
+
+    def __init__(self, upstreams: Dict[str, UpstreamConfig] = UPSTREAMS):
+        self.upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is not None and not client.is_closed:
+            return client
+        upstream = self.upstreams[name]
+        transport = _InstrumentedTransport(upstream)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=upstream.timeout,
+            headers={"User-Agent": "relasi4warna-api"},
+        )
+        self._clients[name] = client
+        self._transports[name] = transport
+        return client
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {name} HTTP client: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {**transport.stats(), "open": name in self._clients}
+            for name, transport in self._transports.items()
+        }
+
+
+_registry = HTTPClientRegistry()
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """Pooled client for ``google``, ``resend``, ``midtrans`` or ``openai``."""
+    return _registry.get(upstream)
+
+
+async def close_http_clients():
+    """Close every pool (call from shutdown)."""
+    await _registry.aclose()
+
+
+def http_client_stats() -> Dict[str, Any]:
+    """Per-upstream request count, reuse ratio and in-flight requests."""
+    return _registry.stats()
@@ -0,0 +1,311 @@
+"""
+MongoDB Index Registry
+======================
+Every index the API relies on, declared in one place. Both consumers use it:
+- ``ensure_indexes(db)`` at startup
+- ``scripts/create_indexes.py`` for first deployments / init containers
+
+Creating an index that already exists with the same spec is a no-op, so
+the registry can be applied on every boot. An index whose name or options
+changed is reported and left alone (drop it by hand first).
+
+When adding a query on a new field or sort order, add its index here and a
+representative query to utils.query_audit.AUDIT_QUERIES; the auditor fails
+on plans that still need a COLLSCAN or an in-memory SORT.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    # ---------- accounts ----------
+    "users": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("tier", ASCENDING)]),
+        # Keyset pagination (utils.pagination): sort key + id tie-breaker
+        IndexModel([("created_at", DESCENDING), ("user_id", DESCENDING)]),
+    ],
+    "password_resets": [
+        IndexModel([("token", ASCENDING)]),
+    ],
+    "password_reset_attempts": [
+        IndexModel([("email", ASCENDING), ("timestamp", ASCENDING)]),
+    ],
+    "sessions": [
+        IndexModel([("session_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        # TTL index - expire sessions after 7 days
+        IndexModel(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=604800,
+            name="ttl_sessions"
+        ),
+    ],
+
+    # ---------- quiz, results and reports ----------
+    "quiz_attempts": [
+        IndexModel([("attempt_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("series", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        # TTL index - delete incomplete attempts after 24 hours
+        IndexModel(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=86400,
+            partialFilterExpression={"status": "in_progress"},
+            name="ttl_incomplete_attempts"
+        ),
+    ],
+    "results": [
+        IndexModel([("result_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("series", ASCENDING)]),
+        IndexModel([("is_paid", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("result_id", DESCENDING)]),
+        IndexModel([("primary_archetype", ASCENDING)]),
+        IndexModel([("created_at_dt", DESCENDING)]),
+    ],
+    "reports": [
+        IndexModel([("report_id", ASCENDING)], unique=True),
+        IndexModel([("result_id", ASCENDING), ("language", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "elite_reports": [
+        IndexModel([("report_id", ASCENDING)], unique=True),
+        IndexModel([("result_id", ASCENDING), ("language", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("report_id", DESCENDING)]),
+    ],
+    "elite_plus_reports": [
+        IndexModel([("report_id", ASCENDING)], unique=True),
+        IndexModel([("result_id", ASCENDING), ("language", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "deep_dive_results": [
+        IndexModel([("result_id", ASCENDING), ("user_id", ASCENDING)]),
+    ],
+    "deep_dive_reports": [
+        IndexModel([("result_id", ASCENDING)]),
+    ],
+    "questions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("series", ASCENDING)]),
+        IndexModel([("category", ASCENDING)]),
+    ],
+
+    # ---------- payments ----------
+    "payments": [
+        IndexModel([("payment_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("result_id", ASCENDING)]),
+        IndexModel([("result_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("paid_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("paid_at_dt", DESCENDING)]),
+    ],
+    "coupons": [
+        IndexModel([("code", ASCENDING)]),
+        IndexModel([("coupon_id", ASCENDING)]),
+    ],
+
+    # ---------- packs, challenges, tips, blog ----------
+    "couples_packs": [
+        IndexModel([("pack_id", ASCENDING)]),
+        IndexModel([("creator_id", ASCENDING)]),
+        IndexModel([("partner_id", ASCENDING)]),
+    ],
+    "team_packs": [
+        IndexModel([("pack_id", ASCENDING)]),
+        IndexModel([("members.user_id", ASCENDING)]),
+    ],
+    "team_invites": [
+        IndexModel([("invite_id", ASCENDING)]),
+    ],
+    "challenges": [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "tips_subscriptions": [
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("subscribed", ASCENDING)]),
+    ],
+    "generated_tips": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "blog_articles": [
+        IndexModel([("slug", ASCENDING)]),
+        IndexModel([("article_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("article_id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("article_id", DESCENDING)]),
+    ],
+
+    # ---------- HITL ----------
+    "risk_assessments": [
+        IndexModel([("assessment_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("created_at_dt", DESCENDING)]),
+    ],
+    "moderation_queue": [
+        IndexModel([("queue_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("queue_id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("queue_id", DESCENDING)]),
+        IndexModel([("created_at_dt", DESCENDING)]),
+    ],
+    "audit_logs": [
+        IndexModel([("timestamp", DESCENDING)]),
+        IndexModel([("timestamp_dt", DESCENDING)]),
+        IndexModel([("queue_id", ASCENDING)]),
+    ],
+    "hitl_events": [
+        IndexModel([("timestamp", DESCENDING)]),
+    ],
+    "hitl_daily": [
+        IndexModel(
+            [("metric", ASCENDING), ("day", ASCENDING), ("risk_level", ASCENDING),
+             ("keyword", ASCENDING), ("status", ASCENDING), ("moderator_id", ASCENDING),
+             ("action", ASCENDING)],
+            unique=True,
+        ),
+    ],
+    "risk_keywords": [
+        IndexModel([("category", ASCENDING)]),
+    ],
+    # Legacy collection names kept for their TTL policies
+    "hitl_queue": [
+        IndexModel([("queue_id", ASCENDING)], unique=True),
+        IndexModel([("result_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("risk_level", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        # TTL index - delete reviewed items after 30 days
+        IndexModel(
+            [("reviewed_at", ASCENDING)],
+            expireAfterSeconds=2592000,
+            partialFilterExpression={"status": "reviewed"},
+            name="ttl_reviewed_hitl"
+        ),
+    ],
+    "audit_log": [
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("action", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        # TTL index - delete audit logs after 90 days
+        IndexModel(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=7776000,
+            name="ttl_audit_log"
+        ),
+    ],
+
+    # ---------- LLM usage ----------
+    "llm_usage_daily": [
+        IndexModel(
+            [("day", ASCENDING), ("endpoint_name", ASCENDING), ("model", ASCENDING),
+             ("tier", ASCENDING), ("status", ASCENDING)],
+            unique=True,
+        ),
+    ],
+    "ai_usage": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        IndexModel([("last_request_date", ASCENDING)]),
+    ],
+    # The ts_utc TTL index follows LLM_USAGE_RETENTION_DAYS and is managed by
+    # ai_gateway.usage_rollups.apply_retention
+    "llm_usage_events": [
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+        IndexModel([("ts_utc", DESCENDING), ("status", ASCENDING)]),
+    ],
+
+    # ---------- RELASI4 ----------
+    "r4_question_sets": [
+        IndexModel([("code", ASCENDING)]),
+        IndexModel([("is_active", ASCENDING)]),
+    ],
+    "r4_questions": [
+        IndexModel([("set_code", ASCENDING), ("order_no", ASCENDING)]),
+    ],
+    "r4_answers": [
+        IndexModel([("set_code", ASCENDING), ("order_no", ASCENDING), ("label", ASCENDING)]),
+    ],
+    "r4_assessments": [
+        IndexModel([("assessment_id", ASCENDING)]),
+    ],
+    "r4_responses": [
+        IndexModel([("assessment_id", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("calculated_at", DESCENDING)]),
+        IndexModel([("calculated_at", DESCENDING), ("assessment_id", DESCENDING)]),
+    ],
+    "r4_reports": [
+        IndexModel([("report_id", ASCENDING)]),
+        IndexModel([("assessment_id", ASCENDING)]),
+        IndexModel([("family_group_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("report_id", DESCENDING)]),
+        IndexModel([("report_type", ASCENDING), ("compatibility_summary.compatibility_score", DESCENDING)]),
+        IndexModel([("report_type", ASCENDING), ("family_summary.harmony_score", DESCENDING)]),
+    ],
+    "r4_couple_invites": [
+        IndexModel([("invite_code", ASCENDING)]),
+    ],
+    "r4_family_groups": [
+        IndexModel([("group_id", ASCENDING)]),
+        IndexModel([("invite_code", ASCENDING)]),
+    ],
+    "r4_payments": [
+        IndexModel([("payment_id", ASCENDING)]),
+    ],
+    "r4_analytics": [
+        IndexModel([("created_at", ASCENDING)]),
+    ],
+    "r4_analytics_daily": [
+        IndexModel([("date", ASCENDING)]),
+    ],
+    "r4_analytics_hourly": [
+        IndexModel(
+            [("hour", ASCENDING), ("event", ASCENDING), ("variant", ASCENDING),
+             ("cta_variant", ASCENDING), ("primary_need", ASCENDING),
+             ("primary_conflict_style", ASCENDING), ("primary_color", ASCENDING),
+             ("entry_point", ASCENDING)],
+            unique=True,
+        ),
+    ],
+}
+
+
+def index_name(index: IndexModel) -> str:
+    return index.document["name"]
+
+
+async def ensure_indexes(db, collections: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """
+    Create every registered index. Returns ``{"created": [...], "failed": [...]}``
+    with ``collection.index_name`` entries (existing identical indexes count
+    as created).
+    """
+    report: Dict[str, List[str]] = {"created": [], "failed": []}
+    for collection, indexes in INDEXES.items():
+        if collections and collection not in collections:
+            continue
+        try:
+            # One round trip per collection when nothing conflicts
+            await db[collection].create_indexes(indexes)
+            report["created"].extend(f"{collection}.{index_name(i)}" for i in indexes)
+            continue
+        except Exception:
+            pass
+        for index in indexes:
+            name = f"{collection}.{index_name(index)}"
+            try:
+                await db[collection].create_indexes([index])
+                report["created"].append(name)
+            except Exception as e:
+                report["failed"].append(name)
+                logger.warning(f"Index {name} not created: {e}")
+    return report
@@ -0,0 +1,214 @@
+"""
+Event-Loop Lag Monitor
+======================
+Measures event-loop lag continuously and names whatever blocks the loop.
+
+Two cheap pieces:
+- a ticker task on the loop sleeps ``LOOP_LAG_INTERVAL_MS`` and records how
+  late it woke up (``event_loop_lag_ms`` histogram, windowed max gauge)
+- a watchdog thread checks the ticker's heartbeat; when the loop has not
+  ticked for ``LOOP_BLOCK_THRESHOLD_MS`` it grabs the loop thread's stack
+  (``sys._current_frames``) once per stall
+
+When the stall ends the ticker logs one ``event_loop.blocked`` warning with
+the total lag, the route (template from the ASGI scope found on the stack)
+and the innermost application frame responsible, and increments
+``event_loop_blocked_total{route=...}``. Nothing runs per request.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.metrics import increment_counter, observe_histogram, set_gauge
+
+logger = logging.getLogger("event_loop")
+
+LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL_MS = float(os.environ.get("LOOP_LAG_INTERVAL_MS", 100))
+LOOP_BLOCK_THRESHOLD_MS = float(os.environ.get("LOOP_BLOCK_THRESHOLD_MS", 200))
+# Window for the event_loop_lag_max_ms gauge
+LOOP_LAG_WINDOW_SECONDS = float(os.environ.get("LOOP_LAG_WINDOW_SECONDS", 10))
+
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Frames under these roots count as "ours" when naming the culprit
+APP_ROOTS = (
+    str(Path(__file__).resolve().parent.parent),
+    str(Path(__file__).resolve().parent.parent.parent.parent / "packages"),
+)
+SITE_PACKAGES_MARKERS = ("site-packages", "dist-packages")
+
+MAX_STACK_FRAMES = 30
+RECENT_BLOCKS = 20
+
+
+def _is_app_frame(filename: str) -> bool:
+    return filename.startswith(APP_ROOTS) and not any(m in filename for m in SITE_PACKAGES_MARKERS)
+
+
+def _scope_from_frame(frame) -> Optional[dict]:
+    """The first HTTP ASGI scope found up the stack."""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return scope
+        frame = frame.f_back
+    return None
+
+
+def capture_blocking_stack(frame) -> Dict[str, Any]:
+    """Describe what a (blocked) thread is doing from its innermost frame."""
+    stack = traceback.extract_stack(frame, limit=MAX_STACK_FRAMES)
+    culprit = next((f for f in reversed(stack) if _is_app_frame(f.filename)), stack[-1] if stack else None)
+    scope = _scope_from_frame(frame) or {}
+    return {
+        # Template only (bounded metric label); raw path for the log
+        "route": getattr(scope.get("route"), "path", None),
+        "path": scope.get("path"),
+        "function": f"{culprit.name} ({Path(culprit.filename).name}:{culprit.lineno})" if culprit else None,
+        "stack": [f"{Path(f.filename).name}:{f.lineno} {f.name}" for f in stack],
+    }
+
+
+class LoopLagMonitor:
+    """Ticker task + watchdog thread for one event loop."""
+
+    def __init__(self, interval_ms: float = LOOP_LAG_INTERVAL_MS,
+                 block_threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS,
+                 window_seconds: float = LOOP_LAG_WINDOW_SECONDS):
+        self.interval = interval_ms / 1000
+        self.block_threshold = block_threshold_ms / 1000
+        self.window_seconds = window_seconds
+        self.recent_blocks: deque = deque(maxlen=RECENT_BLOCKS)
+        self.max_lag_ms = 0.0
+        self._heartbeat = time.monotonic()
+        self._captured: Optional[Dict[str, Any]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Start on the running loop (call from a startup hook)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ---------- loop side ----------
+
+    async def _tick(self):
+        window_start = time.monotonic()
+        window_max = 0.0
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+            lag_ms = lag * 1000
+
+            observe_histogram("event_loop_lag_ms", lag_ms, buckets=LAG_BUCKETS_MS)
+            window_max = max(window_max, lag_ms)
+            if now - window_start >= self.window_seconds:
+                self.max_lag_ms = window_max
+                set_gauge("event_loop_lag_max_ms", round(window_max, 2), mode="max")
+                window_start, window_max = now, 0.0
+
+            if lag >= self.block_threshold:
+                self._report_block(lag_ms)
+
+    def _report_block(self, lag_ms: float):
+        captured, self._captured = self._captured, None
+        captured = captured or {"route": None, "path": None, "function": None, "stack": []}
+        # No HTTP scope on the stack: startup, background task or a callback
+        route = captured["route"] or ("unmatched" if captured["path"] else "background")
+        increment_counter("event_loop_blocked_total", labels={"route": route})
+        block = {
+            "lag_ms": round(lag_ms, 1),
+            "route": route,
+            "path": captured["path"],
+            "function": captured["function"],
+            "stack": captured["stack"],
+            "at": time.time(),
+        }
+        self.recent_blocks.append(block)
+        logger.warning(
+            f"Event loop blocked for {lag_ms:.0f}ms in {captured['path'] or route} at {captured['function']}",
+            extra={"extra_data": {"event_type": "event_loop.blocked", **block}},
+        )
+
+    # ---------- watchdog thread ----------
+
+    def _watch(self):
+        poll = min(self.interval, self.block_threshold / 2)
+        stalled_since = None
+        while not self._stop.wait(poll):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval
+            if overdue < self.block_threshold:
+                stalled_since = None
+                continue
+            if stalled_since == heartbeat:
+                continue  # already captured this stall
+            stalled_since = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                try:
+                    self._captured = capture_blocking_stack(frame)
+                except Exception as e:  # never let the watchdog die
+                    logger.debug(f"Could not capture blocked stack: {e}")
+                finally:
+                    del frame
+
+    # ---------- reporting ----------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.block_threshold * 1000,
+            "max_lag_ms_last_window": round(self.max_lag_ms, 2),
+            "recent_blocks": list(self.recent_blocks),
+        }
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Get or create the singleton monitor."""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
+
+
+def start_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Start the monitor on the running loop unless LOOP_MONITOR_ENABLED=false."""
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    monitor = get_loop_monitor()
+    monitor.start()
+    return monitor
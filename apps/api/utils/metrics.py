@@ -1,20 +1,81 @@
 """
 Prometheus Metrics Endpoint
 ===========================
-Basic metrics for monitoring (optional).
+Counters, gauges and fixed-bucket histograms exported at /api/metrics.
+
+Histograms keep cumulative bucket counts (Prometheus ``le`` semantics), so
+an observation is O(1) memory and a bisect over a fixed bucket list.
+
+Multi-worker: with ``METRICS_MULTIPROC_DIR`` set, every worker writes a
+snapshot of its metrics to ``<dir>/metrics_<pid>.json`` every
+``METRICS_FLUSH_SECONDS``; whichever worker serves the scrape merges all
+snapshots (counters and histograms summed, gauges per their mode). Clear
+the directory when the container starts.
 """
 
+import asyncio
+import glob
+import logging
 import os
 import time
+from bisect import bisect_left
 from collections import defaultdict
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
 from fastapi import APIRouter, Depends
 from fastapi.responses import PlainTextResponse
 
-# In-memory metrics storage
+logger = logging.getLogger(__name__)
+
+# Milliseconds; covers cache hits through slow LLM calls
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR", "")
+FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+# Gauges from snapshots older than this are treated as from a dead worker
+GAUGE_STALE_SECONDS = FLUSH_SECONDS * 3
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: List[int], total: float, count: int):
+        for i, c in enumerate(counts):
+            self.counts[i] += c
+        self.sum += total
+        self.count += count
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs including +Inf."""
+        result = []
+        running = 0
+        for bound, c in zip(self.buckets, self.counts):
+            running += c
+            result.append((_format_le(bound), running))
+        result.append(("+Inf", running + self.counts[-1]))
+        return result
+
+
+# In-memory metrics storage (this worker)
 _metrics: Dict[str, float] = defaultdict(float)
 _counters: Dict[str, int] = defaultdict(int)
-_histograms: Dict[str, list] = defaultdict(list)
+_histograms: Dict[str, Histogram] = {}
+_gauge_modes: Dict[str, str] = {}
 
 router = APIRouter()
 
@@ -25,19 +86,26 @@ def increment_counter(name: str, value: int = 1, labels: Dict[str, str] = None):
     _counters[key] += value
 
 
-def observe_histogram(name: str, value: float, labels: Dict[str, str] = None):
-    """Record a histogram observation."""
+def observe_histogram(name: str, value: float, labels: Dict[str, str] = None,
+                      buckets: Optional[Iterable[float]] = None):
+    """Record a histogram observation (buckets fixed on first use, default ms)."""
     key = _make_key(name, labels)
-    _histograms[key].append(value)
-    # Keep last 1000 observations
-    if len(_histograms[key]) > 1000:
-        _histograms[key] = _histograms[key][-1000:]
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram(buckets or DEFAULT_BUCKETS_MS)
+    histogram.observe(value)
+
 
+def set_gauge(name: str, value: float, labels: Dict[str, str] = None, mode: str = "sum"):
+    """
+    Set a gauge metric.
 
-def set_gauge(name: str, value: float, labels: Dict[str, str] = None):
-    """Set a gauge metric."""
+    ``mode`` decides how workers are combined at scrape: "sum" (queue
+    depths, cache sizes) or "max" (lags, high-water marks).
+    """
     key = _make_key(name, labels)
     _metrics[key] = value
+    _gauge_modes[name] = mode
 
 
 def _make_key(name: str, labels: Dict[str, str] = None) -> str:
@@ -48,33 +116,150 @@ def _make_key(name: str, labels: Dict[str, str] = None) -> str:
     return f"{name}{{{label_str}}}"
 
 
-def _format_prometheus() -> str:
+def _split_key(key: str) -> Tuple[str, str]:
+    """Metric key -> (name, label body without braces)."""
+    if "{" not in key:
+        return key, ""
+    name, _, rest = key.partition("{")
+    return name, rest[:-1]
+
+
+def _format_le(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+
+def _with_label(labels: str, extra: str) -> str:
+    return f"{{{labels},{extra}}}" if labels else f"{{{extra}}}"
+
+
+# ---------- multi-worker snapshots ----------
+
+def _snapshot() -> dict:
+    return {
+        "time": time.time(),
+        "counters": dict(_counters),
+        "gauges": dict(_metrics),
+        "gauge_modes": dict(_gauge_modes),
+        "histograms": {
+            key: [list(h.buckets), h.counts, h.sum, h.count] for key, h in _histograms.items()
+        },
+    }
+
+
+def write_snapshot(directory: str = None):
+    """Atomically write this worker's metrics for other workers to merge."""
+    directory = directory or MULTIPROC_DIR
+    if not directory:
+        return
+    path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(_snapshot()))
+    os.replace(tmp_path, path)
+
+
+def _read_snapshots(directory: str) -> List[dict]:
+    own = os.path.join(directory, f"metrics_{os.getpid()}.json")
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        if path == own:
+            continue
+        try:
+            with open(path, "rb") as f:
+                snapshots.append(orjson.loads(f.read()))
+        except (OSError, ValueError):
+            logger.debug(f"Skipping unreadable metrics snapshot {path}")
+    return snapshots
+
+
+def _collect(directory: str = None):
+    """This worker's metrics merged with the other workers' snapshots."""
+    counters: Dict[str, float] = defaultdict(int, _counters)
+    gauges: Dict[str, float] = dict(_metrics)
+    modes = dict(_gauge_modes)
+    histograms: Dict[str, Histogram] = {}
+    for key, h in _histograms.items():
+        merged = histograms[key] = Histogram(h.buckets)
+        merged.merge(h.counts, h.sum, h.count)
+
+    directory = directory or MULTIPROC_DIR
+    if directory:
+        now = time.time()
+        for snap in _read_snapshots(directory):
+            for key, value in snap.get("counters", {}).items():
+                counters[key] += value
+            for key, (buckets, counts, total, count) in snap.get("histograms", {}).items():
+                merged = histograms.get(key)
+                if merged is None:
+                    merged = histograms[key] = Histogram(buckets)
+                if list(merged.buckets) == list(buckets):
+                    merged.merge(counts, total, count)
+            if now - snap.get("time", 0) > GAUGE_STALE_SECONDS:
+                continue
+            modes = {**snap.get("gauge_modes", {}), **modes}
+            for key, value in snap.get("gauges", {}).items():
+                if key not in gauges:
+                    gauges[key] = value
+                elif modes.get(_split_key(key)[0], "sum") == "max":
+                    gauges[key] = max(gauges[key], value)
+                else:
+                    gauges[key] += value
+    return counters, gauges, histograms
+
+
+async def run_snapshot_writer():
+    """Background task: keep this worker's snapshot fresh (multi-worker only)."""
+    if not MULTIPROC_DIR:
+        return
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    try:
+        while True:
+            try:
+                write_snapshot()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+            await asyncio.sleep(FLUSH_SECONDS)
+    finally:
+        # Final flush so counters survive a graceful worker restart
+        try:
+            write_snapshot()
+        except OSError:
+            pass
+
+
+# ---------- exposition ----------
+
+def _format_prometheus(directory: str = None) -> str:
     """Format metrics in Prometheus format."""
+    counters, gauges, histograms = _collect(directory)
     lines = []
-    
-    # Counters
-    for key, value in _counters.items():
-        lines.append(f"# TYPE {key.split('{')[0]} counter")
-        lines.append(f"{key} {value}")
-    
-    # Gauges
-    for key, value in _metrics.items():
-        lines.append(f"# TYPE {key.split('{')[0]} gauge")
-        lines.append(f"{key} {value}")
-    
-    # Histograms (simplified - just sum and count)
-    for key, values in _histograms.items():
-        base_name = key.split('{')[0]
-        labels = key[len(base_name):] if '{' in key else ""
-        
-        if values:
-            total = sum(values)
-            count = len(values)
-            lines.append(f"# TYPE {base_name} summary")
-            lines.append(f"{base_name}_sum{labels} {total}")
-            lines.append(f"{base_name}_count{labels} {count}")
-    
-    return "\n".join(lines)
+    typed = set()
+
+    def type_line(name: str, kind: str):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for key in sorted(counters):
+        type_line(_split_key(key)[0], "counter")
+        lines.append(f"{key} {counters[key]}")
+
+    for key in sorted(gauges):
+        type_line(_split_key(key)[0], "gauge")
+        lines.append(f"{key} {gauges[key]}")
+
+    for key in sorted(histograms):
+        histogram = histograms[key]
+        name, labels = _split_key(key)
+        type_line(name, "histogram")
+        for le, count in histogram.cumulative():
+            bucket_labels = _with_label(labels, 'le="' + le + '"')
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
 
 
 # Verify admin access for metrics
@@ -92,17 +277,36 @@ async def verify_metrics_access():
 async def get_metrics(authorized: bool = Depends(verify_metrics_access)):
     """
     Prometheus-compatible metrics endpoint.
-    
+
     Protected by METRICS_TOKEN environment variable.
     """
     return _format_prometheus()
 
 
 # Pre-defined metric helpers
+
+# (method, route, status) -> (counter key, histogram key); bounded by the route table
+_request_keys: Dict[Tuple[str, str, int], Tuple[str, str]] = {}
+
+
 def record_request(method: str, path: str, status: int, latency_ms: float):
-    """Record HTTP request metrics."""
-    increment_counter("http_requests_total", labels={"method": method, "path": path, "status": str(status)})
-    observe_histogram("http_request_duration_ms", latency_ms, labels={"method": method, "path": path})
+    """
+    Record HTTP request metrics.
+
+    ``path`` must be a route template (e.g. ``/api/quiz/result/{result_id}``),
+    never the raw URL, to keep label cardinality bounded.
+    """
+    keys = _request_keys.get((method, path, status))
+    if keys is None:
+        keys = _request_keys[(method, path, status)] = (
+            _make_key("http_requests_total", {"method": method, "path": path, "status": str(status)}),
+            _make_key("http_request_duration_ms", {"method": method, "path": path}),
+        )
+    _counters[keys[0]] += 1
+    histogram = _histograms.get(keys[1])
+    if histogram is None:
+        histogram = _histograms[keys[1]] = Histogram()
+    histogram.observe(latency_ms)
 
 
 def record_llm_call(model: str, success: bool, tokens: int, latency_ms: float):
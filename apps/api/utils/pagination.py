@@ -0,0 +1,171 @@
+"""
+Keyset Pagination
+=================
+Cursor pagination for list endpoints. Pages are ordered on an indexed sort
+key plus a unique id tie-breaker, e.g. ``(created_at desc, user_id desc)``.
+The next page starts *after* the last row of the previous one, so it is an
+index seek rather than ``skip()`` walking past every earlier row. Page 1000
+costs the same as page 1, and rows inserted meanwhile do not shift pages.
+
+Cursors are opaque url-safe tokens (base64 JSON of the sort fields and the
+last row's values). Clients only pass back ``next_cursor``. A cursor for a
+different sort is rejected with InvalidCursor (routes answer 400).
+
+Totals come from ``CountCache``: ``estimated_document_count()`` for an
+unfiltered list (collection metadata, no scan), otherwise ``count_documents``.
+Either way the value is cached for ``PAGINATION_COUNT_TTL_SECONDS``, so paging
+does not recount the collection on every request.
+
+Every ``(sort field, id)`` pair used here needs a matching compound index in
+utils.indexes.
+"""
+
+import base64
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PAGINATION_COUNT_TTL_SECONDS = float(os.environ.get("PAGINATION_COUNT_TTL_SECONDS", 60))
+PAGINATION_MAX_LIMIT = int(os.environ.get("PAGINATION_MAX_LIMIT", 500))
+COUNT_CACHE_MAX_ENTRIES = 512
+
+Sort = Sequence[Tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    """Cursor token is malformed or belongs to another ordering."""
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return str(value)
+
+
+def _json_hook(obj: Dict[str, Any]):
+    if set(obj) == {"$date"}:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _get(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def encode_cursor(doc: Dict[str, Any], sort: Sort) -> str:
+    """Opaque token pointing just after ``doc`` in ``sort`` order."""
+    payload = {"k": [field for field, _ in sort], "v": [_get(doc, field) for field, _ in sort]}
+    raw = json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: Sort) -> List[Any]:
+    """Last-row values from ``token``; raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw, object_hook=_json_hook)
+        keys, values = payload["k"], payload["v"]
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if keys != [field for field, _ in sort] or len(values) != len(keys):
+        raise InvalidCursor("Cursor does not match this listing")
+    return values
+
+
+def _beyond(field: str, direction: int, value: Any, nullable: bool) -> List[Dict[str, Any]]:
+    """Conditions for ``field`` strictly after ``value`` (nulls sort lowest)."""
+    if value is None:
+        return [{field: {"$ne": None}}] if direction > 0 else []
+    if direction > 0:
+        return [{field: {"$gt": value}}]
+    if nullable:
+        return [{field: {"$lt": value}}, {field: None}]
+    return [{field: {"$lt": value}}]
+
+
+def keyset_filter(sort: Sort, values: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Rows after ``values``: ``a < va OR (a == va AND b < vb) ...`` for a
+    descending sort. Each branch is an index range on the compound index.
+    Only the leading sort key may be missing on old documents; the id
+    tie-breaker is always set.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        equal = {f: values[j] for j, (f, _) in enumerate(sort[:i])}
+        for condition in _beyond(field, direction, values[i], nullable=i == 0):
+            branches.append({**equal, **condition})
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort: Sort,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of ``collection`` and the cursor for the next page (None on
+    the last page). ``skip`` is only honoured without a cursor, for clients
+    that still page by offset.
+    """
+    limit = max(1, min(limit, PAGINATION_MAX_LIMIT))
+    if cursor:
+        seek = keyset_filter(sort, decode_cursor(cursor, sort))
+        query = {"$and": [query, seek]} if query else seek
+    find = collection.find(query, projection).sort(list(sort))
+    if skip and not cursor:
+        find = find.skip(skip)
+    docs = await find.limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1], sort) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+class CountCache:
+    """Short-lived totals per (collection, filter)."""
+
+    def __init__(self, ttl: float = PAGINATION_COUNT_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+
+    async def total(self, collection, query: Optional[Dict[str, Any]] = None) -> int:
+        query = query or {}
+        key = (collection.name, json.dumps(query, sort_keys=True, default=_json_default))
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry and now - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            return entry[0]
+        if query:
+            count = await collection.count_documents(query)
+        else:
+            count = await collection.estimated_document_count()
+        self._entries[key] = (count, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > COUNT_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+        return count
+
+    def clear(self):
+        self._entries.clear()
+
+
+_count_cache: Optional[CountCache] = None
+
+
+def get_count_cache() -> CountCache:
+    """Get or create singleton count cache."""
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache()
+    return _count_cache
@@ -0,0 +1,117 @@
+"""
+Password Hashing Pool
+=====================
+bcrypt off the event loop.
+
+bcrypt costs ~100-300 ms of CPU per call by design. Running it inside an
+async handler freezes every other request on the worker, so hashing and
+verification run on a small dedicated thread pool (bcrypt releases the
+GIL while it works).
+
+Admission control: at most PASSWORD_HASH_WORKERS calls run and
+PASSWORD_HASH_MAX_QUEUE wait. Beyond that callers get 503 immediately
+instead of queueing behind seconds of bcrypt work.
+
+Metrics:
+- password_hash_duration_ms{op}     time in the pool (wait + hash)
+- password_hash_queue_depth         calls running or waiting
+- password_hash_rejected_total{op}  calls refused while saturated
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+from fastapi import HTTPException
+
+from utils.metrics import increment_counter, observe_histogram, set_gauge
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 32))
+
+
+def hash_password_sync(password: str) -> str:
+    """Blocking bcrypt hash. Never call from a coroutine."""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def verify_password_sync(password: str, hashed: str) -> bool:
+    """Blocking bcrypt check. Never call from a coroutine."""
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class PasswordHasherBusy(HTTPException):
+    """Raised when the bcrypt pool is saturated."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+class PasswordHasher:
+    """Bounded bcrypt executor with fail-fast admission."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, op: str, fn: Callable, *args):
+        """Run a blocking password function on the pool, labelled op."""
+        if self.pending >= self.max_pending:
+            increment_counter("password_hash_rejected_total", labels={"op": op})
+            raise PasswordHasherBusy()
+
+        self.pending += 1
+        set_gauge("password_hash_queue_depth", self.pending)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            set_gauge("password_hash_queue_depth", self.pending)
+            observe_histogram(
+                "password_hash_duration_ms",
+                (time.perf_counter() - start) * 1000,
+                labels={"op": op},
+            )
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the pool."""
+        return await self.run("hash", hash_password_sync, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Verify a password on the pool."""
+        return await self.run("verify", verify_password_sync, password, hashed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get or create singleton password hasher."""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop (503 when saturated)."""
+    return await get_password_hasher().hash(password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Verify a password without blocking the event loop (503 when saturated)."""
+    return await get_password_hasher().verify(password, hashed)
@@ -0,0 +1,326 @@
+"""
+On-Demand Profiling
+===================
+Admin-armed profiling of the next N requests matching a route, plus
+tracemalloc snapshot diffs.
+
+Request profiling (``RequestProfiler``):
+- ``sampling`` mode: a thread samples the loop thread's stack every
+  ``interval_ms`` while the request runs. Samples where the request is on
+  the CPU keep its real stack; while it is suspended, its coroutine await
+  chain is recorded with an ``[awaiting]`` leaf. The output is collapsed
+  stacks (``frame;frame;frame count``), ready for flamegraph.pl, speedscope
+  or inferno.
+- ``cprofile`` mode: deterministic cProfile of the request. The profiler is
+  per thread, so other requests interleaved on the loop show up too.
+  Returns the top functions by cumulative time.
+
+One request is profiled at a time. When nothing is armed,
+``ProfilingMiddleware`` does a single ``is None`` check per request.
+
+Memory (``MemoryProfiler``): tracemalloc is only started on demand. Each
+snapshot is diffed against the previous one and reported together with
+the sizes of the module-level caches known to grow.
+
+State is per worker: arm the worker you want to inspect (the responses
+include its pid) or run a single worker while diagnosing.
+"""
+
+import asyncio
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROFILE_MAX_REQUESTS = int(os.environ.get("PROFILE_MAX_REQUESTS", 20))
+# An armed session that matches nothing is dropped after this long
+PROFILE_SESSION_TTL_SECONDS = int(os.environ.get("PROFILE_SESSION_TTL_SECONDS", 600))
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_MODES = ("sampling", "cprofile")
+
+_PARAM_RE = re.compile(r"\{[^}/]+\}")
+
+
+def compile_route(route: str) -> re.Pattern:
+    """``/api/report/generate/{result_id}`` -> regex over raw paths."""
+    parts = _PARAM_RE.split(route)
+    return re.compile("[^/]+".join(re.escape(p) for p in parts) + "$")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name})"
+
+
+class ProfileSession:
+    """Armed profiling request for one route."""
+
+    def __init__(self, route: str, count: int, mode: str = "sampling", method: Optional[str] = None,
+                 interval_ms: float = 5.0):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"mode must be one of {PROFILE_MODES}")
+        self.route = route
+        self.pattern = compile_route(route)
+        self.method = method.upper() if method else None
+        self.remaining = max(1, min(count, PROFILE_MAX_REQUESTS))
+        self.requested = self.remaining
+        self.mode = mode
+        self.interval = max(1.0, interval_ms) / 1000
+        self.profiles: List[Dict[str, Any]] = []
+        self.busy = False
+        self.created_at = time.time()
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self.created_at > PROFILE_SESSION_TTL_SECONDS
+
+    @property
+    def finished(self) -> bool:
+        return self.remaining == 0 and not self.busy
+
+    def claim(self, scope) -> bool:
+        """Take the next profiling slot if this request matches."""
+        if self.busy or self.remaining == 0:
+            return False
+        if self.method and scope["method"] != self.method:
+            return False
+        if not self.pattern.match(scope["path"]):
+            return False
+        self.busy = True
+        self.remaining -= 1
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "method": self.method,
+            "mode": self.mode,
+            "requested": self.requested,
+            "remaining": self.remaining,
+            "profiled": len(self.profiles),
+            "pid": os.getpid(),
+        }
+
+
+class _StackSampler(threading.Thread):
+    """Samples the loop thread while one request runs."""
+
+    def __init__(self, loop_thread_id: int, anchor_frame, task: Optional[asyncio.Task], interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.anchor = anchor_frame
+        self.task = task
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            stack = self._on_cpu_stack() or self._awaiting_stack()
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def _on_cpu_stack(self) -> Optional[List[str]]:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        labels = []
+        while frame is not None:
+            if frame is self.anchor:
+                return list(reversed(labels))
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        return None  # the loop is running something else
+
+    def _awaiting_stack(self) -> Optional[List[str]]:
+        if self.task is None or self.task.done():
+            return None
+        labels = []
+        collecting = False
+        awaitable = self.task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            if collecting:
+                labels.append(_frame_label(frame.f_code))
+            elif frame is self.anchor:
+                collecting = True
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        if not collecting:
+            return None
+        labels.append("[awaiting]")
+        return labels
+
+
+class RequestProfiler:
+    """Holds the armed session (if any) and the last finished one."""
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        self.last: Optional[ProfileSession] = None
+
+    def arm(self, route: str, count: int = 1, mode: str = "sampling", method: Optional[str] = None,
+            interval_ms: float = 5.0) -> ProfileSession:
+        self.session = ProfileSession(route, count, mode, method, interval_ms)
+        return self.session
+
+    def disarm(self):
+        if self.session is not None:
+            self.last, self.session = self.session, None
+
+    def status(self) -> Dict[str, Any]:
+        current = self.session or self.last
+        if current is None:
+            return {"armed": False, "profiles": []}
+        return {"armed": self.session is not None, **current.summary(), "profiles": current.profiles}
+
+    async def run(self, session: ProfileSession, scope, call) -> None:
+        """Run ``call()`` (the rest of the ASGI stack) under the profiler."""
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"method": scope["method"], "path": scope["path"]}
+        try:
+            if session.mode == "cprofile":
+                await self._run_cprofile(call, result)
+            else:
+                await self._run_sampling(call, result, session.interval)
+        finally:
+            route = scope.get("route")
+            result["route"] = getattr(route, "path", None)
+            result["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            session.profiles.append(result)
+            session.busy = False
+            if session.finished and self.session is session:
+                self.disarm()
+
+    async def _run_sampling(self, call, result: Dict[str, Any], interval: float):
+        sampler = _StackSampler(threading.get_ident(), sys._getframe(), asyncio.current_task(), interval)
+        sampler.start()
+        try:
+            await call()
+        finally:
+            sampler.stopped.set()
+            sampler.join()
+            result["samples"] = sum(sampler.samples.values())
+            result["interval_ms"] = interval * 1000
+            result["collapsed"] = "\n".join(
+                f"{stack} {count}" for stack, count in sampler.samples.most_common()
+            )
+
+    async def _run_cprofile(self, call, result: Dict[str, Any]):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await call()
+        finally:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            result["functions"] = [
+                {
+                    "function": f"{name} ({Path(filename).name}:{line})",
+                    "ncalls": ncalls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3),
+                }
+                for (filename, line, name), (_, ncalls, tottime, cumtime, _) in rows[:PROFILE_TOP_FUNCTIONS]
+            ]
+
+
+def module_cache_sizes() -> Dict[str, int]:
+    """Entry counts of the module-level caches that grow with traffic."""
+    from middleware.rate_limit import _rate_limit_storage
+    from utils import metrics
+
+    sizes = {
+        "rate_limit_storage_keys": len(_rate_limit_storage),
+        "rate_limit_storage_timestamps": sum(len(v) for v in list(_rate_limit_storage.values())),
+        "metrics_counters": len(metrics._counters),
+        "metrics_gauges": len(metrics._metrics),
+        "metrics_histograms": len(metrics._histograms),
+    }
+    try:
+        from security import cost_guardrail
+        gateway = cost_guardrail._guardrail_gateway
+        sizes["guardrail_usage_cache"] = len(gateway._usage_cache) if gateway else 0
+    except ImportError:
+        pass
+    return sizes
+
+
+class MemoryProfiler:
+    """On-demand tracemalloc with diffs between consecutive snapshots."""
+
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, min(frames, 50)))
+        self.baseline = self._take()
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        tracemalloc.stop()
+        self.baseline = None
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "caches": module_cache_sizes(),
+            "pid": os.getpid(),
+        }
+
+    def snapshot(self, limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+        """Top allocation growth since the previous snapshot (then re-baseline)."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+        snapshot = self._take()
+        diff = snapshot.compare_to(self.baseline, group_by) if self.baseline else []
+        self.baseline = snapshot
+        top = [
+            {
+                # Innermost frames last
+                "location": [str(frame) for frame in stat.traceback][-5:]
+                if group_by == "traceback" else str(stat.traceback[-1]),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in diff[:limit]
+        ]
+        return {**self.status(), "group_by": group_by, "top_growth": top}
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+
+
+_request_profiler = RequestProfiler()
+_memory_profiler = MemoryProfiler()
+
+
+def get_request_profiler() -> RequestProfiler:
+    return _request_profiler
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    return _memory_profiler
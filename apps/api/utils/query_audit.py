@@ -0,0 +1,344 @@
+"""
+Query Plan Auditor
+==================
+Replays representative queries from the route handlers with ``explain()`` and
+reports any plan that needs a COLLSCAN or an in-memory SORT. It is a
+regression gate for utils.indexes: run ``scripts/audit_query_plans.py``
+against a local mongod (it uses a scratch database) in CI.
+
+``AUDIT_QUERIES`` holds one entry per hot query shape (not per call site):
+- the collection
+- ``filter``, optional ``sort``, or an aggregation ``pipeline``
+- ``source``: the handler (or service method) that issues it
+
+``unsupported()`` is a static approximation of the planner. It runs
+without MongoDB, so the unit tests catch a query that lost its index.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.indexes import INDEXES
+from utils.pagination import keyset_filter
+
+AUDIT_QUERIES: List[Dict[str, Any]] = [
+    # accounts
+    {"source": "login", "collection": "users", "filter": {"email": "a@example.com"}},
+    {"source": "get_current_user", "collection": "users", "filter": {"user_id": "user_1"}},
+    {"source": "get_users", "collection": "users", "filter": {}, "sort": [("created_at", -1), ("user_id", -1)]},
+    {"source": "reset_password", "collection": "password_resets",
+     "filter": {"token": "t", "used": False}},
+    {"source": "check_rate_limit", "collection": "password_reset_attempts",
+     "filter": {"email": "a@example.com", "timestamp": {"$gte": "2026-01-01"}}, "sort": [("timestamp", 1)]},
+    # quiz, results, reports
+    {"source": "submit_quiz", "collection": "quiz_attempts",
+     "filter": {"attempt_id": "att_1", "user_id": "user_1"}},
+    {"source": "get_result", "collection": "results",
+     "filter": {"result_id": "res_1", "user_id": "user_1"}},
+    {"source": "get_history", "collection": "results",
+     "filter": {"user_id": "user_1"}, "sort": [("created_at", -1)]},
+    {"source": "get_all_results", "collection": "results",
+     "filter": {}, "sort": [("created_at", -1), ("result_id", -1)]},
+    {"source": "generate_report", "collection": "reports",
+     "filter": {"result_id": "res_1", "language": "id"}},
+    {"source": "generate_elite_report", "collection": "elite_reports",
+     "filter": {"result_id": "res_1", "language": "id"}},
+    {"source": "get_all_elite_reports", "collection": "elite_reports",
+     "filter": {}, "sort": [("created_at", -1), ("report_id", -1)]},
+    {"source": "generate_elite_plus_report", "collection": "elite_plus_reports",
+     "filter": {"result_id": "res_1", "language": "id"}},
+    {"source": "get_deep_dive_result", "collection": "deep_dive_results",
+     "filter": {"result_id": "res_1", "user_id": "user_1"}},
+    # payments
+    {"source": "payment_webhook", "collection": "payments", "filter": {"payment_id": "pay_1"}},
+    {"source": "submit_deep_dive", "collection": "payments",
+     "filter": {"user_id": "user_1", "result_id": "res_1", "product_type": {"$in": ["deep_dive"]},
+                "status": "paid"}},
+    {"source": "AdminDashboard.compute_overview", "collection": "payments", "pipeline": [
+        {"$match": {"status": "paid"}},
+        {"$facet": {"total": [{"$count": "n"}]}},
+    ]},
+    {"source": "AdminDashboard.compute_overview", "collection": "users", "pipeline": [
+        {"$match": {"created_at": {"$gte": "2026-01-01"}}},
+        {"$facet": {"week": [{"$count": "n"}]}},
+    ]},
+    {"source": "AdminDashboard.compute_stats", "collection": "quiz_attempts", "filter": {"status": "completed"}},
+    {"source": "AdminDashboard.compute_stats", "collection": "results", "filter": {"is_paid": True}},
+    {"source": "create_coupon", "collection": "coupons", "filter": {"code": "WELCOME"}},
+    # packs, challenges, tips, blog
+    {"source": "get_my_packs", "collection": "couples_packs",
+     "filter": {"$or": [{"creator_id": "user_1"}, {"partner_id": "user_1"}]}},
+    {"source": "get_couples_pack", "collection": "couples_packs", "filter": {"pack_id": "cp_1"}},
+    {"source": "get_my_team_packs", "collection": "team_packs", "filter": {"members.user_id": "user_1"}},
+    {"source": "join_team_via_link", "collection": "team_packs", "filter": {"pack_id": "tp_1"}},
+    {"source": "join_team_pack", "collection": "team_invites", "filter": {"invite_id": "inv_1"}},
+    {"source": "get_active_challenge", "collection": "challenges",
+     "filter": {"user_id": "user_1", "status": "active"}},
+    {"source": "get_challenge_history", "collection": "challenges",
+     "filter": {"user_id": "user_1"}, "sort": [("created_at", -1)]},
+    {"source": "get_tips_subscription", "collection": "tips_subscriptions", "filter": {"user_id": "user_1"}},
+    {"source": "send_weekly_tips_batch", "collection": "tips_subscriptions",
+     "filter": {"subscribed": True}},
+    {"source": "get_tips_history", "collection": "generated_tips",
+     "filter": {"user_id": "user_1"}, "sort": [("created_at", -1)]},
+    {"source": "get_articles", "collection": "blog_articles",
+     "filter": {"status": "published"}, "sort": [("created_at", -1), ("article_id", -1)]},
+    {"source": "get_article_by_slug", "collection": "blog_articles", "filter": {"slug": "hello"}},
+    {"source": "admin_get_articles", "collection": "blog_articles",
+     "filter": {}, "sort": [("created_at", -1), ("article_id", -1)]},
+    # HITL
+    {"source": "HITLEngine.get_moderation_queue", "collection": "moderation_queue",
+     "filter": {"status": "pending"}, "sort": [("created_at", -1), ("queue_id", -1)]},
+    {"source": "HITLEngine.get_queue_item_detail", "collection": "moderation_queue",
+     "filter": {"queue_id": "queue_1"}},
+    {"source": "get_risk_assessments", "collection": "risk_assessments",
+     "filter": {"risk_level": "level_2"}, "sort": [("created_at", -1)]},
+    {"source": "get_all_audit_logs", "collection": "audit_logs",
+     "filter": {}, "sort": [("timestamp", -1)]},
+    {"source": "hitl_analytics.timeline", "collection": "risk_assessments", "pipeline": [
+        {"$match": {"created_at_dt": {"$gte": {"$date": "2026-01-01T00:00:00Z"}}}},
+        {"$group": {"_id": "$risk_level", "count": {"$sum": 1}}},
+    ]},
+    {"source": "HITLRollups.aggregate", "collection": "hitl_daily", "pipeline": [
+        {"$match": {"metric": "moderator_action", "day": {"$gte": "2026-01-01"}}},
+        {"$group": {"_id": "$moderator_id", "count": {"$sum": "$count"}}},
+    ]},
+    {"source": "HITLRollups.aggregate", "collection": "risk_assessments", "pipeline": [
+        {"$match": {"created_at": {"$gte": "2026-01-01T06:00:00", "$lt": "2026-01-02"}}},
+        {"$group": {"_id": "$risk_level", "count": {"$sum": 1}}},
+    ]},
+    {"source": "HITLRollups.aggregate", "collection": "moderation_queue", "pipeline": [
+        {"$match": {"created_at": {"$gte": "2026-01-01T06:00:00", "$lt": "2026-01-02"}}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+    ]},
+    {"source": "HITLRollups.aggregate", "collection": "audit_logs", "pipeline": [
+        {"$match": {"timestamp": {"$gte": "2026-01-01T06:00:00", "$lt": "2026-01-02"},
+                    "moderator_id": {"$exists": True}}},
+        {"$group": {"_id": "$moderator_id", "count": {"$sum": 1}}},
+    ]},
+    # RELASI4
+    {"source": "build_question_set_pipeline", "collection": "r4_questions",
+     "filter": {"set_code": "R4W_CORE_V1", "is_active": True}, "sort": [("order_no", 1)]},
+    {"source": "build_question_set_pipeline", "collection": "r4_answers",
+     "filter": {"set_code": "R4W_CORE_V1", "order_no": 1}, "sort": [("label", 1)]},
+    {"source": "get_assessment", "collection": "r4_responses",
+     "filter": {"assessment_id": "r4a_1"}},
+    {"source": "list_user_assessments", "collection": "r4_responses",
+     "filter": {"user_id": "user_1"}, "sort": [("calculated_at", -1)]},
+    {"source": "admin_get_all_assessments", "collection": "r4_responses",
+     "filter": {}, "sort": [("calculated_at", -1), ("assessment_id", -1)]},
+    {"source": "submit_assessment", "collection": "r4_assessments", "filter": {"assessment_id": "r4a_1"}},
+    {"source": "get_premium_report", "collection": "r4_reports", "filter": {"report_id": "r4r_1"}},
+    {"source": "get_report_by_assessment", "collection": "r4_reports",
+     "filter": {"assessment_id": "r4a_1"}},
+    {"source": "generate_family_report", "collection": "r4_reports",
+     "filter": {"family_group_id": "fam_1", "report_type": "FAMILY"}},
+    {"source": "admin_get_all_reports", "collection": "r4_reports",
+     "filter": {}, "sort": [("created_at", -1), ("report_id", -1)]},
+    {"source": "ReportLeaderboards.rebuild", "collection": "r4_reports",
+     "filter": {"report_type": "COUPLE"}, "sort": [("compatibility_summary.compatibility_score", -1)]},
+    {"source": "ReportLeaderboards.rebuild", "collection": "r4_reports",
+     "filter": {"report_type": "FAMILY"}, "sort": [("family_summary.harmony_score", -1)]},
+    {"source": "join_couple_invite", "collection": "r4_couple_invites",
+     "filter": {"invite_code": "ABC123"}},
+    {"source": "join_family_group", "collection": "r4_family_groups",
+     "filter": {"invite_code": "ABC123"}},
+    {"source": "get_family_group", "collection": "r4_family_groups",
+     "filter": {"group_id": "fam_1"}},
+    {"source": "relasi4_payment_webhook", "collection": "r4_payments", "filter": {"payment_id": "pay_1"}},
+    {"source": "get_analytics_events", "collection": "r4_analytics",
+     "filter": {"created_at": {"$gte": "2026-01-01"}}, "sort": [("created_at", -1)]},
+    {"source": "AnalyticsRollups.load_cube", "collection": "r4_analytics_hourly", "pipeline": [
+        {"$match": {"hour": {"$gte": "2026-01-01T00"}}},
+        {"$group": {"_id": "$event", "count": {"$sum": "$count"}}},
+    ]},
+    {"source": "get_emotional_heatmap", "collection": "r4_analytics_daily", "pipeline": [
+        {"$match": {"date": {"$gte": "2026-01-01"}}},
+        {"$group": {"_id": "$primary_need", "count": {"$sum": "$count"}}},
+    ]},
+    # LLM usage
+    {"source": "UsageRollups.load_rows", "collection": "llm_usage_daily",
+     "filter": {"day": {"$gte": "2026-01-01"}}},
+    {"source": "UsageRollups.load_rows", "collection": "llm_usage_events",
+     "filter": {"ts_utc": {"$gte": {"$date": "2026-01-01T06:00:00Z"}, "$lt": {"$date": "2026-01-02T00:00:00Z"}}}},
+    {"source": "get_llm_usage_events", "collection": "llm_usage_events",
+     "filter": {"ts_utc": {"$gte": {"$date": "2026-01-01T00:00:00Z"}}}, "sort": [("ts_utc", -1)]},
+]
+
+
+def _next_page(query: Dict[str, Any]) -> Dict[str, Any]:
+    """The same listing one keyset page further (utils.pagination)."""
+    seek = keyset_filter(query["sort"], ["2026-01-01T00:00:00+00:00", "id_1"])
+    return {**query, "source": f"{query['source']} (cursor)",
+            "filter": {"$and": [query["filter"], seek]} if query["filter"] else seek}
+
+
+# Every listing sorted on (sort key, id tie-breaker) is cursor-paginated
+AUDIT_QUERIES += [_next_page(q) for q in list(AUDIT_QUERIES) if len(q.get("sort", [])) == 2]
+
+
+# ---------- explain() analysis ----------
+
+BAD_STAGES = {"COLLSCAN": "COLLSCAN", "SORT": "in-memory SORT"}
+
+
+def _plan_stages(plan: Any) -> Iterable[str]:
+    if isinstance(plan, dict):
+        stage = plan.get("stage")
+        if isinstance(stage, str):
+            yield stage
+        for key in ("inputStage", "queryPlan", "winningPlan", "outerStage", "innerStage", "thenStage",
+                    "elseStage"):
+            if key in plan:
+                yield from _plan_stages(plan[key])
+        for child in plan.get("inputStages", []):
+            yield from _plan_stages(child)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def _winning_plans(explain: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    if "queryPlanner" in explain:
+        yield explain["queryPlanner"].get("winningPlan", {})
+    for stage in explain.get("stages", []):
+        cursor = stage.get("$cursor") if isinstance(stage, dict) else None
+        if cursor and "queryPlanner" in cursor:
+            yield cursor["queryPlanner"].get("winningPlan", {})
+    for shard in explain.get("shards", {}).values() if isinstance(explain.get("shards"), dict) else []:
+        yield from _winning_plans(shard)
+
+
+def plan_problems(explain: Dict[str, Any]) -> List[str]:
+    """COLLSCAN / in-memory SORT stages in an explain() result."""
+    problems = []
+    for plan in _winning_plans(explain):
+        for stage in _plan_stages(plan):
+            if stage in BAD_STAGES and BAD_STAGES[stage] not in problems:
+                problems.append(BAD_STAGES[stage])
+    return problems
+
+
+def _ejson(value: Any) -> Any:
+    """``{"$date": iso}`` -> datetime so the queries stay JSON-like above."""
+    from utils.dates import parse_iso
+    if isinstance(value, dict):
+        if set(value) == {"$date"}:
+            return parse_iso(value["$date"])
+        return {k: _ejson(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_ejson(v) for v in value]
+    return value
+
+
+def explain_command(query: Dict[str, Any]) -> Dict[str, Any]:
+    if "pipeline" in query:
+        command = {"aggregate": query["collection"], "pipeline": _ejson(query["pipeline"]), "cursor": {}}
+    else:
+        command = {"find": query["collection"], "filter": _ejson(query["filter"]), "limit": 20}
+        if query.get("sort"):
+            command["sort"] = dict(query["sort"])
+    return {"explain": command, "verbosity": "queryPlanner"}
+
+
+async def audit(db, queries: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    explain() every query against ``db`` (indexes must already exist).
+    Returns one entry per query with its ``problems`` (empty when fine).
+    """
+    queries = queries or AUDIT_QUERIES
+    existing = set(await db.list_collection_names())
+    results = []
+    for query in queries:
+        if query["collection"] not in existing:
+            # A missing collection explains as EOF, which would hide a COLLSCAN
+            await db.create_collection(query["collection"])
+            existing.add(query["collection"])
+        explain = await db.command(explain_command(query))
+        results.append({"source": query["source"], "collection": query["collection"],
+                        "problems": plan_problems(explain)})
+    return results
+
+
+# ---------- static check (no MongoDB) ----------
+
+def _index_keys(collection: str) -> List[List[Tuple[str, int]]]:
+    return [
+        [(field, int(direction)) for field, direction in index.document["key"].items()]
+        for index in INDEXES.get(collection, [])
+        if "partialFilterExpression" not in index.document
+    ]
+
+
+def _split_filter(query_filter: Dict[str, Any]) -> Tuple[set, set]:
+    equality, ranges = set(), set()
+    for field, cond in query_filter.items():
+        if field.startswith("$"):
+            continue
+        if isinstance(cond, dict) and any(op in cond for op in ("$gte", "$gt", "$lte", "$lt", "$in", "$exists", "$ne")):
+            ranges.add(field)
+        else:
+            equality.add(field)
+    return equality, ranges
+
+
+def _branch_supported(collection: str, query_filter: Dict[str, Any],
+                      sort: List[Tuple[str, int]]) -> bool:
+    equality, ranges = _split_filter(query_filter)
+    # A sort key pinned by equality does not need index order
+    sort = [(f, d) for f, d in sort if f not in equality]
+    for keys in _index_keys(collection):
+        fields = [f for f, _ in keys]
+        if not sort:
+            if fields[0] in equality | ranges:
+                return True
+            continue
+        # Equality prefix (any order), then the sort keys in order, all in
+        # the index direction or all reversed
+        prefix = 0
+        while prefix < len(fields) and fields[prefix] in equality:
+            prefix += 1
+        rest = keys[prefix:prefix + len(sort)]
+        if [f for f, _ in rest] != [f for f, _ in sort]:
+            continue
+        same = all(d == sd for (_, d), (_, sd) in zip(rest, sort))
+        reversed_ = all(d == -sd for (_, d), (_, sd) in zip(rest, sort))
+        if same or reversed_:
+            return True
+    return False
+
+
+def _flatten(query_filter: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Top-level conditions (``$and`` merged) and the ``$or`` branches, if any."""
+    fields: Dict[str, Any] = {}
+    branches: List[Dict[str, Any]] = []
+    for clause in [query_filter] + list(query_filter.get("$and", [])):
+        inner, inner_branches = ({k: v for k, v in clause.items() if k not in ("$and", "$or")},
+                                 clause.get("$or", []))
+        fields.update(inner)
+        branches = branches or inner_branches
+    return fields, branches
+
+
+def unsupported(query: Dict[str, Any]) -> Optional[str]:
+    """Why the registry cannot serve ``query`` without COLLSCAN/SORT, or None."""
+    collection = query["collection"]
+    if "pipeline" in query:
+        first = query["pipeline"][0]
+        query_filter = first.get("$match", {})
+        sort = []
+    else:
+        query_filter = query["filter"]
+        sort = [(field, int(direction)) for field, direction in query.get("sort", [])]
+
+    fields, branches = _flatten(query_filter)
+    if branches:
+        # Each $or branch gets its own index scan (merged in sort order)
+        for branch in branches:
+            if not _branch_supported(collection, {**fields, **branch}, sort):
+                return f"no index for $or branch {sorted(branch)} sort {sort}"
+        return None
+    if not fields and not sort:
+        return "no filter or sort"
+    if not _branch_supported(collection, fields, sort):
+        return f"no index for filter {sorted(fields)} sort {sort}"
+    return None
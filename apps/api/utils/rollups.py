@@ -0,0 +1,170 @@
+"""
+Rollup State
+============
+Bookkeeping shared by the pre-aggregated rollups (``r4_analytics_hourly``,
+``hitl_daily``, ``llm_usage_daily``). Each rollup module builds its own rows;
+this module owns the rest:
+
+- a state document ``{_id: state_id}`` holding ``incremental_since`` (first
+  period written by the incremental path), ``rebuilt_until`` (end of the
+  range rebuilt from raw data) and ``ready``
+- readiness: the first incremental period also holds data written before
+  the deploy, so rollups are complete once that period has been rebuilt
+  (``incremental_since < rebuilt_until``). Readiness never reverts.
+- rebuilds over settled periods (ended more than ``settle_seconds`` ago), in
+  chunks, with rows overwritten in place (``replace_rows``)
+- ``status()`` for the admin endpoints
+
+Periods are sortable strings: ``YYYY-MM-DDTHH`` for hours, ``YYYY-MM-DD``
+for days.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Period:
+    """Rollup granularity."""
+
+    unit: str
+    format: str
+    step: timedelta
+
+    def of(self, ts: datetime) -> str:
+        return ts.strftime(self.format)
+
+    def start(self, period: str) -> datetime:
+        return datetime.strptime(period, self.format).replace(tzinfo=timezone.utc)
+
+    def next(self, period: str) -> str:
+        return self.of(self.start(period) + self.step)
+
+
+HOUR = Period("hour", "%Y-%m-%dT%H", timedelta(hours=1))
+DAY = Period("day", "%Y-%m-%d", timedelta(days=1))
+
+# (start, end, rebuild_id) -> rows written
+RebuildRange = Callable[[str, str, str], Awaitable[int]]
+
+
+async def replace_rows(collection, rows: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+                       scope: Dict[str, Any], rebuild_id: str) -> int:
+    """
+    Write rebuilt ``(key, values)`` rows and drop rows in ``scope`` that no
+    longer exist. Rows are overwritten in place rather than deleted first,
+    so readers never see a half-empty period.
+    """
+    ops = [UpdateOne(key, {"$set": {**values, "rebuild_id": rebuild_id}}, upsert=True) for key, values in rows]
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+    await collection.delete_many({**scope, "rebuild_id": {"$ne": rebuild_id}})
+    return len(ops)
+
+
+class RollupState:
+    """State document, readiness and rebuild driver of one rollup collection."""
+
+    def __init__(self, name: str, state_collection: str, rows_collection: str, period: Period,
+                 settle_seconds: int, state_id: str, chunk: int = 1, db=None):
+        self.name = name
+        self.state_collection = state_collection
+        self.rows_collection = rows_collection
+        self.period = period
+        self.settle_seconds = settle_seconds
+        self.state_id = state_id
+        self.chunk = chunk
+        self.db = db
+        self._ready = False
+        self._incremental_marked = False
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self._ready = False
+        self._incremental_marked = False
+
+    @property
+    def _states(self):
+        return getattr(self.db, self.state_collection)
+
+    async def get(self) -> Dict[str, Any]:
+        state = await self._states.find_one({"_id": self.state_id}) or {}
+        state.pop("_id", None)
+        return state
+
+    async def set(self, **fields):
+        await self._states.update_one({"_id": self.state_id}, {"$set": fields}, upsert=True)
+
+    async def is_ready(self) -> bool:
+        """True once rollups cover every period (cached; it never reverts)."""
+        if not self._ready:
+            self._ready = bool((await self.get()).get("ready"))
+        return self._ready
+
+    async def mark_incremental(self, period: str):
+        """Record a period written by the incremental path (keeps the earliest)."""
+        await self._states.update_one(
+            {"_id": self.state_id}, {"$min": {"incremental_since": period}}, upsert=True
+        )
+
+    async def mark_incremental_once(self, period: str):
+        """``mark_incremental`` for the first write of this process only."""
+        if not self._incremental_marked:
+            await self.mark_incremental(period)
+            self._incremental_marked = True
+
+    def settled(self) -> str:
+        """First period that has not settled yet (exclusive end of rebuilds)."""
+        return self.period.of(datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds))
+
+    async def rebuild(self, rebuild_range: RebuildRange, since: Optional[str] = None,
+                      until: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run ``rebuild_range`` over [since, until) in chunks of ``chunk`` periods.
+
+        ``until`` is capped at the latest settled period; ``since`` defaults to
+        ``until`` (nothing to rebuild). Marks the rollups ready when the
+        incremental path covers every period after the rebuilt range.
+        """
+        settled = self.settled()
+        until = min(until or settled, settled)
+        since = since or until
+
+        rebuild_id = uuid.uuid4().hex
+        periods = rows = 0
+        start = since
+        while start < until:
+            end = start
+            for _ in range(self.chunk):
+                end = self.period.next(end)
+                if end >= until:
+                    end = until
+                    break
+            rows += await rebuild_range(start, end, rebuild_id)
+            while start < end:
+                start = self.period.next(start)
+                periods += 1
+
+        state = await self.get()
+        rebuilt_until = max(state.get("rebuilt_until") or "", until)
+        incremental_since = state.get("incremental_since")
+        ready = bool(state.get("ready")) or (incremental_since is not None and incremental_since < rebuilt_until)
+        await self.set(rebuilt_until=rebuilt_until, ready=ready,
+                       rebuilt_at=datetime.now(timezone.utc).isoformat())
+        self._ready = ready
+        unit = self.period.unit
+        logger.info(f"{self.name} rollups rebuilt: {periods} {unit}s, {rows} rows (ready={ready})")
+        return {f"since_{unit}": since, f"until_{unit}": until, f"{unit}s": periods, "rows": rows,
+                "incremental_since": incremental_since, "ready": ready}
+
+    async def status(self) -> Dict[str, Any]:
+        rows = await getattr(self.db, self.rows_collection).estimated_document_count()
+        return {**await self.get(), "rows": rows}
@@ -0,0 +1,157 @@
+"""
+Fast JSON Serialization
+=======================
+orjson-based response class and route class used app-wide.
+
+FastAPI normally runs every return value through ``jsonable_encoder``
+and then ``json.dumps``. ``ORJSONRoute`` skips the encoder for routes
+without a response_model and ``ORJSONResponse`` renders with orjson,
+keeping output semantically identical for clients:
+
+- datetime/date/time -> ``isoformat()`` (same as the ISO strings we store)
+- ObjectId -> str
+- Pydantic models -> ``model_dump(mode="json", by_alias=True)``
+- sets, Decimal, timedelta, bytes, paths -> as jsonable_encoder does
+
+One deliberate difference: non-finite floats (NaN, inf, -inf) render as
+``null``. The old ``JSONResponse`` (``allow_nan=False``) raised instead,
+which turned the request into a 500.
+"""
+
+import copy
+import dataclasses
+import datetime
+import decimal
+import inspect
+import json
+from enum import Enum
+from pathlib import PurePath
+from typing import Any, Callable, Coroutine
+
+import orjson
+from fastapi.dependencies.models import Dependant
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, get_request_handler
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    from bson import ObjectId
+except ImportError:  # pragma: no cover - bson ships with pymongo
+    ObjectId = None
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it does not handle natively."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if ObjectId is not None and isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        # Same rule as pydantic's decimal encoder used by jsonable_encoder
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to UTF-8 JSON bytes.
+
+    Falls back to the stdlib path for anything orjson rejects
+    (e.g. integers beyond 64 bits) so behaviour never regresses.
+    """
+    try:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    except TypeError:
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _uses_response_param(dependant: Dependant) -> bool:
+    if dependant.response_param_name:
+        return True
+    return any(_uses_response_param(dep) for dep in dependant.dependencies)
+
+
+class ORJSONRoute(APIRoute):
+    """
+    APIRoute that hands endpoint results straight to ORJSONResponse.
+
+    Only applies to routes without a response_model whose response class
+    is ORJSONResponse and that do not inject a ``Response`` parameter;
+    everything else keeps FastAPI's default handling.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        response_class = getattr(self.response_class, "value", self.response_class)
+        if (
+            self.response_field is not None
+            or not (isinstance(response_class, type) and issubclass(response_class, ORJSONResponse))
+            or _uses_response_param(self.dependant)
+            or (self.status_code is not None and not is_body_allowed_for_status_code(self.status_code))
+        ):
+            return super().get_route_handler()
+
+        call = self.dependant.call
+        is_coroutine = inspect.iscoroutinefunction(call)
+        response_args = {"status_code": self.status_code} if self.status_code else {}
+
+        async def direct_call(**values: Any) -> Any:
+            if is_coroutine:
+                raw = await call(**values)
+            else:
+                raw = await run_in_threadpool(call, **values)
+            if isinstance(raw, Response):
+                return raw
+            return response_class(raw, **response_args)
+
+        dependant = copy.copy(self.dependant)
+        dependant.call = direct_call
+
+        return get_request_handler(
+            dependant=dependant,
+            body_field=self.body_field,
+            status_code=self.status_code,
+            response_class=self.response_class,
+            response_field=self.secure_cloned_response_field,
+            response_model_include=self.response_model_include,
+            response_model_exclude=self.response_model_exclude,
+            response_model_by_alias=self.response_model_by_alias,
+            response_model_exclude_unset=self.response_model_exclude_unset,
+            response_model_exclude_defaults=self.response_model_exclude_defaults,
+            response_model_exclude_none=self.response_model_exclude_none,
+            dependency_overrides_provider=self.dependency_overrides_provider,
+        )
+
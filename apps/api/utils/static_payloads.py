@@ -0,0 +1,113 @@
+"""
+Precomputed Static Payloads
+===========================
+Immutable, pre-serialized JSON bodies for reference endpoints whose
+content only changes with a deploy (archetypes, compatibility matrix,
+deep-dive questions, ...).
+
+Payloads are serialized once, optionally pre-gzipped, and served with a
+strong ETag and Cache-Control so nginx and browsers can cache them.
+"""
+
+import gzip
+import hashlib
+import os
+from typing import Any, Callable, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from utils.serialization import dumps
+
+STATIC_CACHE_MAX_AGE = int(os.environ.get("STATIC_CACHE_MAX_AGE", 3600))
+STATIC_GZIP_ENABLED = os.environ.get("STATIC_GZIP_ENABLED", "true").lower() == "true"
+
+# Bodies smaller than this are not worth a gzip variant
+GZIP_MIN_SIZE = 512
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize exactly like the app-wide ORJSONResponse."""
+    return dumps(content)
+
+
+class StaticPayload:
+    """A serialized JSON body with its ETag and optional gzip variant."""
+
+    __slots__ = ("body", "gzip_body", "etag", "cache_control")
+
+    def __init__(self, content: Any, max_age: int = STATIC_CACHE_MAX_AGE, etag: Optional[str] = None):
+        self.body = render_json(content)
+        # Callers with a content hash of their own (e.g. a lock hash) can pass it
+        self.etag = '"' + (etag or hashlib.sha256(self.body).hexdigest()[:32]) + '"'
+        self.cache_control = f"public, max-age={max_age}"
+        self.gzip_body: Optional[bytes] = None
+        if STATIC_GZIP_ENABLED and len(self.body) >= GZIP_MIN_SIZE:
+            # mtime=0 keeps the blob deterministic across workers
+            self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    def response(self, request: Request) -> Response:
+        """Build a response, honouring If-None-Match and Accept-Encoding."""
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match and _etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        if self.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            # Different bytes from the identity body: weak validator (still matches above)
+            headers["ETag"] = f"W/{self.etag}"
+            return Response(content=self.gzip_body, media_type="application/json", headers=headers)
+
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" matches "x" (e.g. after a proxy re-encodes)
+    return any(tag == etag or tag == f"W/{etag}" for tag in candidates)
+
+
+# Registry: key -> payload
+_payloads: Dict[str, StaticPayload] = {}
+
+
+def register_static_payload(key: str, content: Any) -> StaticPayload:
+    """Serialize content and store it under key."""
+    payload = StaticPayload(content)
+    _payloads[key] = payload
+    return payload
+
+
+def get_static_payload(key: str) -> Optional[StaticPayload]:
+    """Return the precomputed payload for key, if any."""
+    return _payloads.get(key)
+
+
+def static_response(
+    request: Request,
+    key: str,
+    builder: Callable[[], Any],
+) -> Any:
+    """
+    Serve the precomputed payload for key.
+
+    Falls back to the builder (uncached) when key was never registered,
+    e.g. for unsupported languages or before startup warmed the registry.
+    """
+    payload = _payloads.get(key)
+    if payload is None:
+        return builder()
+    return payload.response(request)
+
+
+def clear_static_payloads():
+    """Drop all registered payloads (tests)."""
+    _payloads.clear()
@@ -0,0 +1,198 @@
+"""
+Lightweight Span Tracing
+========================
+contextvars-based spans for finding where slow requests spend their time.
+
+    with span("report.pre_assess", result_id=result_id):
+        pre_assessment = await hitl_engine.assess_risk(...)
+
+    @traced("report.generate")
+    async def generate_report(...): ...
+
+Nested spans share the trace of the innermost open span (also across
+``await`` and tasks created inside it). When a root span closes, the
+whole trace is logged once as OpenTelemetry-compatible JSON (OTLP/JSON
+``resourceSpans`` layout) on the ``tracing`` logger, and every span's
+duration is observed in the ``span_duration_ms{span=...}`` histogram.
+
+Span names must be static strings (they are metric labels).
+"""
+
+import logging
+import os
+import secrets
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from utils.logging import request_id_var
+from utils.metrics import observe_histogram
+
+logger = logging.getLogger("tracing")
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+# Export traces whose root span took at least this long (0 = all)
+TRACE_EXPORT_MIN_MS = float(os.environ.get("TRACE_EXPORT_MIN_MS", 0))
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "relasi4warna-api")
+
+# Guard against runaway loops creating spans inside one trace
+MAX_SPANS_PER_TRACE = 256
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent", "attributes", "start_ns", "end_ns",
+                 "error", "_spans", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        # Finished spans of the whole trace, collected on the root
+        self._spans: List["Span"] = parent._spans if parent else []
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    # Usable as both ``with`` and ``async with``
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"[:200]
+        self._finish()
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def _finish(self):
+        observe_histogram("span_duration_ms", self.duration_ms, labels={"span": self.name})
+        if len(self._spans) < MAX_SPANS_PER_TRACE:
+            self._spans.append(self)
+        if self.parent is None and self.duration_ms >= TRACE_EXPORT_MIN_MS:
+            _export(self)
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON span representation."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otel_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otel_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _export(root: Span):
+    spans = sorted(root._spans, key=lambda s: s.start_ns)
+    trace = {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otel_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "relasi4warna.tracing"},
+                "spans": [s.to_otel() for s in spans],
+            }],
+        }],
+    }
+    stages: Dict[str, float] = {}
+    for s in spans:
+        if s is not root:
+            stages[s.name] = round(stages.get(s.name, 0) + s.duration_ms, 2)
+    logger.info(
+        f"trace {root.name} {root.duration_ms:.0f}ms",
+        extra={"extra_data": {
+            "trace_id": root.trace_id,
+            "span": root.name,
+            "duration_ms": round(root.duration_ms, 2),
+            "stages_ms": stages,
+            "otel": trace,
+        }},
+    )
+
+
+def span(name: str, /, **attributes):
+    """Start a span as a child of the current one (or a new trace)."""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    parent = _current_span.get()
+    if parent is None:
+        request_id = request_id_var.get("")
+        if request_id:
+            attributes["request_id"] = request_id
+    return Span(name, parent, attributes)
+
+
+def current_span():
+    """The innermost open span, or a no-op span."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced(name: str):
+    """Decorator: run an async function inside a span."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -46,6 +46,11 @@ from .budget_guard import (
     TIER_SOFT_CAPS,
 )
 
+from .usage_rollups import (
+    UsageRollups,
+    get_usage_rollups,
+)
+
 from .routing import (
     RoutingPolicy,
     RouteConfig,
@@ -71,6 +76,9 @@ __all__ = [
     "BudgetGuard",
     "get_budget_guard",
     "TIER_SOFT_CAPS",
+    # Usage rollups
+    "UsageRollups",
+    "get_usage_rollups",
     # Routing
     "RoutingPolicy",
     "RouteConfig",
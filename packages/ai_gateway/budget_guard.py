@@ -14,6 +14,8 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any
 from collections import defaultdict
 
+from ai_gateway.usage_rollups import get_usage_rollups
+
 logger = logging.getLogger(__name__)
 
 
@@ -251,7 +253,8 @@ class BudgetGuard:
         """
         Get usage summary for admin endpoint.
         
-        Returns aggregated stats for the specified number of days.
+        Returns aggregated stats for the specified number of days, from the
+        daily rollups (ai_gateway.usage_rollups) once they are ready.
         """
         if self.db is None:
             return {"error": "Database not available"}
@@ -259,57 +262,12 @@ class BudgetGuard:
         start_date = datetime.now(timezone.utc) - timedelta(days=days)
         
         try:
-            # Daily breakdown
-            pipeline = [
-                {
-                    "$match": {
-                        "ts_utc": {"$gte": start_date}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$ts_utc"}},
-                            "status": "$status"
-                        },
-                        "count": {"$sum": 1},
-                        "total_cost": {"$sum": "$cost_estimate_usd"},
-                        "total_tokens_in": {"$sum": "$tokens_in"},
-                        "total_tokens_out": {"$sum": "$tokens_out"},
-                        "avg_latency": {"$avg": "$latency_ms"}
-                    }
-                },
-                {
-                    "$sort": {"_id.date": -1}
-                }
-            ]
-            
-            results = await self.db.llm_usage_events.aggregate(pipeline).to_list(100)
-            
-            # Top endpoints
-            endpoint_pipeline = [
-                {
-                    "$match": {
-                        "ts_utc": {"$gte": start_date},
-                        "status": {"$in": ["ok", "degraded"]}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": "$endpoint_name",
-                        "count": {"$sum": 1},
-                        "total_cost": {"$sum": "$cost_estimate_usd"}
-                    }
-                },
-                {
-                    "$sort": {"total_cost": -1}
-                },
-                {
-                    "$limit": 10
-                }
-            ]
-            
-            endpoints = await self.db.llm_usage_events.aggregate(endpoint_pipeline).to_list(10)
+            rollups = get_usage_rollups(self.db)
+            if await rollups.is_ready():
+                breakdown = await rollups.summary(start_date)
+            else:
+                breakdown = await self._raw_usage_breakdown(start_date)
+            results = breakdown["daily_breakdown"]
             
             # Total stats
             total_cost = sum(r["total_cost"] for r in results if r["_id"]["status"] in ["ok", "degraded"])
@@ -323,7 +281,8 @@ class BudgetGuard:
                 "blocked_calls": blocked_calls,
                 "block_rate_percent": round(blocked_calls / total_calls * 100, 2) if total_calls > 0 else 0,
                 "daily_breakdown": results,
-                "top_endpoints": endpoints,
+                "top_endpoints": breakdown["top_endpoints"],
+                "percentiles": breakdown["percentiles"],
                 "current_daily_budget": self.daily_budget,
                 "current_daily_spent": round(self._daily_spent, 4)
             }
@@ -331,6 +290,63 @@ class BudgetGuard:
         except Exception as e:
             logger.error(f"Failed to get usage summary: {e}")
             return {"error": str(e)}
+    
+    async def _raw_usage_breakdown(self, start_date: datetime) -> Dict[str, Any]:
+        """Usage breakdown aggregated from raw events (before the rollups are backfilled)."""
+        # Daily breakdown
+        pipeline = [
+            {
+                "$match": {
+                    "ts_utc": {"$gte": start_date}
+                }
+            },
+            {
+                "$group": {
+                    "_id": {
+                        "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$ts_utc"}},
+                        "status": "$status"
+                    },
+                    "count": {"$sum": 1},
+                    "total_cost": {"$sum": "$cost_estimate_usd"},
+                    "total_tokens_in": {"$sum": "$tokens_in"},
+                    "total_tokens_out": {"$sum": "$tokens_out"},
+                    "avg_latency": {"$avg": "$latency_ms"}
+                }
+            },
+            {
+                "$sort": {"_id.date": -1}
+            }
+        ]
+        
+        results = await self.db.llm_usage_events.aggregate(pipeline).to_list(100)
+        
+        # Top endpoints
+        endpoint_pipeline = [
+            {
+                "$match": {
+                    "ts_utc": {"$gte": start_date},
+                    "status": {"$in": ["ok", "degraded"]}
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$endpoint_name",
+                    "count": {"$sum": 1},
+                    "total_cost": {"$sum": "$cost_estimate_usd"}
+                }
+            },
+            {
+                "$sort": {"total_cost": -1}
+            },
+            {
+                "$limit": 10
+            }
+        ]
+        
+        endpoints = await self.db.llm_usage_events.aggregate(endpoint_pipeline).to_list(10)
+        
+        # Percentiles need the rollup histograms
+        return {"daily_breakdown": results, "top_endpoints": endpoints, "percentiles": {}}
 
 
 # Singleton instance
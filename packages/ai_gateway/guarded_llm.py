@@ -26,6 +26,18 @@ if packages_path not in sys.path:
 
 logger = logging.getLogger(__name__)
 
+try:
+    # Span tracing lives in apps/api; tracing is a no-op when used elsewhere
+    from utils.tracing import span, traced
+except ImportError:
+    from contextlib import nullcontext
+
+    def span(name: str, **attributes):
+        return nullcontext()
+
+    def traced(name: str):
+        return lambda func: func
+
 
 class LLMStatus(str, Enum):
     """Status of LLM call."""
@@ -118,7 +130,7 @@ class GuardedLLMGateway:
     4. User soft cap check (degrade if exceeded)
     5. Routing: select model + token limits
     6. Provider call via llm_provider
-    7. Persist llm_usage_events record
+    7. Persist llm_usage_events record (and its daily rollup)
     8. Structured logging
     """
     
@@ -229,6 +241,11 @@ class GuardedLLMGateway:
             await self.db.llm_usage_events.insert_one(event)
         except Exception as e:
             logger.error(f"Failed to persist LLM event: {e}")
+            return
+        
+        # Daily rollup (token/cost/latency totals and histograms)
+        from ai_gateway.usage_rollups import get_usage_rollups
+        await get_usage_rollups(self.db).record(event)
     
     def _log_event(self, context: GuardedLLMContext, result: GuardedLLMResult):
         """Structured JSON logging."""
@@ -276,7 +293,8 @@ class GuardedLLMGateway:
             # A) ABUSE GUARD PRECHECK
             # ========================================
             abuse_guard = self._get_abuse_guard()
-            abuse_result = abuse_guard.analyze(context.prompt)
+            with span("gateway.abuse_check"):
+                abuse_result = abuse_guard.analyze(context.prompt)
             
             if abuse_result.detected:
                 context.abuse_flags = abuse_result.matched_patterns[:5]
@@ -310,7 +328,8 @@ class GuardedLLMGateway:
             # C) DAILY BUDGET CHECK (Block if exceeded)
             # ========================================
             budget_guard = self._get_budget_guard()
-            budget_status = await budget_guard.check_daily_budget()
+            with span("gateway.budget_check"):
+                budget_status = await budget_guard.check_daily_budget()
             
             if budget_status["blocked"]:
                 result.status = LLMStatus.BLOCKED
@@ -327,9 +346,10 @@ class GuardedLLMGateway:
             # ========================================
             # D) USER SOFT CAP CHECK (Degrade if exceeded)
             # ========================================
-            user_cap_status = await budget_guard.check_user_soft_cap(
-                context.user_id, context.tier
-            )
+            with span("gateway.user_cap_check"):
+                user_cap_status = await budget_guard.check_user_soft_cap(
+                    context.user_id, context.tier
+                )
             
             degrade_mode = user_cap_status["exceeded"]
             if degrade_mode:
@@ -365,13 +385,14 @@ class GuardedLLMGateway:
                 system_prompt = self._add_concise_instruction(system_prompt, context.language)
             
             try:
-                output = await provider.generate(
-                    system_prompt=system_prompt,
-                    user_prompt=context.prompt,
-                    model=result.model_used,
-                    max_tokens=result.max_tokens_allowed,
-                    temperature=0.3
-                )
+                with span("gateway.provider_call"):
+                    output = await provider.generate(
+                        system_prompt=system_prompt,
+                        user_prompt=context.prompt,
+                        model=result.model_used,
+                        max_tokens=result.max_tokens_allowed,
+                        temperature=0.3
+                    )
                 
                 # Estimate tokens
                 result.tokens_in = len(f"{system_prompt}\n{context.prompt}") // 4
@@ -400,16 +421,18 @@ class GuardedLLMGateway:
             # H) PERSIST + LOG
             # ========================================
             self._log_event(context, result)
-            await self._persist_event(context, result)
+            with span("gateway.persist"):
+                await self._persist_event(context, result)
             
             # Update budget tracking if successful
             if result.status in [LLMStatus.OK, LLMStatus.DEGRADED]:
-                await budget_guard.record_usage(
-                    user_id=context.user_id,
-                    cost_usd=result.cost_estimate_usd,
-                    tokens_in=result.tokens_in,
-                    tokens_out=result.tokens_out
-                )
+                with span("gateway.record_usage"):
+                    await budget_guard.record_usage(
+                        user_id=context.user_id,
+                        cost_usd=result.cost_estimate_usd,
+                        tokens_in=result.tokens_in,
+                        tokens_out=result.tokens_out
+                    )
             
             return result
             
@@ -473,6 +496,7 @@ def get_llm_gateway(db=None) -> GuardedLLMGateway:
     return _gateway
 
 
+@traced("llm.gateway")
 async def call_llm_guarded(context: GuardedLLMContext) -> GuardedLLMResult:
     """
     SINGLE ENTRYPOINT for all LLM calls.
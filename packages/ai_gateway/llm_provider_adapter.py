@@ -14,6 +14,12 @@ import logging
 from typing import Optional
 from openai import AsyncOpenAI
 
+try:
+    # Pooled outbound clients live in apps/api; the SDK default is used elsewhere
+    from utils.http_clients import get_http_client
+except ImportError:
+    get_http_client = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +37,8 @@ class LLMProviderAdapter:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self._client: Optional[AsyncOpenAI] = None
+        self._http_client = None
         
         # Model mapping for compatibility
         self.model_mapping = {
@@ -42,6 +49,16 @@ class LLMProviderAdapter:
         }
         
         logger.info("LLM Provider Adapter initialized with OpenAI SDK")
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """AsyncOpenAI on the app's pooled ``openai`` HTTP client when available."""
+        http_client = get_http_client("openai") if get_http_client else None
+        if self._client is None or http_client is not self._http_client:
+            kwargs = {"http_client": http_client, "timeout": http_client.timeout} if http_client else {}
+            self._client = AsyncOpenAI(api_key=self.api_key, **kwargs)
+            self._http_client = http_client
+        return self._client
     
     async def generate(
         self,
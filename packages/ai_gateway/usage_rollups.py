@@ -0,0 +1,354 @@
+"""
+LLM Usage Rollups
+=================
+Daily rollups of ``llm_usage_events`` and the retention policy for the raw
+events.
+
+``llm_usage_daily`` holds one document per (day, endpoint_name, model,
+tier, status) with:
+- ``count``, ``cost_usd``, ``tokens_in``, ``tokens_out``, ``latency_ms_sum``
+- ``hist.<field>``: fixed log-scale histograms for latency_ms, tokens_in,
+  tokens_out and cost_usd. ``BUCKETS_PER_DECADE`` buckets per power of ten
+  (key ``i`` counts values in (10^((i-1)/10), 10^(i/10)]; ``z`` counts zeros).
+  Histograms merge by addition, so percentiles over any set of rows are
+  exact to one bucket (about 26%).
+
+Maintenance:
+- incremental: the gateway applies one ``$inc`` upsert per persisted event
+- rebuild: ``rebuild()`` recomputes settled days from the raw events
+  (``scripts/rebuild_llm_usage_rollups.py`` or
+  ``POST /api/admin/llm-usage/rollups/rebuild``). Run it once after
+  deploying, and again the next day so the first incrementally written day
+  is covered. State, readiness and the rebuild loop are ``RollupState``
+  (``utils/rollups.py``).
+
+Retention: once the rollups are ready, ``apply_retention()`` puts a TTL
+index on ``llm_usage_events.ts_utc`` so raw events are kept for
+``LLM_USAGE_RETENTION_DAYS`` (default 90, 0 keeps them forever). It runs at
+startup and after each rebuild, and never before the backfill, so no history
+is deleted before it has been rolled up. Rebuilds only touch days whose raw
+events are still retained.
+
+Reads (``summary``): full days come from the rollups, and the partial
+day at the start of the window is folded from raw events (if they are still
+retained). Until the rollups are ready, BudgetGuard keeps aggregating the
+raw events.
+"""
+
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+
+from utils.rollups import DAY, RollupState, replace_rows
+
+logger = logging.getLogger(__name__)
+
+LLM_USAGE_RETENTION_DAYS = int(os.environ.get("LLM_USAGE_RETENTION_DAYS", 90))
+LLM_USAGE_ROLLUP_SETTLE_SECONDS = int(os.environ.get("LLM_USAGE_ROLLUP_SETTLE_SECONDS", 300))
+
+DIMENSIONS = ("endpoint_name", "model", "tier", "status")
+# rollup histogram -> raw event field
+HISTOGRAMS = {
+    "latency_ms": "latency_ms",
+    "tokens_in": "tokens_in",
+    "tokens_out": "tokens_out",
+    "cost_usd": "cost_estimate_usd",
+}
+BUCKETS_PER_DECADE = 10
+PERCENTILES = (50, 95, 99)
+SPENDING_STATUSES = ("ok", "degraded")
+
+TTL_INDEX_NAME = "ttl_llm_usage_events"
+RAW_BATCH_SIZE = 1000
+
+# (day, *DIMENSIONS)
+RollupKey = Tuple[Optional[str], ...]
+
+
+def day_of(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+def day_start(day: str) -> datetime:
+    return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def next_day(day: str) -> str:
+    return day_of(day_start(day) + timedelta(days=1))
+
+
+def bucket(value: Optional[float]) -> str:
+    """Histogram key for a value: ``z`` for zero/missing, else the log-scale index."""
+    if not value or value <= 0:
+        return "z"
+    return str(math.ceil(round(math.log10(value) * BUCKETS_PER_DECADE, 9)))
+
+
+def bucket_upper(key: str) -> float:
+    return 0.0 if key == "z" else 10 ** (int(key) / BUCKETS_PER_DECADE)
+
+
+def percentile(hist: Dict[str, int], q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-th percentile (q in 0..100)."""
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(total * q / 100))
+    seen = 0
+    for key in sorted(hist, key=lambda k: -math.inf if k == "z" else int(k)):
+        seen += hist[key]
+        if seen >= rank:
+            return bucket_upper(key)
+    return None
+
+
+def merge_hist(into: Dict[str, int], hist: Dict[str, int]):
+    for key, count in hist.items():
+        into[key] = into.get(key, 0) + count
+
+
+def rollup_key(event: Dict[str, Any]) -> RollupKey:
+    ts = event["ts_utc"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (day_of(ts), event.get("endpoint_name"), event.get("model_used"),
+            event.get("tier"), event.get("status"))
+
+
+def key_filter(key: RollupKey) -> Dict[str, Any]:
+    return {"day": key[0], **dict(zip(DIMENSIONS, key[1:]))}
+
+
+def event_update(event: Dict[str, Any]) -> UpdateOne:
+    """``$inc`` upsert adding one event to its rollup row."""
+    inc = {
+        "count": 1,
+        "cost_usd": event.get("cost_estimate_usd") or 0.0,
+        "tokens_in": event.get("tokens_in") or 0,
+        "tokens_out": event.get("tokens_out") or 0,
+        "latency_ms_sum": event.get("latency_ms") or 0.0,
+    }
+    for name, field in HISTOGRAMS.items():
+        inc[f"hist.{name}.{bucket(event.get(field))}"] = 1
+    return UpdateOne(key_filter(rollup_key(event)), {"$inc": inc}, upsert=True)
+
+
+def fold(rows: Dict[RollupKey, Dict[str, Any]], event: Dict[str, Any]):
+    """Add one raw event to in-memory rollup rows (same result as event_update)."""
+    key = rollup_key(event)
+    row = rows.get(key)
+    if row is None:
+        row = rows[key] = {
+            **key_filter(key), "count": 0, "cost_usd": 0.0, "tokens_in": 0, "tokens_out": 0,
+            "latency_ms_sum": 0.0, "hist": {name: {} for name in HISTOGRAMS},
+        }
+    row["count"] += 1
+    row["cost_usd"] += event.get("cost_estimate_usd") or 0.0
+    row["tokens_in"] += event.get("tokens_in") or 0
+    row["tokens_out"] += event.get("tokens_out") or 0
+    row["latency_ms_sum"] += event.get("latency_ms") or 0.0
+    for name, field in HISTOGRAMS.items():
+        b = bucket(event.get(field))
+        row["hist"][name][b] = row["hist"][name].get(b, 0) + 1
+
+
+def _percentiles(hist: Dict[str, int]) -> Dict[str, Optional[float]]:
+    return {f"p{q}": percentile(hist, q) for q in PERCENTILES}
+
+
+class UsageRollups:
+    """Maintains and reads ``llm_usage_daily``."""
+
+    def __init__(self, db=None, retention_days: int = LLM_USAGE_RETENTION_DAYS):
+        self.db = db
+        self.retention_days = retention_days
+        self.state = RollupState("LLM usage", "llm_usage_rollup_state", "llm_usage_daily", DAY,
+                                 LLM_USAGE_ROLLUP_SETTLE_SECONDS, state_id="daily", db=db)
+
+    def set_db(self, db):
+        """Set database connection."""
+        self.db = db
+        self.state.set_db(db)
+
+    # ---------- incremental writes ----------
+
+    async def record(self, event: Dict[str, Any]):
+        """Add a persisted event to its rollup row. Failures are logged; rebuild repairs them."""
+        try:
+            await self.state.mark_incremental_once(rollup_key(event)[0])
+            await self.db.llm_usage_daily.bulk_write([event_update(event)], ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to update LLM usage rollup: {e}")
+
+    # ---------- reads ----------
+
+    async def is_ready(self) -> bool:
+        """True once rollups cover every day (cached; it never reverts)."""
+        return await self.state.is_ready()
+
+    async def _raw_rows(self, start: datetime, end: datetime) -> Dict[RollupKey, Dict[str, Any]]:
+        rows: Dict[RollupKey, Dict[str, Any]] = {}
+        projection = {"_id": 0, "ts_utc": 1, "status": 1, "tier": 1, "endpoint_name": 1, "model_used": 1,
+                      **{field: 1 for field in HISTOGRAMS.values()}}
+        cursor = self.db.llm_usage_events.find(
+            {"ts_utc": {"$gte": start, "$lt": end}}, projection
+        ).batch_size(RAW_BATCH_SIZE)
+        async for event in cursor:
+            fold(rows, event)
+        return rows
+
+    async def load_rows(self, since: datetime) -> List[Dict[str, Any]]:
+        """Rollup rows from ``since``: full days from the rollups, the partial first day from raw events."""
+        first_day = day_of(since)
+        retained = await self._retained_since()
+        if retained and first_day < retained:
+            # Raw events of the first day are gone; count the whole day
+            boundary, edge = first_day, []
+        else:
+            boundary = next_day(first_day)
+            edge = list((await self._raw_rows(since, day_start(boundary))).values())
+        rows = await self.db.llm_usage_daily.find(
+            {"day": {"$gte": boundary}}, {"_id": 0, "rebuild_id": 0}
+        ).to_list(None)
+        return rows + edge
+
+    async def summary(self, since: datetime) -> Dict[str, Any]:
+        """``daily_breakdown``, ``top_endpoints`` and ``percentiles`` from the rollups."""
+        rows = await self.load_rows(since)
+
+        daily: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        overall = {name: {} for name in HISTOGRAMS}
+        for row in rows:
+            entry = daily.setdefault((row["day"], row.get("status")), {
+                "count": 0, "total_cost": 0.0, "total_tokens_in": 0, "total_tokens_out": 0, "latency": 0.0,
+            })
+            entry["count"] += row["count"]
+            entry["total_cost"] += row["cost_usd"]
+            entry["total_tokens_in"] += row["tokens_in"]
+            entry["total_tokens_out"] += row["tokens_out"]
+            entry["latency"] += row["latency_ms_sum"]
+            if row.get("status") not in SPENDING_STATUSES:
+                continue
+            endpoint = endpoints.setdefault(row.get("endpoint_name"), {
+                "count": 0, "total_cost": 0.0, "latency": {},
+            })
+            endpoint["count"] += row["count"]
+            endpoint["total_cost"] += row["cost_usd"]
+            merge_hist(endpoint["latency"], row["hist"]["latency_ms"])
+            for name in HISTOGRAMS:
+                merge_hist(overall[name], row["hist"][name])
+
+        daily_breakdown = [
+            {
+                "_id": {"date": date, "status": status},
+                "count": e["count"],
+                "total_cost": e["total_cost"],
+                "total_tokens_in": e["total_tokens_in"],
+                "total_tokens_out": e["total_tokens_out"],
+                "avg_latency": e["latency"] / e["count"] if e["count"] else None,
+            }
+            for (date, status), e in sorted(daily.items(), key=lambda item: item[0][0], reverse=True)
+        ][:100]
+        top_endpoints = [
+            {"_id": name, "count": e["count"], "total_cost": e["total_cost"],
+             "latency_ms": _percentiles(e["latency"])}
+            for name, e in sorted(endpoints.items(), key=lambda item: -item[1]["total_cost"])[:10]
+        ]
+        return {
+            "daily_breakdown": daily_breakdown,
+            "top_endpoints": top_endpoints,
+            "percentiles": {name: _percentiles(hist) for name, hist in overall.items()},
+        }
+
+    # ---------- maintenance ----------
+
+    async def _retained_since(self) -> Optional[str]:
+        """First day whose raw events are all still retained (None: no TTL applied)."""
+        days = (await self.state.get()).get("retention_days")
+        if not days:
+            return None
+        return next_day(day_of(datetime.now(timezone.utc) - timedelta(days=days)))
+
+    async def rebuild(self, since_day: Optional[str] = None, until_day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recompute days in [since_day, until_day) from the raw events.
+
+        ``until_day`` defaults to the latest settled day; ``since_day`` to the
+        day of the oldest event. Days whose raw events have expired are
+        skipped. Applies retention once the rollups are ready.
+        """
+        if since_day is None:
+            oldest = await self.db.llm_usage_events.find_one({}, {"ts_utc": 1}, sort=[("ts_utc", 1)])
+            since_day = rollup_key(oldest)[0] if oldest else None
+        retained = await self._retained_since()
+        if since_day and retained:
+            since_day = max(since_day, retained)
+
+        result = await self.state.rebuild(self._rebuild_range, since_day, until_day)
+        result["retention"] = await self.apply_retention() if result["ready"] else None
+        return result
+
+    async def _rebuild_range(self, start: str, end: str, rebuild_id: str) -> int:
+        rows = await self._raw_rows(day_start(start), day_start(end))
+        return await replace_rows(
+            self.db.llm_usage_daily, ((key_filter(key), row) for key, row in rows.items()),
+            {"day": {"$gte": start, "$lt": end}}, rebuild_id,
+        )
+
+    async def apply_retention(self) -> Dict[str, Any]:
+        """
+        Make the ``ts_utc`` index of ``llm_usage_events`` match the retention
+        setting: a TTL index of ``retention_days``, or none when 0. Does
+        nothing until the rollups are ready.
+        """
+        if not await self.is_ready():
+            return {"applied": False, "reason": "rollups not ready"}
+
+        expire = self.retention_days * 86400
+        existing = None
+        for name, info in (await self.db.llm_usage_events.index_information()).items():
+            if info.get("key") == [("ts_utc", 1)]:
+                existing = (name, info.get("expireAfterSeconds"))
+
+        if existing and existing[1] == (expire or None):
+            action = "unchanged"
+        elif existing and existing[1] is not None and expire:
+            await self.db.command({
+                "collMod": "llm_usage_events",
+                "index": {"name": existing[0], "expireAfterSeconds": expire},
+            })
+            action = "updated"
+        else:
+            if existing:
+                await self.db.llm_usage_events.drop_index(existing[0])
+            if expire:
+                await self.db.llm_usage_events.create_index(
+                    [("ts_utc", ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=expire
+                )
+            action = "created" if expire else "removed"
+
+        await self.state.set(retention_days=self.retention_days)
+        if action != "unchanged":
+            logger.info(f"LLM usage retention {action}: {self.retention_days} days")
+        return {"applied": True, "action": action, "retention_days": self.retention_days}
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.state.status()
+
+
+_usage_rollups: Optional[UsageRollups] = None
+
+
+def get_usage_rollups(db=None) -> UsageRollups:
+    """Get or create singleton usage rollups."""
+    global _usage_rollups
+    if _usage_rollups is None:
+        _usage_rollups = UsageRollups(db)
+    elif db is not None and db is not _usage_rollups.db:
+        _usage_rollups.set_db(db)
+    return _usage_rollups
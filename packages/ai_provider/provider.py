@@ -8,6 +8,12 @@ from abc import ABC, abstractmethod
 from typing import Optional, List, Dict, Any
 from openai import OpenAI, AsyncOpenAI
 
+try:
+    # Pooled outbound clients live in apps/api; the SDK default is used elsewhere
+    from utils.http_clients import get_http_client
+except ImportError:
+    get_http_client = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,8 +70,19 @@ class OpenAIProvider(AIProvider):
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self._client: Optional[AsyncOpenAI] = None
+        self._http_client = None
         self.sync_client = OpenAI(api_key=self.api_key)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """AsyncOpenAI on the app's pooled ``openai`` HTTP client when available."""
+        http_client = get_http_client("openai") if get_http_client else None
+        if self._client is None or http_client is not self._http_client:
+            kwargs = {"http_client": http_client, "timeout": http_client.timeout} if http_client else {}
+            self._client = AsyncOpenAI(api_key=self.api_key, **kwargs)
+            self._http_client = http_client
+        return self._client
     
     def _resolve_model(self, model: str) -> str:
         """Resolve model name to actual OpenAI model."""
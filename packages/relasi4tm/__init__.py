@@ -7,6 +7,7 @@ Components:
 - scoring_service: Deterministic scoring service (no AI)
 - prompts: RELASI4™ prompt registry
 - reports: Report generation service
+- leaderboards: Materialized COUPLE/FAMILY leaderboards
 - schemas: Input/output JSON schemas
 """
 
@@ -26,6 +27,10 @@ from .scoring_service import (
     get_color_hex,
     get_conflict_description,
 )
+from .leaderboards import (
+    ReportLeaderboards,
+    get_report_leaderboards,
+)
 
 __all__ = [
     'RELASI4ScoringService',
@@ -42,5 +47,7 @@ __all__ = [
     'archetype_to_color',
     'get_color_hex',
     'get_conflict_description',
+    'ReportLeaderboards',
+    'get_report_leaderboards',
 ]
 
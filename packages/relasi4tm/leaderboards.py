@@ -0,0 +1,201 @@
+"""
+RELASI4™ Report Leaderboards
+============================
+Materialized public leaderboards for COUPLE and FAMILY reports.
+
+``r4_leaderboards`` holds one document per report type:
+- ``entries``: the top ``LEADERBOARD_SIZE`` reports by score, already
+  projected to the public fields and sorted (score desc, newest first)
+- ``total``: number of reports of that type
+
+Maintenance:
+- ``record()``: ``_save_report`` calls it for each newly inserted COUPLE or
+  FAMILY report. One ``update_one`` increments ``total`` and pushes the
+  entry with ``$sort`` + ``$slice``, so the document is never read back
+  and concurrent saves cannot lose each other's entries.
+- ``remove()``: admin deletion. Decrements ``total``, or rebuilds the
+  document when the report was on the board so it keeps its full length.
+- ``rebuild()``: recomputes a document from ``r4_reports`` (one sorted
+  query and one count). Reads build a missing document on first use;
+  ``scripts/rebuild_leaderboards.py`` repairs existing ones.
+
+Reads (``get()``) are one ``find_one`` by ``_id``, cached per worker for
+``LEADERBOARD_CACHE_SECONDS``. Records on the same worker drop the cached
+copy immediately; other workers pick them up when their copy expires.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SIZE = int(os.environ.get("LEADERBOARD_SIZE", 100))
+LEADERBOARD_CACHE_SECONDS = float(os.environ.get("LEADERBOARD_CACHE_SECONDS", 30))
+
+# report_type -> score field and the public fields stored per entry
+LEADERBOARDS = {
+    "COUPLE": {
+        "score": "compatibility_summary.compatibility_score",
+        "fields": [
+            "report_id",
+            "compatibility_summary.compatibility_score",
+            "compatibility_summary.compatibility_level",
+            "person_a_profile.primary_color",
+            "person_a_profile.archetype",
+            "person_b_profile.primary_color",
+            "person_b_profile.archetype",
+            "created_at",
+        ],
+    },
+    "FAMILY": {
+        "score": "family_summary.harmony_score",
+        "fields": [
+            "report_id",
+            "family_name",
+            "family_summary.harmony_score",
+            "member_profiles",
+            "created_at",
+        ],
+    },
+}
+
+
+def leaderboard_sort(report_type: str) -> List[Tuple[str, int]]:
+    return [(LEADERBOARDS[report_type]["score"], -1), ("created_at", -1)]
+
+
+def leaderboard_entry(report_type: str, report: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a report to its public leaderboard fields (like a find projection)."""
+    entry: Dict[str, Any] = {}
+    for path in LEADERBOARDS[report_type]["fields"]:
+        *parents, last = path.split(".")
+        source, target = report, entry
+        for part in parents:
+            source = source.get(part) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(part, {})
+        else:
+            if last in source:
+                target[last] = source[last]
+    return entry
+
+
+class ReportLeaderboards:
+    """Maintains and serves ``r4_leaderboards``."""
+
+    def __init__(self, db: AsyncIOMotorDatabase = None, size: int = LEADERBOARD_SIZE,
+                 ttl: float = LEADERBOARD_CACHE_SECONDS):
+        self.db = db
+        self.size = size
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def set_db(self, db: AsyncIOMotorDatabase):
+        """Set database connection."""
+        self.db = db
+        self.invalidate()
+
+    def invalidate(self, report_type: Optional[str] = None):
+        if report_type is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(report_type, None)
+
+    # ---------- writes ----------
+
+    async def record(self, report: Dict[str, Any]):
+        """Count a newly saved report and push it onto its board. Failures are logged; rebuild repairs them."""
+        report_type = report.get("report_type")
+        if report_type not in LEADERBOARDS:
+            return
+        try:
+            # No upsert: a missing board is built from r4_reports on first read,
+            # which already includes this report
+            await self.db.r4_leaderboards.update_one(
+                {"_id": report_type},
+                {
+                    "$inc": {"total": 1},
+                    "$push": {"entries": {
+                        "$each": [leaderboard_entry(report_type, report)],
+                        "$sort": dict(leaderboard_sort(report_type)),
+                        "$slice": self.size,
+                    }},
+                    "$set": {"updated_at": datetime.now(timezone.utc)},
+                },
+            )
+        except Exception as e:
+            logger.error(f"Failed to update {report_type} leaderboard: {e}")
+        self.invalidate(report_type)
+
+    async def remove(self, report_type: Optional[str], report_id: str):
+        """Take a deleted report off its board."""
+        if report_type not in LEADERBOARDS:
+            return
+        on_board = await self.db.r4_leaderboards.find_one(
+            {"_id": report_type, "entries.report_id": report_id}, {"_id": 1}
+        )
+        if on_board:
+            await self.rebuild(report_type)
+        else:
+            await self.db.r4_leaderboards.update_one({"_id": report_type}, {"$inc": {"total": -1}})
+        self.invalidate(report_type)
+
+    async def rebuild(self, report_type: str) -> Dict[str, Any]:
+        """Recompute a board from r4_reports."""
+        projection = {"_id": 0, **{path: 1 for path in LEADERBOARDS[report_type]["fields"]}}
+        entries = await self.db.r4_reports.find(
+            {"report_type": report_type}, projection
+        ).sort(leaderboard_sort(report_type)).limit(self.size).to_list(length=self.size)
+        board = {
+            "entries": entries,
+            "total": await self.db.r4_reports.count_documents({"report_type": report_type}),
+            "updated_at": datetime.now(timezone.utc),
+        }
+        await self.db.r4_leaderboards.replace_one({"_id": report_type}, board, upsert=True)
+        self.invalidate(report_type)
+        return board
+
+    # ---------- reads ----------
+
+    async def get(self, report_type: str) -> Dict[str, Any]:
+        """The board for report_type: ``{"entries": [...], "total": n}``."""
+        entry = self._entries.get(report_type)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        lock = self._locks.setdefault(report_type, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(report_type)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            board = await self.db.r4_leaderboards.find_one({"_id": report_type}, {"_id": 0, "updated_at": 0})
+            if board is None:
+                board = await self.rebuild(report_type)
+            board = {"entries": board.get("entries", []), "total": board.get("total", 0)}
+            self._entries[report_type] = (time.monotonic(), board)
+            return board
+
+    async def top(self, report_type: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Top ``limit`` entries (capped at the stored size) and the total."""
+        board = await self.get(report_type)
+        return board["entries"][:max(0, min(limit, self.size))], board["total"]
+
+
+_report_leaderboards: Optional[ReportLeaderboards] = None
+
+
+def get_report_leaderboards(db: AsyncIOMotorDatabase = None) -> ReportLeaderboards:
+    """Get or create report leaderboards singleton."""
+    global _report_leaderboards
+    if _report_leaderboards is None:
+        _report_leaderboards = ReportLeaderboards(db)
+    elif db is not None and db is not _report_leaderboards.db:
+        _report_leaderboards.set_db(db)
+    return _report_leaderboards
@@ -25,6 +25,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ai_gateway import call_llm_guarded, GuardedLLMContext, LLMStatus
+from relasi4tm.leaderboards import get_report_leaderboards
 
 # ========================
 # RELASI4™ PROMPT REGISTRY
@@ -647,13 +648,15 @@ Berikan output JSON saja, tanpa markdown code block."""
         raise ValueError("No valid JSON found in output")
     
     async def _save_report(self, report_data: Dict[str, Any]):
-        """Save report to r4_reports collection."""
+        """Save report to r4_reports collection (and new COUPLE/FAMILY reports to their leaderboard)."""
         report_data["created_at"] = datetime.now(timezone.utc)
-        await self.db.r4_reports.update_one(
+        result = await self.db.r4_reports.update_one(
             {"report_id": report_data["report_id"]},
             {"$set": report_data},
             upsert=True
         )
+        if result.upserted_id is not None:
+            await get_report_leaderboards(self.db).record(report_data)
     
     async def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
         """Get a saved report by ID."""
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Query Plan Audit Script
+Creates the registered indexes in a scratch database on a local mongod,
+explains every query in apps/api/utils/query_audit.py and exits non-zero
+if any plan needs a COLLSCAN or an in-memory SORT. Meant as a CI gate
+next to the test suite; the scratch database is dropped afterwards.
+
+Usage: python3 scripts/audit_query_plans.py [--keep]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from utils.indexes import ensure_indexes  # noqa: E402
+from utils.query_audit import AUDIT_QUERIES, audit  # noqa: E402
+
+
+async def run_audit(keep=False):
+    mongo_url = os.environ.get("QUERY_AUDIT_MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("QUERY_AUDIT_DB_NAME", "relasi4warna_query_audit")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Scratch database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    try:
+        report = await ensure_indexes(db)
+        if report["failed"]:
+            print(f"✗ Indexes failed: {', '.join(report['failed'])}")
+            sys.exit(1)
+        print(f"✓ {len(report['created'])} indexes in place")
+
+        print(f"\nExplaining {len(AUDIT_QUERIES)} queries...")
+        results = await audit(db)
+        failures = [r for r in results if r["problems"]]
+        for r in results:
+            mark = "✗" if r["problems"] else "✓"
+            detail = f" - {', '.join(r['problems'])}" if r["problems"] else ""
+            print(f"  {mark} {r['collection']:<22} {r['source']}{detail}")
+    finally:
+        if not keep:
+            await client.drop_database(db_name)
+        client.close()
+
+    if failures:
+        print(f"\n✗ {len(failures)} queries need an index (see utils/indexes.py)")
+        sys.exit(1)
+    print("\n✓ All query plans use indexes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail on COLLSCAN / in-memory SORT query plans")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database")
+    args = parser.parse_args()
+    asyncio.run(run_audit(keep=args.keep))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Admin Dashboard Benchmark
+Latency of /api/admin/dashboard/overview in three versions:
+- the old handler: 9 count_documents + 3 aggregations, awaited one by one
+- AdminDashboard.compute_overview: 4 concurrent queries ($facet)
+- a cache hit
+Every fake query costs one simulated round trip plus server time.
+
+Usage:
+    python3 scripts/bench/bench_admin_dashboard.py [query_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from common import setup_api_path
+
+setup_api_path()
+
+from services.admin_dashboard import AdminDashboard  # noqa: E402
+
+ITERATIONS = 20
+
+
+class Cursor:
+    def __init__(self, db, rows):
+        self.db = db
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self.db.query_s)
+        return self.rows
+
+
+class Collection:
+    def __init__(self, db):
+        self.db = db
+
+    async def count_documents(self, query):
+        await asyncio.sleep(self.db.query_s)
+        return 1
+
+    async def estimated_document_count(self):
+        await asyncio.sleep(self.db.query_s)
+        return 1
+
+    def aggregate(self, pipeline):
+        return Cursor(self.db, [{}])
+
+
+class DB:
+    def __init__(self, query_ms):
+        self.query_s = query_ms / 1000
+        self.users = self.results = self.payments = self.quiz_attempts = Collection(self)
+
+
+async def legacy_overview(db):
+    for _ in range(3):
+        await db.users.count_documents({})
+    for _ in range(3):
+        await db.results.count_documents({})
+    for _ in range(3):
+        await db.payments.count_documents({})
+    for _ in range(3):
+        await db.results.aggregate([]).to_list(10)
+
+
+async def measure(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    query_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    db = DB(query_ms)
+    dashboard = AdminDashboard(db, ttl=60)
+
+    async def run():
+        before = await measure(lambda: legacy_overview(db))
+        concurrent = await measure(dashboard.compute_overview)
+        await dashboard.overview()
+        cached = await measure(dashboard.overview)
+        return before, concurrent, cached
+
+    before, concurrent, cached = asyncio.run(run())
+    print(f"{query_ms} ms per query\n")
+    print(f"{'sequential (old)':<32} {before:>8.2f} ms")
+    print(f"{'concurrent $facet':<32} {concurrent:>8.2f} ms   x{before / concurrent:.1f}")
+    print(f"{'cache hit':<32} {cached:>8.3f} ms   x{before / max(cached, 1e-6):.0f}")
+
+
+if __name__ == "__main__":
+    main()
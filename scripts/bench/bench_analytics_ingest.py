@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Analytics Ingestion Benchmark
+Compares the old per-event writes of /relasi4/analytics/track (insert_one +
+daily upsert on every event) with AnalyticsBuffer (insert_many + coalesced
+$inc upserts per flush). A fake DB stands in for MongoDB: every operation
+costs one simulated round trip and is counted.
+
+Usage:
+    python3 scripts/bench/bench_analytics_ingest.py [events] [round_trip_ms]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from common import report, setup_api_path
+
+setup_api_path()
+
+from services.analytics_buffer import AnalyticsBuffer  # noqa: E402
+
+CONCURRENCY = 50
+NEEDS = ["security", "approval", "control", "freedom"]
+CONFLICTS = ["avoid", "confront", "accommodate", "compromise"]
+VARIANTS = ["A", "B", "C"]
+PACKAGES = ["single", "couple", "family"]
+
+
+class FakeCollection:
+    def __init__(self, db):
+        self.db = db
+
+    async def _round_trip(self):
+        self.db.ops += 1
+        await asyncio.sleep(self.db.round_trip)
+
+    async def insert_one(self, doc):
+        await self._round_trip()
+
+    async def update_one(self, query, update, upsert=False):
+        await self._round_trip()
+
+    async def insert_many(self, docs, ordered=True):
+        await self._round_trip()
+
+    async def bulk_write(self, ops, ordered=True):
+        await self._round_trip()
+
+
+class FakeDB:
+    def __init__(self, round_trip_ms: float):
+        self.round_trip = round_trip_ms / 1000
+        self.ops = 0
+        self.r4_analytics = FakeCollection(self)
+        self.r4_analytics_daily = FakeCollection(self)
+
+
+def make_events(count: int):
+    rng = random.Random(42)
+    return [
+        ({"event_id": f"evt_{i}", "event": "cta_view"},
+         ("2026-01-01", rng.choice(NEEDS), rng.choice(CONFLICTS), rng.choice(VARIANTS), rng.choice(PACKAGES)),
+         rng.random() < 0.05)
+        for i in range(count)
+    ]
+
+
+async def drive(handler, events):
+    queue = iter(events)
+
+    async def worker():
+        for item in queue:
+            await handler(*item)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return time.perf_counter() - start
+
+
+async def run_legacy(events, round_trip_ms):
+    db = FakeDB(round_trip_ms)
+
+    async def handler(event, key, conversion):
+        await db.r4_analytics.insert_one(event)
+        date, need, conflict, variant, package = key
+        await db.r4_analytics_daily.update_one(
+            {"date": date, "primary_need": need, "primary_conflict_style": conflict,
+             "cta_variant": variant, "package_type": package},
+            {"$inc": {"count": 1, "conversions": 1 if conversion else 0}},
+            upsert=True,
+        )
+
+    elapsed = await drive(handler, events)
+    return len(events) / elapsed, db.ops
+
+
+async def run_buffered(events, round_trip_ms):
+    db = FakeDB(round_trip_ms)
+    buffer = AnalyticsBuffer(db)
+
+    async def handler(event, key, conversion):
+        buffer.add(event, key, conversion)
+
+    elapsed = await drive(handler, events)
+    await buffer.stop()  # flush the tail (not part of request latency)
+    return len(events) / elapsed, db.ops
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    round_trip_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    events = make_events(count)
+    print(f"{count} events, {CONCURRENCY} concurrent clients, {round_trip_ms} ms per DB round trip\n")
+    before_rate, before_ops = asyncio.run(run_legacy(events, round_trip_ms))
+    after_rate, after_ops = asyncio.run(run_buffered(events, round_trip_ms))
+    report("Track throughput (events/s)", before_rate, after_rate, unit="ev/s")
+    print(f"{'DB operations':<48} before {before_ops:>12,}        after {after_ops:>12,}        "
+          f"x{before_ops / max(after_ops, 1):.0f} fewer")
+
+
+if __name__ == "__main__":
+    main()
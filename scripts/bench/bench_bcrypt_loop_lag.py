@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+bcrypt Event-Loop Lag Benchmark
+Fires N concurrent "logins" (bcrypt verify) and measures how late a 5 ms
+ticker on the same event loop fires. Compares inline bcrypt (before)
+with utils.passwords (bounded pool + fail-fast admission).
+
+Usage:
+    python3 scripts/bench/bench_bcrypt_loop_lag.py [logins] [rounds]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from common import setup_api_path
+
+setup_api_path()
+
+import bcrypt  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+from utils.passwords import PasswordHasher, verify_password_sync  # noqa: E402
+
+TICK_SECONDS = 0.005
+
+
+async def measure(login, logins: int):
+    lags = []
+    done = False
+
+    async def ticker():
+        while not done:
+            expected = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append((time.perf_counter() - expected) * 1000)
+
+    tick_task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(TICK_SECONDS * 2)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[login() for _ in range(logins)], return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick_task
+
+    rejected = sum(1 for r in results if isinstance(r, HTTPException) and r.status_code == 503)
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "ok": logins - rejected,
+        "rejected": rejected,
+        "lag_p50_ms": statistics.median(lags),
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1],
+        "lag_max_ms": lags[-1],
+    }
+
+
+def print_row(label, r):
+    print(f"{label:<28} total {r['elapsed_s']:6.2f}s  ok {r['ok']:>4}  503 {r['rejected']:>4}  "
+          f"loop lag p50 {r['lag_p50_ms']:8.1f} ms  p99 {r['lag_p99_ms']:8.1f} ms  max {r['lag_max_ms']:8.1f} ms")
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    hashed = bcrypt.hashpw(b"Rahasia123!", bcrypt.gensalt(rounds=rounds)).decode()
+
+    async def inline_login():
+        return verify_password_sync("Rahasia123!", hashed)
+
+    print(f"{logins} concurrent logins, bcrypt cost {rounds}\n")
+    print_row("before (inline bcrypt)", asyncio.run(measure(inline_login, logins)))
+
+    for workers, queue in ((4, 32), (4, logins)):
+        hasher = PasswordHasher(workers=workers, max_queue=queue)
+
+        async def pooled_login():
+            return await hasher.verify("Rahasia123!", hashed)
+
+        print_row(f"after (pool {workers}, queue {queue})", asyncio.run(measure(pooled_login, logins)))
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+HITL Export Benchmark
+Peak RSS and time to export N risk assessments. The old export_hitl_data
+loaded every document (to_list) and serialized the whole export at once.
+The streaming export (services/hitl_export.py) writes batches to the
+response as it goes. A fake cursor generates documents lazily, the way
+a motor cursor fetches batches, and the output bytes are discarded as a
+socket would. Each variant runs in a fresh process because ru_maxrss only
+grows.
+
+Usage:
+    python3 scripts/bench/bench_hitl_export.py [rows]
+"""
+
+import asyncio
+import resource
+import subprocess
+import sys
+import time
+
+from common import setup_api_path
+
+setup_api_path()
+
+import orjson  # noqa: E402
+
+from services.hitl_export import iter_csv, iter_json, iter_ndjson  # noqa: E402
+
+FROM = "2026-01-01T00:00:00+00:00"
+
+
+def make_doc(i):
+    return {
+        "assessment_id": f"ra_{i:08d}",
+        "user_id_hash": f"{i * 2654435761 % 2**32:08x}",
+        "result_id": f"res_{i:08d}",
+        "series": "couples",
+        "risk_level": "level_2" if i % 7 else "level_3",
+        "risk_score": i % 100,
+        "detected_keywords": ["lelah", "sendiri"] if i % 3 == 0 else [],
+        "flags": ["yellow_keyword"] if i % 3 == 0 else [],
+        "language": "id",
+        "created_at": f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00",
+    }
+
+
+class Cursor:
+    def __init__(self, n):
+        self.n = n
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for i in range(self.n):
+            if i % 1000 == 0:
+                await asyncio.sleep(0)  # a batch round trip
+            yield make_doc(i)
+
+    async def to_list(self, length=None):
+        return [make_doc(i) for i in range(min(self.n, length or self.n))]
+
+
+class Collection:
+    def __init__(self, n):
+        self.n = n
+
+    def find(self, query, projection=None):
+        return Cursor(self.n)
+
+    async def find_one(self, query, projection=None, sort=None):
+        return make_doc(0) if self.n else None
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        class Keys:
+            async def to_list(_, length=None):
+                return [{"_id": k} for k in make_doc(0)]
+        return Keys()
+
+
+class DB:
+    def __init__(self, n):
+        self.risk_assessments = Collection(n)
+        self.moderation_queue = Collection(0)
+        self.audit_logs = Collection(0)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+async def legacy(db, n):
+    # Old handler: to_list per collection, one dict, one serialization
+    assessments = await db.risk_assessments.find({}).to_list(n)
+    export = {"risk_assessments": assessments, "moderation_queue": [], "audit_logs": [],
+              "summary": {"total_assessments": len(assessments)}}
+    return len(orjson.dumps(export))
+
+
+async def drain(chunks):
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def run_variant(variant, n):
+    db = DB(n)
+    names = ["risk_assessments", "moderation_queue", "audit_logs"]
+    start = time.perf_counter()
+    if variant == "legacy":
+        size = asyncio.run(legacy(db, n))
+    elif variant == "json":
+        size = asyncio.run(drain(iter_json(db, names, FROM, 30)))
+    elif variant == "ndjson":
+        size = asyncio.run(drain(iter_ndjson(db, names, FROM)))
+    else:
+        size = asyncio.run(drain(iter_csv(db, "risk_assessments", FROM)))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak_mb:.1f} {size}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--variant":
+        run_variant(sys.argv[2], int(sys.argv[3]))
+        return
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{n:,} risk assessments\n")
+    baseline = None
+    for variant, label in (("legacy", "to_list + json (old)"), ("json", "streamed json"),
+                           ("ndjson", "streamed ndjson"), ("csv", "streamed csv")):
+        out = subprocess.run([sys.executable, __file__, "--variant", variant, str(n)],
+                             capture_output=True, text=True, check=True).stdout.split()
+        elapsed, peak_mb, size = float(out[0]), float(out[1]), int(out[2])
+        baseline = baseline or peak_mb
+        print(f"{label:<24} {elapsed:>7.2f} s   peak RSS {peak_mb:>8.1f} MB   "
+              f"output {size / 2**20:>8.1f} MB   x{baseline / peak_mb:.1f} less memory")
+
+
+if __name__ == "__main__":
+    main()
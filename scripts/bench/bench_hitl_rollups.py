@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+HITL Rollups Benchmark
+Work per request for the HITL analytics endpoints over a 30-day window:
+- documents the pipelines read: raw events vs hitl_daily rows (computed
+  from a synthetic event log with services.hitl_rollups keys)
+- moderator performance round trips: grouped audit logs plus one users
+  query per moderator vs one pipeline with $lookup
+- timeline restructuring: the old nested next() scan per (date, level) vs
+  the pivoted rows, for daily and hourly intervals
+
+Usage:
+    python3 scripts/bench/bench_hitl_rollups.py [events_per_day]
+"""
+
+import random
+import sys
+import time
+
+from common import setup_api_path
+
+setup_api_path()
+
+from services.hitl_analytics import RISK_LEVELS  # noqa: E402
+
+DAYS = 30
+MODERATORS = 25
+ACTIONS = ["approve_as_is", "approve_with_buffer", "edit_output", "safe_response_only", "escalate"]
+KEYWORDS = [f"kw_{i}" for i in range(60)]
+STATUSES = ["pending", "approved", "approved_with_buffer", "edited", "safe_response_only", "escalated"]
+
+
+def legacy_restructure(timeline_data):
+    dates = sorted(set(item["_id"]["date"] for item in timeline_data))
+    series = {level: [] for level in RISK_LEVELS}
+    for date in dates:
+        for level in RISK_LEVELS:
+            count = next(
+                (item["count"] for item in timeline_data
+                 if item["_id"]["date"] == date and item["_id"]["level"] == level),
+                0
+            )
+            series[level].append({"date": date, "count": count})
+    return dates, series
+
+
+def pivot(rows):
+    return [row["_id"] for row in rows], {
+        level: [{"date": row["_id"], "count": row[level]} for row in rows] for level in RISK_LEVELS
+    }
+
+
+def grouped(dates):
+    groups = [{"_id": {"date": d, "level": lvl}, "count": 1} for d in dates for lvl in RISK_LEVELS]
+    rows = [{"_id": d, **{lvl: 1 for lvl in RISK_LEVELS}} for d in dates]
+    return groups, rows
+
+
+def measure(fn, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(1)
+    keys = {metric: set() for metric in ("risk_level", "keyword", "queue_status", "response", "moderator_action")}
+    for day in range(DAYS):
+        for _ in range(per_day):
+            keys["risk_level"].add((day, rng.choice(RISK_LEVELS)))
+            for kw in rng.sample(KEYWORDS, 2):
+                keys["keyword"].add((day, kw))
+            keys["queue_status"].add((day, rng.choice(STATUSES)))
+            keys["response"].add(day)
+            keys["moderator_action"].add((day, rng.randrange(MODERATORS), rng.choice(ACTIONS)))
+
+    events = DAYS * per_day
+    raw_reads = {  # overview + timeline + moderator performance + get_hitl_stats (30 days of history)
+        "risk_assessments": events * 4,
+        "moderation_queue": events * 3,
+        "audit_logs": events,
+    }
+    rollup_reads = (len(keys["risk_level"]) * 3 + len(keys["keyword"]) + len(keys["queue_status"]) * 2
+                    + len(keys["response"]) + len(keys["moderator_action"]))
+    print(f"{DAYS} days x {per_day:,} events/day, {MODERATORS} moderators\n")
+    print(f"{'documents read (4 endpoints)':<40} raw {sum(raw_reads.values()):>12,}   "
+          f"rollups {rollup_reads:>8,}   x{sum(raw_reads.values()) / rollup_reads:,.0f}")
+    print(f"{'moderator performance round trips':<40} raw {1 + MODERATORS:>12}   rollups {1:>8}")
+
+    for label, dates in (("timeline restructure, daily", [f"d{i:02d}" for i in range(DAYS)]),
+                         ("timeline restructure, hourly", [f"d{i:02d} {h:02d}" for i in range(DAYS)
+                                                            for h in range(24)])):
+        groups, rows = grouped(dates)
+        iterations = 20 if len(dates) < 100 else 1
+        before = measure(legacy_restructure, groups, iterations)
+        after = measure(pivot, rows, iterations)
+        assert legacy_restructure(groups) == pivot(rows)
+        print(f"{label:<40} old {before:>10.2f} ms   pivot {after:>8.3f} ms   x{before / after:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+JSON Serialization Benchmark
+Compares FastAPI's default jsonable_encoder + json.dumps path (before)
+with utils.serialization.ORJSONResponse (after) on representative
+report, history and HITL export payloads.
+
+Usage:
+    python3 scripts/bench/bench_json_serialization.py [iterations]
+"""
+
+import sys
+
+from common import setup_api_path, timeit, report
+
+setup_api_path()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from utils.serialization import ORJSONResponse  # noqa: E402
+
+
+def report_payload() -> dict:
+    """Premium report with ~60 KB of markdown."""
+    section = (
+        "## Pola Komunikasi Anda\n"
+        "Sebagai **Driver** dengan sentuhan *Spark*, Anda cenderung langsung ke inti masalah. "
+        "Dalam hubungan, hal ini bisa terasa seperti ketegasan — atau tekanan. 🔥\n\n"
+        "- Dengarkan dulu sebelum menawarkan solusi\n- Validasi perasaan pasangan\n\n"
+    )
+    return {
+        "report_id": "report_1a2b3c4d5e6f",
+        "result_id": "result_1a2b3c4d5e6f",
+        "language": "id",
+        "content": section * 200,
+        "is_preview": False,
+        "scores": {"driver": 12, "spark": 8, "anchor": 4, "analyst": 2},
+        "hitl_status": "approved",
+        "created_at": "2025-01-22T23:57:28.123456+00:00",
+    }
+
+
+def history_payload() -> dict:
+    """get_history: 50 results."""
+    return {"results": [
+        {
+            "result_id": f"result_{i:012x}",
+            "user_id": "user_1a2b3c4d5e6f",
+            "attempt_id": f"attempt_{i:012x}",
+            "series": ["family", "business", "friendship", "couples"][i % 4],
+            "primary_archetype": "driver",
+            "secondary_archetype": "spark",
+            "scores": {"driver": 10, "spark": 9, "anchor": 4, "analyst": 3},
+            "balance_index": 0.27,
+            "stress_flag": i % 5 == 0,
+            "is_paid": i % 2 == 0,
+            "created_at": "2025-01-22T23:57:28.123456+00:00",
+        }
+        for i in range(50)
+    ]}
+
+
+def export_payload() -> dict:
+    """export_hitl_data: assessments, queue and audit logs."""
+    return {
+        "export_date": "2025-01-22T23:57:28.123456+00:00",
+        "date_range": {"start": "2025-01-01", "end": "2025-01-22"},
+        "assessments": [
+            {
+                "assessment_id": f"ra_{i:012x}",
+                "result_id": f"result_{i:012x}",
+                "user_id": f"user_{i % 300:06d}",
+                "risk_level": i % 3 + 1,
+                "risk_score": i * 7 % 100,
+                "keywords_detected": {"violence": ["pukul"], "self_harm": [], "coercion": ["paksa"]},
+                "stress_flag": i % 4 == 0,
+                "created_at": "2025-01-22T23:57:28.123456+00:00",
+            }
+            for i in range(3000)
+        ],
+        "moderation_queue": [
+            {"queue_id": f"q_{i}", "status": "pending", "risk_level": 2, "created_at": "2025-01-22T23:57:28+00:00"}
+            for i in range(500)
+        ],
+        "audit_logs": [
+            {"log_id": f"log_{i}", "action": "approve", "moderator_id": "admin", "timestamp": "2025-01-22T23:57:28+00:00"}
+            for i in range(500)
+        ],
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    cases = [
+        ("report (markdown)", report_payload(), iterations * 10),
+        ("history (50 results)", history_payload(), iterations * 10),
+        ("hitl export (4000 docs)", export_payload(), max(iterations // 10, 5)),
+    ]
+    print("JSON serialization throughput\n")
+    for label, payload, n in cases:
+        size_kb = len(ORJSONResponse(payload).body) / 1024
+        before = timeit(lambda: JSONResponse(jsonable_encoder(payload)), n)
+        after = timeit(lambda: ORJSONResponse(payload), n)
+        report(f"{label} [{size_kb:,.0f} KB]", before, after, unit="resp/s")
+
+
+if __name__ == "__main__":
+    main()
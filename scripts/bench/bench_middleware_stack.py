@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Middleware Stack Overhead Benchmark
+Calls an empty endpoint directly over ASGI (no network, no TestClient)
+and compares the old middleware chain (CORS + SecurityHeaders +
+RequestSizeLimit + RateLimit + AuthContext) with SecurityStackMiddleware.
+
+Usage:
+    python3 scripts/bench/bench_middleware_stack.py [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+from common import report, setup_api_path
+
+setup_api_path()
+
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+
+from middleware.auth_context import AuthContextMiddleware  # noqa: E402
+from middleware.rate_limit import RateLimitMiddleware  # noqa: E402
+from middleware.request_size import RequestSizeLimitMiddleware  # noqa: E402
+from middleware.security_headers import SecurityHeadersMiddleware  # noqa: E402
+from middleware.security_stack import SecurityStackMiddleware  # noqa: E402
+
+BODY = b'{"status":"ok"}'
+
+
+async def empty_endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", b"15")]})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+def legacy_stack():
+    app = CORSMiddleware(empty_endpoint, allow_origins=["*"], allow_credentials=True,
+                         allow_methods=["*"], allow_headers=["*"])
+    app = SecurityHeadersMiddleware(app)
+    app = RequestSizeLimitMiddleware(app)
+    app = RateLimitMiddleware(app)
+    return AuthContextMiddleware(app)
+
+
+def fused_stack():
+    return SecurityStackMiddleware(empty_endpoint, cors_origins=["*"])
+
+
+def make_scope():
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/health-check",
+        "raw_path": b"/api/health-check",
+        "query_string": b"",
+        "root_path": "",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+        "headers": [
+            (b"host", b"testserver"),
+            (b"origin", b"https://relasi4warna.com"),
+            (b"accept", b"application/json"),
+            (b"user-agent", b"bench"),
+        ],
+    }
+
+
+async def run(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(make_scope(), receive, send)  # warm up
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(), receive, send)
+    elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"Empty endpoint, {requests} requests, rate limiting disabled\n")
+    before = asyncio.run(run(legacy_stack(), requests))
+    after = asyncio.run(run(fused_stack(), requests))
+    report("Middleware stack (req/s)", before, after, unit="req/s")
+    print(f"{'Per-request overhead':<48} before {1e6 / before:>9.1f} us   after {1e6 / after:>9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Pagination Benchmark
+Page 1 vs page 1000 of an admin listing: the old ``skip()`` + full
+``count_documents`` per request, against keyset cursors (utils.pagination)
+with the cached total. A sorted in-memory list stands in for the
+(created_at, id) index. Like mongod, ``skip`` walks past every skipped
+entry, a cursor seeks straight to its position, and a count scans every
+entry.
+
+Usage:
+    python3 scripts/bench/bench_pagination.py [documents] [page_size]
+"""
+
+import asyncio
+import bisect
+import sys
+
+from common import report, setup_api_path, timeit
+
+setup_api_path()
+
+from utils.pagination import CountCache, encode_cursor, fetch_page  # noqa: E402
+
+SORT = [("created_at", -1), ("user_id", -1)]
+PAGES = (1, 10, 100, 1000)
+
+
+class IndexCursor:
+    def __init__(self, collection, start):
+        self.collection = collection
+        self.position = start
+        self.count = None
+
+    def sort(self, sort):
+        return self
+
+    def skip(self, n):
+        # The server still reads every skipped index entry
+        for _ in range(n):
+            self.position += 1
+            self.collection.examined += 1
+        return self
+
+    def limit(self, n):
+        self.count = n
+        return self
+
+    async def to_list(self, length=None):
+        entries = self.collection.desc[self.position:self.position + self.count]
+        self.collection.examined += len(entries)
+        return [{"created_at": c, "user_id": u} for c, u in entries]
+
+
+class IndexedCollection:
+    name = "users"
+
+    def __init__(self, n):
+        self.asc = [(f"2026-01-01T00:{i // 600 % 60:02d}:{i // 10 % 60:02d}.{i:06d}", f"user_{i:07d}")
+                    for i in range(n)]
+        self.asc.sort()
+        self.desc = self.asc[::-1]
+        self.examined = 0
+
+    def find(self, query, projection=None):
+        start = 0
+        if "$or" in query:
+            # Keyset seek: entries after (created_at, user_id) in descending order
+            tie = next(b for b in query["$or"] if "user_id" in b)
+            key = (tie["created_at"], tie["user_id"]["$lt"])
+            start = len(self.asc) - bisect.bisect_left(self.asc, key)
+        return IndexCursor(self, start)
+
+    async def count_documents(self, query):
+        self.examined += len(self.asc)
+        return len(self.asc)
+
+    async def estimated_document_count(self):
+        return len(self.asc)
+
+
+async def skip_page(collection, page, size):
+    items, _ = await fetch_page(collection, {}, SORT, size, skip=(page - 1) * size)
+    total = await collection.count_documents({})
+    return items, total
+
+
+def cursor_for(collection, page, size):
+    """The cursor a client holds when requesting ``page``."""
+    if page == 1:
+        return None
+    last = collection.desc[(page - 1) * size - 1]
+    return encode_cursor({"created_at": last[0], "user_id": last[1]}, SORT)
+
+
+async def cursor_page(collection, cursor, size, counts):
+    items, _ = await fetch_page(collection, {}, SORT, size, cursor=cursor)
+    total = await counts.total(collection)
+    return items, total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    collection = IndexedCollection(n)
+    counts = CountCache(ttl=60)
+    print(f"{n:,} documents, {size} per page\n")
+
+    for page in PAGES:
+        if (page - 1) * size >= n:
+            break
+        cursor = cursor_for(collection, page, size)
+        skip_items, _ = asyncio.run(skip_page(collection, page, size))
+        keyset_items, _ = asyncio.run(cursor_page(collection, cursor, size, counts))
+        assert skip_items == keyset_items
+
+        collection.examined = 0
+        asyncio.run(skip_page(collection, page, size))
+        skip_examined = collection.examined
+        collection.examined = 0
+        asyncio.run(cursor_page(collection, cursor, size, counts))
+        keyset_examined = collection.examined
+
+        iterations = 20 if page > 10 else 200
+        before = timeit(lambda: asyncio.run(skip_page(collection, page, size)), iterations)
+        after = timeit(lambda: asyncio.run(cursor_page(collection, cursor, size, counts)), iterations)
+        report(f"Page {page} (requests/s)", before, after, unit="req/s")
+        print(f"{'  index entries examined':<48} before {skip_examined:>12,}          "
+              f"after {keyset_examined:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Static Reference Payload Benchmark
+Compares per-call dict rebuild + FastAPI JSON encoding (before) with the
+precomputed byte blobs from utils.static_payloads (after).
+
+Usage:
+    python3 scripts/bench/bench_static_payloads.py [iterations]
+"""
+
+import sys
+
+from common import setup_api_path, timeit, report
+
+setup_api_path()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+import server  # noqa: E402
+from utils.static_payloads import static_response  # noqa: E402
+
+
+def make_request(accept_encoding: str = "identity") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    })
+
+
+CASES = [
+    ("quiz/series", "quiz:series", server._build_series_payload),
+    ("quiz/archetypes", "quiz:archetypes", lambda: {"archetypes": server.ARCHETYPES}),
+    ("compatibility/matrix", "compat:matrix", server._build_compatibility_matrix),
+    ("compatibility/pair/driver/spark?en", "compat:pair:driver:spark:en",
+     lambda: server._build_compatibility_pair("driver", "spark", "en")),
+    ("compatibility/for/anchor?id", "compat:for:anchor:id",
+     lambda: server._build_compatibility_for_archetype("anchor", "id")),
+    ("deep-dive/questions?id", "deep_dive:questions:id",
+     lambda: server._build_deep_dive_questions("id")),
+    ("deep-dive/type-interactions/spark?en", "deep_dive:interactions:spark:en",
+     lambda: server._build_type_interactions("spark", "en")),
+]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    server.warm_static_payloads()
+    identity = make_request()
+    gzipped = make_request("gzip, br")
+
+    print(f"Static payload throughput ({iterations} iterations per case)\n")
+    for label, key, builder in CASES:
+        before = timeit(lambda: JSONResponse(jsonable_encoder(builder())), iterations)
+        after = timeit(lambda: static_response(identity, key, builder), iterations)
+        report(label, before, after)
+        after_gz = timeit(lambda: static_response(gzipped, key, builder), iterations)
+        report(label + " (gzip)", before, after_gz)
+
+
+if __name__ == "__main__":
+    main()
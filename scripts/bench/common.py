@@ -0,0 +1,45 @@
+"""
+Shared helpers for the micro-benchmarks in scripts/bench/.
+
+Benchmarks run in-process against apps/api (no server, no MongoDB) so
+they can be executed anywhere:
+
+    python3 scripts/bench/<name>.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+API_DIR = ROOT_DIR / "apps" / "api"
+
+
+def setup_api_path():
+    """Make apps/api and packages importable and set safe env defaults."""
+    for path in (API_DIR, API_DIR / "packages", ROOT_DIR / "packages"):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017/bench")
+    os.environ.setdefault("DB_NAME", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench-secret-key-minimum-32-characters!!")
+    os.environ.setdefault("OPENAI_API_KEY", "dummy-openai-key-for-bench")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+def timeit(fn: Callable[[], object], iterations: int) -> float:
+    """Run fn iterations times and return calls per second."""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float("inf")
+
+
+def report(label: str, before: float, after: float, unit: str = "ops/s"):
+    """Print a before/after line with the speedup factor."""
+    speedup = after / before if before else float("inf")
+    print(f"{label:<48} before {before:>12,.0f} {unit}   after {after:>12,.0f} {unit}   x{speedup:.1f}")
@@ -3,13 +3,21 @@
 MongoDB Index Migration Script
 Creates required indexes and TTL settings for Relasi4Warna.
 Run on first deployment or as init container.
+
+The indexes are declared in apps/api/utils/indexes.py, which the API also
+applies at startup.
 """
 
 import asyncio
 import os
 import sys
+from pathlib import Path
+
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, ASCENDING, DESCENDING
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from utils.indexes import INDEXES, index_name  # noqa: E402
 
 
 async def create_indexes():
@@ -32,140 +40,22 @@ async def create_indexes():
         print(f"✗ MongoDB connection failed: {e}")
         sys.exit(1)
     
-    indexes = {
-        # Users collection
-        "users": [
-            IndexModel([("user_id", ASCENDING)], unique=True),
-            IndexModel([("email", ASCENDING)], unique=True),
-            IndexModel([("tier", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ],
-        
-        # Quiz attempts collection
-        "quiz_attempts": [
-            IndexModel([("attempt_id", ASCENDING)], unique=True),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("series", ASCENDING)]),
-            IndexModel([("status", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            # TTL index - delete incomplete attempts after 24 hours
-            IndexModel(
-                [("created_at", ASCENDING)],
-                expireAfterSeconds=86400,
-                partialFilterExpression={"status": "in_progress"},
-                name="ttl_incomplete_attempts"
-            ),
-        ],
-        
-        # Results collection
-        "results": [
-            IndexModel([("result_id", ASCENDING)], unique=True),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("series", ASCENDING)]),
-            IndexModel([("is_paid", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            IndexModel([("primary_archetype", ASCENDING)]),
-        ],
-        
-        # Reports collection
-        "reports": [
-            IndexModel([("report_id", ASCENDING)], unique=True),
-            IndexModel([("result_id", ASCENDING)]),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("language", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ],
-        
-        # Elite reports collection
-        "elite_reports": [
-            IndexModel([("report_id", ASCENDING)], unique=True),
-            IndexModel([("result_id", ASCENDING)]),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ],
-        
-        # Elite+ reports collection
-        "elite_plus_reports": [
-            IndexModel([("report_id", ASCENDING)], unique=True),
-            IndexModel([("result_id", ASCENDING)]),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ],
-        
-        # Payments collection
-        "payments": [
-            IndexModel([("payment_id", ASCENDING)], unique=True),
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("result_id", ASCENDING)]),
-            IndexModel([("status", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ],
-        
-        # Questions collection
-        "questions": [
-            IndexModel([("id", ASCENDING)], unique=True),
-            IndexModel([("series", ASCENDING)]),
-            IndexModel([("category", ASCENDING)]),
-        ],
-        
-        # HITL moderation queue
-        "hitl_queue": [
-            IndexModel([("queue_id", ASCENDING)], unique=True),
-            IndexModel([("result_id", ASCENDING)]),
-            IndexModel([("status", ASCENDING)]),
-            IndexModel([("risk_level", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            # TTL index - delete reviewed items after 30 days
-            IndexModel(
-                [("reviewed_at", ASCENDING)],
-                expireAfterSeconds=2592000,
-                partialFilterExpression={"status": "reviewed"},
-                name="ttl_reviewed_hitl"
-            ),
-        ],
-        
-        # Sessions collection (for rate limiting, etc.)
-        "sessions": [
-            IndexModel([("session_id", ASCENDING)], unique=True),
-            IndexModel([("user_id", ASCENDING)]),
-            # TTL index - expire sessions after 7 days
-            IndexModel(
-                [("created_at", ASCENDING)],
-                expireAfterSeconds=604800,
-                name="ttl_sessions"
-            ),
-        ],
-        
-        # Audit log
-        "audit_log": [
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("action", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            # TTL index - delete audit logs after 90 days
-            IndexModel(
-                [("created_at", ASCENDING)],
-                expireAfterSeconds=7776000,
-                name="ttl_audit_log"
-            ),
-        ],
-    }
-    
     print("\nCreating indexes...")
     
-    for collection_name, collection_indexes in indexes.items():
+    for collection_name, collection_indexes in INDEXES.items():
         print(f"\n  Collection: {collection_name}")
         collection = db[collection_name]
         
         for index in collection_indexes:
+            name = index_name(index)
             try:
-                index_name = index.document.get("name", str(index.document.get("key")))
                 await collection.create_indexes([index])
-                print(f"    ✓ Index created: {index_name}")
+                print(f"    ✓ Index created: {name}")
             except Exception as e:
                 if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                    print(f"    ○ Index exists: {index_name}")
+                    print(f"    ○ Index exists: {name}")
                 else:
-                    print(f"    ✗ Index failed: {index_name} - {e}")
+                    print(f"    ✗ Index failed: {name} - {e}")
     
     print("\n✓ Index migration complete!")
     
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Native Date Migration Script
+Backfills BSON date twins (created_at_dt, paid_at_dt, ...) next to the ISO
+string timestamps, in batches with checkpoints. Safe to interrupt and
+re-run: it resumes after the last migrated _id.
+Run after the dual-writing release has fully rolled out.
+
+Usage: python3 scripts/migrate_native_dates.py [--collection NAME] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from services.date_migration import DATE_MIGRATION_BATCH_SIZE, NativeDateMigration  # noqa: E402
+
+
+async def migrate(collection=None, batch_size=DATE_MIGRATION_BATCH_SIZE):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME", "relasi4warna")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    results = await NativeDateMigration(db, batch_size=batch_size).run([collection] if collection else None)
+    print("\nMigrated fields:")
+    for name, result in results.items():
+        resumed = " (resumed)" if result["resumed"] else ""
+        print(f"  ✓ {name}: {result['converted']} documents converted{resumed}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--collection", help="only migrate this collection")
+    parser.add_argument("--batch-size", type=int, default=DATE_MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.collection, args.batch_size))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollup Rebuild Script
+Recomputes r4_analytics_hourly from the raw r4_analytics events.
+Run once after deploying the hourly rollups (after the rollout has finished
+and the current hour has settled), and again to repair hours after a
+failed analytics flush.
+
+Usage: python3 scripts/rebuild_analytics_rollups.py [--since YYYY-MM-DDTHH]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from services.analytics_rollups import AnalyticsRollups  # noqa: E402
+
+
+async def rebuild(since_hour=None):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME", "relasi4warna")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    result = await AnalyticsRollups(db).rebuild(since_hour=since_hour)
+    print(f"\n✓ Rebuilt {result['hours']} hours ({result['rows']} rollup rows)")
+    print(f"  Range: {result['since_hour']} .. {result['until_hour']} (exclusive)")
+    print(f"  Incremental writes since: {result['incremental_since'] or 'not started'}")
+    print(f"  Ready: {result['ready']}")
+    if not result["ready"]:
+        print("  Endpoints keep scanning raw events until the incremental hour has been rebuilt;")
+        print("  run this again after the current hour has settled.")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", help="first hour to rebuild (YYYY-MM-DDTHH); default: oldest event")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.since))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+HITL Rollup Rebuild Script
+Recomputes hitl_daily from risk_assessments, moderation_queue and
+audit_logs. Run once after deploying the daily HITL rollups (after the
+rollout has finished and the current day has settled), and again to
+repair days after failed rollup writes.
+
+Usage: python3 scripts/rebuild_hitl_rollups.py [--since YYYY-MM-DD]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))
+
+from services.hitl_rollups import HITLRollups  # noqa: E402
+
+
+async def rebuild(since_day=None):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME", "relasi4warna")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    result = await HITLRollups(db).rebuild(since_day=since_day)
+    print(f"\n✓ Rebuilt {result['days']} days ({result['rows']} rollup rows)")
+    print(f"  Range: {result['since_day']} .. {result['until_day']} (exclusive)")
+    print(f"  Incremental writes since: {result['incremental_since'] or 'not started'}")
+    print(f"  Ready: {result['ready']}")
+    if not result["ready"]:
+        print("  HITL analytics keep scanning raw collections until the incremental day has been rebuilt;")
+        print("  run this again tomorrow.")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", help="first day to rebuild (YYYY-MM-DD); default: oldest document")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.since))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+RELASI4 Leaderboard Rebuild Script
+Recomputes the materialized COUPLE and FAMILY leaderboards (r4_leaderboards)
+from r4_reports. Boards are built on first read, so this is only needed to
+repair them, e.g. after reports were changed or deleted outside the API.
+
+Usage: python3 scripts/rebuild_leaderboards.py [COUPLE|FAMILY ...]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "packages"))
+
+from relasi4tm.leaderboards import LEADERBOARDS, ReportLeaderboards  # noqa: E402
+
+
+async def rebuild(report_types):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME", "relasi4warna")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    leaderboards = ReportLeaderboards(db)
+    for report_type in report_types:
+        board = await leaderboards.rebuild(report_type)
+        print(f"✓ {report_type}: {len(board['entries'])} entries, {board['total']} reports")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("report_types", nargs="*", metavar="REPORT_TYPE",
+                        help="COUPLE and/or FAMILY; default: both")
+    args = parser.parse_args()
+    unknown = set(args.report_types) - set(LEADERBOARDS)
+    if unknown:
+        parser.error(f"unknown report type(s): {', '.join(sorted(unknown))}")
+    asyncio.run(rebuild(args.report_types or list(LEADERBOARDS)))
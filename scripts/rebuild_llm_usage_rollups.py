@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+LLM Usage Rollup Rebuild Script
+Recomputes llm_usage_daily from the raw llm_usage_events. Run once after
+deploying the daily usage rollups (after the rollout has finished and the
+current day has settled), and again the next day. Once the rollups are
+ready, the TTL on raw events (LLM_USAGE_RETENTION_DAYS) is applied.
+
+Usage: python3 scripts/rebuild_llm_usage_rollups.py [--since YYYY-MM-DD]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "packages"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "apps" / "api"))  # utils.rollups
+
+from ai_gateway.usage_rollups import UsageRollups  # noqa: E402
+
+
+async def rebuild(since_day=None):
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME", "relasi4warna")
+
+    print(f"Connecting to MongoDB: {mongo_url}")
+    print(f"Database: {db_name}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print("✓ MongoDB connection successful")
+    except Exception as e:
+        print(f"✗ MongoDB connection failed: {e}")
+        sys.exit(1)
+
+    result = await UsageRollups(db).rebuild(since_day=since_day)
+    print(f"\n✓ Rebuilt {result['days']} days ({result['rows']} rollup rows)")
+    print(f"  Range: {result['since_day']} .. {result['until_day']} (exclusive)")
+    print(f"  Incremental writes since: {result['incremental_since'] or 'not started'}")
+    print(f"  Ready: {result['ready']}")
+    if result["retention"]:
+        print(f"  Raw event retention: {result['retention']}")
+    if not result["ready"]:
+        print("  Usage summaries keep aggregating raw events (and raw events are kept)")
+        print("  until the incremental day has been rebuilt; run this again tomorrow.")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", help="first day to rebuild (YYYY-MM-DD); default: oldest event")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.since))